@@ -0,0 +1,117 @@
+# app/app_logging.py
+"""
+アプリケーションのログ設定
+
+- レベル・出力先・ローテーションは config_all.APP_CONFIG（log_level / log_file / log_max_size / log_backup_count）
+- ログ出力はキュー経由で別スレッドが書き込む（画面処理・計画計算をファイル書き込みで止めない）
+- DEBUG は出力箇所ごとに一定時間内の件数を制限（ループ内のデバッグ出力で埋まらないようにする）
+- メッセージは logger.debug("... %s", value) の形で渡す（レベル外の出力は文字列を組み立てない）
+
+使い方:
+    from app_logging import get_logger
+    logger = get_logger(__name__)
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config_all import APP_CONFIG
+
+# ハンドラを設定するロガー（各モジュールの __name__ の先頭）
+APP_LOGGERS = ('repository', 'services', 'domain', 'ui', 'app')
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s'
+
+_lock = threading.Lock()
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """DEBUG の出力を出力箇所ごとに interval 秒あたり max_records 件までに制限する"""
+
+    def __init__(self, max_records: int = 20, interval: float = 10.0):
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self._windows = {}  # (ファイル, 行) → [期間開始, 件数, 抑止件数]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg}（直前 {self.interval:g} 秒で {suppressed} 件省略）"
+                return True
+            if window[1] < self.max_records:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def _level() -> int:
+    return getattr(logging, str(APP_CONFIG.log_level).upper(), logging.INFO)
+
+
+def _create_handlers():
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if APP_CONFIG.log_file:
+        try:
+            handlers.append(RotatingFileHandler(
+                APP_CONFIG.log_file,
+                maxBytes=APP_CONFIG.log_max_size * 1024 * 1024,
+                backupCount=APP_CONFIG.log_backup_count,
+                encoding='utf-8',
+                delay=True
+            ))
+        except OSError as e:
+            logging.getLogger(__name__).warning("ログファイルを開けません: %s", e)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging():
+    """アプリのロガーにキュー経由のハンドラを設定（2回目以降は何もしない）"""
+    global _listener
+    if _listener is not None:
+        return
+    with _lock:
+        if _listener is not None:
+            return
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+
+        level = _level()
+        for name in APP_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.setLevel(level)
+            logger.addHandler(queue_handler)
+            logger.propagate = False
+
+        listener = QueueListener(log_queue, *_create_handlers(), respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _listener = listener
+
+
+def get_logger(name: str) -> logging.Logger:
+    """モジュール用のロガー（初回呼び出し時にログ設定を行う）"""
+    setup_logging()
+    if name == '__main__' or name.split('.')[0] not in APP_LOGGERS:
+        name = f"app.{name}"
+    return logging.getLogger(name)
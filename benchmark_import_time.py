@@ -0,0 +1,137 @@
+"""
+起動時の import 時間ベンチマーク（python -X importtime）
+
+使い方:
+    python benchmark_import_time.py
+    python benchmark_import_time.py --repeat 5 --top 20
+    python benchmark_import_time.py --module ui.pages.transport_page
+    python benchmark_import_time.py --max-ms 1500 --record import_time.jsonl
+
+別プロセスで `python -X importtime -c "import main"` を実行し、
+- 起動（main の import）全体の時間
+- パッケージ別の時間（自身の import 時間の合計）
+- 起動時に読み込まれてはいけない重いライブラリ（帳票・グラフ）の有無
+を表示する。計測は --repeat 回行い、モジュールごとに最短の時間を使う。
+--max-ms を超えた場合・重いライブラリが読み込まれた場合は終了コード1で終わる。
+--record を指定すると結果を JSON 1行で追記する（起動時間の推移の記録用）。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+# Windows環境でUTF-8出力を有効にする
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# ページを表示するまで読み込まないライブラリ（main の import で読み込まれたら失敗）
+DEFERRED_PACKAGES = ('reportlab', 'plotly', 'openpyxl', 'scipy')
+# これ未満は読み込み済みとみなさない（streamlit が plotly の有無を確認するだけの import など）
+DEFERRED_MIN_MS = 5.0
+
+
+def measure(module: str):
+    """1回分の計測結果 {モジュール名: (自身の時間us, 累積時間us)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import失敗')
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # import time:       123 |        456 |   package.module
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 見出し行
+        name = parts[2].strip()
+        timings[name] = (int(parts[0]), int(parts[1]))
+    return timings
+
+
+def best_of(module: str, repeat: int):
+    """repeat 回計測し、モジュールごとに最短の時間を返す"""
+    best = {}
+    for _ in range(repeat):
+        for name, (self_us, cumulative_us) in measure(module).items():
+            current = best.get(name)
+            if current is None or cumulative_us < current[1]:
+                best[name] = (self_us, cumulative_us)
+    return best
+
+
+def by_package(timings):
+    """パッケージ（先頭の名前）ごとの自身の import 時間の合計（us）"""
+    totals = defaultdict(int)
+    for name, (self_us, _) in timings.items():
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='起動時の import 時間ベンチマーク')
+    parser.add_argument('--module', default='main', help='計測するモジュール（既定: main）')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（最短時間を表示）')
+    parser.add_argument('--top', type=int, default=15, help='表示するパッケージ数')
+    parser.add_argument('--max-ms', type=float, help='import 時間の上限（ms）。超えた場合は失敗')
+    parser.add_argument('--record', help='結果を JSON 1行で追記するファイル')
+    args = parser.parse_args()
+
+    timings = best_of(args.module, args.repeat)
+    if args.module not in timings:
+        print(f"❌ {args.module} の import 時間を取得できませんでした")
+        sys.exit(1)
+
+    total_ms = timings[args.module][1] / 1000
+    packages = by_package(timings)
+    deferred = [package for package, self_us in packages
+                if package in DEFERRED_PACKAGES and self_us / 1000 >= DEFERRED_MIN_MS]
+
+    print(f"import {args.module}: {total_ms:,.1f} ms（{len(timings)}モジュール・{args.repeat}回中最短）")
+    print(f"\nパッケージ別（自身の import 時間の合計）上位{args.top}件")
+    for package, self_us in packages[:args.top]:
+        print(f"  {package:<30} {self_us / 1000:>9,.1f} ms")
+
+    failed = False
+    if deferred:
+        failed = True
+        print(f"\n❌ 起動時に読み込まれた重いライブラリ: {', '.join(deferred)}")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        failed = True
+        print(f"\n❌ import 時間が上限を超えました: {total_ms:,.1f} ms > {args.max_ms:,.1f} ms")
+
+    if args.record:
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'commit': current_commit(),
+                'module': args.module,
+                'total_ms': round(total_ms, 1),
+                'modules': len(timings),
+                'packages_ms': {package: round(self_us / 1000, 1) for package, self_us in packages[:args.top]},
+                'deferred_loaded': deferred,
+            }, ensure_ascii=False) + '\n')
+        print(f"\n記録しました: {args.record}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+積載エンジンのベンチマーク（底面積判定 'area'・2次元配置判定 'packing'・容器枠割付 'slots' の比較）
+
+使い方:
+    python benchmark_loading_engines.py
+    python benchmark_loading_engines.py --snapshot snapshots/kubota_planning_snapshot.db --start 2025-10-20 --days 10
+    python benchmark_loading_engines.py --planner tiera --seed 3 --repeat 5
+
+--snapshot を指定しない場合は乱数で作成したサンプルデータ（容器6種・トラック5台・トラック×容器ルール）を使う。
+計画ごとに、作成時間・便数・積み残し容器数・平均積載率と、
+「2次元配置では実際に載らないトラック数」（現場で手直しが必要になる便の数）を表示する。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+# Windows環境でUTF-8出力を有効にする
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from domain.calculators.floor_packing import LOADING_ENGINES, FloorPackingEngine, get_loading_engine, stack_columns
+from domain.calculators.slot_loading import SLOT_ENGINE
+from domain.calculators.tiera_transport_planner import TieraTransportPlanner
+from domain.calculators.transport_planner import TransportPlanner
+from domain.models.master_data import MasterData
+
+
+class WeekdayCalendar:
+    """サンプルデータ用カレンダー（土日以外を営業日とする）"""
+
+    def is_working_day(self, target_date: date) -> bool:
+        return target_date.weekday() < 5
+
+
+def sample_inputs(seed: int, start_date: date, days: int):
+    """乱数でマスタと受注を作成"""
+    rnd = random.Random(seed)
+    containers = [
+        SimpleNamespace(
+            id=i, name=f'容器{i}', width=rnd.choice([800, 1000, 1100, 1200]),
+            depth=rnd.choice([600, 800, 1000, 1200]), height=900, max_weight=500,
+            max_volume=None, can_mix=True, stackable=rnd.random() < 0.6,
+            max_stack=rnd.choice([1, 2, 3]), created_at=None
+        )
+        for i in range(1, 7)
+    ]
+    trucks_df = pd.DataFrame([
+        {
+            'id': i, 'name': f'トラック{i}', 'width': 2400, 'depth': rnd.choice([6200, 8000, 9600]),
+            'height': 2500, 'max_weight': 10000, 'default_use': i <= 3,
+            'arrival_day_offset': 1 if i in (2, 5) else 0, 'priority_product_codes': None
+        }
+        for i in range(1, 6)
+    ])
+    products_df = pd.DataFrame([
+        {
+            'id': i, 'product_code': f'P{i:03d}', 'product_name': f'製品{i}',
+            'used_container_id': rnd.randint(1, 6),
+            'used_truck_ids': ','.join(str(t) for t in rnd.sample(range(1, 6), rnd.randint(1, 3))),
+            'capacity': rnd.choice([5, 10, 20, 40]), 'can_advance': int(rnd.random() < 0.5),
+            'stackable': int(rnd.random() < 0.6), 'lead_time_days': rnd.choice([0, 0, 1])
+        }
+        for i in range(60)
+    ])
+    orders = []
+    for k in range(days * 12):
+        quantity = rnd.randint(1, 200)
+        orders.append({
+            'id': k, 'product_id': rnd.randrange(60),
+            'delivery_date': start_date + timedelta(days=rnd.randrange(days + 3)),
+            'order_quantity': quantity, 'shipped_quantity': 0, 'remaining_quantity': quantity
+        })
+    # トラック×容器ルール（一部の組合せのみ。無い組合せはサイズベース）
+    rules = []
+    for truck_id in range(1, 6):
+        for container_id in range(1, 7):
+            if rnd.random() < 0.5:
+                rules.append({
+                    'id': len(rules) + 1, 'truck_id': truck_id, 'container_id': container_id,
+                    'max_quantity': rnd.randint(8, 40), 'stack_count': None, 'priority': rnd.randint(0, 3)
+                })
+    return pd.DataFrame(orders), products_df, containers, trucks_df, rules, WeekdayCalendar()
+
+
+def snapshot_inputs(path: str, start_date: date, days: int):
+    """計画スナップショット（PlanningSnapshotRepository.export の出力）から入力を作成"""
+    from repository.snapshot_repository import PlanningSnapshot
+
+    snapshot = PlanningSnapshot.from_file(path)
+    end_date = start_date + timedelta(days=days + 14)
+    return (
+        snapshot.get_delivery_progress(start_date, end_date),
+        snapshot.get_all_products(),
+        snapshot.get_containers(),
+        snapshot.get_trucks(),
+        snapshot.get_truck_container_rules(),
+        snapshot,
+    )
+
+
+def packing_failures(result, master: MasterData, checker: FloorPackingEngine) -> int:
+    """2次元配置では全ての容器が載らないトラック（便）の数"""
+    failures = 0
+    for plan in result.get('daily_plans', {}).values():
+        for truck_plan in plan.get('trucks', []):
+            truck_info = master.trucks.get(truck_plan['truck_id'])
+            if truck_info is None:
+                continue
+            groups = {}
+            for item in truck_plan.get('loaded_items', []):
+                group = groups.setdefault(item['container_id'], [0, item.get('stackable')])
+                group[0] += item.get('num_containers', 0)
+            footprints = {}
+            for container_id, (count, stackable) in groups.items():
+                container = master.containers.get(container_id)
+                if container is None:
+                    continue
+                if stackable is None:
+                    stackable = container.stackable
+                key = (int(container.width), int(container.depth))
+                footprints[key] = footprints.get(key, 0) + stack_columns(count, container.max_stack, stackable)
+            if not checker.fits(truck_info, footprints):
+                failures += 1
+    return failures
+
+
+def summarize(result, master: MasterData, checker: FloorPackingEngine):
+    trips = 0
+    rates = []
+    for plan in result.get('daily_plans', {}).values():
+        for truck_plan in plan.get('trucks', []):
+            trips += 1
+            rates.append(truck_plan.get('utilization', {}).get('floor_area_rate', 0))
+    unloaded = sum(
+        demand.get('num_containers', 0)
+        for plan in result.get('daily_plans', {}).values()
+        for demand in plan.get('remaining_demands', [])
+    )
+    return {
+        'trips': trips,
+        'unloaded_containers': unloaded,
+        'avg_floor_rate': sum(rates) / len(rates) if rates else 0.0,
+        'packing_failures': packing_failures(result, master, checker),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='積載エンジンのベンチマーク')
+    parser.add_argument('--snapshot', help='計画スナップショットファイル（未指定時はサンプルデータ）')
+    parser.add_argument('--start', help='計画開始日 YYYY-MM-DD（未指定時は今日）')
+    parser.add_argument('--days', type=int, default=10, help='計画日数')
+    parser.add_argument('--planner', choices=['kubota', 'tiera'], default='kubota')
+    parser.add_argument('--seed', type=int, default=0, help='サンプルデータの乱数シード')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（最短時間を表示）')
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d').date() if args.start else date.today()
+    if args.snapshot:
+        inputs = snapshot_inputs(args.snapshot, start_date, args.days)
+    else:
+        inputs = sample_inputs(args.seed, start_date, args.days)
+    orders_df, products_df, containers, trucks_df, rules, calendar = inputs
+
+    master = MasterData.from_sources(trucks_df, products_df, containers)
+    checker = FloorPackingEngine()
+    planner_cls = TransportPlanner if args.planner == 'kubota' else TieraTransportPlanner
+
+    print(f"受注 {len(orders_df)}件 / 製品 {len(master.products)}件 / 容器 {len(master.containers)}種 / "
+          f"トラック {len(master.trucks)}台 / {args.days}営業日（{args.planner}）")
+    print(f"{'エンジン':<10}{'時間(秒)':>10}{'便数':>8}{'積み残し容器':>12}{'平均積載率%':>12}{'配置不可便':>10}")
+
+    for engine_name in LOADING_ENGINES + (SLOT_ENGINE,):
+        best = None
+        result = None
+        for _ in range(max(1, args.repeat)):
+            planner = planner_cls()
+            started = time.perf_counter()
+            with redirect_stdout(StringIO()):  # プランナーの進捗出力を抑制
+                result = planner.calculate_loading_plan_from_orders(
+                    orders_df=orders_df, products_df=products_df, containers=containers,
+                    trucks_df=trucks_df, truck_container_rules=rules, start_date=start_date,
+                    days=args.days, calendar_repo=calendar, loading_engine=engine_name
+                )
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        stats = summarize(result, master, checker)
+        print(f"{engine_name:<10}{best:>10.3f}{stats['trips']:>8}{stats['unloaded_containers']:>12}"
+              f"{stats['avg_floor_rate']:>12.1f}{stats['packing_failures']:>10}")
+
+    engine = get_loading_engine('packing')
+    info = engine.cache_info()
+    print(f"\n配置判定キャッシュ: hits={info.hits} misses={info.misses} size={info.currsize}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+主要な検索の実行計画（EXPLAIN）チェック
+
+使い方:
+    python check_query_plans.py
+    python check_query_plans.py --customer tiera --start 2025-10-20 --days 14
+    python check_query_plans.py --min-rows 0    # 件数に関係なく全件走査を失敗にする
+
+リポジトリのメソッドを実際に呼び出し、発行された SELECT を記録して EXPLAIN する。
+よく使うテーブル（受注・生産指示・積載計画明細）で全件走査（type=ALL）が出た場合は終了コード1で終わる。
+- 使えるインデックスが無い（possible_keys が NULL）全件走査は件数に関係なく失敗
+- インデックスがあっても見積件数が --min-rows 以上の全件走査は失敗（少件数のテーブルでは MySQL が全件走査を選ぶため）
+
+インデックスは migrations/add_hot_table_indexes.py で追加する。
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+# Windows環境でUTF-8出力を有効にする
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from repository.database_manager import CustomerDatabaseManager
+from repository.delivery_progress_repository import DeliveryProgressRepository
+from repository.loading_plan_repository import LoadingPlanRepository
+from repository.production_repository import ProductionRepository
+
+HOT_TABLES = {'delivery_progress', 'production_instructions_detail', 'loading_plan_detail'}
+
+# FROM / JOIN 句のテーブル名と別名（EXPLAIN の table 列には別名が出るため、テーブル名に戻すのに使う）
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(\w+)`?)?', re.IGNORECASE)
+NOT_ALIASES = {'where', 'on', 'using', 'left', 'right', 'inner', 'outer', 'cross', 'join', 'straight_join',
+               'natural', 'group', 'order', 'limit', 'having', 'union', 'for', 'lock', 'window'}
+
+# リポジトリ外（取込サービス・画面）で発行している検索
+EXTRA_QUERIES = [
+    ('CSV取込: order_id で既存受注を検索',
+     "SELECT id FROM delivery_progress WHERE order_id = :order_id",
+     lambda ctx: {'order_id': ctx['order_id']}),
+    ('CSV取込画面: 検査対象の生産指示',
+     """SELECT pid.instruction_date, pid.id, pid.inspection_category, pid.instruction_quantity,
+               p.product_code, p.product_name
+        FROM production_instructions_detail pid
+        LEFT JOIN products p ON pid.product_id = p.id
+        WHERE pid.instruction_date BETWEEN :start_date AND :end_date
+          AND pid.is_inspection_target = 1
+        ORDER BY pid.instruction_date, pid.inspection_category""",
+     lambda ctx: {'start_date': ctx['start_date'], 'end_date': ctx['end_date']}),
+]
+
+
+class QueryRecorder:
+    """エンジンで実行された SELECT 文を記録する"""
+
+    def __init__(self):
+        self.label = None
+        self.queries = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.queries.append((self.label, statement, parameters))
+
+    def run(self, label, func, *args, **kwargs):
+        self.label = label
+        logging.disable(logging.CRITICAL)
+        try:
+            with redirect_stdout(StringIO()):  # リポジトリのエラー出力は EXPLAIN の結果で確認する
+                func(*args, **kwargs)
+        finally:
+            logging.disable(logging.NOTSET)
+            self.label = None
+
+
+def sample_context(session, start_date: date, end_date: date) -> dict:
+    """検索に使う実在のID（無い場合は存在しない値で実行計画だけ確認する）"""
+    def scalar(sql, default):
+        row = session.execute(text(sql)).fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'product_id': scalar("SELECT MIN(product_id) FROM delivery_progress", 0),
+        'order_id': scalar("SELECT MIN(order_id) FROM delivery_progress", ''),
+        'plan_id': scalar("SELECT MAX(id) FROM loading_plan_header", 0),
+        'truck_id': scalar("SELECT MIN(truck_id) FROM loading_plan_detail", 0),
+    }
+
+
+def explain(session, statement, parameters):
+    result = session.connection().exec_driver_sql("EXPLAIN " + statement, parameters)
+    return [dict(row._mapping) for row in result]
+
+
+def table_aliases(statement: str) -> dict:
+    """SQL の FROM / JOIN 句から {別名またはテーブル名: テーブル名} を作る"""
+    aliases = {}
+    for table, alias in TABLE_REFERENCE.findall(statement):
+        aliases[table] = table
+        if alias and alias.lower() not in NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def check_plan(rows, min_rows: int, aliases: dict = None):
+    """
+    実行計画の問題点（失敗, 注意）
+
+    Args:
+        aliases: table_aliases() の結果（EXPLAIN の table 列の別名をテーブル名に戻す）
+    """
+    aliases = aliases or {}
+    failures, notices = [], []
+    for row in rows:
+        label = row.get('table') or ''
+        if label.startswith('<'):
+            continue  # 派生テーブル・UNION の結果
+        table = aliases.get(label, label)
+        if table != label:
+            label = f"{table}({label})"
+        access = (row.get('type') or '').upper()
+        estimated = int(row.get('rows') or 0)
+        detail = f"{label}: type={access} key={row.get('key')} rows={estimated}"
+        if access == 'ALL':
+            if table in HOT_TABLES and (row.get('possible_keys') is None or estimated >= min_rows):
+                failures.append(detail)
+            else:
+                notices.append(detail)
+        elif access == 'INDEX' and table in HOT_TABLES:
+            notices.append(detail + "（インデックス全走査）")
+    return failures, notices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主要な検索の実行計画チェック')
+    parser.add_argument('--customer', help='顧客（未指定時は既定の顧客）')
+    parser.add_argument('--start', help='検索開始日 YYYY-MM-DD（未指定時は今日）')
+    parser.add_argument('--days', type=int, default=14, help='検索日数')
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='インデックスがある場合に全件走査を失敗とする見積件数')
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d').date() if args.start else date.today()
+    end_date = start_date + timedelta(days=args.days - 1)
+
+    db = CustomerDatabaseManager(args.customer)
+    session = db.get_session()
+    recorder = QueryRecorder()
+    event.listen(Engine, 'before_cursor_execute', recorder)
+
+    try:
+        ctx = sample_context(session, start_date, end_date)
+
+        progress_repo = DeliveryProgressRepository(db)
+        production_repo = ProductionRepository(db)
+        plan_repo = LoadingPlanRepository(db)
+
+        recorder.run('納入進度（期間）', progress_repo.get_delivery_progress, start_date, end_date)
+        recorder.run('納入進度（期間・営業日のみ）', progress_repo.get_delivery_progress,
+                     start_date, end_date, working_days_only=True)
+        recorder.run('納入進度（製品×納期）', progress_repo.get_progress_by_product_and_date,
+                     ctx['product_id'], start_date)
+        recorder.run('生産指示（期間）', production_repo.get_production_instructions, start_date, end_date)
+        recorder.run('生産指示（期間・営業日のみ）', production_repo.get_production_instructions,
+                     start_date, end_date, working_days_only=True)
+        recorder.run('積載計画（計画ID）', plan_repo.get_loading_plan, ctx['plan_id'], use_cache=False)
+        recorder.run('積載計画明細（積載日×トラック）', plan_repo.get_plan_details_by_date_and_truck,
+                     start_date, ctx['truck_id'])
+    finally:
+        event.remove(Engine, 'before_cursor_execute', recorder)
+
+    queries = list(recorder.queries)
+    for label, sql, make_params in EXTRA_QUERIES:
+        compiled = text(sql).compile(dialect=session.get_bind().dialect)
+        params = make_params(ctx)
+        queries.append((label, str(compiled), compiled.construct_params(params)))
+
+    print(f"実行計画チェック（顧客: {db.get_current_customer()} / {start_date} ~ {end_date} / 件数しきい値 {args.min_rows}）")
+    failed = 0
+    try:
+        for label, statement, parameters in queries:
+            try:
+                rows = explain(session, statement, parameters)
+            except Exception as e:
+                failed += 1
+                print(f"❌ {label}: EXPLAIN エラー: {e}")
+                session.rollback()
+                continue
+            failures, notices = check_plan(rows, args.min_rows, table_aliases(statement))
+            if failures:
+                failed += 1
+                print(f"❌ {label}")
+                for detail in failures:
+                    print(f"    全件走査: {detail}")
+            else:
+                print(f"✅ {label}")
+            for detail in notices:
+                print(f"    ⚠️ {detail}")
+    finally:
+        session.close()
+
+    print(f"\n{len(queries)}件中 {failed}件で問題あり")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -110,6 +110,8 @@ class AppConfig:
     data_directory: str = "data"
     backup_directory: str = "backups"
     export_directory: str = "exports"
+    # PDF出力用の日本語フォント（未設定時はOS標準フォントを順に探索）
+    pdf_font_path: str = os.getenv("PDF_FONT_PATH", "")
 
 # -------------------------
 # フォーマット設定
@@ -148,6 +150,24 @@ class SystemConfig:
     backup_interval_hours: int = 24
     auto_save_interval_minutes: int = 5
     max_records_per_page: int = 50
+    # バックグラウンドジョブ（積載計画・CSV取込・進度再計算）
+    job_max_workers: int = int(os.getenv("JOB_MAX_WORKERS", "2"))
+    job_result_ttl_minutes: int = int(os.getenv("JOB_RESULT_TTL_MINUTES", "30"))
+    # 作成済み積載計画のサーバー側ストア（全セッション合計の上限MB・未使用での破棄分数）
+    plan_store_max_mb: int = int(os.getenv("PLAN_STORE_MAX_MB", "256"))
+    plan_store_ttl_minutes: int = int(os.getenv("PLAN_STORE_TTL_MINUTES", "120"))
+    # ダッシュボード集計のキャッシュ保持秒数（全セッション共通）
+    dashboard_cache_ttl_seconds: int = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+    # 複数顧客DBへの並列クエリ（顧客ごとの既定タイムアウト秒）
+    fanout_max_workers: int = int(os.getenv("FANOUT_MAX_WORKERS", "4"))
+    fanout_timeout_seconds: float = float(os.getenv("FANOUT_TIMEOUT_SECONDS", "30"))
+    # 読み取りレプリカの許容遅延秒（超えたレプリカは使わずプライマリから読む）
+    replica_max_lag_seconds: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    # 積載計画用ローカルスナップショットの保存先
+    snapshot_dir: str = os.getenv(
+        "PLANNING_SNAPSHOT_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+    )
 
 
 # -------------------------
@@ -229,6 +249,10 @@ def build_db_config() -> DatabaseConfig:
     return cfg
 
 
+# 対応顧客（顧客別DBを持つ顧客）
+SUPPORTED_CUSTOMERS = ["kubota", "tiera"]
+
+
 def build_customer_db_config(customer: str) -> DatabaseConfig:
     """
     顧客別のデータベース設定を生成
@@ -241,7 +265,7 @@ def build_customer_db_config(customer: str) -> DatabaseConfig:
     """
     customer = customer.lower()
 
-    if customer not in ["kubota", "tiera"]:
+    if customer not in SUPPORTED_CUSTOMERS:
         raise ValueError(f"未対応の顧客名: {customer}. 'kubota' または 'tiera' を指定してください")
 
     # 環境変数プレフィックスを設定
@@ -269,6 +293,36 @@ def build_customer_db_config(customer: str) -> DatabaseConfig:
     return cfg
 
 
+def build_customer_multi_db_config(customer: str) -> Optional[MultiDatabaseConfig]:
+    """
+    顧客別DBの読み取りレプリカ構成を生成
+
+    {顧客}_DB_REPLICA_HOSTS に "host[:port]" をカンマ区切りで指定する
+    （ユーザー・パスワード・DB名はプライマリと共通）。未設定の場合は None。
+    """
+    primary = build_customer_db_config(customer)
+    hosts = os.getenv(f"{customer.upper()}_DB_REPLICA_HOSTS", "")
+    replicas = []
+    for index, entry in enumerate([h.strip() for h in hosts.split(",") if h.strip()], start=1):
+        host, _, port = entry.partition(":")
+        replicas.append(DatabaseConfig(
+            host=host,
+            user=primary.user,
+            password=primary.password,
+            database=primary.database,
+            port=int(port) if port else primary.port,
+            is_primary=False,
+            priority=index + 1,
+            name=f"{customer}_replica{index}"
+        ))
+
+    if not replicas:
+        return None
+
+    primary.priority = 1
+    return MultiDatabaseConfig([primary] + replicas)
+
+
 def get_default_customer() -> str:
     """デフォルトの顧客名を取得"""
     return os.getenv("DEFAULT_CUSTOMER", "kubota").lower()
@@ -278,6 +332,7 @@ def get_default_customer() -> str:
 class CustomerTransportConfig:
     """顧客別積載計画設定"""
     truck_priority: str  # トラック優先順位 ('morning' または 'evening')
+    loading_engine: str = "area"  # 積載エンジン ('area': 底面積の合計 / 'packing': 容器の2次元配置 / 'slots': トラック×容器ルールの本数枠)
 
 
 def get_customer_transport_config(customer: str) -> CustomerTransportConfig:
@@ -295,7 +350,7 @@ def get_customer_transport_config(customer: str) -> CustomerTransportConfig:
     """
     customer = customer.lower()
 
-    if customer not in ["kubota", "tiera"]:
+    if customer not in SUPPORTED_CUSTOMERS:
         raise ValueError(f"未対応の顧客名: {customer}. 'kubota' または 'tiera' を指定してください")
 
     # 環境変数プレフィックスを設定
@@ -311,8 +366,15 @@ def get_customer_transport_config(customer: str) -> CustomerTransportConfig:
         logging.warning(f"無効なtruck_priority: {truck_priority}. デフォルト'morning'を使用します")
         truck_priority = "morning"
 
+    # 積載エンジン（未設定時は従来の底面積判定）
+    loading_engine = os.getenv(f"{prefix}_LOADING_ENGINE", "area").lower()
+    if loading_engine not in ["area", "packing", "slots"]:
+        logging.warning(f"無効なloading_engine: {loading_engine}. デフォルト'area'を使用します")
+        loading_engine = "area"
+
     cfg = CustomerTransportConfig(
-        truck_priority=truck_priority
+        truck_priority=truck_priority,
+        loading_engine=loading_engine
     )
 
     logging.info(f"顧客別積載計画設定を取得: {customer} -> {truck_priority}便優先")
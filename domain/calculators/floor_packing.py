@@ -0,0 +1,240 @@
+# app/domain/calculators/floor_packing.py
+"""
+積載エンジン（荷台の床に容器が載るかの判定）
+
+- AreaLoadingEngine: 従来方式。底面積の合計のみで判定し、配置の検証はしない
+- FloorPackingEngine: 容器の底面（幅×奥行）を荷台（幅×奥行）に2次元配置して判定
+  - 段積みできる容器は max_stack 段を1列（同じ底面）にまとめる
+  - 容器は90度回転して置ける
+  - シェルフ法（荷台の奥行方向に棚を切り、棚の中で幅方向に並べる）で配置する
+  - 同じ構成（荷台寸法＋容器寸法ごとの列数）の判定結果はメモ化する
+
+プランナーは底面積での判定を行った上で、エンジンの max_containers() で積載数を絞り込む。
+AreaLoadingEngine は要求数をそのまま返すため、従来の計画結果と変わらない。
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+LOADING_ENGINES = ('area', 'packing')
+
+# (幅mm, 奥行mm) → 列数
+Footprints = Dict[Tuple[int, int], int]
+
+
+def _item_value(item, name):
+    """積載品（LoadedItem / 辞書）の項目を取得"""
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def _dimension(value) -> Optional[int]:
+    """寸法（mm）を整数に変換。欠損・0以下は None"""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+        value = int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def stack_columns(num_containers: int, max_stack, stackable) -> int:
+    """段積みを考慮した床上の列数"""
+    max_stack = max_stack or 1
+    if stackable and max_stack > 1:
+        return (num_containers + max_stack - 1) // max_stack
+    return num_containers
+
+
+class AreaLoadingEngine:
+    """底面積の合計で判定する積載エンジン（配置の制約を加えない）"""
+
+    name = 'area'
+
+    def fits(self, truck_info, footprints: Footprints) -> bool:
+        return True
+
+    def max_containers(self, truck_info, loaded_items: Iterable[Any], container, stackable,
+                       requested: int, container_map: Dict[int, Any]) -> int:
+        return requested
+
+
+class FloorPackingEngine:
+    """容器の底面を荷台に2次元配置して判定する積載エンジン"""
+
+    name = 'packing'
+
+    def __init__(self, allow_rotation: bool = True, cache_size: int = 4096):
+        self.allow_rotation = allow_rotation
+        self._pack_cached = lru_cache(maxsize=cache_size)(self._pack)
+
+    def cache_info(self):
+        """配置判定のメモ化状況（functools.lru_cache の CacheInfo）"""
+        return self._pack_cached.cache_info()
+
+    # -------------------------
+    # 判定
+    # -------------------------
+    def fits(self, truck_info, footprints: Footprints) -> bool:
+        """
+        容器の列が荷台に全て配置できるか
+
+        Args:
+            truck_info: TruckInfo（width / depth を使用）
+            footprints: {(容器幅mm, 容器奥行mm): 列数}
+        """
+        truck_width = _dimension(truck_info.width)
+        truck_depth = _dimension(truck_info.depth)
+        if truck_width is None or truck_depth is None:
+            return True  # 荷台寸法が無い場合は判定しない（底面積の判定に任せる）
+        signature = tuple(sorted((w, d, n) for (w, d), n in footprints.items() if n > 0))
+        if not signature:
+            return True
+        return self._pack_cached(truck_width, truck_depth, signature)
+
+    def max_containers(self, truck_info, loaded_items: Iterable[Any], container, stackable,
+                       requested: int, container_map: Dict[int, Any]) -> int:
+        """
+        積載済みの容器に加えて、指定容器を最大何個配置できるか（requested が上限）
+
+        Args:
+            truck_info: TruckInfo
+            loaded_items: トラックに積載済みの積載品
+            container: 追加する容器（ContainerInfo）
+            stackable: 追加する製品が段積み可能か（製品と容器の両方を確認済みの値）
+            requested: 追加したい容器数
+            container_map: 容器ID → ContainerInfo
+        """
+        if requested <= 0 or container is None:
+            return max(requested, 0)
+        footprint = (_dimension(container.width), _dimension(container.depth))
+        if None in footprint:
+            return requested
+
+        # 積載済みの容器を容器IDごとに集計（段積み可否は最初の積載品に合わせる）
+        groups: Dict[int, list] = {}
+        for item in loaded_items:
+            container_id = _item_value(item, 'container_id')
+            group = groups.get(container_id)
+            if group is None:
+                item_stackable = _item_value(item, 'stackable')
+                loaded_container = container_map.get(container_id)
+                if item_stackable is None and loaded_container is not None:
+                    item_stackable = loaded_container.stackable
+                groups[container_id] = [0, bool(item_stackable)]
+                group = groups[container_id]
+            group[0] += _item_value(item, 'num_containers') or 0
+        if container.id not in groups:
+            groups[container.id] = [0, bool(stackable)]
+
+        def _fits_with(extra: int) -> bool:
+            footprints: Footprints = {}
+            for container_id, (count, group_stackable) in groups.items():
+                if container_id == container.id:
+                    count += extra
+                group_container = container if container_id == container.id else container_map.get(container_id)
+                if group_container is None:
+                    continue
+                key = (_dimension(group_container.width), _dimension(group_container.depth))
+                if None in key:
+                    continue
+                footprints[key] = footprints.get(key, 0) + stack_columns(
+                    count, group_container.max_stack, group_stackable
+                )
+            return self.fits(truck_info, footprints)
+
+        if _fits_with(requested):
+            return requested
+        # 二分探索で配置できる最大数を求める
+        low, high = 0, requested
+        while high - low > 1:
+            middle = (low + high) // 2
+            if _fits_with(middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
+    # -------------------------
+    # 配置（シェルフ法）
+    # -------------------------
+    def _pack(self, truck_width: int, truck_depth: int, signature: Tuple[Tuple[int, int, int], ...]) -> bool:
+        """向きの方針を変えてシェルフ配置を試し、いずれかで全列が載れば True"""
+        total_area = sum(w * d * n for w, d, n in signature)
+        if total_area > truck_width * truck_depth:
+            return False
+        policies = ('shallow', 'deep') if self.allow_rotation else ('fixed',)
+        return any(self._shelf_pack(truck_width, truck_depth, signature, policy) for policy in policies)
+
+    def _orientations(self, width: int, depth: int, policy: str):
+        """容器の向きの候補（先頭が棚を新設するときの向き）。(幅方向, 奥行方向)"""
+        if policy == 'fixed' or width == depth:
+            return ((width, depth),)
+        shallow = (max(width, depth), min(width, depth))
+        deep = (min(width, depth), max(width, depth))
+        return (shallow, deep) if policy == 'shallow' else (deep, shallow)
+
+    def _shelf_pack(self, truck_width: int, truck_depth: int, signature, policy: str) -> bool:
+        types = [(self._orientations(w, d, policy), n) for w, d, n in signature]
+        # 棚の奥行が大きい容器から配置する
+        types.sort(key=lambda t: t[0][0][1], reverse=True)
+
+        # [棚の奥行, 使用済みの幅, {容器の種類: 棚内での向き}]
+        # 同じ種類の容器は棚の中で向きを揃える（1個ずつ無駄の少ない向きを選ぶと向きが混ざり、並べれば入る配置を取りこぼす）
+        shelves = []
+        used_depth = 0
+        for kind, (orientations, count) in enumerate(types):
+            for _ in range(count):
+                # 既存の棚に入るか（棚の奥行に収まり、残り幅が最も少なくなる向き・棚を選ぶ）
+                best = None
+                for shelf in shelves:
+                    fixed = shelf[2].get(kind)
+                    for orientation in ((fixed,) if fixed else orientations):
+                        along_width, along_depth = orientation
+                        if along_depth <= shelf[0] and shelf[1] + along_width <= truck_width:
+                            waste = truck_width - shelf[1] - along_width
+                            if best is None or waste < best[0]:
+                                best = (waste, shelf, orientation)
+                if best is not None:
+                    best[1][1] += best[2][0]
+                    best[1][2][kind] = best[2]
+                    continue
+                # 新しい棚を手前に追加
+                for orientation in orientations:
+                    along_width, along_depth = orientation
+                    if along_width <= truck_width and used_depth + along_depth <= truck_depth:
+                        shelves.append([along_depth, along_width, {kind: orientation}])
+                        used_depth += along_depth
+                        break
+                else:
+                    return False
+        return True
+
+
+_engines: Dict[str, Any] = {}
+
+
+def get_loading_engine(name: Optional[str] = None):
+    """
+    積載エンジンを取得（同じ名前のエンジンはプロセス内で共有し、配置判定のメモ化を再利用する）
+
+    Args:
+        name: 'area'（底面積の合計）または 'packing'（2次元配置）
+    """
+    name = (name or 'area').lower()
+    if name not in LOADING_ENGINES:
+        logger.warning("⚠️ 未対応の積載エンジン: %s（'area' を使用します）", name)
+        name = 'area'
+    if name not in _engines:
+        _engines[name] = FloorPackingEngine() if name == 'packing' else AreaLoadingEngine()
+    return _engines[name]
@@ -1,10 +1,20 @@
 # app/domain/calculators/production_calculator.py
-from typing import List
+from datetime import date
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
 from ..models.production import ProductionInstruction, ProductionPlan
 from ..models.product import ProductConstraint
+from .production_leveler import ProductionLeveler
 
 class ProductionCalculator:
     """生産計画計算機"""
+
+    # calculate_production_plan_df の出力列
+    PLAN_COLUMNS = [
+        'date', 'product_id', 'product_code', 'product_name',
+        'demand_quantity', 'planned_quantity', 'inspection_category', 'is_constrained'
+    ]
     
     def calculate_production_plan(self, 
                                 instructions: List[ProductionInstruction],
@@ -12,13 +22,14 @@ class ProductionCalculator:
         """生産計画計算"""
         
         plans = []
+        # 製品IDで制約を引けるように索引化（指示×制約の総当たりを避ける）
+        constraint_map = {}
+        for c in constraints:
+            constraint_map.setdefault(c.product_id, c)
         
         for instruction in instructions:
             # 該当製品の制約を検索
-            constraint = next(
-                (c for c in constraints if c.product_id == instruction.product_id), 
-                None
-            )
+            constraint = constraint_map.get(instruction.product_id)
             
             if constraint:
                 planned_quantity = self._calculate_smoothed_production(
@@ -45,6 +56,170 @@ class ProductionCalculator:
         
         return plans
     
+    def calculate_production_plan_df(self,
+                                     instructions_df: pd.DataFrame,
+                                     constraints_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        生産計画計算（DataFrame版）
+
+        生産指示と製品制約を product_id で1回だけ結合し、
+        min(需要 × 平準化係数, 日産能力) を列演算でまとめて計算する。
+
+        Args:
+            instructions_df: 生産指示（product_id, instruction_date, instruction_quantity, ...）
+            constraints_df: 製品制約（product_id, daily_capacity, smoothing_level）
+
+        Returns:
+            DataFrame: PLAN_COLUMNS の列を持つ生産計画
+        """
+        if instructions_df is None or instructions_df.empty:
+            return pd.DataFrame(columns=self.PLAN_COLUMNS)
+
+        plan_df = instructions_df.rename(columns={
+            'instruction_date': 'date',
+            'instruction_quantity': 'demand_quantity'
+        })
+        for col in ('product_code', 'product_name', 'inspection_category'):
+            if col not in plan_df.columns:
+                plan_df[col] = None
+
+        if constraints_df is not None and not constraints_df.empty:
+            constraint_cols = (
+                constraints_df[['product_id', 'daily_capacity', 'smoothing_level']]
+                .drop_duplicates('product_id')
+            )
+            plan_df = plan_df.merge(constraint_cols, on='product_id', how='left', indicator='_constraint')
+            is_constrained = (plan_df['_constraint'] == 'both').to_numpy()
+        else:
+            plan_df = plan_df.assign(daily_capacity=np.nan, smoothing_level=np.nan)
+            is_constrained = np.zeros(len(plan_df), dtype=bool)
+
+        demand = pd.to_numeric(plan_df['demand_quantity'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        smoothing = pd.to_numeric(plan_df['smoothing_level'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        capacity = pd.to_numeric(plan_df['daily_capacity'], errors='coerce').fillna(0).to_numpy(dtype=float)
+
+        plan_df['demand_quantity'] = demand
+        plan_df['planned_quantity'] = np.where(
+            is_constrained,
+            np.minimum(demand * smoothing, capacity),
+            demand
+        )
+        plan_df['is_constrained'] = is_constrained
+
+        return plan_df[self.PLAN_COLUMNS].reset_index(drop=True)
+
+    def calculate_leveled_plan_df(self,
+                                  instructions_df: pd.DataFrame,
+                                  constraints_df: pd.DataFrame,
+                                  working_days: List[date],
+                                  line_capacity: Optional[float] = None,
+                                  mode: str = ProductionLeveler.MODE_GREEDY) -> Dict[str, Any]:
+        """
+        期間全体で能力を平準化した生産計画を計算
+
+        日産能力・ライン能力を超える需要は前の営業日へ前倒しする。
+        非営業日の需要は直前の営業日（期間初日より前なら初日）の需要として扱う。
+        制約のない製品は日産能力無制限とする（smoothing_level は使用しない）。
+
+        Args:
+            instructions_df: 生産指示（product_id, instruction_date, instruction_quantity, ...）
+            constraints_df: 製品制約（product_id, daily_capacity）
+            working_days: 計画期間内の営業日
+            line_capacity: 全製品共通のライン日産能力（None の場合は制約なし）
+            mode: 'greedy'（既定）または 'lp'
+
+        Returns:
+            {
+                'plan': PLAN_COLUMNS + daily_capacity, backlog_quantity の DataFrame,
+                'daily_summary': 日別の需要・生産・繰越残の DataFrame,
+                'shortage': 期間内に吸収できなかった製品別の不足量 DataFrame
+            }
+        """
+        plan_columns = self.PLAN_COLUMNS + ['daily_capacity', 'backlog_quantity']
+        summary_columns = ['date', 'demand_quantity', 'planned_quantity', 'carried_backlog', 'line_utilization']
+        empty_result = {
+            'plan': pd.DataFrame(columns=plan_columns),
+            'daily_summary': pd.DataFrame(columns=summary_columns),
+            'shortage': pd.DataFrame(columns=['product_id', 'product_code', 'product_name', 'shortage_quantity'])
+        }
+
+        if instructions_df is None or instructions_df.empty or not working_days:
+            return empty_result
+
+        days = pd.DatetimeIndex(sorted(set(pd.to_datetime(working_days))))
+        instructions = instructions_df.copy()
+        for col in ('product_code', 'product_name', 'inspection_category'):
+            if col not in instructions.columns:
+                instructions[col] = None
+
+        # 需要日 → 直前の営業日の列番号
+        demand_dates = pd.to_datetime(instructions['instruction_date']).to_numpy()
+        day_index = np.clip(np.searchsorted(days.to_numpy(), demand_dates, side='right') - 1, 0, None)
+        product_codes, product_index = np.unique(instructions['product_id'].to_numpy(), return_inverse=True)
+
+        quantity = pd.to_numeric(instructions['instruction_quantity'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        demand = np.zeros((len(product_codes), len(days)))
+        np.add.at(demand, (product_index, day_index), quantity)
+
+        capacity = np.full(len(product_codes), np.inf)
+        is_constrained = np.zeros(len(product_codes), dtype=bool)
+        if constraints_df is not None and not constraints_df.empty:
+            caps = (
+                constraints_df.drop_duplicates('product_id')
+                .set_index('product_id')['daily_capacity']
+                .reindex(product_codes)
+            )
+            caps = pd.to_numeric(caps, errors='coerce')
+            is_constrained = caps.notna().to_numpy()
+            capacity = np.where(is_constrained, caps.fillna(0).to_numpy(dtype=float), np.inf)
+
+        leveled = ProductionLeveler().level(demand, capacity, line_capacity=line_capacity, mode=mode)
+        production = leveled['production']
+        backlog = leveled['backlog']
+
+        product_info = (
+            instructions.drop_duplicates('product_id')
+            .set_index('product_id')[['product_code', 'product_name', 'inspection_category']]
+            .reindex(product_codes)
+        )
+
+        num_products, num_days = demand.shape
+        rows_p = np.repeat(np.arange(num_products), num_days)
+        rows_t = np.tile(np.arange(num_days), num_products)
+        plan_df = pd.DataFrame({
+            'date': days.date[rows_t],
+            'product_id': product_codes[rows_p],
+            'product_code': product_info['product_code'].to_numpy()[rows_p],
+            'product_name': product_info['product_name'].to_numpy()[rows_p],
+            'demand_quantity': demand.ravel(),
+            'planned_quantity': production.ravel(),
+            'inspection_category': product_info['inspection_category'].to_numpy()[rows_p],
+            'is_constrained': is_constrained[rows_p],
+            'daily_capacity': np.where(np.isfinite(capacity), capacity, np.nan)[rows_p],
+            'backlog_quantity': backlog.ravel()
+        })
+        active = (plan_df['demand_quantity'] > 0) | (plan_df['planned_quantity'] > 0) | (plan_df['backlog_quantity'] > 0)
+        plan_df = plan_df[active].sort_values(['date', 'product_id']).reset_index(drop=True)
+
+        daily_production = production.sum(axis=0)
+        daily_summary = pd.DataFrame({
+            'date': days.date,
+            'demand_quantity': demand.sum(axis=0),
+            'planned_quantity': daily_production,
+            'carried_backlog': backlog.sum(axis=0),
+            'line_utilization': (daily_production / line_capacity * 100) if line_capacity else np.nan
+        })
+
+        shortage_mask = leveled['shortage'] > 1e-9
+        shortage_df = pd.DataFrame({
+            'product_id': product_codes[shortage_mask],
+            'product_code': product_info['product_code'].to_numpy()[shortage_mask],
+            'product_name': product_info['product_name'].to_numpy()[shortage_mask],
+            'shortage_quantity': leveled['shortage'][shortage_mask]
+        })
+
+        return {'plan': plan_df, 'daily_summary': daily_summary, 'shortage': shortage_df}
+
     def _calculate_smoothed_production(self, demand: float, smoothing_level: float, daily_capacity: float) -> float:
         """平均化生産量計算"""
         smoothed = demand * smoothing_level
@@ -0,0 +1,166 @@
+# app/domain/calculators/production_leveler.py
+"""
+生産平準化エンジン（計画期間全体での能力平準化）
+
+- 製品別の日産能力（daily_capacity）と共有ライン能力を超える需要を、前の営業日へ前倒しする
+- 既定は貪欲法：納期の遅い日から逆順に、溢れた分を前日へ繰り越す（製品方向にベクトル化）
+- mode='lp' の場合は線形計画（scipy の HiGHS）で在庫保持量が最小になる生産量を求める
+- 期間初日までに吸収できなかった分は不足（shortage）として返す
+
+需要・能力は「製品 × 営業日」の行列で受け取り、行列で返す（DataFrame変換は呼び出し側）。
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from app_logging import get_logger
+
+try:
+    from scipy import sparse
+    from scipy.optimize import linprog
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+
+class ProductionLeveler:
+    """生産平準化エンジン"""
+
+    MODE_GREEDY = 'greedy'
+    MODE_LP = 'lp'
+
+    def __init__(self, mode: str = MODE_GREEDY):
+        self.mode = mode
+
+    def level(self,
+              demand: np.ndarray,
+              capacity: np.ndarray,
+              line_capacity: Optional[float] = None,
+              mode: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        需要行列を平準化
+
+        Args:
+            demand: 需要量（製品数 × 営業日数）。列は日付の昇順
+            capacity: 製品別の日産能力（長さ=製品数、制約なしは np.inf）
+            line_capacity: 全製品共通のライン日産能力（None の場合は制約なし）
+            mode: 'greedy' または 'lp'（未指定時はコンストラクタの値）
+
+        Returns:
+            {
+                'production': 生産量（製品数 × 営業日数）,
+                'backlog': 各日の繰越残（その日以降の需要のうち、前日以前に生産が必要な量）,
+                'shortage': 製品別の不足量（期間初日より前に必要だった量）
+            }
+        """
+        demand = np.asarray(demand, dtype=float)
+        capacity = np.asarray(capacity, dtype=float)
+        mode = mode or self.mode
+
+        if demand.size == 0:
+            empty = np.zeros_like(demand)
+            return {'production': empty, 'backlog': empty, 'shortage': np.zeros(demand.shape[0])}
+
+        if mode == self.MODE_LP:
+            if SCIPY_AVAILABLE:
+                production = self._solve_lp(demand, capacity, line_capacity)
+            else:
+                logger.warning("⚠️ scipyがインストールされていないため貪欲法で平準化します")
+                production = None
+            if production is None:
+                production = self._solve_greedy(demand, capacity, line_capacity)
+        else:
+            production = self._solve_greedy(demand, capacity, line_capacity)
+
+        # その日以降の需要 - その日以降の生産 = 前日以前へ繰り越した量
+        future_demand = np.cumsum(demand[:, ::-1], axis=1)[:, ::-1]
+        future_production = np.cumsum(production[:, ::-1], axis=1)[:, ::-1]
+        backlog = np.clip(future_demand - future_production, 0, None)
+
+        return {
+            'production': production,
+            'backlog': backlog,
+            'shortage': backlog[:, 0].copy()
+        }
+
+    def _solve_greedy(self, demand: np.ndarray, capacity: np.ndarray,
+                      line_capacity: Optional[float]) -> np.ndarray:
+        """
+        貪欲法：最終日から逆順に、能力を超えた分を前日へ繰り越す
+
+        ライン能力を超える日は、各製品の生産量を同じ比率で削って繰り越す。
+        """
+        num_products, num_days = demand.shape
+        production = np.zeros_like(demand)
+        carry = np.zeros(num_products)
+
+        for t in range(num_days - 1, -1, -1):
+            required = demand[:, t] + carry
+            produce = np.minimum(required, capacity)
+
+            if line_capacity is not None:
+                total = produce.sum()
+                if total > line_capacity:
+                    produce = produce * (line_capacity / total)
+
+            production[:, t] = produce
+            carry = required - produce
+
+        return production
+
+    def _solve_lp(self, demand: np.ndarray, capacity: np.ndarray,
+                  line_capacity: Optional[float]) -> Optional[np.ndarray]:
+        """
+        線形計画：納期遅れ無し・能力内で在庫保持量（前倒し量×日数）を最小化
+
+        変数: x[p, t]（製品p・日tの生産量）, s[p]（製品pの不足量）
+        制約: 各日までの累計生産 + 不足 >= 各日までの累計需要
+              総生産 + 不足 = 総需要
+              日ごとの全製品生産量 <= ライン能力
+        """
+        num_products, num_days = demand.shape
+        num_x = num_products * num_days
+
+        # 早く作るほど保持日数が長い → 係数 (T - t)。不足は前倒しより常に不利になる重み
+        holding = np.tile(np.arange(num_days, 0, -1, dtype=float), num_products)
+        shortage_penalty = np.full(num_products, 2.0 * num_days + 1)
+        cost = np.concatenate([holding, shortage_penalty])
+
+        cumulative = sparse.kron(sparse.identity(num_products), sparse.tril(np.ones((num_days, num_days))))
+        shortage_cols = sparse.kron(sparse.identity(num_products), np.ones((num_days, 1)))
+        a_ub = [-sparse.hstack([cumulative, shortage_cols])]
+        b_ub = [-np.cumsum(demand, axis=1).ravel()]
+
+        if line_capacity is not None:
+            line_rows = sparse.kron(np.ones((1, num_products)), sparse.identity(num_days))
+            a_ub.append(sparse.hstack([line_rows, sparse.csr_matrix((num_days, num_products))]))
+            b_ub.append(np.full(num_days, float(line_capacity)))
+
+        a_eq = sparse.hstack([
+            sparse.kron(sparse.identity(num_products), np.ones((1, num_days))),
+            sparse.identity(num_products)
+        ])
+        b_eq = demand.sum(axis=1)
+
+        bounds = [(0, None if not np.isfinite(cap) else float(cap))
+                  for cap in capacity for _ in range(num_days)]
+        bounds += [(0, None)] * num_products
+
+        result = linprog(
+            cost,
+            A_ub=sparse.vstack(a_ub).tocsr(),
+            b_ub=np.concatenate(b_ub),
+            A_eq=a_eq.tocsr(),
+            b_eq=b_eq,
+            bounds=bounds,
+            method='highs'
+        )
+
+        if not result.success:
+            logger.warning("⚠️ 線形計画で解が得られませんでした（貪欲法で代替）: %s", result.message)
+            return None
+
+        return np.clip(result.x[:num_x].reshape(num_products, num_days), 0, None)
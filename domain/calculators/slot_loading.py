@@ -0,0 +1,298 @@
+# app/domain/calculators/slot_loading.py
+"""
+容器枠ベースの積載エンジン（トラック×容器ルール truck_container_rules を使用）
+
+基本ルール_容器積載版 に従い、底面積ではなく「トラック×容器ごとの積載本数」で割り付ける。
+- 上限はルールの max_quantity（段積み後の最終本数）のみ
+- stack_count 未設定時は容器の max_stack を使う。段積み不可の製品は1容器で stack_count 本分の枠を使う
+- ルールの無い組合せはサイズベース（荷台底面積 ÷ 容器底面積 × 段数）の枠で許容する。
+  ルールの無い容器どうしは同じ荷台を使うため、積載日×トラックごとに1つの底面積枠を共有して消費する
+  （ルールのある容器も積んだ分の底面積をこの枠から差し引く。ルールのある容器の上限はルールのみ）
+- 積載日×トラック×容器の残枠を密な配列（numpy）で持ち、枠の確認・消費は O(1)
+- 割付順序: 積載日 → 納期 → ルール優先度 → 残枠が少なくなるトラック（Fit）
+- 積めない分: 同日の別トラック → 前倒し可なら前営業日 → 非デフォルトトラック（特便） → 積み残し
+- 積載率は容器枠の使用率（使用本数 ÷ 上限本数）
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from domain.calculators.floor_packing import stack_columns
+from domain.models.loading_records import Demand, LoadedItem
+
+SLOT_ENGINE = 'slots'
+
+
+def _rule_value(rule, name):
+    """ルール（辞書 / TruckContainerRule）の項目を取得。欠損は None"""
+    value = rule.get(name) if isinstance(rule, dict) else getattr(rule, name, None)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SlotLedger:
+    """積載日×トラック×容器の残り枠（本数）台帳"""
+
+    def __init__(self, dates: Sequence[date], trucks: Dict[int, Any], containers: Dict[int, Any],
+                 rules: Iterable[Any]):
+        self.date_index = {d: i for i, d in enumerate(dates)}
+        self.truck_index = {truck_id: i for i, truck_id in enumerate(trucks)}
+        self.container_index = {container_id: i for i, container_id in enumerate(containers)}
+
+        shape = (len(self.truck_index), len(self.container_index))
+        self.limit = np.zeros(shape, dtype=np.int64)
+        self.stack_count = np.ones(shape, dtype=np.int64)
+        self.priority = np.zeros(shape, dtype=np.int64)
+        has_rule = np.zeros(shape, dtype=bool)
+        # 1枠（段積み後の1本）が使う底面積
+        self.slot_area = np.zeros(shape, dtype=float)
+        truck_floor = np.zeros(len(self.truck_index), dtype=float)
+
+        for rule in rules or []:
+            t = self.truck_index.get(_rule_value(rule, 'truck_id'))
+            c = self.container_index.get(_rule_value(rule, 'container_id'))
+            max_quantity = _rule_value(rule, 'max_quantity')
+            if t is None or c is None or max_quantity is None:
+                continue
+            container = containers[_rule_value(rule, 'container_id')]
+            self.limit[t, c] = max(max_quantity, 0)
+            self.stack_count[t, c] = max(_rule_value(rule, 'stack_count') or container.max_stack or 1, 1)
+            self.priority[t, c] = _rule_value(rule, 'priority') or 0
+            self.slot_area[t, c] = (container.floor_area or 0) / self.stack_count[t, c]
+            has_rule[t, c] = True
+
+        # ルールの無い組合せはサイズベースで許容
+        for truck_id, t in self.truck_index.items():
+            truck = trucks[truck_id]
+            truck_floor[t] = truck.floor_area
+            for container_id, c in self.container_index.items():
+                if has_rule[t, c]:
+                    continue
+                container = containers[container_id]
+                stack = max(container.max_stack or 1, 1) if container.stackable else 1
+                positions = int(truck.floor_area // container.floor_area) if container.floor_area > 0 else 0
+                self.limit[t, c] = positions * stack
+                self.stack_count[t, c] = stack
+                self.slot_area[t, c] = container.floor_area / stack
+
+        self.has_rule = has_rule
+        self.truck_floor = truck_floor
+        self.remaining = np.repeat(self.limit[np.newaxis, :, :], len(self.date_index), axis=0)
+        # ルールの無い容器が共有する残り底面積（積載日×トラック）
+        self.floor_remaining = np.repeat(truck_floor[np.newaxis, :], len(self.date_index), axis=0)
+
+    def slot_cost(self, truck_id: int, container_id: int, stackable) -> int:
+        """1容器あたりの使用枠数（段積みできない製品は段数分の枠を使う）"""
+        if stackable:
+            return 1
+        return int(self.stack_count[self.truck_index[truck_id], self.container_index[container_id]])
+
+    def loadable(self, loading_date: date, truck_id: int, container_id: int, stackable) -> int:
+        """追加で積める容器数"""
+        d = self.date_index.get(loading_date)
+        t = self.truck_index.get(truck_id)
+        c = self.container_index.get(container_id)
+        if d is None or t is None or c is None:
+            return 0
+        cost = self.slot_cost(truck_id, container_id, stackable)
+        count = int(self.remaining[d, t, c]) // cost
+        if not self.has_rule[t, c] and count > 0:
+            # 他のルールの無い容器が使った底面積を差し引く（浮動小数の誤差分だけ余裕を持たせる）
+            floor_left = max(self.floor_remaining[d, t], 0.0)
+            count = min(count, int((floor_left + 1e-9) // (self.slot_area[t, c] * cost)))
+        return count
+
+    def consume(self, loading_date: date, truck_id: int, container_id: int, num_containers: int, stackable):
+        d = self.date_index[loading_date]
+        t = self.truck_index[truck_id]
+        c = self.container_index[container_id]
+        cost = self.slot_cost(truck_id, container_id, stackable)
+        self.remaining[d, t, c] -= num_containers * cost
+        self.floor_remaining[d, t] -= num_containers * cost * self.slot_area[t, c]
+
+    def rule_priority(self, truck_id: int, container_id: int) -> int:
+        return int(self.priority[self.truck_index[truck_id], self.container_index[container_id]])
+
+    def usage_rate(self, loading_date: date, truck_id: int) -> float:
+        """
+        容器枠の使用率（%）。積載した容器の上限本数に対する使用本数
+
+        ルールの無い容器は共有の底面積枠をまとめて1つの枠とみなし、底面積の使用率で数える。
+        """
+        d = self.date_index[loading_date]
+        t = self.truck_index[truck_id]
+        limit = self.limit[t]
+        used = limit - self.remaining[d, t]
+        loaded = used > 0
+        if not loaded.any():
+            return 0.0
+        ruled = loaded & self.has_rule[t]
+        shared = loaded & ~self.has_rule[t]
+        used_total = float(used[ruled].sum())
+        limit_total = float(limit[ruled].sum())
+        if shared.any() and self.truck_floor[t] > 0:
+            shared_limit = float(limit[shared].sum())
+            floor_rate = 1 - self.floor_remaining[d, t] / self.truck_floor[t]
+            used_total += shared_limit * min(max(floor_rate, 0.0), 1.0)
+            limit_total += shared_limit
+        if limit_total <= 0:
+            return 0.0
+        return round(used_total / limit_total * 100, 1)
+
+
+class SlotLoadingEngine:
+    """容器枠ベースで需要をトラックへ割り付ける積載エンジン"""
+
+    name = SLOT_ENGINE
+
+    def allocate(self,
+                 daily_demands: Dict[str, List[Demand]],
+                 working_dates: Sequence[date],
+                 truck_map: Dict[int, Any],
+                 container_map: Dict[int, Any],
+                 rules: Iterable[Any],
+                 truck_ids: Optional[Sequence[int]] = None,
+                 allow_advance: bool = True,
+                 allow_special: bool = True,
+                 use_product_trucks: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        需要を積載日ごとにトラックへ割り付ける
+
+        Args:
+            daily_demands: {積載日文字列: [Demand]}
+            working_dates: 計画対象の営業日
+            truck_map / container_map: MasterData のトラック・容器
+            rules: TransportRepository.get_truck_container_rules() の結果
+            truck_ids: 通常便に使うトラック（並び順が同条件時の優先順）。None は全トラック
+            allow_advance: 積めない分を前営業日へ前倒しするか（製品の can_advance も必要）
+            allow_special: 積めない分を非デフォルトトラック（特便）に積むか
+            use_product_trucks: 製品の使用トラック（used_truck_ids）に限定するか
+
+        Returns:
+            {積載日文字列: {'trucks', 'total_trips', 'warnings', 'remaining_demands'}}
+            （積載品・積み残しはレコードのまま。warnings は空で返す）
+        """
+        ledger = SlotLedger(working_dates, truck_map, container_map, rules)
+        regular_trucks = list(truck_map) if truck_ids is None else [t for t in truck_ids if t in truck_map]
+        special_trucks = [t for t, info in truck_map.items() if not info.default_use]
+        truck_rank = {truck_id: rank for rank, truck_id in enumerate(regular_trucks)}
+
+        loads: Dict[Tuple[date, int], List[LoadedItem]] = defaultdict(list)
+        remaining: Dict[date, List[Demand]] = defaultdict(list)
+
+        for day_index, working_date in enumerate(working_dates):
+            date_str = working_date.strftime('%Y-%m-%d')
+            demands = sorted(daily_demands.get(date_str, []),
+                             key=lambda d: (d.delivery_date or working_date, -d.num_containers))
+            for demand in demands:
+                candidates = regular_trucks
+                if use_product_trucks and demand.truck_ids:
+                    candidates = [t for t in regular_trucks if t in demand.truck_ids]
+                left = self._place(ledger, loads, demand, working_date, candidates, truck_rank, container_map)
+
+                if left is not None and allow_advance and day_index > 0 and demand.can_advance:
+                    previous_date = working_dates[day_index - 1]
+                    left = self._place(ledger, loads, left, previous_date, candidates, truck_rank,
+                                       container_map, is_advanced=True)
+
+                if left is not None and allow_special and special_trucks:
+                    left = self._place(ledger, loads, left, working_date, special_trucks, truck_rank,
+                                       container_map, is_special_delivery=True)
+
+                if left is not None:
+                    remaining[working_date].append(left)
+
+        daily_plans = {}
+        for working_date in working_dates:
+            truck_plans = []
+            for truck_id in truck_map:
+                items = loads.get((working_date, truck_id))
+                if not items:
+                    continue
+                rate = ledger.usage_rate(working_date, truck_id)
+                truck_plans.append({
+                    'truck_id': truck_id,
+                    'truck_name': truck_map[truck_id].name,
+                    'loaded_items': items,
+                    'utilization': {
+                        'floor_area_rate': rate,
+                        'volume_rate': rate,
+                        'slot_rate': rate
+                    }
+                })
+            daily_plans[working_date.strftime('%Y-%m-%d')] = {
+                'trucks': truck_plans,
+                'total_trips': len(truck_plans),
+                'warnings': [],
+                'remaining_demands': remaining.get(working_date, [])
+            }
+        return daily_plans
+
+    def _place(self, ledger: SlotLedger, loads, demand: Demand, loading_date: date,
+               truck_ids: Sequence[int], truck_rank: Dict[int, int], container_map,
+               is_advanced: bool = False, is_special_delivery: bool = False) -> Optional[Demand]:
+        """
+        需要を指定日のトラックへ積めるだけ積む（ルール優先度 → Fit の順にトラックを選ぶ）
+
+        Returns:
+            積み切れなかった残り（全て積めた場合は None）
+        """
+        container_id = demand.container_id
+        need = demand.num_containers
+        candidates = []
+        for truck_id in truck_ids:
+            loadable = ledger.loadable(loading_date, truck_id, container_id, demand.stackable)
+            if loadable <= 0:
+                continue
+            fits_all = loadable >= need
+            candidates.append((
+                -ledger.rule_priority(truck_id, container_id),
+                0 if fits_all else 1,
+                loadable - need if fits_all else -loadable,
+                truck_rank.get(truck_id, len(truck_rank)),
+                truck_id,
+                loadable,
+            ))
+        candidates.sort()
+
+        quantity_left = demand.total_quantity
+        container = container_map.get(container_id)
+        max_stack = container.max_stack if container else demand.max_stack
+        for *_, truck_id, loadable in candidates:
+            num_containers = min(need, loadable)
+            quantity = min(num_containers * demand.capacity, quantity_left)
+            ledger.consume(loading_date, truck_id, container_id, num_containers, demand.stackable)
+
+            item = LoadedItem.from_demand(demand)
+            item.num_containers = num_containers
+            item.total_quantity = quantity
+            item.surplus = num_containers * demand.capacity - quantity
+            item.floor_area = demand.floor_area_per_container * stack_columns(
+                num_containers, max_stack, demand.stackable
+            )
+            item.loading_date = loading_date
+            item.is_advanced = demand.is_advanced or is_advanced
+            item.is_special_delivery = is_special_delivery
+            loads[(loading_date, truck_id)].append(item)
+
+            need -= num_containers
+            quantity_left -= quantity
+            if need <= 0:
+                return None
+
+        if need == demand.num_containers:
+            return demand
+        left = demand.copy()
+        left.num_containers = need
+        left.total_quantity = quantity_left
+        left.surplus = max(need * demand.capacity - quantity_left, 0)
+        left.floor_area = demand.floor_area_per_container * stack_columns(need, max_stack, demand.stackable)
+        return left
@@ -9,17 +9,24 @@ Tiera様専用の積載計画プランナー
 - 積めるだけ積む方式
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 import pandas as pd
 
+from domain.models.loading_records import Demand, LoadedItem, daily_plans_to_dicts
+from domain.models.master_data import MasterData
+from domain.calculators.floor_packing import AreaLoadingEngine, get_loading_engine
+from domain.calculators.slot_loading import SLOT_ENGINE, SlotLoadingEngine
+
 
 class TieraTransportPlanner:
     """Tiera様専用の積載計画プランナー"""
 
     def __init__(self, calendar_repo=None):
         self.calendar_repo = calendar_repo
+        self.loading_engine = AreaLoadingEngine()
+        self.loading_engine_name = 'area'
 
     def calculate_loading_plan_from_orders(self,
                                           orders_df: pd.DataFrame,
@@ -29,7 +36,9 @@ class TieraTransportPlanner:
                                           truck_container_rules: List[Any],
                                           start_date: date,
                                           days: int = 7,
-                                          calendar_repo=None) -> Dict[str, Any]:
+                                          calendar_repo=None,
+                                          progress_callback: Optional[Callable[[float, str], None]] = None,
+                                          loading_engine: str = 'area') -> Dict[str, Any]:
         """
         Tiera様の積載計画作成
 
@@ -37,70 +46,78 @@ class TieraTransportPlanner:
         1. 納品日 - リードタイム = 積載日を計算
         2. 夕便優先でトラックを選択
         3. 積めるだけ積む（前倒し無し）
+
+        progress_callback を渡すとステップごとに progress_callback(ratio, message) で進捗を通知する
+        loading_engine で積載判定の方式を選ぶ（'area': 底面積の合計 / 'packing': 容器の2次元配置 /
+        'slots': トラック×容器ルールの本数枠。ルール未登録時は 'area'）
         """
         self.calendar_repo = calendar_repo
+        self.loading_engine_name = (loading_engine or 'area').lower()
+        self.loading_engine = get_loading_engine(
+            'area' if self.loading_engine_name == SLOT_ENGINE else self.loading_engine_name
+        )
+        report = progress_callback or (lambda ratio, message: None)
+        report(0.0, "データ準備中")
 
         # 営業日のみで計画期間を構築
         working_dates = self._get_working_dates(start_date, days)
 
-        # データ準備
-        container_map = {c.id: c for c in containers}
-        truck_map = {}
-        for _, row in trucks_df.iterrows():
-            try:
-                truck_id = row['id']
-                if pd.isna(truck_id):
-                    continue
-                truck_map[int(truck_id)] = row
-            except (ValueError, TypeError):
-                continue
-
-        product_map = {}
-        for _, row in products_df.iterrows():
-            try:
-                product_id = row['id']
-                if pd.isna(product_id):
-                    continue
-                product_map[int(product_id)] = row
-            except (ValueError, TypeError):
-                continue
+        # データ準備（マスタを型付きレコードに1回だけ変換）
+        master = MasterData.from_sources(trucks_df, products_df, containers)
+        container_map = master.containers
+        truck_map = master.trucks
+        product_map = master.products
 
         # Step1: 積載日ごとに需要を整理（リードタイムを適用）
+        report(0.1, "Step1: 積載日ごとの需要整理")
         daily_demands = self._organize_demands_by_loading_date(
             orders_df, product_map, container_map, working_dates
         )
 
-        # Step2: 日次積載計画作成（シンプル版）
-        daily_plans = {}
-        for working_date in working_dates:
-            date_str = working_date.strftime('%Y-%m-%d')
-            if date_str not in daily_demands or not daily_demands[date_str]:
-                daily_plans[date_str] = {
-                    'trucks': [],
-                    'total_trips': 0,
-                    'warnings': [],
-                    'remaining_demands': []
-                }
-                continue
-
-            plan = self._create_simple_loading_plan(
-                daily_demands[date_str],
-                truck_map,
-                container_map,
-                product_map,
-                working_date
+        if self.loading_engine_name == SLOT_ENGINE and truck_container_rules:
+            # Step2: トラック×容器ルールの枠で割付（前倒し・特便は無し）
+            report(0.2, "Step2: 容器枠で割付")
+            daily_plans = self._create_slot_loading_plans(
+                daily_demands, truck_map, container_map, truck_container_rules, working_dates
             )
-            daily_plans[date_str] = plan
+        else:
+            # Step2: 日次積載計画作成（シンプル版）
+            daily_plans = {}
+            for day_index, working_date in enumerate(working_dates):
+                date_str = working_date.strftime('%Y-%m-%d')
+                report(0.2 + 0.7 * day_index / len(working_dates), f"Step2: 日次積載計画作成 ({date_str})")
+                if date_str not in daily_demands or not daily_demands[date_str]:
+                    daily_plans[date_str] = {
+                        'trucks': [],
+                        'total_trips': 0,
+                        'warnings': [],
+                        'remaining_demands': []
+                    }
+                    continue
+
+                plan = self._create_simple_loading_plan(
+                    daily_demands[date_str],
+                    truck_map,
+                    container_map,
+                    product_map,
+                    working_date
+                )
+                daily_plans[date_str] = plan
 
         # ✅ 翌日着トラック（arrival_day_offset=1）の積載日を前日に調整
+        report(0.9, "翌日着トラック調整")
         self._adjust_for_next_day_arrival_trucks(daily_plans, truck_map, start_date)
 
+        # 計画結果は従来どおり辞書形式で返す
+        daily_plans_to_dicts(daily_plans)
+
         # 集計
         total_trips = sum(plan['total_trips'] for plan in daily_plans.values())
         total_warnings = sum(len(plan['warnings']) for plan in daily_plans.values())
         all_remaining = []
         for plan in daily_plans.values():
             all_remaining.extend(plan.get('remaining_demands', []))
+        report(1.0, "積載計画作成完了")
 
         return {
             'daily_plans': daily_plans,
@@ -205,27 +222,16 @@ class TieraTransportPlanner:
                 continue
 
             # 容器情報取得
-            container_id = product.get('used_container_id')
-            if not container_id or pd.isna(container_id):
-                continue
-
-            try:
-                container_id = int(container_id)
-            except (ValueError, TypeError):
+            container_id = product.used_container_id
+            if container_id is None:
                 continue
 
             container = container_map.get(container_id)
             if not container:
                 continue
 
-            # 入り数取得
-            try:
-                raw_capacity = product.get('capacity')
-                if raw_capacity is None or pd.isna(raw_capacity):
-                    raw_capacity = 1
-                capacity = max(1, int(raw_capacity))
-            except Exception:
-                capacity = 1
+            # 入り数
+            capacity = product.capacity
 
             # 数量取得
             quantity = self._get_order_quantity(order)
@@ -238,12 +244,12 @@ class TieraTransportPlanner:
             surplus = capacity - remainder if remainder > 0 else 0
 
             # 底面積計算
-            floor_area_per_container = (container.width * container.depth) / 1_000_000
-            max_stack = getattr(container, 'max_stack', 1)
+            floor_area_per_container = container.floor_area
+            max_stack = container.max_stack
 
             # 段積み可否：製品と容器の両方がstackable=Trueで、max_stack>1の場合のみ
-            product_stackable = bool(product.get('stackable', 0))  # tinyint(1) -> bool
-            container_stackable = getattr(container, 'stackable', False)
+            product_stackable = product.stackable
+            container_stackable = container.stackable
 
             if max_stack > 1 and product_stackable and container_stackable:
                 stacked_containers = (num_containers + max_stack - 1) // max_stack
@@ -251,49 +257,34 @@ class TieraTransportPlanner:
             else:
                 total_floor_area_needed = floor_area_per_container * num_containers
 
-            # リードタイム取得
-            try:
-                product_lead_time = int(product.get('lead_time_days', 0))
-                if pd.isna(product_lead_time):
-                    product_lead_time = 0
-            except (ValueError, TypeError):
-                product_lead_time = 0
-
             # 積載日計算（営業日ベースでリードタイムを引く）
             loading_date = self._calculate_loading_date_by_working_days(
-                delivery_date, product_lead_time
+                delivery_date, product.lead_time_days
             )
 
             # 計画期間内のみ
             if loading_date in working_dates:
                 date_str = loading_date.strftime('%Y-%m-%d')
 
-                # トラックID取得
-                truck_ids_str = product.get('used_truck_ids')
-                if truck_ids_str and not pd.isna(truck_ids_str):
-                    truck_ids = [int(tid.strip()) for tid in str(truck_ids_str).split(',')]
-                else:
-                    truck_ids = []
-
-                daily_demands[date_str].append({
-                    'product_id': product_id,
-                    'product_code': product.get('product_code', ''),
-                    'product_name': product.get('product_name', ''),
-                    'container_id': container_id,
-                    'container_name': getattr(container, 'name', '不明'),  # ✅ UI表示用
-                    'num_containers': num_containers,
-                    'total_quantity': quantity,
-                    'capacity': capacity,
-                    'remainder': remainder,
-                    'surplus': surplus,
-                    'floor_area': total_floor_area_needed,
-                    'floor_area_per_container': floor_area_per_container,
-                    'delivery_date': delivery_date,
-                    'loading_date': loading_date,
-                    'truck_ids': truck_ids,
-                    'max_stack': max_stack,
-                    'stackable': product_stackable and container_stackable  # ✅ 製品と容器の両方を確認
-                })
+                daily_demands[date_str].append(Demand(
+                    product_id=product_id,
+                    product_code=product.product_code,
+                    product_name=product.product_name,
+                    container_id=container_id,
+                    container_name=container.name if container.name is not None else '不明',  # ✅ UI表示用
+                    num_containers=num_containers,
+                    total_quantity=quantity,
+                    capacity=capacity,
+                    remainder=remainder,
+                    surplus=surplus,
+                    floor_area=total_floor_area_needed,
+                    floor_area_per_container=floor_area_per_container,
+                    delivery_date=delivery_date,
+                    loading_date=loading_date,
+                    truck_ids=list(product.used_truck_ids),
+                    max_stack=max_stack,
+                    stackable=product_stackable and container_stackable  # ✅ 製品と容器の両方を確認
+                ))
 
         return daily_demands
 
@@ -333,7 +324,7 @@ class TieraTransportPlanner:
         # 夕便優先でトラックをソート（arrival_day_offset=1を優先）
         available_trucks = []
         for truck_id, truck_info in truck_map.items():
-            arrival_offset = int(truck_info.get('arrival_day_offset', 0) or 0)
+            arrival_offset = truck_info.arrival_day_offset
             # 夕便（offset=1）を優先（値が小さいほど優先）
             priority = 0 if arrival_offset == 1 else 1
             available_trucks.append((priority, truck_id, truck_info))
@@ -343,11 +334,13 @@ class TieraTransportPlanner:
         # トラック状態初期化
         truck_states = {}
         for _, truck_id, truck_info in available_trucks:
+            width = truck_info.width if truck_info.width is not None else 2400
+            depth = truck_info.depth if truck_info.depth is not None else 9700
             truck_states[truck_id] = {
                 'truck_id': truck_id,
-                'truck_name': truck_info.get('name', f'トラック{truck_id}'),
-                'total_floor_area': float(truck_info.get('width', 2400) * truck_info.get('depth', 9700)) / 1_000_000,
-                'remaining_floor_area': float(truck_info.get('width', 2400) * truck_info.get('depth', 9700)) / 1_000_000,
+                'truck_name': truck_info.name,
+                'total_floor_area': float(width * depth) / 1_000_000,
+                'remaining_floor_area': float(width * depth) / 1_000_000,
                 'loaded_items': [],
                 'trip_number': 1
             }
@@ -358,7 +351,7 @@ class TieraTransportPlanner:
         # 需要を1つずつ処理
         for demand in demands:
             loaded = False
-            container_id = demand['container_id']
+            container_id = demand.container_id
 
             # トラックに順番に積載を試みる
             for _, truck_id, truck_info in available_trucks:
@@ -366,18 +359,18 @@ class TieraTransportPlanner:
 
                 # 同じ容器が既に積載されているか確認（段積み統合用）
                 same_container_items = [item for item in truck_state['loaded_items']
-                                       if item['container_id'] == container_id]
+                                       if item.container_id == container_id]
 
                 if same_container_items:
                     # 同じ容器が既にある場合、段積みとして統合できるか確認
                     container = container_map.get(container_id)
-                    if container and getattr(container, 'stackable', False):
-                        max_stack = getattr(container, 'max_stack', 1)
-                        floor_area_per_container = (container.width * container.depth) / 1_000_000
+                    if container and container.stackable:
+                        max_stack = container.max_stack
+                        floor_area_per_container = container.floor_area
 
                         # 既存の容器数を計算（同じ容器IDの全製品）
-                        existing_containers = sum(item['num_containers'] for item in same_container_items)
-                        new_total_containers = existing_containers + demand['num_containers']
+                        existing_containers = sum(item.num_containers for item in same_container_items)
+                        new_total_containers = existing_containers + demand.num_containers
 
                         # 既存の配置数
                         existing_stacks = (existing_containers + max_stack - 1) // max_stack
@@ -387,44 +380,48 @@ class TieraTransportPlanner:
                         additional_stacks = new_stacks - existing_stacks
                         additional_floor_area = additional_stacks * floor_area_per_container
 
-                        if additional_floor_area <= truck_state['remaining_floor_area']:
+                        if (additional_floor_area <= truck_state['remaining_floor_area'] and
+                                self._can_pack(truck_info, truck_state['loaded_items'], container,
+                                               demand, container_map)):
                             # 段積みとして統合可能
-                            truck_state['loaded_items'].append({
-                                'product_id': demand['product_id'],
-                                'product_code': demand['product_code'],
-                                'product_name': demand['product_name'],
-                                'container_id': demand['container_id'],
-                                'container_name': demand.get('container_name', '不明'),
-                                'num_containers': demand['num_containers'],
-                                'total_quantity': demand['total_quantity'],
-                                'delivery_date': demand['delivery_date'],
-                                'floor_area': demand['floor_area']
-                            })
+                            truck_state['loaded_items'].append(LoadedItem(
+                                product_id=demand.product_id,
+                                product_code=demand.product_code,
+                                product_name=demand.product_name,
+                                container_id=demand.container_id,
+                                container_name=demand.container_name,
+                                num_containers=demand.num_containers,
+                                total_quantity=demand.total_quantity,
+                                delivery_date=demand.delivery_date,
+                                floor_area=demand.floor_area
+                            ))
                             truck_state['remaining_floor_area'] -= additional_floor_area
                             loaded = True
                             break
 
                 # 同じ容器がない場合、または段積み統合できなかった場合は通常の積載を試みる
-                if not loaded and demand['floor_area'] <= truck_state['remaining_floor_area']:
+                if (not loaded and demand.floor_area <= truck_state['remaining_floor_area'] and
+                        self._can_pack(truck_info, truck_state['loaded_items'], container_map.get(container_id),
+                                       demand, container_map)):
                     # 積載
-                    truck_state['loaded_items'].append({
-                        'product_id': demand['product_id'],
-                        'product_code': demand['product_code'],
-                        'product_name': demand['product_name'],
-                        'container_id': demand['container_id'],
-                        'container_name': demand.get('container_name', '不明'),  # ✅ UI表示用
-                        'num_containers': demand['num_containers'],
-                        'total_quantity': demand['total_quantity'],
-                        'delivery_date': demand['delivery_date'],
-                        'floor_area': demand['floor_area']
-                    })
-                    truck_state['remaining_floor_area'] -= demand['floor_area']
+                    truck_state['loaded_items'].append(LoadedItem(
+                        product_id=demand.product_id,
+                        product_code=demand.product_code,
+                        product_name=demand.product_name,
+                        container_id=demand.container_id,
+                        container_name=demand.container_name,  # ✅ UI表示用
+                        num_containers=demand.num_containers,
+                        total_quantity=demand.total_quantity,
+                        delivery_date=demand.delivery_date,
+                        floor_area=demand.floor_area
+                    ))
+                    truck_state['remaining_floor_area'] -= demand.floor_area
                     loaded = True
                     break
 
             if not loaded:
                 remaining_demands.append(demand)
-                warnings.append(f"製品 {demand['product_code']} が積載できませんでした")
+                warnings.append(f"製品 {demand.product_code} が積載できませんでした")
 
         # 結果整形
         trucks_result = []
@@ -454,6 +451,32 @@ class TieraTransportPlanner:
             'remaining_demands': remaining_demands
         }
 
+    def _create_slot_loading_plans(self, daily_demands, truck_map, container_map, truck_container_rules,
+                                   working_dates):
+        """容器枠ベースの積載計画作成（夕便優先、積めるだけ積む）"""
+        # 夕便（offset=1）を同条件時に優先
+        truck_ids = sorted(truck_map, key=lambda truck_id: 0 if truck_map[truck_id].arrival_day_offset == 1 else 1)
+        daily_plans = SlotLoadingEngine().allocate(
+            daily_demands, working_dates, truck_map, container_map, truck_container_rules,
+            truck_ids=truck_ids, allow_advance=False, allow_special=False, use_product_trucks=False
+        )
+        for date_str, plan in daily_plans.items():
+            loading_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            for truck_plan in plan['trucks']:
+                truck_plan['trip_number'] = 1
+                truck_plan['loading_date'] = loading_date
+            plan['warnings'] = [
+                f"製品 {demand.product_code} が積載できませんでした" for demand in plan['remaining_demands']
+            ]
+        return daily_plans
+
+    def _can_pack(self, truck_info, loaded_items, container, demand, container_map) -> bool:
+        """積載エンジンで需要の全容器を積載済みの容器と一緒に配置できるか"""
+        packable = self.loading_engine.max_containers(
+            truck_info, loaded_items, container, demand.stackable, demand.num_containers, container_map
+        )
+        return packable >= demand.num_containers
+
     def _parse_date(self, date_value):
         """日付を解析"""
         if not date_value:
@@ -493,7 +516,7 @@ class TieraTransportPlanner:
                     continue
 
                 truck_info = truck_map[truck_id]
-                arrival_offset = int(truck_info.get('arrival_day_offset', 0) or 0)
+                arrival_offset = truck_info.arrival_day_offset
 
                 # arrival_day_offset=1のトラックを前日に移動
                 if arrival_offset == 1:
@@ -530,8 +553,8 @@ class TieraTransportPlanner:
 
                 # 全ての積載アイテムのloading_dateを更新
                 for item in truck_plan['loaded_items']:
-                    item['loading_date'] = prev_date
-                    item['adjusted_for_next_day_arrival'] = True  # フラグを追加
+                    item.loading_date = prev_date
+                    item.adjusted_for_next_day_arrival = True  # フラグを追加
 
                 # 前日のプランに追加
                 daily_plans[prev_date_str]['trucks'].append(truck_plan)
@@ -1,9 +1,18 @@
 # app/domain/calculators/transport_planner.py
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, FrozenSet, Tuple, Optional, Callable
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 import pandas as pd
 
+from domain.models.loading_records import Demand, LoadedItem, daily_plans_to_dicts
+from domain.models.master_data import MasterData
+from domain.calculators.floor_packing import AreaLoadingEngine, get_loading_engine
+from domain.calculators.slot_loading import SLOT_ENGINE, SlotLoadingEngine
+from domain.calculators.truck_selection import TruckSelector
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
 
 class TransportConstants:
     """運送計画計算で使用する定数"""
@@ -34,6 +43,8 @@ class TransportPlanner:
     """
     def __init__(self, calendar_repo=None):
         self.calendar_repo = calendar_repo
+        self.loading_engine = AreaLoadingEngine()
+        self.loading_engine_name = 'area'
 
     def calculate_loading_plan_from_orders(self,
                                           orders_df: pd.DataFrame,
@@ -44,7 +55,9 @@ class TransportPlanner:
                                           start_date: date,
                                           days: int = TransportConstants.DEFAULT_PLANNING_DAYS,
                                           calendar_repo=None,
-                                          truck_priority: str = 'morning') -> Dict[str, Any]:
+                                          truck_priority: str = 'morning',
+                                          progress_callback: Optional[Callable[[float, str], None]] = None,
+                                          loading_engine: str = 'area') -> Dict[str, Any]:
         """
         新ルールに基づく積載計画作成
 
@@ -52,49 +65,105 @@ class TransportPlanner:
             truck_priority: トラック優先順位 ('morning' または 'evening')
                            - 'morning': 朝便優先（Kubota様）
                            - 'evening': 夕便優先（Tiera様）
+            progress_callback: 進捗通知関数 progress_callback(ratio, message)（バックグラウンド実行用）
+            loading_engine: 積載エンジン（'area': 底面積の合計で判定 / 'packing': 容器の2次元配置で判定 /
+                            'slots': トラック×容器ルールの本数枠で割付。ルール未登録時は 'area'）
 
         Note:
             リードタイムは製品ごとにproductsテーブルのlead_time_days列から取得
         """
         self.calendar_repo = calendar_repo
         self.truck_priority = truck_priority
+        self.loading_engine_name = (loading_engine or 'area').lower()
+        self.loading_engine = get_loading_engine(
+            'area' if self.loading_engine_name == SLOT_ENGINE else self.loading_engine_name
+        )
+        report = progress_callback or (lambda ratio, message: None)
+        report(0.0, "データ準備中")
         # 営業日のみで計画期間を構築
         working_dates = self._get_working_dates(start_date, days, calendar_repo)
-        # データ準備
-        container_map = {c.id: c for c in containers}
-        # トラックマップ作成（NaNチェック）
-        truck_map = {}
-        for _, row in trucks_df.iterrows():
-            try:
-                truck_id = row['id']
-                if pd.isna(truck_id):
-                    continue
-                truck_map[int(truck_id)] = row
-            except (ValueError, TypeError):
-                continue
-        # 製品マップ作成（NaNチェック）
-        product_map = {}
-        for _, row in products_df.iterrows():
-            try:
-                product_id = row['id']
-                if pd.isna(product_id):
-                    continue
-                product_map[int(product_id)] = row
-            except (ValueError, TypeError):
-                continue
+        # データ準備（マスタを型付きレコードに1回だけ変換）
+        master = MasterData.from_sources(trucks_df, products_df, containers)
+        container_map = master.containers
+        truck_map = master.trucks
+        product_map = master.products
         # Step1: 需要分析とトラック台数決定
+        report(0.05, "Step1: 需要分析")
         daily_demands, use_non_default = self._analyze_demand_and_decide_trucks(
             orders_df, product_map, container_map, truck_map, working_dates
         )
+        if self.loading_engine_name == SLOT_ENGINE and truck_container_rules:
+            # Step2-6: トラック×容器ルールの枠で割付（前倒し・特便も枠の中で行う）
+            report(0.15, "Step2-6: 容器枠で割付")
+            daily_plans = self._plan_by_container_slots(
+                daily_demands, truck_map, container_map, truck_container_rules, working_dates, use_non_default
+            )
+        else:
+            daily_plans = self._plan_by_floor_area(
+                daily_demands, truck_map, container_map, product_map, working_dates, use_non_default, report
+            )
+        # まとめ対象日付を実際の計画日で絞り込み
+        planned_dates = [
+            date for date in working_dates
+            if date.strftime('%Y-%m-%d') in daily_plans and daily_plans[date.strftime('%Y-%m-%d')]['trucks']
+        ]
+        if not planned_dates:
+            planned_dates = working_dates
+        # Step7: 最終日の積み残しに特別フラグを設定
+        final_date_str = planned_dates[-1].strftime('%Y-%m-%d') if planned_dates else None
+        if final_date_str and final_date_str in daily_plans:
+            final_plan = daily_plans[final_date_str]
+            if final_plan.get('remaining_demands'):
+                for demand in final_plan['remaining_demands']:
+                    demand.final_day_overflow = True
+        # Step8: 翌日着トラックの積載日を前日に調整
+        report(0.92, "Step8: 翌日着トラック調整")
+        self._adjust_for_next_day_arrival_trucks(daily_plans, truck_map, start_date)
+        
+        # Step9: トラック移動後にplanned_datesを再計算（期間外の日付も含める）
+        all_dates_with_trucks = [
+            datetime.strptime(date_str, '%Y-%m-%d').date()
+            for date_str in daily_plans.keys()
+            if daily_plans[date_str]['trucks']
+        ]
+        if all_dates_with_trucks:
+            all_dates_with_trucks.sort()
+            planned_dates = all_dates_with_trucks
+            period_start = planned_dates[0]
+            period_end = planned_dates[-1]
+        else:
+            period_start = working_dates[0]
+            period_end = working_dates[-1]
+        
+        # 計画結果は従来どおり辞書形式で返す
+        daily_plans_to_dicts(daily_plans)
+
+        # サマリー作成
+        summary = self._create_summary(daily_plans, use_non_default, planned_dates)
+        report(1.0, "積載計画作成完了")
+        return {
+            'daily_plans': daily_plans,
+            'summary': summary,
+            'unloaded_tasks': [],  # 互換性のため
+            'period': f"{period_start.strftime('%Y-%m-%d')} ~ {period_end.strftime('%Y-%m-%d')}",
+            'working_dates': [d.strftime('%Y-%m-%d') for d in planned_dates],
+            'use_non_default_truck': use_non_default
+        }
+
+    def _plan_by_floor_area(self, daily_demands, truck_map, container_map, product_map,
+                            working_dates, use_non_default, report) -> Dict[str, Dict]:
+        """Step2-6: 底面積ベースで日次積載計画を作成し、積み残しを再配置"""
         # Step2: 前倒し処理（最終日から逆順）
+        report(0.15, "Step2: 前倒し処理")
         adjusted_demands = self._forward_scheduling(
             daily_demands, truck_map, container_map, working_dates, use_non_default
         )
         # Step3: 日次積載計画作成
         daily_plans = {}
         all_remaining_demands = []  # 全日の積み残しを収集
-        for working_date in working_dates:
+        for day_index, working_date in enumerate(working_dates):
             date_str = working_date.strftime('%Y-%m-%d')
+            report(0.25 + 0.45 * day_index / len(working_dates), f"Step3: 日次積載計画作成 ({date_str})")
             if date_str not in adjusted_demands or not adjusted_demands[date_str]:
                 daily_plans[date_str] = {'trucks': [], 'total_trips': 0, 'warnings': [], 'remaining_demands': []}
                 continue
@@ -111,6 +180,7 @@ class TransportPlanner:
             if plan.get('remaining_demands'):
                 all_remaining_demands.extend(plan['remaining_demands'])
         # Step4: 積み残しを他のトラック候補で再配置
+        report(0.70, "Step4: 積み残し再配置")
         if all_remaining_demands:
             self._relocate_remaining_demands(
                 all_remaining_demands,
@@ -121,6 +191,7 @@ class TransportPlanner:
                 use_non_default
             )
         # Step5: 積み残しを前倒し（前倒し可能な製品のみ）
+        report(0.78, "Step5: 積み残し前倒し")
         self._forward_remaining_demands(
             daily_plans,
             truck_map,
@@ -129,6 +200,7 @@ class TransportPlanner:
             use_non_default
         )
         # Step6: 積み残しを翌日以降に再配置
+        report(0.85, "Step6: 翌日以降への再配置")
         self._relocate_to_next_days(
             daily_plans,
             truck_map,
@@ -136,48 +208,22 @@ class TransportPlanner:
             working_dates,
             use_non_default
         )
-        # まとめ対象日付を実際の計画日で絞り込み
-        planned_dates = [
-            date for date in working_dates
-            if date.strftime('%Y-%m-%d') in daily_plans and daily_plans[date.strftime('%Y-%m-%d')]['trucks']
-        ]
-        if not planned_dates:
-            planned_dates = working_dates
-        # Step7: 最終日の積み残しに特別フラグを設定
-        final_date_str = planned_dates[-1].strftime('%Y-%m-%d') if planned_dates else None
-        if final_date_str and final_date_str in daily_plans:
-            final_plan = daily_plans[final_date_str]
-            if final_plan.get('remaining_demands'):
-                for demand in final_plan['remaining_demands']:
-                    demand['final_day_overflow'] = True
-        # Step8: 翌日着トラックの積載日を前日に調整
-        self._adjust_for_next_day_arrival_trucks(daily_plans, truck_map, start_date)
-        
-        # Step9: トラック移動後にplanned_datesを再計算（期間外の日付も含める）
-        all_dates_with_trucks = [
-            datetime.strptime(date_str, '%Y-%m-%d').date()
-            for date_str in daily_plans.keys()
-            if daily_plans[date_str]['trucks']
+        return daily_plans
+
+    def _plan_by_container_slots(self, daily_demands, truck_map, container_map, truck_container_rules,
+                                 working_dates, use_non_default) -> Dict[str, Dict]:
+        """Step2-6: トラック×容器ルールの枠（本数）で割付（基本ルール_容器積載版）"""
+        truck_ids = [
+            truck_id for truck_id, truck_info in truck_map.items()
+            if truck_info.default_use or use_non_default
         ]
-        if all_dates_with_trucks:
-            all_dates_with_trucks.sort()
-            planned_dates = all_dates_with_trucks
-            period_start = planned_dates[0]
-            period_end = planned_dates[-1]
-        else:
-            period_start = working_dates[0]
-            period_end = working_dates[-1]
-        
-        # サマリー作成
-        summary = self._create_summary(daily_plans, use_non_default, planned_dates)
-        return {
-            'daily_plans': daily_plans,
-            'summary': summary,
-            'unloaded_tasks': [],  # 互換性のため
-            'period': f"{period_start.strftime('%Y-%m-%d')} ~ {period_end.strftime('%Y-%m-%d')}",
-            'working_dates': [d.strftime('%Y-%m-%d') for d in planned_dates],
-            'use_non_default_truck': use_non_default
-        }
+        daily_plans = SlotLoadingEngine().allocate(
+            daily_demands, working_dates, truck_map, container_map, truck_container_rules,
+            truck_ids=truck_ids
+        )
+        for plan in daily_plans.values():
+            plan['warnings'] = self._remaining_warnings(plan['remaining_demands'])
+        return daily_plans
 
     def _get_working_dates(self, start_date: date, days: int, calendar_repo) -> List[date]:
         """営業日のみを取得"""
@@ -215,8 +261,8 @@ class TransportPlanner:
         total_floor_area = 0
         
         # デフォルトトラックの総底面積を計算（mm²をm²に変換）
-        default_trucks = [t for _, t in truck_map.items() if t.get('default_use', False)]
-        default_total_floor_area = sum((t['width'] * t['depth']) / TransportConstants.MM2_TO_M2 for t in default_trucks)
+        default_trucks = [t for _, t in truck_map.items() if t.default_use]
+        default_total_floor_area = sum((t.width * t.depth) / TransportConstants.MM2_TO_M2 for t in default_trucks)
         
         # 各受注を処理
         for _, order in orders_df.iterrows():
@@ -240,26 +286,15 @@ class TransportPlanner:
                 continue
             
             # 容器情報取得
-            container_id = product.get('used_container_id')
-            if not container_id or pd.isna(container_id):
-                continue
-            
-            try:
-                container_id = int(container_id)
-            except (ValueError, TypeError):
+            container_id = product.used_container_id
+            if container_id is None:
                 continue
             
             container = container_map.get(container_id)
             if not container:
                 continue
             
-            try:
-                raw_capacity = product.get('capacity')
-                if raw_capacity is None or pd.isna(raw_capacity):
-                    raw_capacity = 1
-                capacity = max(1, int(raw_capacity))
-            except Exception:
-                capacity = 1
+            capacity = product.capacity
 
     # 旧 planned_quantity は使わず、残数量ベースに統一
             def _to_int(x, default=0):
@@ -307,12 +342,12 @@ class TransportPlanner:
             total_quantity = quantity
             
             # 容器ごとの底面積計算（段積み考慮）
-            floor_area_per_container = (container.width * container.depth) / TransportConstants.MM2_TO_M2
-            max_stack = getattr(container, 'max_stack', 1)
+            floor_area_per_container = container.floor_area
+            max_stack = container.max_stack
 
             # 段積み可否：製品と容器の両方がstackable=Trueで、max_stack>1の場合のみ
-            product_stackable = bool(product.get('stackable', 0))  # tinyint(1) -> bool
-            container_stackable = getattr(container, 'stackable', False)
+            product_stackable = product.stackable
+            container_stackable = container.stackable
 
             if max_stack > 1 and product_stackable and container_stackable:
                 stacked_containers = (num_containers + max_stack - 1) // max_stack
@@ -323,19 +358,13 @@ class TransportPlanner:
             total_floor_area += total_floor_area_needed
             
             # トラックIDを取得（arrival_day_offsetは後で調整）
-            truck_ids_str = product.get('used_truck_ids')
-            if truck_ids_str and not pd.isna(truck_ids_str):
-                truck_ids = [int(tid.strip()) for tid in str(truck_ids_str).split(',')]
+            if product.used_truck_ids:
+                truck_ids = list(product.used_truck_ids)
             else:
-                truck_ids = [tid for tid, t in truck_map.items() if t.get('default_use', False)]
+                truck_ids = [tid for tid, t in truck_map.items() if t.default_use]
             
-            # 製品のリードタイムを取得（デフォルト0日）
-            try:
-                product_lead_time = int(product.get('lead_time_days', 0))
-                if pd.isna(product_lead_time):
-                    product_lead_time = 0
-            except (ValueError, TypeError):
-                product_lead_time = 0
+            # 製品のリードタイム（デフォルト0日）
+            product_lead_time = product.lead_time_days
 
             # リードタイムを適用して積載日を計算（納品日 - リードタイム日数）
             primary_loading_date = delivery_date - timedelta(days=product_lead_time)
@@ -357,29 +386,29 @@ class TransportPlanner:
                     optimized_containers = max(1, quantity // capacity)
                     num_containers = optimized_containers
 
-                daily_demands[date_str].append({
-                    'product_id': product_id,
-                    'product_code': product.get('product_code', ''),
-                    'product_name': product.get('product_name', ''),
-                    'container_id': container_id,
-                    'num_containers': num_containers,
-                    'total_quantity': total_quantity ,
-                    'calculated_quantity': total_quantity ,  # 計算値も同じ
-                    'capacity': capacity,
-                    'remainder': remainder,  # 余りを保存
-                    'surplus': surplus,  # 余剰を保存
-                    'floor_area': total_floor_area_needed,
-                    'floor_area_per_container': floor_area_per_container,
-                    'delivery_date': delivery_date,
-                    'loading_date': primary_loading_date,
-                    'truck_ids': truck_ids,
-                    'max_stack': max_stack,
-                    'stackable': product_stackable and container_stackable,  # ✅ 製品と容器の両方を確認
-                    'can_advance': False if manual_fixed else bool(product.get('can_advance', 0)),
-                    'manual_fixed': manual_fixed,
-                    'manual_requested_quantity': manual_qty if manual_fixed else None,
-                    'is_advanced': False
-                })
+                daily_demands[date_str].append(Demand(
+                    product_id=product_id,
+                    product_code=product.product_code,
+                    product_name=product.product_name,
+                    container_id=container_id,
+                    num_containers=num_containers,
+                    total_quantity=total_quantity,
+                    calculated_quantity=total_quantity,  # 計算値も同じ
+                    capacity=capacity,
+                    remainder=remainder,  # 余りを保存
+                    surplus=surplus,  # 余剰を保存
+                    floor_area=total_floor_area_needed,
+                    floor_area_per_container=floor_area_per_container,
+                    delivery_date=delivery_date,
+                    loading_date=primary_loading_date,
+                    truck_ids=truck_ids,
+                    max_stack=max_stack,
+                    stackable=product_stackable and container_stackable,  # ✅ 製品と容器の両方を確認
+                    can_advance=False if manual_fixed else product.can_advance,
+                    manual_fixed=manual_fixed,
+                    manual_requested_quantity=manual_qty if manual_fixed else None,
+                    is_advanced=False
+                ))
         # 日平均積載量を計算
         avg_floor_area = total_floor_area / len(working_dates) if working_dates else 0
                 # 非デフォルトトラック使用判定
@@ -403,7 +432,7 @@ class TransportPlanner:
         if use_non_default:
             available_trucks = {tid: t for tid, t in truck_map.items()}
         else:
-            available_trucks = {tid: t for tid, t in truck_map.items() if t.get('default_use', False)}
+            available_trucks = {tid: t for tid, t in truck_map.items() if t.default_use}
         # 最終日から逆順に処理
         for i in range(len(working_dates) - 1, 0, -1):
             current_date = working_dates[i]
@@ -418,18 +447,18 @@ class TransportPlanner:
             for truck_id, truck_info in available_trucks.items():
                 truck_loads[truck_id] = {
                     'floor_area': 0,
-                    'capacity': (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
+                    'capacity': truck_info.floor_area
                 }
             # 当日の需要を各トラックに仮割り当て
             demands_to_forward = []
             remaining_demands = []
             for demand in adjusted_demands[current_date_str]:
                 # ✅ 既に前倒しされた需要は再度前倒ししない（1日前のみルール）
-                if demand.get('is_advanced', False):
+                if demand.is_advanced:
                     remaining_demands.append(demand)
                     continue
                 # この製品が使用できるトラックを取得
-                allowed_truck_ids = demand.get('truck_ids', [])
+                allowed_truck_ids = demand.truck_ids
                 if not allowed_truck_ids:
                     allowed_truck_ids = list(available_trucks.keys())
                 # シンプルに全てのallowed_truck_idsを使用
@@ -441,21 +470,21 @@ class TransportPlanner:
                     if truck_id not in truck_loads:
                         continue
                     remaining_capacity = truck_loads[truck_id]['capacity'] - truck_loads[truck_id]['floor_area']
-                    if remaining_demand['floor_area'] <= remaining_capacity:
+                    if remaining_demand.floor_area <= remaining_capacity:
                         # 全量積載可能
-                        truck_loads[truck_id]['floor_area'] += remaining_demand['floor_area']
+                        truck_loads[truck_id]['floor_area'] += remaining_demand.floor_area
                         has_loaded_any = True
-                        remaining_demand['floor_area'] = 0
-                        remaining_demand['num_containers'] = 0
+                        remaining_demand.floor_area = 0
+                        remaining_demand.num_containers = 0
                         break
                     elif remaining_capacity > 0:
                         # 一部のみ積載可能 - 分割
-                        container = container_map.get(demand['container_id'])
+                        container = container_map.get(demand.container_id)
                         if container:
-                            floor_area_per_container = (container.width * container.depth) / TransportConstants.MM2_TO_M2
-                            max_stack = getattr(container, 'max_stack', 1)
+                            floor_area_per_container = container.floor_area
+                            max_stack = container.max_stack
                             # 段積み可否（需要データに既に製品と容器の両方を確認済み）
-                            is_stackable = demand.get('stackable', False)
+                            is_stackable = demand.stackable
                             # 段積み考慮で積載可能な容器数を計算
                             if max_stack > 1 and is_stackable:
                                 max_stacks = int(remaining_capacity / floor_area_per_container)
@@ -470,35 +499,35 @@ class TransportPlanner:
                                 else:
                                     loadable_floor_area = floor_area_per_container * loadable_containers
                                 truck_loads[truck_id]['floor_area'] += loadable_floor_area
-                                remaining_demand['floor_area'] -= loadable_floor_area
-                                remaining_demand['num_containers'] -= loadable_containers
+                                remaining_demand.floor_area -= loadable_floor_area
+                                remaining_demand.num_containers -= loadable_containers
                                 has_loaded_any = True
                 # 積載結果を判定
-                if remaining_demand['num_containers'] <= 0:
+                if remaining_demand.num_containers <= 0:
                     # 全量積載成功 - そのまま残す（この日に積載完了）
                     remaining_demands.append(demand)
                 elif has_loaded_any:
                     # 一部積載できた - 積載できた分は記録、残りは前倒しor積み残し
-                    if remaining_demand['num_containers'] < demand['num_containers']:
+                    if remaining_demand.num_containers < demand.num_containers:
                         # 積載できた分を記録
                         loaded_demand = demand.copy()
-                        loaded_demand['num_containers'] = demand['num_containers'] - remaining_demand['num_containers']
-                        loaded_demand['total_quantity'] = loaded_demand['num_containers'] * demand['capacity'] - remaining_demand['surplus']  # 直した
-                        loaded_demand['floor_area'] = demand['floor_area'] - remaining_demand['floor_area']
+                        loaded_demand.num_containers = demand.num_containers - remaining_demand.num_containers
+                        loaded_demand.total_quantity = loaded_demand.num_containers * demand.capacity - remaining_demand.surplus  # 直した
+                        loaded_demand.floor_area = demand.floor_area - remaining_demand.floor_area
                         remaining_demands.append(loaded_demand)
                     # 残りを前倒し候補に
-                    if demand.get('can_advance', False):
-                        remaining_demand['is_advanced'] = True
-                        remaining_demand['loading_date'] = prev_date
+                    if demand.can_advance:
+                        remaining_demand.is_advanced = True
+                        remaining_demand.loading_date = prev_date
                         demands_to_forward.append(remaining_demand)
                     else:
                         # 前倒し不可 - 積み残し
                         remaining_demands.append(remaining_demand)
                 else:
                     # 全く積載できなかった - 前倒し候補
-                    if demand.get('can_advance', False):
-                        demand['is_advanced'] = True
-                        demand['loading_date'] = prev_date
+                    if demand.can_advance:
+                        demand.is_advanced = True
+                        demand.loading_date = prev_date
                         demands_to_forward.append(demand)
                     else:
                         # 前倒し不可 - そのまま残す（警告は後で出る）
@@ -524,30 +553,32 @@ class TransportPlanner:
         if use_non_default:
             available_trucks = {tid: t for tid, t in truck_map.items()}
         else:
-            available_trucks = {tid: t for tid, t in truck_map.items() if t.get('default_use', False)}
+            available_trucks = {tid: t for tid, t in truck_map.items() if t.default_use}
         # トラック状態を初期化（mm²をm²に変換）
         truck_states = {}
         for truck_id, truck_info in available_trucks.items():
-            truck_floor_area = (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
+            truck_floor_area = truck_info.floor_area
             truck_states[truck_id] = {
                 'truck_id': truck_id,
-                'truck_name': truck_info['name'],
+                'truck_name': truck_info.name,
                 'truck_info': truck_info,
                 'loaded_items': [],
                 'remaining_floor_area': truck_floor_area,
                 'total_floor_area': truck_floor_area,
                 'loaded_container_ids': set(),
                 'priority_products': self._get_priority_products(truck_info),
-                'is_default': truck_info.get('default_use', False)
+                'is_default': truck_info.default_use
             }
+        # 候補トラックの選択（固定の優先項目は1回だけ計算し、積載ごとに変わる項目はヒープで更新）
+        selector = TruckSelector(truck_states, self.truck_priority)
         # 製品を優先度順にソート
-        sorted_demands = self._sort_demands_by_priority(demands, truck_states)
+        sorted_demands = self._sort_demands_by_priority(demands, selector)
         
         # 利用可能なトラックをフィルタリング（納期に間に合わないトラックを除外）
         filtered_truck_states = {}
         for truck_id, state in truck_states.items():
             truck_info = truck_map[truck_id]
-            arrival_day_offset = truck_info.get('arrival_day_offset', 0)
+            arrival_day_offset = truck_info.arrival_day_offset
             # 翌日到着のトラックは当日納期の製品には使用不可
             if arrival_day_offset > 0:
                 state['unavailable_for_same_day'] = True
@@ -557,58 +588,51 @@ class TransportPlanner:
         for demand in sorted_demands:
             loaded = False
             # ✅ 元の総注文数量を保存（検証用）
-            original_total_quantity = demand['total_quantity']
-            original_num_containers = demand['num_containers']
-            # 製品のトラック制約を取得
-            allowed_truck_ids = demand.get('truck_ids', [])
-            if not allowed_truck_ids:
-                allowed_truck_ids = list(available_trucks.keys())
-            # 制約に合うトラックのみを対象（順序を保持）
-            candidate_trucks = [tid for tid in allowed_truck_ids if tid in truck_states]
-            if not candidate_trucks:
+            original_total_quantity = demand.total_quantity
+            original_num_containers = demand.num_containers
+            # 製品のトラック制約に合うトラック（制約なしは使用可能な全トラック）
+            allowed_trucks = selector.allowed(demand)
+            if not allowed_trucks:
                 # 候補トラックがない場合、積み残し
                 remaining_demands.append(demand)
                 continue
-            # 到着日に間に合うトラックのみ残す
-            demand_delivery_date = demand.get('delivery_date')
-            candidate_trucks = [
-                tid for tid in candidate_trucks
-                if self._can_arrive_on_time(truck_map[tid], current_date, demand_delivery_date)
-            ]
-            if not candidate_trucks:
+            # 到着日に間に合うトラックが無ければ積み残し（間に合わないトラックは積載時に除外）
+            demand_delivery_date = demand.delivery_date
+            if not any(
+                self._can_arrive_on_time(truck_map[tid], current_date, demand_delivery_date)
+                for tid in allowed_trucks
+            ):
                 remaining_demands.append(demand)
                 continue
-            # 候補トラックを優先順位でソート
-            candidate_trucks = self._sort_candidate_trucks(
-                candidate_trucks, demand, truck_states, truck_map, current_date
-            )
+            # 候補トラックを優先順位順に取得
+            candidate_trucks = selector.candidates(demand)
             # トラックに積載を試みる
             remaining_demand = demand.copy()
             # ✅ 改善: 複数トラックへの分割積載を積極的に試みる
             for truck_id in candidate_trucks:
-                if remaining_demand['num_containers'] <= 0:
+                if remaining_demand.num_containers <= 0:
                     # 全量積載完了
                     break
                 truck_state = truck_states[truck_id]
                 truck_info = truck_map[truck_id]
-                container_id = remaining_demand['container_id']
+                container_id = remaining_demand.container_id
                 
                 # 納期チェック（シンプル化：current_dateから到着可能かのみチェック）
-                demand_delivery_date = remaining_demand.get('delivery_date')
+                demand_delivery_date = remaining_demand.delivery_date
                 if not self._can_arrive_on_time(truck_info, current_date, demand_delivery_date):
                     continue
                 # 同じ容器が既に積載されているか確認（段積み統合用）
                 same_container_items = [item for item in truck_state['loaded_items'] 
-                                       if item['container_id'] == container_id]
+                                       if item.container_id == container_id]
                 if same_container_items:
                     # 同じ容器が既にある場合、段積みとして統合できるか確認
                     container = container_map.get(container_id)
-                    if container and getattr(container, 'stackable', False):
-                        max_stack = getattr(container, 'max_stack', 1)
-                        floor_area_per_container = (container.width * container.depth) / TransportConstants.MM2_TO_M2
+                    if container and container.stackable:
+                        max_stack = container.max_stack
+                        floor_area_per_container = container.floor_area
                         # 既存の容器数を計算（同じ容器IDの全製品）
-                        existing_containers = sum(item['num_containers'] for item in same_container_items)
-                        new_total_containers = existing_containers + remaining_demand['num_containers']
+                        existing_containers = sum(item.num_containers for item in same_container_items)
+                        new_total_containers = existing_containers + remaining_demand.num_containers
                         # 既存の配置数
                         existing_stacks = (existing_containers + max_stack - 1) // max_stack
                         # 新しい配置数
@@ -616,47 +640,58 @@ class TransportPlanner:
                         # 追加で必要な配置数
                         additional_stacks = new_stacks - existing_stacks
                         additional_floor_area = additional_stacks * floor_area_per_container
-                        if additional_floor_area <= truck_state['remaining_floor_area']:
+                        if (additional_floor_area <= truck_state['remaining_floor_area'] and
+                                self._can_pack(truck_info, truck_state['loaded_items'], container,
+                                               remaining_demand, container_map)):
                             # 段積みとして統合可能
-                            truck_state['loaded_items'].append(remaining_demand)
+                            truck_state['loaded_items'].append(LoadedItem.from_demand(remaining_demand))
+                            selector.mark_loaded(truck_id)
                             truck_state['remaining_floor_area'] -= additional_floor_area
                             loaded = True
                             break
                 # 通常の積載チェック
-                if remaining_demand['floor_area'] <= truck_state['remaining_floor_area']:
+                if (remaining_demand.floor_area <= truck_state['remaining_floor_area'] and
+                        self._can_pack(truck_info, truck_state['loaded_items'], container_map.get(container_id),
+                                       remaining_demand, container_map)):
                     # 全量積載可能
-                    loaded_item = remaining_demand.copy()
+                    loaded_item = LoadedItem.from_demand(remaining_demand)
                     # ✅ 数量の整合性を確認
-                    expected_quantity = min(loaded_item['num_containers'] * loaded_item['capacity'] - loaded_item['surplus'], # 直した
+                    expected_quantity = min(loaded_item.num_containers * loaded_item.capacity - loaded_item.surplus, # 直した
                                          original_total_quantity)
-                    if loaded_item['total_quantity'] != expected_quantity:
-                        print(f"      🔄 数量を補正: {loaded_item['total_quantity']} → {expected_quantity}")
-                    loaded_item['total_quantity'] = expected_quantity
+                    if loaded_item.total_quantity != expected_quantity:
+                        logger.debug("数量を補正: %s → %s", loaded_item.total_quantity, expected_quantity)
+                    loaded_item.total_quantity = expected_quantity
                     truck_state['loaded_items'].append(loaded_item)
-                    truck_state['remaining_floor_area'] -= remaining_demand['floor_area']
-                    truck_state['loaded_container_ids'].add(remaining_demand['container_id'])
+                    selector.mark_loaded(truck_id)
+                    truck_state['remaining_floor_area'] -= remaining_demand.floor_area
+                    truck_state['loaded_container_ids'].add(remaining_demand.container_id)
                     loaded = True
-                    remaining_demand['num_containers'] = 0
+                    remaining_demand.num_containers = 0
                     break
                 elif truck_state['remaining_floor_area'] > 0:
                     # 一部積載可能（分割）
-                    container = container_map.get(remaining_demand['container_id'])
+                    container = container_map.get(remaining_demand.container_id)
                     if container:
-                        floor_area_per_container = (container.width * container.depth) / TransportConstants.MM2_TO_M2
-                        max_stack = getattr(container, 'max_stack', 1)
+                        floor_area_per_container = container.floor_area
+                        max_stack = container.max_stack
                         # 段積み可否（需要データに既に製品と容器の両方を確認済み）
-                        is_stackable = remaining_demand.get('stackable', False)
+                        is_stackable = remaining_demand.stackable
                         # 段積み考慮で積載可能な容器数を計算
                         if max_stack > 1 and is_stackable:
                             max_stacks = int(truck_state['remaining_floor_area'] / floor_area_per_container)
                             loadable_containers = max_stacks * max_stack
                         else:
                             loadable_containers = int(truck_state['remaining_floor_area'] / floor_area_per_container)
-                        if loadable_containers > 0 and loadable_containers < remaining_demand['num_containers']:
+                        # 積載エンジンで配置できる数に絞る
+                        loadable_containers = self.loading_engine.max_containers(
+                            truck_info, truck_state['loaded_items'], container, is_stackable,
+                            min(loadable_containers, remaining_demand.num_containers), container_map
+                        )
+                        if loadable_containers > 0 and loadable_containers < remaining_demand.num_containers:
                             # 分割積載の数量計算
-                            capacity = remaining_demand.get('capacity', 1)
-                            original_demand_quantity = demand.get('total_quantity', 0)
-                            remaining_quantity = remaining_demand.get('total_quantity', 0)
+                            capacity = remaining_demand.capacity
+                            original_demand_quantity = demand.total_quantity
+                            remaining_quantity = remaining_demand.total_quantity
 
                             # 積載可能数量の計算（最大容量と残り数量の小さい方）
                             max_loadable_quantity = min(loadable_containers * capacity, remaining_quantity)
@@ -672,50 +707,51 @@ class TransportPlanner:
                                 loadable_floor_area = floor_area_per_container * loadable_containers
                             
                             # 数量の整合性チェックと補正
-                            calculated_quantity = loadable_containers * demand['capacity']
+                            calculated_quantity = loadable_containers * demand.capacity
                             actual_quantity = min(calculated_quantity, original_demand_quantity)
                             
                             # ✅ 分割して積載（loaded_itemとして追加）
-                            actual_quantity = min(loadable_containers * capacity - demand['surplus'], original_demand_quantity - demand['surplus']) # 直した
-                            loaded_item = {
-                                'product_id': demand['product_id'],
-                                'product_code': demand['product_code'],
-                                'product_name': demand['product_name'],
-                                'container_id': demand['container_id'],
-                                'container_name': container.name,
-                                'num_containers': loadable_containers,  # ← 積載できた容器数
-                                'total_quantity': actual_quantity,     # ✅ 注文数量を超えない
-                                'floor_area': loadable_floor_area,
-                                'floor_area_per_container': floor_area_per_container,
-                                'delivery_date': demand['delivery_date'],
-                                'loading_date': demand.get('loading_date'),
-                                'capacity': capacity,
-                                'remainder': demand.get('remainder', 0),
-                                'surplus': demand.get('surplus', 0),
-                                'can_advance': demand.get('can_advance', False),
-                                'is_advanced': demand.get('is_advanced', False),
-                                'truck_ids': demand.get('truck_ids', []),
-                                'stackable': getattr(container, 'stackable', False),
-                                'max_stack': max_stack
-                            }
+                            actual_quantity = min(loadable_containers * capacity - demand.surplus, original_demand_quantity - demand.surplus) # 直した
+                            loaded_item = LoadedItem(
+                                product_id=demand.product_id,
+                                product_code=demand.product_code,
+                                product_name=demand.product_name,
+                                container_id=demand.container_id,
+                                container_name=container.name,
+                                num_containers=loadable_containers,  # ← 積載できた容器数
+                                total_quantity=actual_quantity,     # ✅ 注文数量を超えない
+                                floor_area=loadable_floor_area,
+                                floor_area_per_container=floor_area_per_container,
+                                delivery_date=demand.delivery_date,
+                                loading_date=demand.loading_date,
+                                capacity=capacity,
+                                remainder=demand.remainder,
+                                surplus=demand.surplus,
+                                can_advance=demand.can_advance,
+                                is_advanced=demand.is_advanced,
+                                truck_ids=demand.truck_ids,
+                                stackable=container.stackable,
+                                max_stack=max_stack
+                            )
                             # 数量が容器数×容量と元の注文数量の小さい方と一致するか確認
-                            expected_quantity = min(loaded_item['num_containers'] * capacity - loaded_item['surplus'], original_demand_quantity - loaded_item['surplus'])
+                            expected_quantity = min(loaded_item.num_containers * capacity - loaded_item.surplus, original_demand_quantity - loaded_item.surplus)
                             truck_state['loaded_items'].append(loaded_item)
+                            selector.mark_loaded(truck_id)
                             truck_state['remaining_floor_area'] -= loadable_floor_area
-                            truck_state['loaded_container_ids'].add(demand['container_id'])
+                            truck_state['loaded_container_ids'].add(demand.container_id)
                             # ✅ 残りを更新（必ず容器数ベースで再計算）
-                            remaining_demand['num_containers'] -= loadable_containers
-                            remaining_demand['total_quantity'] = remaining_demand['num_containers'] * demand['capacity'] - remaining_demand['surplus'] # 直した
-                            remaining_demand['floor_area'] -= loadable_floor_area
+                            remaining_demand.num_containers -= loadable_containers
+                            remaining_demand.total_quantity = remaining_demand.num_containers * demand.capacity - remaining_demand.surplus # 直した
+                            remaining_demand.floor_area -= loadable_floor_area
                             # 残り数量が元の総数量を超えていないかの確認は省略（計算ロジックで保証）
                             # 次のトラックへ継続（まだ残りがあれば）
-                            if remaining_demand['num_containers'] > 0:   # ここまで直した
+                            if remaining_demand.num_containers > 0:   # ここまで直した
                                 continue
                             else:
                                 loaded = True
                                 break
             # ✅ フォールバック: 低稼働率トラックへの再配置
-            if not loaded and remaining_demand['num_containers'] > 0:
+            if not loaded and remaining_demand.num_containers > 0:
                 low_utilization_threshold = TransportConstants.LOW_UTILIZATION_THRESHOLD
                 fallback_candidates = [
                     state for state in truck_states.values()
@@ -724,16 +760,16 @@ class TransportPlanner:
                 ]
                 fallback_candidates.sort(key=lambda s: s['remaining_floor_area'], reverse=True)
                 for truck_state in fallback_candidates:
-                    if remaining_demand['num_containers'] <= 0:
+                    if remaining_demand.num_containers <= 0:
                         break
-                    candidate_container = container_map.get(remaining_demand['container_id'])
+                    candidate_container = container_map.get(remaining_demand.container_id)
                     if not candidate_container:
                         continue
-                    floor_area_per_container = (candidate_container.width * candidate_container.depth) / TransportConstants.MM2_TO_M2
+                    floor_area_per_container = candidate_container.floor_area
                     if floor_area_per_container <= 0:
                         continue
-                    max_stack = getattr(candidate_container, 'max_stack', 1)
-                    stackable = getattr(candidate_container, 'stackable', False)
+                    max_stack = candidate_container.max_stack
+                    stackable = candidate_container.stackable
                     available_area = truck_state['remaining_floor_area']
                     if available_area <= 0:
                         continue
@@ -747,8 +783,13 @@ class TransportPlanner:
                         loadable_floor_area = loadable_containers * floor_area_per_container
                     if loadable_containers <= 0:
                         continue
-                    loadable_containers = min(loadable_containers, remaining_demand['num_containers'])
-                    capacity = remaining_demand.get('capacity', 1)
+                    loadable_containers = self.loading_engine.max_containers(
+                        truck_state['truck_info'], truck_state['loaded_items'], candidate_container, stackable,
+                        min(loadable_containers, remaining_demand.num_containers), container_map
+                    )
+                    if loadable_containers <= 0:
+                        continue
+                    capacity = remaining_demand.capacity
                     # 数量は必ず「容器数×容量」で計算
                     loadable_quantity = loadable_containers * capacity
                     if stackable and max_stack > 1:
@@ -756,40 +797,41 @@ class TransportPlanner:
                         loadable_floor_area = floor_area_per_container * stacked
                     else:
                         loadable_floor_area = floor_area_per_container * loadable_containers
-                    fallback_item = {
-                        'product_id': remaining_demand['product_id'],
-                        'product_code': remaining_demand['product_code'],
-                        'product_name': remaining_demand.get('product_name', ''),
-                        'container_id': remaining_demand['container_id'],
-                        'container_name': candidate_container.name,
-                        'num_containers': loadable_containers,
-                        'remainder': demand.get('remainder', 0),
-                        'surplus': demand.get('surplus', 0),
-                        'total_quantity': loadable_containers * demand['capacity'] - demand['surplus'],  # ✅ 必ず「容器数×容量」-余りで計算 直した
-                        'floor_area': loadable_floor_area,
-                        'floor_area_per_container': floor_area_per_container,
-                        'delivery_date': remaining_demand['delivery_date'],
-                        'loading_date': remaining_demand.get('loading_date'),
-                        'capacity': capacity,
-                        'can_advance': remaining_demand.get('can_advance', False),
-                        'is_advanced': remaining_demand.get('is_advanced', False),
-                        'truck_ids': remaining_demand.get('truck_ids', []),
-                        'stackable': stackable,
-                        'max_stack': max_stack
-                    }
+                    fallback_item = LoadedItem(
+                        product_id=remaining_demand.product_id,
+                        product_code=remaining_demand.product_code,
+                        product_name=remaining_demand.product_name,
+                        container_id=remaining_demand.container_id,
+                        container_name=candidate_container.name,
+                        num_containers=loadable_containers,
+                        remainder=demand.remainder,
+                        surplus=demand.surplus,
+                        total_quantity=loadable_containers * demand.capacity - demand.surplus,  # ✅ 必ず「容器数×容量」-余りで計算 直した
+                        floor_area=loadable_floor_area,
+                        floor_area_per_container=floor_area_per_container,
+                        delivery_date=remaining_demand.delivery_date,
+                        loading_date=remaining_demand.loading_date,
+                        capacity=capacity,
+                        can_advance=remaining_demand.can_advance,
+                        is_advanced=remaining_demand.is_advanced,
+                        truck_ids=remaining_demand.truck_ids,
+                        stackable=stackable,
+                        max_stack=max_stack
+                    )
                     # 数量計算の検証は省略（計算ロジックで保証）
                     truck_state['loaded_items'].append(fallback_item)
+                    selector.mark_loaded(truck_state['truck_id'])
                     truck_state['remaining_floor_area'] -= loadable_floor_area
-                    truck_state['loaded_container_ids'].add(remaining_demand['container_id'])
-                    remaining_demand['num_containers'] -= loadable_containers
-                    remaining_demand['total_quantity'] = remaining_demand['num_containers'] * demand['capacity'] - demand['surplus']
-                    remaining_demand['floor_area'] -= loadable_floor_area
+                    truck_state['loaded_container_ids'].add(remaining_demand.container_id)
+                    remaining_demand.num_containers -= loadable_containers
+                    remaining_demand.total_quantity = remaining_demand.num_containers * demand.capacity - demand.surplus
+                    remaining_demand.floor_area -= loadable_floor_area
                     loaded = True
-                if remaining_demand['num_containers'] > 0:
+                if remaining_demand.num_containers > 0:
                     # 最終検証: 積み残し数量が正しいか確認
-                    expected_remaining_quantity = remaining_demand['num_containers'] * remaining_demand['capacity'] - remaining_demand['surplus']
-                    if remaining_demand['total_quantity'] != expected_remaining_quantity:
-                        remaining_demand['total_quantity'] = expected_remaining_quantity
+                    expected_remaining_quantity = remaining_demand.num_containers * remaining_demand.capacity - remaining_demand.surplus
+                    if remaining_demand.total_quantity != expected_remaining_quantity:
+                        remaining_demand.total_quantity = expected_remaining_quantity
                     remaining_demands.append(remaining_demand)
         # トラックプランを作成（積載があるトラックのみ）
         final_truck_plans = []
@@ -797,22 +839,22 @@ class TransportPlanner:
             if truck_state['loaded_items']:
                 # 各loaded_itemの数量を検証
                 for item in truck_state['loaded_items']:
-                    expected_quantity = item['num_containers'] * item.get('capacity', 1)- item.get('surplus', 0)
-                    if item['total_quantity'] != expected_quantity:
-                        item['total_quantity'] = expected_quantity
+                    expected_quantity = item.num_containers * item.capacity - (item.surplus or 0)
+                    if item.total_quantity != expected_quantity:
+                        item.total_quantity = expected_quantity
                 # 積載率を計算（容器別に段積み考慮）
                 container_totals = {}  # container_id -> 容器数の合計
                 # 容器別に集計
                 for item in truck_state['loaded_items']:
-                    container_id = item['container_id']
+                    container_id = item.container_id
                     if container_id not in container_totals:
                         container_totals[container_id] = {
                             'num_containers': 0,
-                            'floor_area_per_container': item['floor_area_per_container'],
-                            'stackable': item.get('stackable', False),
-                            'max_stack': item.get('max_stack', 1)
+                            'floor_area_per_container': item.floor_area_per_container,
+                            'stackable': item.stackable,
+                            'max_stack': item.max_stack
                         }
-                    container_totals[container_id]['num_containers'] += item['num_containers']
+                    container_totals[container_id]['num_containers'] += item.num_containers
                 # 容器別に底面積を計算
                 total_loaded_area = 0
                 for container_id, info in container_totals.items():
@@ -836,23 +878,7 @@ class TransportPlanner:
                 }
                 final_truck_plans.append(truck_plan)
         # 積み残し警告
-        if remaining_demands:
-            for demand in remaining_demands:
-                can_advance = demand.get('can_advance', False)
-                is_final_day_overflow = demand.get('final_day_overflow', False)
-                if is_final_day_overflow:
-                    # 最終日の容量オーバー - 特別警告
-                    warnings.append(
-                        f"🚨 最終日容量オーバー: {demand['product_code']} ({demand['num_containers']}容器={demand['total_quantity']}個) ※非デフォルトトラック追加が必要"
-                    )
-                elif can_advance:
-                    warnings.append(
-                        f"⚠ 積み残し: {demand['product_code']} ({demand['num_containers']}容器={demand['total_quantity']}個) ※前倒し配送可能"
-                    )
-                else:
-                    warnings.append(
-                        f"❌ 積み残し: {demand['product_code']} ({demand['num_containers']}容器={demand['total_quantity']}個) ※前倒し不可"
-                    )
+        warnings.extend(self._remaining_warnings(remaining_demands))
         return {
             'trucks': final_truck_plans,
             'total_trips': len(final_truck_plans),
@@ -860,14 +886,39 @@ class TransportPlanner:
             'remaining_demands': remaining_demands
         }
 
-    def _get_priority_products(self, truck_info) -> List[str]:
+    def _remaining_warnings(self, remaining_demands) -> List[str]:
+        """積み残しの警告メッセージ"""
+        warnings = []
+        for demand in remaining_demands:
+            can_advance = demand.can_advance
+            is_final_day_overflow = demand.final_day_overflow
+            if is_final_day_overflow:
+                # 最終日の容量オーバー - 特別警告
+                warnings.append(
+                    f"🚨 最終日容量オーバー: {demand.product_code} ({demand.num_containers}容器={demand.total_quantity}個) ※非デフォルトトラック追加が必要"
+                )
+            elif can_advance:
+                warnings.append(
+                    f"⚠ 積み残し: {demand.product_code} ({demand.num_containers}容器={demand.total_quantity}個) ※前倒し配送可能"
+                )
+            else:
+                warnings.append(
+                    f"❌ 積み残し: {demand.product_code} ({demand.num_containers}容器={demand.total_quantity}個) ※前倒し不可"
+                )
+        return warnings
+
+    def _can_pack(self, truck_info, loaded_items, container, demand, container_map) -> bool:
+        """積載エンジンで需要の全容器を積載済みの容器と一緒に配置できるか"""
+        packable = self.loading_engine.max_containers(
+            truck_info, loaded_items, container, demand.stackable, demand.num_containers, container_map
+        )
+        return packable >= demand.num_containers
+
+    def _get_priority_products(self, truck_info) -> FrozenSet[str]:
         """トラックの優先積載製品を取得"""
-        priority_products_str = truck_info.get('priority_product_codes') or truck_info.get('priority_products', '')
-        if priority_products_str and not pd.isna(priority_products_str):
-            return [p.strip() for p in str(priority_products_str).split(',')]
-        return []
+        return truck_info.priority_product_codes
 
-    def _sort_demands_by_priority(self, demands, truck_states):
+    def _sort_demands_by_priority(self, demands, selector):
         """
         製品を優先度順にソート
         優先順位:
@@ -878,9 +929,9 @@ class TransportPlanner:
         5. その他
         """
         def get_priority(demand):
-            product_code = demand['product_code']
-            truck_ids = demand.get('truck_ids', [])
-            is_advanced = demand.get('is_advanced', False)
+            product_code = demand.product_code
+            truck_ids = demand.truck_ids
+            is_advanced = demand.is_advanced
             # 1. 前倒しされた製品（最優先）
             if is_advanced:
                 return (0, truck_ids[0] if truck_ids else 0, product_code)
@@ -888,9 +939,9 @@ class TransportPlanner:
             if truck_ids and len(truck_ids) == 1:
                 return (1, truck_ids[0], product_code)
             # 3. 優先積載製品に指定されている場合
-            for truck_id, truck_state in truck_states.items():
-                if product_code in truck_state['priority_products']:
-                    return (2, truck_id, product_code)
+            priority_truck_id = selector.priority_truck(product_code)
+            if priority_truck_id is not None:
+                return (2, priority_truck_id, product_code)
             # 4. トラック制約がある場合
             if truck_ids:
                 return (3, truck_ids[0], product_code)
@@ -898,70 +949,6 @@ class TransportPlanner:
             return (4, 0, product_code)
         return sorted(demands, key=get_priority)
 
-    def _sort_candidate_trucks(self, candidate_trucks, demand, truck_states, truck_map, current_date=None):
-        """候補トラックを優先順位でソート
-        優先順位：
-        0. 納期に間に合うトラック（最優先）
-        1. 製品のused_truck_idsの順序
-        2. 優先積載製品に指定されている
-        3. 同容器が既に積載されている
-        4. 空き容量が大きい
-        """
-        product_code = demand['product_code']
-        container_id = demand['container_id']
-        truck_ids = demand.get('truck_ids', [])
-        delivery_date = demand.get('delivery_date')
-        def get_truck_priority(truck_id):
-            truck_state = truck_states[truck_id]
-            truck_info = truck_map[truck_id]
-
-            # 0. 納期に間に合うトラックを最優先
-            if current_date and delivery_date:
-                if not self._can_arrive_on_time(truck_info, current_date, delivery_date):
-                    return (1, 9999, 9999, 1, 1, 0)  # 納期に間に合わないトラックは最低優先度
-
-            # 1. 製品のused_truck_idsの順序を優先（インデックスが小さいほど優先）
-            if truck_ids and truck_id in truck_ids:
-                truck_priority_index = truck_ids.index(truck_id)
-            else:
-                truck_priority_index = 9999  # リストにない場合は低優先度
-
-            # 2. トラック便優先順位（arrival_day_offset）
-            # - truck_priority='morning': arrival_day_offset=0（朝便/当日着）を優先
-            # - truck_priority='evening': arrival_day_offset=1（夕便/翌日着）を優先
-            arrival_offset = int(truck_info.get('arrival_day_offset', 0) or 0)
-            if self.truck_priority == 'evening':
-                # 夕便優先: arrival_day_offset=1を優先（0が最優先）
-                truck_time_priority = 0 if arrival_offset == 1 else 1
-            else:
-                # 朝便優先（デフォルト）: arrival_day_offset=0を優先（0が最優先）
-                truck_time_priority = 0 if arrival_offset == 0 else 1
-
-            # 3. 優先積載製品に指定されている
-            if product_code in truck_state['priority_products']:
-                priority_product_flag = 0
-            else:
-                priority_product_flag = 1
-            # 4. 同容器が既に積載されている
-            if container_id in truck_state['loaded_container_ids']:
-                same_container_flag = 0
-            else:
-                same_container_flag = 1
-            # 5. 空き容量（大きい方が優先）
-            remaining_area = truck_state['remaining_floor_area']
-            # 6. 現在の利用率（低い方を優先）
-            utilized_area = truck_state['total_floor_area'] - truck_state['remaining_floor_area']
-            utilization_rate = utilized_area / truck_state['total_floor_area'] if truck_state['total_floor_area'] else 0
-            return (
-                truck_priority_index,
-                truck_time_priority,
-                priority_product_flag,
-                same_container_flag,
-                -remaining_area,
-                utilization_rate
-            )
-        return sorted(candidate_trucks, key=get_truck_priority)
-
     def _parse_date(self, date_value):
         """日付を解析"""
         if not date_value:
@@ -1013,8 +1000,8 @@ class TransportPlanner:
         # Step4: 積み残し再配置開始
         for demand in remaining_demands:
             relocated = False
-            truck_ids = demand.get('truck_ids', [])
-            original_loading_date = demand.get('loading_date')
+            truck_ids = demand.truck_ids
+            original_loading_date = demand.loading_date
             
             # 全てのトラック候補を試す
             for truck_id in truck_ids:
@@ -1035,16 +1022,16 @@ class TransportPlanner:
                 if use_non_default:
                     available_trucks = {tid: t for tid, t in truck_map.items()}
                 else:
-                    available_trucks = {tid: t for tid, t in truck_map.items() if t.get('default_use', False)}
+                    available_trucks = {tid: t for tid, t in truck_map.items() if t.default_use}
                 # このトラックが使用可能かチェック
                 if truck_id not in available_trucks:
                     continue
                 # このトラックの状態を確認
                 truck_info = truck_map[truck_id]
-                if not self._can_arrive_on_time(truck_info, target_date, demand.get('delivery_date')):
+                if not self._can_arrive_on_time(truck_info, target_date, demand.delivery_date):
                     continue
-                truck_name = truck_info['name']
-                truck_floor_area = (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
+                truck_name = truck_info.name
+                truck_floor_area = truck_info.floor_area
                 # 既存のトラックプランを探す
                 target_truck_plan = None
                 for truck_plan in day_plan['trucks']:
@@ -1057,15 +1044,15 @@ class TransportPlanner:
                     loaded_area = 0
                     container_totals = {}
                     for item in target_truck_plan['loaded_items']:
-                        container_id = item['container_id']
+                        container_id = item.container_id
                         if container_id not in container_totals:
                             container_totals[container_id] = {
                                 'num_containers': 0,
-                                'floor_area_per_container': item['floor_area_per_container'],
-                                'stackable': item.get('stackable', False),
-                                'max_stack': item.get('max_stack', 1)
+                                'floor_area_per_container': item.floor_area_per_container,
+                                'stackable': item.stackable,
+                                'max_stack': item.max_stack
                             }
-                        container_totals[container_id]['num_containers'] += item['num_containers']
+                        container_totals[container_id]['num_containers'] += item.num_containers
                     for container_id, info in container_totals.items():
                         if info['stackable'] and info['max_stack'] > 1:
                             stacked_containers = (info['num_containers'] + info['max_stack'] - 1) // info['max_stack']
@@ -1078,27 +1065,30 @@ class TransportPlanner:
                     # トラックプランが存在しない場合、全容量が空き
                     remaining_area = truck_floor_area
                 # 積載可能かチェック
-                if demand['floor_area'] <= remaining_area:
+                loaded_items = target_truck_plan['loaded_items'] if target_truck_plan else []
+                if (demand.floor_area <= remaining_area and
+                        self._can_pack(truck_info, loaded_items, container_map.get(demand.container_id),
+                                       demand, container_map)):
                     # 積載可能
-                    loaded_item = demand.copy()
-                    loaded_item['loading_date'] = target_date
+                    loaded_item = LoadedItem.from_demand(demand)
+                    loaded_item.loading_date = target_date
                     # 数量検証
-                    expected_quantity = loaded_item['num_containers'] * loaded_item['capacity']
-                    if loaded_item['total_quantity'] != expected_quantity:
-                        loaded_item['total_quantity'] = expected_quantity
-                    if original_loading_date:
-                        loaded_item.setdefault('original_date', original_loading_date)
+                    expected_quantity = loaded_item.num_containers * loaded_item.capacity
+                    if loaded_item.total_quantity != expected_quantity:
+                        loaded_item.total_quantity = expected_quantity
+                    if original_loading_date and loaded_item.original_date is None:
+                        loaded_item.original_date = original_loading_date
                     if target_truck_plan:
                         # 既存のトラックプランに追加
                         target_truck_plan['loaded_items'].append(loaded_item)
                         # 積載率を再計算
-                        new_loaded_area = loaded_area + demand['floor_area']
+                        new_loaded_area = loaded_area + demand.floor_area
                         new_utilization_rate = round(new_loaded_area / truck_floor_area * 100, 1)
                         target_truck_plan['utilization']['floor_area_rate'] = new_utilization_rate
                         target_truck_plan['utilization']['volume_rate'] = new_utilization_rate
                     else:
                         # 新しいトラックプランを作成
-                        new_utilization_rate = round(demand['floor_area'] / truck_floor_area * 100, 1)
+                        new_utilization_rate = round(demand.floor_area / truck_floor_area * 100, 1)
                         new_truck_plan = {
                             'truck_id': truck_id,
                             'truck_name': truck_name,
@@ -1111,14 +1101,14 @@ class TransportPlanner:
                         day_plan['trucks'].append(new_truck_plan)
                         day_plan['total_trips'] += 1
                     # 元の日の警告を削除
-                    original_date = demand.get('loading_date')
+                    original_date = demand.loading_date
                     if original_date:
                         original_date_str = original_date.strftime('%Y-%m-%d')
                         if original_date_str in daily_plans:
                             original_plan = daily_plans[original_date_str]
                             # 積み残し警告を削除
-                            product_code = demand['product_code']
-                            num_containers = demand['num_containers']
+                            product_code = demand.product_code
+                            num_containers = demand.num_containers
                             original_plan['warnings'] = [
                                 w for w in original_plan['warnings']
                                 if not (product_code in w and f"{num_containers}容器" in w)
@@ -1127,7 +1117,7 @@ class TransportPlanner:
                             if 'remaining_demands' in original_plan:
                                 original_plan['remaining_demands'] = [
                                     d for d in original_plan['remaining_demands']
-                                    if not (d['product_code'] == product_code and d['num_containers'] == num_containers)
+                                    if not (d.product_code == product_code and d.num_containers == num_containers)
                                 ]
                     relocated = True
                     break
@@ -1143,7 +1133,7 @@ class TransportPlanner:
         if use_non_default:
             available_trucks = {tid: t for tid, t in truck_map.items()}
         else:
-            available_trucks = {tid: t for tid, t in truck_map.items() if t.get('default_use', False)}
+            available_trucks = {tid: t for tid, t in truck_map.items() if t.default_use}
         # 最終日から逆順に処理
         for i in range(len(working_dates) - 1, 0, -1):
             current_date = working_dates[i]
@@ -1164,14 +1154,14 @@ class TransportPlanner:
             demands_to_forward = []
             for demand in remaining_demands:
                 # 前倒し可能かチェック
-                if not demand.get('can_advance', False):
+                if not demand.can_advance:
                     continue
                 # 数量検証
-                expected_quantity = demand['num_containers'] * demand['capacity']
-                if demand['total_quantity'] != expected_quantity:
-                    demand['total_quantity'] = expected_quantity
+                expected_quantity = demand.num_containers * demand.capacity
+                if demand.total_quantity != expected_quantity:
+                    demand.total_quantity = expected_quantity
                 # この製品が使用できるトラックを取得
-                allowed_truck_ids = demand.get('truck_ids', [])
+                allowed_truck_ids = demand.truck_ids
                 if not allowed_truck_ids:
                     allowed_truck_ids = list(available_trucks.keys())
                 # 前日の各トラックの空き容量を確認
@@ -1180,9 +1170,9 @@ class TransportPlanner:
                         continue
                     # 前日のこのトラックの状態を確認（mm²をm²に変換）
                     truck_info = truck_map[truck_id]
-                    if not self._can_arrive_on_time(truck_info, prev_date, demand.get('delivery_date')):
+                    if not self._can_arrive_on_time(truck_info, prev_date, demand.delivery_date):
                         continue
-                    truck_floor_area = (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
+                    truck_floor_area = truck_info.floor_area
                     # 既存のトラックプランを探す
                     target_truck_plan = None
                     for truck_plan in prev_plan['trucks']:
@@ -1194,15 +1184,15 @@ class TransportPlanner:
                         loaded_area = 0
                         container_totals = {}
                         for item in target_truck_plan['loaded_items']:
-                            container_id = item['container_id']
+                            container_id = item.container_id
                             if container_id not in container_totals:
                                 container_totals[container_id] = {
                                     'num_containers': 0,
-                                    'floor_area_per_container': item['floor_area_per_container'],
-                                    'stackable': item.get('stackable', False),
-                                    'max_stack': item.get('max_stack', 1)
+                                    'floor_area_per_container': item.floor_area_per_container,
+                                    'stackable': item.stackable,
+                                    'max_stack': item.max_stack
                                 }
-                            container_totals[container_id]['num_containers'] += item['num_containers']
+                            container_totals[container_id]['num_containers'] += item.num_containers
                         for container_id, info in container_totals.items():
                             if info['stackable'] and info['max_stack'] > 1:
                                 stacked_containers = (info['num_containers'] + info['max_stack'] - 1) // info['max_stack']
@@ -1215,49 +1205,52 @@ class TransportPlanner:
                         # トラックプランが存在しない場合、新規作成が必要
                         remaining_area = truck_floor_area
                     # 積載可能かチェック
-                    demand_floor_area = demand['floor_area']
+                    demand_floor_area = demand.floor_area
                     if demand_floor_area <= remaining_area:
                         # 積載可能 - 前倒し実行
-                        container = container_map.get(demand['container_id'])
+                        container = container_map.get(demand.container_id)
                         if not container:
                             continue
+                        loaded_items = target_truck_plan['loaded_items'] if target_truck_plan else []
+                        if not self._can_pack(truck_info, loaded_items, container, demand, container_map):
+                            continue
                         # 前日のトラックプランに追加
                         if not target_truck_plan:
                             # 新規トラックプラン作成
                             target_truck_plan = {
                                 'truck_id': truck_id,
-                                'truck_name': truck_info['name'],
+                                'truck_name': truck_info.name,
                                 'loaded_items': [],
                                 'utilization': {'floor_area_rate': 0, 'volume_rate': 0}
                             }
                             prev_plan['trucks'].append(target_truck_plan)
                             prev_plan['total_trips'] = len(prev_plan['trucks'])
                         # アイテムを追加
-                        capacity = demand['capacity']
-                        expected_quantity = demand['num_containers'] * capacity
-                        target_truck_plan['loaded_items'].append({
-                            'product_id': demand['product_id'],
-                            'product_code': demand['product_code'],
-                            'product_name': demand.get('product_name', ''),
-                            'container_id': demand['container_id'],
-                            'container_name': container.name,
-                            'num_containers': demand['num_containers'],
-                            'total_quantity': expected_quantity,
-                            'floor_area_per_container': demand['floor_area'] / demand['num_containers'],
-                            'delivery_date': demand['delivery_date'],
-                            'loading_date': prev_date,
-                            'is_advanced': True,  # 前倒しフラグ
-                            'stackable': container.stackable,
-                            'max_stack': container.max_stack,
-                            'capacity': capacity
-                        })
+                        capacity = demand.capacity
+                        expected_quantity = demand.num_containers * capacity
+                        target_truck_plan['loaded_items'].append(LoadedItem(
+                            product_id=demand.product_id,
+                            product_code=demand.product_code,
+                            product_name=demand.product_name,
+                            container_id=demand.container_id,
+                            container_name=container.name,
+                            num_containers=demand.num_containers,
+                            total_quantity=expected_quantity,
+                            floor_area_per_container=demand.floor_area / demand.num_containers,
+                            delivery_date=demand.delivery_date,
+                            loading_date=prev_date,
+                            is_advanced=True,  # 前倒しフラグ
+                            stackable=container.stackable,
+                            max_stack=container.max_stack,
+                            capacity=capacity
+                        ))
                         # 積載率を再計算
                         self._recalculate_utilization(target_truck_plan, truck_info, container_map)
                         # 前倒し成功を記録
                         demands_to_forward.append(demand)
                         # 当日の警告を削除
-                        product_code = demand['product_code']
-                        num_containers = demand['num_containers']
+                        product_code = demand.product_code
+                        num_containers = demand.num_containers
                         current_plan['warnings'] = [
                             w for w in current_plan['warnings']
                             if not (product_code in w and f"{num_containers}容器" in w)
@@ -1272,30 +1265,30 @@ class TransportPlanner:
 
     def _recalculate_utilization(self, truck_plan, truck_info, container_map):
         """トラックの積載率を再計算（mm²をm²に変換）"""
-        truck_floor_area = (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
-        truck_volume = (truck_info['width'] * truck_info['depth'] * truck_info['height']) / TransportConstants.MM3_TO_M3
+        truck_floor_area = truck_info.floor_area
+        truck_volume = truck_info.volume
         loaded_area = 0
         loaded_volume = 0
         container_totals = {}
         # 数量検証しながら集計
         for item in truck_plan['loaded_items']:
-            container_id = item['container_id']
+            container_id = item.container_id
             # 数量検証
-            expected_quantity = item['num_containers'] * item.get('capacity', 1)
-            if item['total_quantity'] != expected_quantity:
-                item['total_quantity'] = expected_quantity
+            expected_quantity = item.num_containers * item.capacity
+            if item.total_quantity != expected_quantity:
+                item.total_quantity = expected_quantity
             if container_id not in container_totals:
                 container = container_map.get(container_id)
                 if not container:
                     continue
                 container_totals[container_id] = {
                     'num_containers': 0,
-                    'floor_area_per_container': item['floor_area_per_container'],
-                    'volume_per_container': (container.width * container.depth * container.height) / TransportConstants.MM3_TO_M3,
+                    'floor_area_per_container': item.floor_area_per_container,
+                    'volume_per_container': container.volume,
                     'stackable': container.stackable,
                     'max_stack': container.max_stack
                 }
-            container_totals[container_id]['num_containers'] += item['num_containers']
+            container_totals[container_id]['num_containers'] += item.num_containers
         for container_id, info in container_totals.items():
             if info['stackable'] and info['max_stack'] > 1:
                 # 段積み可能
@@ -1319,7 +1312,7 @@ class TransportPlanner:
         非デフォルトトラックは翌日着のため、前倒しとならない
         """
         # 非デフォルトトラックを取得
-        non_default_trucks = {tid: t for tid, t in truck_map.items() if not t.get('default_use', False)}
+        non_default_trucks = {tid: t for tid, t in truck_map.items() if not t.default_use}
         if not non_default_trucks:
             # 非デフォルトトラックがない場合は何もしない
             return
@@ -1337,9 +1330,9 @@ class TransportPlanner:
             for demand in list(remaining_demands):
                 relocated = False
                 # 数量検証
-                expected_quantity = demand['num_containers'] * demand['capacity']
-                if demand['total_quantity'] != expected_quantity:
-                    demand['total_quantity'] = expected_quantity
+                expected_quantity = demand.num_containers * demand.capacity
+                if demand.total_quantity != expected_quantity:
+                    demand.total_quantity = expected_quantity
                 # ✅ 特便は緊急対応のため、トラック制約を無視して全非デフォルトトラックを使用可能
                 candidate_trucks = list(non_default_trucks.keys())
                 if not candidate_trucks:
@@ -1347,9 +1340,9 @@ class TransportPlanner:
                 # 各非デフォルトトラック候補を試す
                 for truck_id in candidate_trucks:
                     truck_info = truck_map[truck_id]
-                    if not self._can_arrive_on_time(truck_info, current_date, demand.get('delivery_date')):
+                    if not self._can_arrive_on_time(truck_info, current_date, demand.delivery_date):
                         continue
-                    truck_floor_area = (truck_info['width'] * truck_info['depth']) / TransportConstants.MM2_TO_M2
+                    truck_floor_area = truck_info.floor_area
                     # 前日のこのトラックの状態を確認
                     target_truck_plan = None
                     for truck_plan in current_plan['trucks']:
@@ -1361,15 +1354,15 @@ class TransportPlanner:
                         loaded_area = 0
                         container_totals = {}
                         for item in target_truck_plan['loaded_items']:
-                            container_id = item['container_id']
+                            container_id = item.container_id
                             if container_id not in container_totals:
                                 container_totals[container_id] = {
                                     'num_containers': 0,
-                                    'floor_area_per_container': item['floor_area_per_container'],
-                                    'stackable': item.get('stackable', False),
-                                    'max_stack': item.get('max_stack', 1)
+                                    'floor_area_per_container': item.floor_area_per_container,
+                                    'stackable': item.stackable,
+                                    'max_stack': item.max_stack
                                 }
-                            container_totals[container_id]['num_containers'] += item['num_containers']
+                            container_totals[container_id]['num_containers'] += item.num_containers
                         for container_id, info in container_totals.items():
                             if info['stackable'] and info['max_stack'] > 1:
                                 stacked_containers = (info['num_containers'] + info['max_stack'] - 1) // info['max_stack']
@@ -1382,47 +1375,50 @@ class TransportPlanner:
                         # トラックプランが存在しない場合、全容量が空き
                         remaining_area = truck_floor_area
                     # 積載可能かチェック
-                    demand_floor_area = demand['floor_area']
+                    demand_floor_area = demand.floor_area
                     if demand_floor_area <= remaining_area:
                         # 積載可能 - 前日に特便を出す
-                        container = container_map.get(demand['container_id'])
+                        container = container_map.get(demand.container_id)
                         if not container:
                             continue
+                        loaded_items = target_truck_plan['loaded_items'] if target_truck_plan else []
+                        if not self._can_pack(truck_info, loaded_items, container, demand, container_map):
+                            continue
                         # 前日のトラックプランに追加
                         if not target_truck_plan:
                             # 新規トラックプラン作成
                             target_truck_plan = {
                                 'truck_id': truck_id,
-                                'truck_name': truck_info['name'],
+                                'truck_name': truck_info.name,
                                 'loaded_items': [],
                                 'utilization': {'floor_area_rate': 0, 'volume_rate': 0}
                             }
                             current_plan['trucks'].append(target_truck_plan)
                             current_plan['total_trips'] = len(current_plan['trucks'])
                         # アイテムを追加（特便フラグを設定）
-                        capacity = demand['capacity']
-                        expected_quantity = demand['num_containers'] * capacity
-                        target_truck_plan['loaded_items'].append({
-                            'product_id': demand['product_id'],
-                            'product_code': demand['product_code'],
-                            'product_name': demand.get('product_name', ''),
-                            'container_id': demand['container_id'],
-                            'container_name': container.name,
-                            'num_containers': demand['num_containers'],
-                            'total_quantity': expected_quantity,
-                            'floor_area_per_container': demand['floor_area'] / demand['num_containers'],
-                            'delivery_date': demand['delivery_date'],
-                            'loading_date': current_date,
-                            'is_special_delivery': True,  # 特便フラグ
-                            'stackable': container.stackable,
-                            'max_stack': container.max_stack,
-                            'capacity': capacity
-                        })
+                        capacity = demand.capacity
+                        expected_quantity = demand.num_containers * capacity
+                        target_truck_plan['loaded_items'].append(LoadedItem(
+                            product_id=demand.product_id,
+                            product_code=demand.product_code,
+                            product_name=demand.product_name,
+                            container_id=demand.container_id,
+                            container_name=container.name,
+                            num_containers=demand.num_containers,
+                            total_quantity=expected_quantity,
+                            floor_area_per_container=demand.floor_area / demand.num_containers,
+                            delivery_date=demand.delivery_date,
+                            loading_date=current_date,
+                            is_special_delivery=True,  # 特便フラグ
+                            stackable=container.stackable,
+                            max_stack=container.max_stack,
+                            capacity=capacity
+                        ))
                         # 積載率を再計算
                         self._recalculate_utilization(target_truck_plan, truck_info, container_map)
                         # 当日の警告を削除
-                        product_code = demand['product_code']
-                        num_containers = demand['num_containers']
+                        product_code = demand.product_code
+                        num_containers = demand.num_containers
                         current_plan['warnings'] = [
                             w for w in current_plan['warnings']
                             if not (product_code in w and f"{num_containers}容器" in w)
@@ -1436,7 +1432,7 @@ class TransportPlanner:
         calculated_quantity = num_containers * capacity
         verified_quantity = min(calculated_quantity, original_quantity)
         if calculated_quantity != verified_quantity:
-            print(f"    🔄 数量補正: {calculated_quantity} → {verified_quantity}")
+            logger.debug("数量補正: %s → %s", calculated_quantity, verified_quantity)
         return verified_quantity
 
     def _adjust_for_next_day_arrival_trucks(self, daily_plans, truck_map, start_date):
@@ -1465,7 +1461,7 @@ class TransportPlanner:
                     continue
                     
                 truck_info = truck_map[truck_id]
-                arrival_offset = int(truck_info.get('arrival_day_offset', 0) or 0)
+                arrival_offset = truck_info.arrival_day_offset
                 
                 # arrival_day_offset=1のトラックを前日に移動
                 if arrival_offset == 1:
@@ -1502,8 +1498,8 @@ class TransportPlanner:
                 
                 # 全ての積載アイテムのloading_dateを更新
                 for item in truck_plan['loaded_items']:
-                    item['loading_date'] = prev_date
-                    item['adjusted_for_next_day_arrival'] = True  # フラグを追加
+                    item.loading_date = prev_date
+                    item.adjusted_for_next_day_arrival = True  # フラグを追加
                 
                 # 前日のプランに追加
                 daily_plans[prev_date_str]['trucks'].append(truck_plan)
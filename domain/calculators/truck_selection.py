@@ -0,0 +1,182 @@
+# app/domain/calculators/truck_selection.py
+"""
+候補トラックの選択（Step3 日次積載計画で需要ごとにトラックを選ぶ順序）
+
+- 需要ごとに変わらない項目（used_truck_ids の順位・朝便/夕便の優先・優先積載製品フラグ）は1日分の計画開始時に1回だけ計算
+- 積載のたびに変わる項目（同容器の積載有無・空き底面積・利用率）はインデックス付きヒープで持ち、積載したトラックだけ更新
+- 候補の並び順（同順位の扱いを含む）は従来の並べ替えと同じ
+  1. 製品の used_truck_ids の順序
+  2. トラック便の優先（朝便 / 夕便）
+  3. 優先積載製品に指定されている
+  4. 同容器が既に積載されている
+  5. 空き底面積が大きい
+  6. 利用率が低い
+  7. トラックの登録順
+"""
+
+import heapq
+from typing import Any, Dict, FrozenSet, Hashable, Iterator, List, Optional, Tuple
+
+
+class IndexedHeap:
+    """キーを更新できる二分ヒープ（要素 → ヒープ上の位置の索引付き）"""
+
+    def __init__(self):
+        self._items: List[Hashable] = []
+        self._keys: Dict[Hashable, Tuple] = {}
+        self._position: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, item: Hashable, key: Tuple):
+        if item in self._position:
+            self.update(item, key)
+            return
+        self._items.append(item)
+        self._keys[item] = key
+        self._position[item] = len(self._items) - 1
+        self._sift_up(len(self._items) - 1)
+
+    def update(self, item: Hashable, key: Tuple):
+        """要素のキーを変更（O(log n)）"""
+        old_key = self._keys[item]
+        self._keys[item] = key
+        index = self._position[item]
+        if key < old_key:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def ordered(self) -> Iterator[Hashable]:
+        """キーの小さい順に要素を返す（ヒープは変更しない。k 件取り出しで O(k log k)）"""
+        if not self._items:
+            return
+        frontier = [(self._keys[self._items[0]], 0)]
+        while frontier:
+            _, index = heapq.heappop(frontier)
+            yield self._items[index]
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self._items):
+                    heapq.heappush(frontier, (self._keys[self._items[child]], child))
+
+    def _swap(self, i: int, j: int):
+        items = self._items
+        items[i], items[j] = items[j], items[i]
+        self._position[items[i]] = i
+        self._position[items[j]] = j
+
+    def _sift_up(self, index: int):
+        while index > 0:
+            parent = (index - 1) // 2
+            if self._keys[self._items[index]] < self._keys[self._items[parent]]:
+                self._swap(index, parent)
+                index = parent
+            else:
+                break
+
+    def _sift_down(self, index: int):
+        size = len(self._items)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._keys[self._items[child]] < self._keys[self._items[smallest]]:
+                    smallest = child
+            if smallest == index:
+                break
+            self._swap(index, smallest)
+            index = smallest
+
+
+class TruckSelector:
+    """1日分のトラック状態から、需要ごとの候補トラックを優先順に返す"""
+
+    def __init__(self, truck_states: Dict[int, Dict[str, Any]], truck_priority: str = 'morning'):
+        """
+        Args:
+            truck_states: トラックID → トラック状態（_create_daily_loading_plan の truck_states）
+            truck_priority: 'morning'（朝便優先）または 'evening'（夕便優先）
+        """
+        self.truck_states = truck_states
+        self._truck_ids = list(truck_states)
+        self._order = {truck_id: index for index, truck_id in enumerate(self._truck_ids)}
+
+        preferred_offset = 1 if truck_priority == 'evening' else 0
+        self._time_priority = {
+            truck_id: 0 if state['truck_info'].arrival_day_offset == preferred_offset else 1
+            for truck_id, state in truck_states.items()
+        }
+
+        # 優先積載製品 → 指定しているトラック（先頭のトラックは需要の並べ替えに使う）
+        self._priority_owner: Dict[Any, int] = {}
+        priority_trucks: Dict[Any, List[int]] = {}
+        for truck_id, state in truck_states.items():
+            for product_code in state['priority_products']:
+                self._priority_owner.setdefault(product_code, truck_id)
+                priority_trucks.setdefault(product_code, []).append(truck_id)
+        self._priority_trucks = {code: frozenset(ids) for code, ids in priority_trucks.items()}
+
+        self._restricted: Dict[Tuple[int, ...], List[int]] = {}
+        self._heaps: Dict[Tuple[Any, FrozenSet[int]], IndexedHeap] = {}
+        self._pending = set()
+
+    def priority_truck(self, product_code) -> Optional[int]:
+        """製品を優先積載製品に指定している最初のトラック"""
+        return self._priority_owner.get(product_code)
+
+    def allowed(self, demand) -> List[int]:
+        """需要を積める候補トラック（優先順ではない）"""
+        if demand.truck_ids:
+            return self._restricted_candidates(demand.truck_ids)
+        return self._truck_ids
+
+    def candidates(self, demand):
+        """候補トラックを優先順に返す（返した後の積載は次の呼び出しで反映される）"""
+        self._apply_pending()
+        if demand.truck_ids:
+            # used_truck_ids の順位で並びが決まる（他の項目は同じトラック同士の比較にしか効かない）
+            return self._restricted_candidates(demand.truck_ids)
+        group = (demand.container_id, self._priority_trucks.get(demand.product_code, frozenset()))
+        heap = self._heaps.get(group)
+        if heap is None:
+            heap = IndexedHeap()
+            for truck_id in self._truck_ids:
+                heap.push(truck_id, self._key(truck_id, group))
+            self._heaps[group] = heap
+        return heap.ordered()
+
+    def mark_loaded(self, truck_id: int):
+        """トラックへ積載したことを記録（次の candidates() でキーを更新）"""
+        self._pending.add(truck_id)
+
+    def _restricted_candidates(self, truck_ids) -> List[int]:
+        key = tuple(truck_ids)
+        candidates = self._restricted.get(key)
+        if candidates is None:
+            candidates = [truck_id for truck_id in key if truck_id in self.truck_states]
+            candidates.sort(key=key.index)
+            self._restricted[key] = candidates
+        return candidates
+
+    def _key(self, truck_id: int, group) -> Tuple:
+        container_id, priority_trucks = group
+        state = self.truck_states[truck_id]
+        remaining_area = state['remaining_floor_area']
+        total_area = state['total_floor_area']
+        utilization_rate = (total_area - remaining_area) / total_area if total_area else 0
+        return (
+            self._time_priority[truck_id],
+            0 if truck_id in priority_trucks else 1,
+            0 if container_id in state['loaded_container_ids'] else 1,
+            -remaining_area,
+            utilization_rate,
+            self._order[truck_id],
+        )
+
+    def _apply_pending(self):
+        if not self._pending:
+            return
+        for group, heap in self._heaps.items():
+            for truck_id in self._pending:
+                heap.update(truck_id, self._key(truck_id, group))
+        self._pending.clear()
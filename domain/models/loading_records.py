@@ -0,0 +1,150 @@
+# app/domain/models/loading_records.py
+"""
+積載計画プランナー内部で使うレコード
+
+- 需要（Demand）・積載品（LoadedItem）を __slots__ 付き dataclass で表す（マスタ側は master_data）
+- プランナー内部では属性アクセスのみで扱い、計画結果を返す時点で to_dict() により従来の辞書形式へ変換する
+- to_dict() は必須項目以外の「未設定（None / False）」の項目を出力しない（従来の辞書にキーが無かった状態と同じ）
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+
+def _copy_record(record):
+    """浅いコピー（dict.copy() と同じくリスト等は共有）"""
+    clone = object.__new__(type(record))
+    for name in record.__slots__:
+        object.__setattr__(clone, name, getattr(record, name))
+    return clone
+
+
+def _record_to_dict(record, required) -> Dict[str, Any]:
+    result = {}
+    for name in record.__slots__:
+        value = getattr(record, name)
+        if name not in required and (value is None or value is False):
+            continue
+        result[name] = value
+    return result
+
+
+@dataclass(slots=True)
+class Demand:
+    """積載日ごとの需要（受注1件分、または分割後の残り）"""
+    product_id: int
+    product_code: Any
+    product_name: Any
+    container_id: int
+    num_containers: int
+    total_quantity: int
+    capacity: int
+    remainder: int
+    surplus: int
+    floor_area: float
+    floor_area_per_container: float
+    delivery_date: date
+    loading_date: Optional[date]
+    truck_ids: List[int]
+    max_stack: int
+    stackable: bool
+    container_name: Optional[str] = None
+    calculated_quantity: Optional[int] = None
+    can_advance: bool = False
+    manual_fixed: bool = False
+    manual_requested_quantity: Any = None
+    is_advanced: bool = False
+    final_day_overflow: bool = False
+
+    # to_dict() で常に出力する項目
+    _REQUIRED = frozenset((
+        'product_id', 'product_code', 'product_name', 'container_id', 'num_containers',
+        'total_quantity', 'capacity', 'remainder', 'surplus', 'floor_area',
+        'floor_area_per_container', 'delivery_date', 'loading_date', 'truck_ids',
+        'max_stack', 'stackable',
+    ))
+
+    def copy(self) -> 'Demand':
+        return _copy_record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _record_to_dict(self, self._REQUIRED)
+
+
+@dataclass(slots=True)
+class LoadedItem:
+    """トラックに積載した製品（1トラック・1便内の1明細）"""
+    product_id: int
+    product_code: Any
+    product_name: Any
+    container_id: int
+    num_containers: int
+    total_quantity: int
+    delivery_date: Optional[date]
+    container_name: Optional[str] = None
+    floor_area: Optional[float] = None
+    floor_area_per_container: Optional[float] = None
+    loading_date: Optional[date] = None
+    capacity: Optional[int] = None
+    remainder: Optional[int] = None
+    surplus: Optional[int] = None
+    truck_ids: Optional[List[int]] = None
+    stackable: Any = None
+    max_stack: Optional[int] = None
+    calculated_quantity: Optional[int] = None
+    can_advance: bool = False
+    manual_fixed: bool = False
+    manual_requested_quantity: Any = None
+    is_advanced: bool = False
+    original_date: Optional[date] = None
+    is_special_delivery: bool = False
+    adjusted_for_next_day_arrival: bool = False
+
+    _REQUIRED = frozenset((
+        'product_id', 'product_code', 'product_name', 'container_id', 'num_containers',
+        'total_quantity', 'delivery_date',
+    ))
+
+    @classmethod
+    def from_demand(cls, demand: Demand) -> 'LoadedItem':
+        """需要をそのまま積載品にする（需要側の項目を引き継ぐ）"""
+        return cls(
+            product_id=demand.product_id,
+            product_code=demand.product_code,
+            product_name=demand.product_name,
+            container_id=demand.container_id,
+            num_containers=demand.num_containers,
+            total_quantity=demand.total_quantity,
+            delivery_date=demand.delivery_date,
+            container_name=demand.container_name,
+            floor_area=demand.floor_area,
+            floor_area_per_container=demand.floor_area_per_container,
+            loading_date=demand.loading_date,
+            capacity=demand.capacity,
+            remainder=demand.remainder,
+            surplus=demand.surplus,
+            truck_ids=demand.truck_ids,
+            stackable=demand.stackable,
+            max_stack=demand.max_stack,
+            calculated_quantity=demand.calculated_quantity,
+            can_advance=demand.can_advance,
+            manual_fixed=demand.manual_fixed,
+            manual_requested_quantity=demand.manual_requested_quantity,
+            is_advanced=demand.is_advanced,
+        )
+
+    def copy(self) -> 'LoadedItem':
+        return _copy_record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _record_to_dict(self, self._REQUIRED)
+
+
+def daily_plans_to_dicts(daily_plans: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """プランナー内部の日別計画（レコード）を計画結果の辞書形式へ変換（その場で置き換える）"""
+    for plan in daily_plans.values():
+        for truck_plan in plan.get('trucks', []):
+            truck_plan['loaded_items'] = [item.to_dict() for item in truck_plan['loaded_items']]
+        plan['remaining_demands'] = [demand.to_dict() for demand in plan.get('remaining_demands', [])]
+    return daily_plans
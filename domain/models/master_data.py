@@ -0,0 +1,244 @@
+# app/domain/models/master_data.py
+"""
+積載計画用マスタデータ（トラック・製品・容器）
+
+- DataFrame / 容器オブジェクトを計画開始時に1回だけ型付きレコードへ変換する
+- 文字列項目は変換時に解析済み（used_truck_ids はタプル、priority_product_codes は frozenset）
+- プランナー（Kubota様・Tiera様）と積載率再計算で共通利用する
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+def _is_missing(value) -> bool:
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def _to_number(value) -> Optional[float]:
+    """数値に変換できない・欠損の場合は None"""
+    if _is_missing(value):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_id(value) -> Optional[int]:
+    if _is_missing(value):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_id_list(value) -> Tuple[int, ...]:
+    """'1, 2, 3' 形式のID列をタプルに変換（数値でない要素は無視）"""
+    if not value or _is_missing(value):
+        return ()
+    ids = []
+    for token in str(value).split(','):
+        try:
+            ids.append(int(token.strip()))
+        except ValueError:
+            continue
+    return tuple(ids)
+
+
+def _parse_code_set(value) -> FrozenSet[str]:
+    if not value or _is_missing(value):
+        return frozenset()
+    return frozenset(code.strip() for code in str(value).split(','))
+
+
+def _frame_records(df: Optional[pd.DataFrame]):
+    """DataFrame を行辞書のリストに変換（iterrows より高速）"""
+    if df is None or getattr(df, 'empty', True):
+        return []
+    return df.to_dict('records')
+
+
+@dataclass(slots=True)
+class TruckInfo:
+    """トラックマスタ1行分（底面積・容積は mm → m² / m³ 換算済み）"""
+    id: int
+    name: Any
+    width: Any
+    depth: Any
+    height: Any
+    default_use: bool = False
+    arrival_day_offset: int = 0
+    max_weight: Any = None
+    departure_time: Any = None
+    arrival_time: Any = None
+    priority_product_codes: FrozenSet[str] = frozenset()
+    floor_area: float = 0.0  # m²
+    volume: float = 0.0  # m³
+
+    @classmethod
+    def from_row(cls, truck_id: int, row) -> 'TruckInfo':
+        """trucks_df の1行（dict / Series）から作成"""
+        width = row.get('width')
+        depth = row.get('depth')
+        height = row.get('height')
+
+        offset = row.get('arrival_day_offset', 0)
+        try:
+            offset = 0 if _is_missing(offset) else int(offset or 0)
+        except (ValueError, TypeError):
+            offset = 0
+
+        w, d, h = _to_number(width), _to_number(depth), _to_number(height)
+        floor_area = (w * d) / 1_000_000 if w and d else 0.0
+        volume = (w * d * h) / 1_000_000_000 if w and d and h else 0.0
+
+        return cls(
+            id=truck_id,
+            name=row.get('name', f'トラック{truck_id}'),
+            width=width,
+            depth=depth,
+            height=height,
+            default_use=bool(row.get('default_use', False)),
+            arrival_day_offset=offset,
+            max_weight=row.get('max_weight'),
+            departure_time=row.get('departure_time'),
+            arrival_time=row.get('arrival_time'),
+            priority_product_codes=_parse_code_set(
+                row.get('priority_product_codes') or row.get('priority_products', '')
+            ),
+            floor_area=floor_area,
+            volume=volume,
+        )
+
+
+@dataclass(slots=True)
+class ProductInfo:
+    """製品マスタ1行分（積載計画で使う項目のみ）"""
+    id: int
+    product_code: Any = ''
+    product_name: Any = ''
+    used_container_id: Optional[int] = None
+    capacity: int = 1
+    stackable: bool = False
+    can_advance: bool = False
+    lead_time_days: int = 0
+    used_truck_ids: Tuple[int, ...] = ()
+
+    @classmethod
+    def from_row(cls, product_id: int, row) -> 'ProductInfo':
+        """products_df の1行（dict / Series）から作成"""
+        container_id = row.get('used_container_id')
+        if not container_id or _is_missing(container_id):
+            container_id = None
+        else:
+            container_id = _record_id(container_id)
+
+        try:
+            raw_capacity = row.get('capacity')
+            if _is_missing(raw_capacity):
+                raw_capacity = 1
+            capacity = max(1, int(raw_capacity))
+        except Exception:
+            capacity = 1
+
+        try:
+            lead_time = int(row.get('lead_time_days', 0))
+        except (ValueError, TypeError):
+            lead_time = 0
+
+        return cls(
+            id=product_id,
+            product_code=row.get('product_code', ''),
+            product_name=row.get('product_name', ''),
+            used_container_id=container_id,
+            capacity=capacity,
+            stackable=bool(row.get('stackable', 0)),  # tinyint(1) -> bool
+            can_advance=bool(row.get('can_advance', 0)),
+            lead_time_days=lead_time,
+            used_truck_ids=_parse_id_list(row.get('used_truck_ids')),
+        )
+
+
+@dataclass(slots=True)
+class ContainerInfo:
+    """容器マスタ1件分（底面積・容積は mm → m² / m³ 換算済み）"""
+    id: int
+    name: Any = None
+    width: Any = None
+    depth: Any = None
+    height: Any = None
+    max_weight: Any = None
+    can_mix: Any = None
+    stackable: bool = False
+    max_stack: int = 1
+    floor_area: float = 0.0  # m²
+    volume: float = 0.0  # m³
+
+    @classmethod
+    def from_object(cls, container) -> 'ContainerInfo':
+        """TransportRepository.get_containers() の要素（属性アクセス可能なオブジェクト）から作成"""
+        width = getattr(container, 'width', None)
+        depth = getattr(container, 'depth', None)
+        height = getattr(container, 'height', None)
+        return cls(
+            id=container.id,
+            name=getattr(container, 'name', None),
+            width=width,
+            depth=depth,
+            height=height,
+            max_weight=getattr(container, 'max_weight', None),
+            can_mix=getattr(container, 'can_mix', None),
+            stackable=getattr(container, 'stackable', False),
+            max_stack=getattr(container, 'max_stack', 1),
+            floor_area=((width or 0) * (depth or 0)) / 1_000_000,
+            volume=((width or 0) * (depth or 0) * (height or 0)) / 1_000_000_000,
+        )
+
+
+class MasterData:
+    """積載計画用のマスタデータ（ID → レコード）"""
+
+    def __init__(self,
+                 trucks: Optional[Dict[int, TruckInfo]] = None,
+                 products: Optional[Dict[int, ProductInfo]] = None,
+                 containers: Optional[Dict[int, ContainerInfo]] = None):
+        self.trucks = trucks or {}
+        self.products = products or {}
+        self.containers = containers or {}
+
+    @classmethod
+    def from_sources(cls,
+                     trucks_df: Optional[pd.DataFrame] = None,
+                     products_df: Optional[pd.DataFrame] = None,
+                     containers: Optional[Iterable[Any]] = None) -> 'MasterData':
+        """
+        リポジトリの取得結果からマスタデータを作成
+
+        Args:
+            trucks_df: TransportRepository.get_trucks() の結果
+            products_df: ProductRepository.get_all_products() の結果
+            containers: TransportRepository.get_containers() の結果
+        """
+        trucks = {}
+        for row in _frame_records(trucks_df):
+            truck_id = _record_id(row.get('id'))
+            if truck_id is not None:
+                trucks[truck_id] = TruckInfo.from_row(truck_id, row)
+
+        products = {}
+        for row in _frame_records(products_df):
+            product_id = _record_id(row.get('id'))
+            if product_id is not None:
+                products[product_id] = ProductInfo.from_row(product_id, row)
+
+        container_map = {}
+        for container in containers or []:
+            if getattr(container, 'id', None) is None:
+                continue
+            container_map[container.id] = ContainerInfo.from_object(container)
+
+        return cls(trucks=trucks, products=products, containers=container_map)
@@ -1,24 +1,10 @@
 # app/main.py
 import streamlit as st
 from repository.database_manager import DatabaseManager, CustomerDatabaseManager
-from services.production_service import ProductionService
-from services.transport_service import TransportService
-from services.tiera_transport_service import TieraTransportService  # ✅ Tiera様専用
 from services.auth_service import AuthService
 from ui.layouts.sidebar import create_sidebar
-from ui.pages.dashboard_page import DashboardPage
-from ui.pages.csv_import_page import CSVImportPage
-from ui.pages.constraints_page import ConstraintsPage
-from ui.pages.product_page import ProductPage
-from ui.pages.product_group_page import ProductGroupPage
-from ui.pages.production_page import ProductionPage
-from ui.pages.transport_page import TransportPage
-from ui.pages.tiera_transport_page import TieraTransportPage  # ✅ Tiera様専用
-from ui.pages.delivery_progress_page import DeliveryProgressPage
-from ui.pages.login_page import LoginPage
-from ui.pages.user_management_page import UserManagementPage
+from ui.page_registry import PageRegistry
 from config_all import APP_CONFIG
-from ui.pages.calendar_page import CalendarPage
 
 class ProductionPlanningApp:
     """生産計画アプリケーション - メイン制御クラス"""
@@ -30,16 +16,13 @@ class ProductionPlanningApp:
         # 認証用データベース（常にデフォルトDBを使用、顧客切り替えの影響を受けない）
         self.auth_db = DatabaseManager()
 
-        # サービス層初期化
-        self.production_service = ProductionService(self.db)
-        self.auth_service = AuthService(self.auth_db)  # 認証は専用DBを使用
+        # 認証は専用DBを使用
+        self.auth_service = AuthService(self.auth_db)
 
-        # 認証ページ
-        self.login_page = LoginPage(self.auth_service)
-
-        # ✅ 顧客別のTransportServiceは動的に作成（初期化時は不要）
-        self.transport_service = None
-        self.pages = {}
+        # ✅ その他のサービス・ページは表示するページが必要とした時点で作成
+        self.current_customer = None
+        self._services = {}
+        self.pages = PageRegistry(self._get_service)
     
     def run(self):
         """アプリケーション実行"""
@@ -53,7 +36,8 @@ class ProductionPlanningApp:
         # 認証チェック
         if not st.session_state.get('authenticated', False):
             # ログイン画面を表示
-            self.login_page.show()
+            from ui.pages.login_page import LoginPage
+            LoginPage(self.auth_service).show()
             return
 
         # サイドバー表示（認証サービスを渡す）
@@ -64,8 +48,7 @@ class ProductionPlanningApp:
         if self.db.get_current_customer() != current_customer:
             self.db.switch_customer(current_customer)
 
-        # ✅ 顧客別にTransportServiceとページを初期化
-        self._initialize_pages(current_customer)
+        self.current_customer = current_customer
 
         # ページアクセス権限チェック
         user = st.session_state.get('user')
@@ -76,7 +59,7 @@ class ProductionPlanningApp:
         # 選択されたページを表示
         if selected_page in self.pages:
             try:
-                self.pages[selected_page].show()
+                self.pages.get(selected_page, current_customer).show()
             except Exception as e:
                 st.error(f"ページ表示エラー: {e}")
                 st.info("データベース接続を確認してください")
@@ -88,35 +71,43 @@ class ProductionPlanningApp:
         else:
             st.error("選択されたページが見つかりません")
 
-    def _initialize_pages(self, customer: str):
-        """顧客別にページを初期化"""
-        # ✅ 顧客別にTransportServiceを作成
-        if customer == 'tiera':
-            self.transport_service = TieraTransportService(self.db)
-            transport_page = TieraTransportPage(self.transport_service, self.auth_service)
-        else:
-            # Kubota様は従来のTransportService
-            self.transport_service = TransportService(self.db)
-            transport_page = TransportPage(self.transport_service, self.auth_service)
-
-        # ページ初期化
-        self.pages = {
-            "ダッシュボード": DashboardPage(self.production_service),
-            "CSV受注取込": CSVImportPage(self.db, self.auth_service),
-            "製品管理": ProductPage(self.production_service, self.transport_service, self.auth_service),
-            "製品群管理": ProductGroupPage(self.production_service, self.auth_service),
-            "制限設定": ConstraintsPage(self.production_service, self.auth_service),
-            "生産計画": ProductionPage(self.production_service, self.transport_service, self.auth_service),
-            "配送便計画": transport_page,  # ✅ 顧客別のTransportPage
-            "納入進度": DeliveryProgressPage(self.transport_service, self.auth_service),
-            "📅 会社カレンダー": CalendarPage(self.db, self.auth_service),
-            "ユーザー管理": UserManagementPage(self.auth_service),
-        }
+    def _get_service(self, name: str):
+        """ページが必要とするサービスを取得（初回のみ import・作成）"""
+        if name == 'db':
+            return self.db
+        if name == 'auth_service':
+            return self.auth_service
+
+        # 配送便のサービスは顧客ごと
+        key = (name, self.current_customer if name == 'transport_service' else None)
+        service = self._services.get(key)
+        if service is None:
+            if name == 'production_service':
+                from services.production_service import ProductionService
+                service = ProductionService(self.db)
+            elif name == 'dashboard_service':
+                from services.dashboard_service import DashboardService
+                service = DashboardService(self.db)
+            elif name == 'transport_service':
+                # ✅ 顧客別にTransportServiceを作成
+                if self.current_customer == 'tiera':
+                    from services.tiera_transport_service import TieraTransportService  # ✅ Tiera様専用
+                    service = TieraTransportService(self.db)
+                else:
+                    # Kubota様は従来のTransportService
+                    from services.transport_service import TransportService
+                    service = TransportService(self.db)
+            else:
+                raise KeyError(f"未登録のサービス: {name}")
+            self._services[key] = service
+        return service
 
     def __del__(self):
         """リソース解放"""
         if hasattr(self, 'db'):
             self.db.close()
+        if hasattr(self, 'auth_db'):
+            self.auth_db.close()
 
 def main():
     """メイン関数"""
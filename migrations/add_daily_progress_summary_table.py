@@ -0,0 +1,108 @@
+"""
+日別需要・進度サマリーテーブル（daily_progress_summary）を追加するマイグレーション
+
+使い方:
+    python migrations/add_daily_progress_summary_table.py [customer]
+    python migrations/add_daily_progress_summary_table.py [customer] rollback
+
+テーブル作成後、既存の delivery_progress / production_instructions_detail から初期集計を行う。
+"""
+import sys
+import os
+
+# Windows環境でUTF-8出力を有効にする
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_manager import CustomerDatabaseManager
+from repository.daily_summary_repository import DailySummaryRepository
+from sqlalchemy import text
+
+
+def migrate(customer: str = None):
+    """マイグレーション実行"""
+    db = CustomerDatabaseManager(customer)
+    session = db.get_session()
+
+    try:
+        print("=" * 60)
+        print(f"マイグレーション開始: daily_progress_summary追加（顧客: {db.get_current_customer()}）")
+        print("=" * 60)
+
+        # 1. テーブル作成
+        print("\n1. daily_progress_summaryテーブルを作成中...")
+        session.execute(text("""
+            CREATE TABLE IF NOT EXISTS daily_progress_summary (
+                customer VARCHAR(50) NOT NULL,
+                product_id INT NOT NULL,
+                summary_date DATE NOT NULL,
+                order_quantity INT NOT NULL DEFAULT 0,
+                planned_quantity INT NOT NULL DEFAULT 0,
+                shipped_quantity INT NOT NULL DEFAULT 0,
+                remaining_quantity INT NOT NULL DEFAULT 0,
+                instruction_quantity INT NOT NULL DEFAULT 0,
+                order_count INT NOT NULL DEFAULT 0,
+                unshipped_count INT NOT NULL DEFAULT 0,
+                partial_count INT NOT NULL DEFAULT 0,
+                completed_count INT NOT NULL DEFAULT 0,
+                cumulative_order_quantity INT NOT NULL DEFAULT 0,
+                cumulative_planned_quantity INT NOT NULL DEFAULT 0,
+                cumulative_shipped_quantity INT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (customer, product_id, summary_date),
+                KEY idx_daily_summary_date (customer, summary_date)
+            )
+        """))
+        session.commit()
+        print("✓ テーブルを作成しました")
+
+    except Exception as e:
+        session.rollback()
+        print(f"\n❌ エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+    finally:
+        session.close()
+
+    # 2. 既存明細から初期集計
+    print("\n2. 既存データから初期集計中...")
+    if DailySummaryRepository(db).refresh():
+        print("✓ 初期集計が完了しました")
+    else:
+        print("❌ 初期集計に失敗しました")
+        return
+
+    print("\n" + "=" * 60)
+    print("マイグレーション完了！")
+    print("=" * 60)
+
+
+def rollback(customer: str = None):
+    """ロールバック"""
+    db = CustomerDatabaseManager(customer)
+    session = db.get_session()
+
+    try:
+        session.execute(text("DROP TABLE IF EXISTS daily_progress_summary"))
+        session.commit()
+        print("✓ daily_progress_summaryテーブルを削除しました")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ ロールバックエラー: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != 'rollback']
+    target_customer = args[0] if args else None
+
+    if 'rollback' in sys.argv[1:]:
+        rollback(target_customer)
+    else:
+        migrate(target_customer)
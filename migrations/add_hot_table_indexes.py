@@ -0,0 +1,167 @@
+"""
+よく使う検索条件に合わせたインデックスと検査対象フラグ列を追加するマイグレーション
+
+使い方:
+    python migrations/add_hot_table_indexes.py [customer]
+    python migrations/add_hot_table_indexes.py [customer] rollback
+
+追加するもの:
+- delivery_progress
+    - (delivery_date, status)        … 期間指定の受注取得（get_delivery_progress）
+    - (product_id, delivery_date)    … 製品×納期の検索（ストアド・get_progress_by_product_and_date）
+    - UNIQUE (order_id)              … CSV取込の upsert（重複データがある場合は通常のインデックス）
+- production_instructions_detail
+    - (instruction_date)             … 期間指定の生産指示取得
+    - is_inspection_target 列        … 検査区分に F / $ を含むか（生成列・STORED）
+    - (is_inspection_target, instruction_date) … 検査対象一覧（前方ワイルドカードの LIKE を使わない）
+- loading_plan_detail
+    - (plan_id, loading_date, truck_id) … 計画単位の明細取得・日付×トラックの明細取得
+    - (loading_date, truck_id)
+
+インデックス・列が既にある場合は何もしないので、何度実行してもよい。
+検索の実行計画は check_query_plans.py で確認できる。
+"""
+import sys
+import os
+
+# Windows環境でUTF-8出力を有効にする
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_manager import CustomerDatabaseManager
+from sqlalchemy import text
+
+# (テーブル, インデックス名, 列, UNIQUE)
+INDEXES = [
+    ('delivery_progress', 'idx_dp_delivery_date_status', 'delivery_date, status', False),
+    ('delivery_progress', 'idx_dp_product_delivery_date', 'product_id, delivery_date', False),
+    ('delivery_progress', 'uq_dp_order_id', 'order_id', True),
+    ('production_instructions_detail', 'idx_pid_instruction_date', 'instruction_date', False),
+    ('production_instructions_detail', 'idx_pid_inspection_date', 'is_inspection_target, instruction_date', False),
+    ('loading_plan_detail', 'idx_lpd_plan_date_truck', 'plan_id, loading_date, truck_id', False),
+    ('loading_plan_detail', 'idx_lpd_date_truck', 'loading_date, truck_id', False),
+]
+
+INSPECTION_COLUMN = 'is_inspection_target'
+
+
+def _index_exists(session, table: str, index_name: str) -> bool:
+    row = session.execute(text("""
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = :table
+          AND index_name = :index_name
+    """), {'table': table, 'index_name': index_name}).fetchone()
+    return bool(row and row[0])
+
+
+def _column_exists(session, table: str, column: str) -> bool:
+    row = session.execute(text("""
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = :table
+          AND column_name = :column
+    """), {'table': table, 'column': column}).fetchone()
+    return bool(row and row[0])
+
+
+def _has_duplicate_order_ids(session) -> bool:
+    row = session.execute(text("""
+        SELECT COUNT(*)
+        FROM (
+            SELECT order_id
+            FROM delivery_progress
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+            HAVING COUNT(*) > 1
+        ) duplicated
+    """)).fetchone()
+    return bool(row and row[0])
+
+
+def migrate(customer: str = None):
+    """マイグレーション実行"""
+    db = CustomerDatabaseManager(customer)
+    session = db.get_session()
+
+    try:
+        print("=" * 60)
+        print(f"マイグレーション開始: 検索用インデックス追加（顧客: {db.get_current_customer()}）")
+        print("=" * 60)
+
+        # 1. 検査対象フラグ列（検査区分に F / $ を含む）
+        print(f"\n1. production_instructions_detail.{INSPECTION_COLUMN} 列を追加中...")
+        if _column_exists(session, 'production_instructions_detail', INSPECTION_COLUMN):
+            print("  - 既に存在します")
+        else:
+            session.execute(text(f"""
+                ALTER TABLE production_instructions_detail
+                ADD COLUMN {INSPECTION_COLUMN} TINYINT(1)
+                    AS (IFNULL(inspection_category LIKE '%F%' OR inspection_category LIKE '%$%', 0)) STORED
+            """))
+            print("✓ 列を追加しました")
+
+        # 2. インデックス
+        print("\n2. インデックスを追加中...")
+        for table, index_name, columns, unique in INDEXES:
+            if _index_exists(session, table, index_name):
+                print(f"  - {table}.{index_name}: 既に存在します")
+                continue
+            if unique and _has_duplicate_order_ids(session):
+                print(f"  ⚠️ {table}.{index_name}: order_id に重複があるため通常のインデックスで作成します")
+                unique = False
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            session.execute(text(f"CREATE {kind} {index_name} ON {table} ({columns})"))
+            print(f"✓ {table}.{index_name} ({columns})")
+
+        session.commit()
+
+    except Exception as e:
+        session.rollback()
+        print(f"\n❌ エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+    finally:
+        session.close()
+
+    print("\n" + "=" * 60)
+    print("マイグレーション完了！")
+    print("=" * 60)
+
+
+def rollback(customer: str = None):
+    """ロールバック"""
+    db = CustomerDatabaseManager(customer)
+    session = db.get_session()
+
+    try:
+        for table, index_name, _, _ in reversed(INDEXES):
+            if _index_exists(session, table, index_name):
+                session.execute(text(f"DROP INDEX {index_name} ON {table}"))
+                print(f"✓ {table}.{index_name} を削除しました")
+        if _column_exists(session, 'production_instructions_detail', INSPECTION_COLUMN):
+            session.execute(text(f"ALTER TABLE production_instructions_detail DROP COLUMN {INSPECTION_COLUMN}"))
+            print(f"✓ production_instructions_detail.{INSPECTION_COLUMN} を削除しました")
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ ロールバックエラー: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != 'rollback']
+    target_customer = args[0] if args else None
+
+    if 'rollback' in sys.argv[1:]:
+        rollback(target_customer)
+    else:
+        migrate(target_customer)
@@ -1,9 +1,32 @@
 # app/repository/calendar_repository.py
 from sqlalchemy import text
-from datetime import date, timedelta
-from typing import List, Dict, Optional
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
+from .db_router import route_reads
+from app_logging import get_logger
 
+logger = get_logger(__name__)
+
+
+def working_day_sql(date_column: str, alias: str = 'wd_cal') -> Tuple[str, str]:
+    """
+    営業日のみに絞り込むSQL（JOIN句, WHERE条件）
+
+    CalendarRepository.is_working_day と同じ判定をSQLで行う:
+    カレンダー登録日は is_working_day の値、未登録日は土日以外を営業日とみなす
+    （DAYOFWEEK: 1=日曜, 7=土曜）
+    """
+    join_clause = f"LEFT JOIN company_calendar {alias} ON {alias}.calendar_date = {date_column}"
+    condition = (
+        f"CASE WHEN {alias}.calendar_date IS NULL "
+        f"THEN DAYOFWEEK({date_column}) NOT IN (1, 7) "
+        f"ELSE {alias}.is_working_day <> 0 END"
+    )
+    return join_clause, condition
+
+
+@route_reads
 class CalendarRepository:
     """会社カレンダーリポジトリ"""
     
@@ -147,7 +170,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"休日追加エラー: {e}")
+            logger.exception("休日追加エラー: %s", e)
             return False
         finally:
             session.close()
@@ -175,7 +198,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"営業日追加エラー: {e}")
+            logger.exception("営業日追加エラー: %s", e)
             return False
         finally:
             session.close()
@@ -195,7 +218,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"日付削除エラー: {e}")
+            logger.exception("日付削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -230,7 +253,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"一括インポートエラー: {e}")
+            logger.exception("一括インポートエラー: %s", e)
             return 0
         finally:
             session.close()
@@ -373,7 +396,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"休日追加エラー: {e}")
+            logger.exception("休日追加エラー: %s", e)
             return False
         finally:
             session.close()
@@ -401,7 +424,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"営業日追加エラー: {e}")
+            logger.exception("営業日追加エラー: %s", e)
             return False
         finally:
             session.close()
@@ -421,7 +444,7 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"日付削除エラー: {e}")
+            logger.exception("日付削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -456,7 +479,37 @@ class CalendarRepository:
         
         except Exception as e:
             session.rollback()
-            print(f"一括インポートエラー: {e}")
+            logger.exception("一括インポートエラー: %s", e)
             return 0
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+    def get_working_day_flags(self, start_date: date, end_date: date) -> Dict[date, bool]:
+        """
+        期間内の全日付について営業日フラグを一括取得
+
+        is_working_day() を日付ごとに呼ぶ代わりに1クエリで取得する。
+        カレンダー未登録の日付は土日以外を営業日とみなす（is_working_day と同じ規則）。
+        """
+        session = self.db.get_session()
+        try:
+            query = text("""
+                SELECT calendar_date, is_working_day
+                FROM company_calendar
+                WHERE calendar_date BETWEEN :start_date AND :end_date
+            """)
+            registered = {
+                (row[0].date() if isinstance(row[0], datetime) else row[0]): bool(row[1])
+                for row in session.execute(query, {
+                    'start_date': start_date,
+                    'end_date': end_date
+                }).fetchall()
+            }
+        finally:
+            session.close()
+
+        flags = {}
+        current = start_date
+        while current <= end_date:
+            flags[current] = registered.get(current, current.weekday() not in [5, 6])
+            current += timedelta(days=1)
+        return flags
@@ -0,0 +1,396 @@
+# app/repository/daily_summary_repository.py
+"""
+日別需要・進度サマリー（daily_progress_summary）のデータアクセス
+
+- (customer, product_id, summary_date) ごとに受注・計画・出荷・生産指示の日計と累計を保持する
+- 明細（delivery_progress / production_instructions_detail）が変わった範囲だけを再集計する
+- ダッシュボード・進度サマリー・社内注文マトリクスは明細ではなくこのテーブルを参照する
+
+テーブル作成・初期集計は migrations/add_daily_progress_summary_table.py を参照。
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .database_manager import DatabaseManager
+from .db_router import route_reads
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@route_reads
+class DailySummaryRepository:
+    """日別サマリーテーブルのデータアクセス"""
+
+    TABLE = 'daily_progress_summary'
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+
+    def _customer(self) -> str:
+        """顧客切替対応のDBでは現在の顧客、それ以外は 'default'"""
+        if hasattr(self.db, 'get_current_customer'):
+            return self.db.get_current_customer() or 'default'
+        return 'default'
+
+    @staticmethod
+    def _scope(alias: str, date_col: str, product_ids: Optional[List[int]],
+               start_date: Optional[date], end_date: Optional[date]) -> str:
+        """再集計範囲の WHERE 条件（製品・日付）を組み立て"""
+        conditions = []
+        if product_ids is not None:
+            conditions.append(f"{alias}.product_id IN :product_ids")
+        if start_date is not None:
+            conditions.append(f"DATE({alias}.{date_col}) >= :start_date")
+        if end_date is not None:
+            conditions.append(f"DATE({alias}.{date_col}) <= :end_date")
+        return ''.join(f" AND {c}" for c in conditions)
+
+    @staticmethod
+    def _params(customer: str, product_ids: Optional[List[int]],
+                start_date: Optional[date], end_date: Optional[date]) -> Dict[str, Any]:
+        params = {'customer': customer}
+        if product_ids is not None:
+            params['product_ids'] = product_ids
+        if start_date is not None:
+            params['start_date'] = start_date
+        if end_date is not None:
+            params['end_date'] = end_date
+        return params
+
+    @staticmethod
+    def _text(sql: str, product_ids: Optional[List[int]]):
+        query = text(sql)
+        if product_ids is not None:
+            query = query.bindparams(bindparam('product_ids', expanding=True))
+        return query
+
+    # -------------------------
+    # 更新（増分再集計）
+    # -------------------------
+    def refresh(self,
+                product_ids: Optional[Iterable[int]] = None,
+                start_date: Optional[date] = None,
+                end_date: Optional[date] = None) -> bool:
+        """
+        指定範囲のサマリーを明細から再集計
+
+        範囲内の行を削除して GROUP BY で入れ直し、対象製品の累計列を更新する。
+        範囲を指定しない場合は全件を作り直す（初期集計用）。
+
+        Args:
+            product_ids: 対象製品ID（None の場合は全製品）
+            start_date: 対象開始日（None の場合は下限なし）
+            end_date: 対象終了日（None の場合は上限なし）
+
+        Returns:
+            bool: 成功した場合True
+        """
+        if product_ids is not None:
+            product_ids = sorted({int(pid) for pid in product_ids if pid is not None})
+            if not product_ids:
+                return True
+
+        customer = self._customer()
+        params = self._params(customer, product_ids, start_date, end_date)
+        summary_scope = self._scope('s', 'summary_date', product_ids, start_date, end_date)
+        progress_scope = self._scope('dp', 'delivery_date', product_ids, start_date, end_date)
+        instruction_scope = self._scope('pid', 'instruction_date', product_ids, start_date, end_date)
+
+        delete_sql = f"""
+            DELETE s FROM {self.TABLE} s
+            WHERE s.customer = :customer{summary_scope}
+        """
+
+        insert_sql = f"""
+            INSERT INTO {self.TABLE}
+            (customer, product_id, summary_date,
+             order_quantity, planned_quantity, shipped_quantity, remaining_quantity,
+             instruction_quantity, order_count, unshipped_count, partial_count, completed_count)
+            SELECT
+                :customer, u.product_id, u.summary_date,
+                SUM(u.order_quantity), SUM(u.planned_quantity), SUM(u.shipped_quantity),
+                SUM(u.remaining_quantity), SUM(u.instruction_quantity),
+                SUM(u.order_count), SUM(u.unshipped_count), SUM(u.partial_count), SUM(u.completed_count)
+            FROM (
+                SELECT
+                    dp.product_id,
+                    DATE(dp.delivery_date) AS summary_date,
+                    COALESCE(dp.order_quantity, 0) AS order_quantity,
+                    COALESCE(dp.planned_quantity, 0) AS planned_quantity,
+                    COALESCE(dp.shipped_quantity, 0) AS shipped_quantity,
+                    COALESCE(dp.remaining_quantity, 0) AS remaining_quantity,
+                    0 AS instruction_quantity,
+                    1 AS order_count,
+                    CASE WHEN dp.status = '未出荷' THEN 1 ELSE 0 END AS unshipped_count,
+                    CASE WHEN dp.status = '一部出荷' THEN 1 ELSE 0 END AS partial_count,
+                    CASE WHEN dp.status = '出荷完了' THEN 1 ELSE 0 END AS completed_count
+                FROM delivery_progress dp
+                WHERE dp.status != 'キャンセル'{progress_scope}
+                UNION ALL
+                SELECT
+                    pid.product_id,
+                    DATE(pid.instruction_date),
+                    0, 0, 0, 0,
+                    pid.instruction_quantity,
+                    0, 0, 0, 0
+                FROM production_instructions_detail pid
+                WHERE pid.instruction_quantity > 0{instruction_scope}
+            ) u
+            WHERE u.product_id IS NOT NULL
+            GROUP BY u.product_id, u.summary_date
+        """
+
+        # 累計は製品ごとの全期間で計算し直す（サマリー行は日数分のみなので明細より十分小さい）
+        cumulative_scope = " AND product_id IN :product_ids" if product_ids is not None else ""
+        cumulative_sql = f"""
+            UPDATE {self.TABLE} s
+            JOIN (
+                SELECT
+                    product_id,
+                    summary_date,
+                    SUM(order_quantity) OVER w AS cumulative_order,
+                    SUM(planned_quantity) OVER w AS cumulative_planned,
+                    SUM(shipped_quantity) OVER w AS cumulative_shipped
+                FROM {self.TABLE}
+                WHERE customer = :customer{cumulative_scope}
+                WINDOW w AS (PARTITION BY product_id ORDER BY summary_date)
+            ) c ON s.customer = :customer
+               AND s.product_id = c.product_id
+               AND s.summary_date = c.summary_date
+            SET s.cumulative_order_quantity = c.cumulative_order,
+                s.cumulative_planned_quantity = c.cumulative_planned,
+                s.cumulative_shipped_quantity = c.cumulative_shipped
+        """
+
+        session = self.db.get_session()
+        try:
+            session.execute(self._text(delete_sql, product_ids), params)
+            session.execute(self._text(insert_sql, product_ids), params)
+            session.execute(
+                self._text(cumulative_sql, product_ids),
+                {k: v for k, v in params.items() if k in ('customer', 'product_ids')}
+            )
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception("日別サマリー更新エラー: %s", e)
+            return False
+        finally:
+            session.close()
+
+    def get_progress_scope(self, progress_ids: Iterable[int]) -> Optional[Dict[str, Any]]:
+        """
+        納入進度IDが属する製品・納期の範囲を取得（削除前の範囲控えにも使用）
+
+        Returns:
+            dict: refresh() にそのまま渡せる product_ids, start_date, end_date（該当なしは None）
+        """
+        progress_ids = sorted({int(pid) for pid in progress_ids if pid is not None})
+        if not progress_ids:
+            return None
+
+        session = self.db.get_session()
+        try:
+            query = text("""
+                SELECT product_id, MIN(DATE(delivery_date)), MAX(DATE(delivery_date))
+                FROM delivery_progress
+                WHERE id IN :progress_ids
+                GROUP BY product_id
+            """).bindparams(bindparam('progress_ids', expanding=True))
+            rows = session.execute(query, {'progress_ids': progress_ids}).fetchall()
+        except SQLAlchemyError as e:
+            logger.exception("日別サマリー対象取得エラー: %s", e)
+            return None
+        finally:
+            session.close()
+
+        if not rows:
+            return None
+        return {
+            'product_ids': [row[0] for row in rows],
+            'start_date': min(row[1] for row in rows),
+            'end_date': max(row[2] for row in rows)
+        }
+
+    @staticmethod
+    def merge_scopes(*scopes: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """get_progress_scope() の範囲をまとめる（製品は和集合、期間は全体を覆う範囲）"""
+        scopes = [scope for scope in scopes if scope]
+        if not scopes:
+            return None
+        return {
+            'product_ids': sorted({pid for scope in scopes for pid in scope['product_ids']}),
+            'start_date': min(scope['start_date'] for scope in scopes),
+            'end_date': max(scope['end_date'] for scope in scopes)
+        }
+
+    def refresh_for_progress_ids(self, progress_ids: Iterable[int]) -> bool:
+        """納入進度IDが属する製品・納期の範囲だけを再集計"""
+        scope = self.get_progress_scope(progress_ids)
+        if scope is None:
+            return True
+        return self.refresh(**scope)
+
+    # -------------------------
+    # 参照
+    # -------------------------
+    def get_daily_totals(self,
+                         start_date: Optional[date] = None,
+                         end_date: Optional[date] = None,
+                         product_ids: Optional[List[int]] = None) -> Optional[pd.DataFrame]:
+        """
+        製品×日付の日計・累計を取得
+
+        Returns:
+            pd.DataFrame: product_id, product_code, product_name, summary_date, 各数量列
+            （サマリーテーブルが利用できない場合は None）
+        """
+        customer = self._customer()
+        scope = self._scope('s', 'summary_date', product_ids, start_date, end_date)
+        query = self._text(f"""
+            SELECT
+                s.product_id,
+                p.product_code,
+                p.product_name,
+                s.summary_date,
+                s.order_quantity,
+                s.planned_quantity,
+                s.shipped_quantity,
+                s.remaining_quantity,
+                s.instruction_quantity,
+                s.cumulative_order_quantity,
+                s.cumulative_planned_quantity,
+                s.cumulative_shipped_quantity,
+                s.cumulative_shipped_quantity - s.cumulative_order_quantity AS progress_quantity
+            FROM {self.TABLE} s
+            LEFT JOIN products p ON s.product_id = p.id
+            WHERE s.customer = :customer{scope}
+            ORDER BY s.summary_date, p.product_code
+        """, product_ids)
+
+        session = self.db.get_session()
+        try:
+            result = session.execute(query, self._params(customer, product_ids, start_date, end_date))
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+            if not df.empty:
+                df['summary_date'] = pd.to_datetime(df['summary_date']).dt.date
+            return df
+        except SQLAlchemyError as e:
+            logger.exception("日別サマリー取得エラー: %s", e)
+            return None
+        finally:
+            session.close()
+
+    def get_progress_summary(self) -> Optional[Dict[str, Any]]:
+        """
+        納入進度サマリー（DeliveryProgressRepository.get_progress_summary と同じキー）
+
+        遅延・緊急は日付単位の未完了件数（order_count - completed_count）から求める。
+        """
+        query = text(f"""
+            SELECT
+                SUM(order_count) AS total_orders,
+                SUM(unshipped_count) AS unshipped,
+                SUM(partial_count) AS partial,
+                SUM(completed_count) AS completed,
+                SUM(CASE WHEN summary_date < CURDATE()
+                         THEN order_count - completed_count ELSE 0 END) AS delayed_count,
+                SUM(CASE WHEN DATEDIFF(summary_date, CURDATE()) BETWEEN 0 AND 3
+                         THEN order_count - completed_count ELSE 0 END) AS urgent,
+                SUM(order_quantity) AS total_quantity,
+                SUM(shipped_quantity) AS total_shipped,
+                SUM(remaining_quantity) AS total_remaining
+            FROM {self.TABLE}
+            WHERE customer = :customer
+        """)
+
+        session = self.db.get_session()
+        try:
+            result = session.execute(query, {'customer': self._customer()}).fetchone()
+            return {
+                'total_orders': result[0] or 0,
+                'unshipped': result[1] or 0,
+                'partial': result[2] or 0,
+                'completed': result[3] or 0,
+                'delayed': result[4] or 0,
+                'urgent': result[5] or 0,
+                'total_quantity': result[6] or 0,
+                'total_shipped': result[7] or 0,
+                'total_remaining': result[8] or 0
+            }
+        except SQLAlchemyError as e:
+            logger.exception("日別サマリー集計エラー: %s", e)
+            return None
+        finally:
+            session.close()
+
+    def get_demand_summary(self) -> Optional[Dict[str, Any]]:
+        """生産指示の総数量と期間（total_demand, min_date, max_date）"""
+        query = text(f"""
+            SELECT
+                COALESCE(SUM(instruction_quantity), 0),
+                MIN(CASE WHEN instruction_quantity > 0 THEN summary_date END),
+                MAX(CASE WHEN instruction_quantity > 0 THEN summary_date END)
+            FROM {self.TABLE}
+            WHERE customer = :customer
+        """)
+
+        session = self.db.get_session()
+        try:
+            row = session.execute(query, {'customer': self._customer()}).fetchone()
+            return {
+                'total_demand': float(row[0] or 0),
+                'min_date': pd.to_datetime(row[1]).date() if row[1] is not None else None,
+                'max_date': pd.to_datetime(row[2]).date() if row[2] is not None else None,
+            }
+        except SQLAlchemyError as e:
+            logger.exception("日別サマリー集計エラー: %s", e)
+            return None
+        finally:
+            session.close()
+
+    def get_daily_demand(self) -> Optional[pd.DataFrame]:
+        """日別の生産指示数量（instruction_date, instruction_quantity）"""
+        query = text(f"""
+            SELECT summary_date AS instruction_date, SUM(instruction_quantity) AS instruction_quantity
+            FROM {self.TABLE}
+            WHERE customer = :customer AND instruction_quantity > 0
+            GROUP BY summary_date
+            ORDER BY summary_date
+        """)
+        return self._read_frame(query, ['instruction_date', 'instruction_quantity'], 'instruction_date')
+
+    def get_product_demand_totals(self) -> Optional[pd.DataFrame]:
+        """製品別の生産指示数量（product_code, product_name, instruction_quantity）"""
+        query = text(f"""
+            SELECT p.product_code, p.product_name, SUM(s.instruction_quantity) AS instruction_quantity
+            FROM {self.TABLE} s
+            LEFT JOIN products p ON s.product_id = p.id
+            WHERE s.customer = :customer AND s.instruction_quantity > 0
+            GROUP BY p.product_code, p.product_name
+            ORDER BY instruction_quantity DESC
+        """)
+        return self._read_frame(query, ['product_code', 'product_name', 'instruction_quantity'])
+
+    def _read_frame(self, query, columns: List[str], date_col: Optional[str] = None) -> Optional[pd.DataFrame]:
+        session = self.db.get_session()
+        try:
+            rows = session.execute(query, {'customer': self._customer()}).fetchall()
+            df = pd.DataFrame(rows, columns=columns)
+            if not df.empty:
+                df['instruction_quantity'] = pd.to_numeric(df['instruction_quantity'], errors='coerce').fillna(0)
+                if date_col:
+                    df[date_col] = pd.to_datetime(df[date_col]).dt.date
+            return df
+        except SQLAlchemyError as e:
+            logger.exception("日別サマリー取得エラー: %s", e)
+            return None
+        finally:
+            session.close()
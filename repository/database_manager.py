@@ -1,14 +1,34 @@
 # app/repository/database_manager.py
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from config_all import DB_CONFIG, build_customer_db_config, get_default_customer, DatabaseConfig
+from config_all import (
+    DB_CONFIG, SYSTEM_CONFIG, SUPPORTED_CUSTOMERS, MULTI_DB_CONFIG,
+    build_customer_db_config, build_customer_multi_db_config, get_default_customer, DatabaseConfig
+)
+from .db_router import get_router, read_only
 import pandas as pd
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class DatabaseManager:
     """SQLAlchemy を使ったデータベース接続管理"""
 
     def __init__(self):
+        # 複数DB構成（PRIMARY_DB_HOST 等）がある場合は参照系をレプリカへ振り分ける
+        self.router = None
+        if MULTI_DB_CONFIG is not None:
+            # ルーター（エンジン・死活監視）はプロセス内で共有する
+            self.router = get_router(MULTI_DB_CONFIG)
+            self.engine = self.router.primary_engine
+            self.SessionLocal = self.router.SessionLocal
+            return
+
         # DB_CONFIG から接続情報を取得
         user = DB_CONFIG.user
         password = DB_CONFIG.password
@@ -27,7 +47,10 @@ class DatabaseManager:
         return self.SessionLocal()
 
     def close(self):
-        """セッションと接続を閉じる"""
+        """セッションと接続を閉じる（共有ルーターの場合はこのスレッドのセッションのみ解放）"""
+        if self.router is not None:
+            self.SessionLocal.remove()
+            return
         self.SessionLocal.remove()
         self.engine.dispose()
 # repository/database_manager.py の execute_query メソッド修正
@@ -36,8 +59,8 @@ class DatabaseManager:
         """クエリ実行 - 修正版"""
         try:
             with self.Session() as session:
-                print(f"🔍 デバッグ: クエリ実行: {query[:100]}...")
-                print(f"🔍 デバッグ: パラメータ: {params}")
+                logger.debug("クエリ実行: %s...", query[:100])
+                logger.debug("パラメータ: %s", params)
                 
                 if params:
                     # ✅ 辞書形式のパラメータを使用
@@ -48,13 +71,11 @@ class DatabaseManager:
                 
                 # ✅ 結果を辞書のリストで返す
                 rows = [dict(row._mapping) for row in result]
-                print(f"🔍 デバッグ: 取得行数: {len(rows)}")
+                logger.debug("取得行数: %s", len(rows))
                 return rows
                 
         except Exception as e:
-            print(f"❌ クエリ実行エラー: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            logger.error("❌ クエリ実行エラー: %s\nQuery: %s\nParams: %s", e, query, params)
             return []    
     def execute_query(self, query, params=None):
         """
@@ -67,6 +88,10 @@ class DatabaseManager:
         Returns:
             pd.DataFrame: 結果のDataFrame
         """
+        with read_only():
+            return self._execute_query(query, params)
+
+    def _execute_query(self, query, params=None):
         session = self.get_session()
         
         try:
@@ -93,11 +118,7 @@ class DatabaseManager:
             return df
             
         except Exception as e:
-            print(f"クエリ実行エラー: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("クエリ実行エラー: %s\nQuery: %s\nParams: %s", e, query, params)
             return pd.DataFrame()
         finally:
             session.close()
@@ -114,13 +135,23 @@ class DatabaseManager:
             session.commit()
         except Exception as e:
             session.rollback()
-            print(f"❌ クエリ実行エラー: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            logger.error("❌ クエリ実行エラー: %s\nQuery: %s\nParams: %s", e, query, params)
         finally:
             session.close()
 
 
+@dataclass
+class MultiCustomerQueryResult:
+    """複数顧客への並列クエリ結果"""
+    data: pd.DataFrame                                     # 全顧客の結果（customer列付き）
+    timings: Dict[str, float] = field(default_factory=dict)  # 顧客別の所要秒数
+    errors: Dict[str, str] = field(default_factory=dict)     # 顧客別のエラー（タイムアウト含む）
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [c for c in self.timings if c not in self.errors]
+
+
 class CustomerDatabaseManager:
     """
     顧客別データベース接続管理クラス
@@ -143,6 +174,10 @@ class CustomerDatabaseManager:
         df = db.execute_query("SELECT * FROM orders")
     """
 
+    # 並列クエリ用のワーカー（全インスタンス共通）
+    _fanout_executor: Optional[ThreadPoolExecutor] = None
+    _fanout_executor_lock = threading.Lock()
+
     def __init__(self, customer: Optional[str] = None):
         """
         初期化
@@ -151,6 +186,7 @@ class CustomerDatabaseManager:
             customer: 顧客名 ('kubota' または 'tiera')。未指定の場合はDEFAULT_CUSTOMERを使用
         """
         self._managers = {}  # 顧客名 -> DatabaseManagerインスタンス
+        self._managers_lock = threading.Lock()
         self._current_customer = customer or get_default_customer()
 
         # 現在の顧客用のマネージャーを初期化
@@ -169,7 +205,15 @@ class CustomerDatabaseManager:
         # 一時的にグローバルのDB_CONFIGを置き換える代わりに、
         # 直接エンジンを作成する
         class TempManager:
-            def __init__(self, config):
+            def __init__(self, config, multi_config=None):
+                # 読み取りレプリカが設定されている顧客は参照系をレプリカへ振り分ける
+                self.router = None
+                if multi_config is not None:
+                    self.router = get_router(multi_config)
+                    self.engine = self.router.primary_engine
+                    self.SessionLocal = self.router.SessionLocal
+                    return
+
                 user = config.user
                 password = config.password
                 host = config.host
@@ -184,11 +228,18 @@ class CustomerDatabaseManager:
                 return self.SessionLocal()
 
             def close(self):
+                if self.router is not None:
+                    self.SessionLocal.remove()
+                    return
                 self.SessionLocal.remove()
                 self.engine.dispose()
 
             def execute_query(self, query, params=None):
                 """SELECTクエリを実行してDataFrameを返す"""
+                with read_only():
+                    return self._execute_query(query, params)
+
+            def _execute_query(self, query, params=None):
                 session = self.get_session()
                 try:
                     if params:
@@ -207,11 +258,7 @@ class CustomerDatabaseManager:
                         df = pd.DataFrame()
                     return df
                 except Exception as e:
-                    print(f"クエリ実行エラー: {e}")
-                    print(f"Query: {query}")
-                    print(f"Params: {params}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("クエリ実行エラー: %s\nQuery: %s\nParams: %s", e, query, params)
                     return pd.DataFrame()
                 finally:
                     session.close()
@@ -227,13 +274,11 @@ class CustomerDatabaseManager:
                     session.commit()
                 except Exception as e:
                     session.rollback()
-                    print(f"❌ クエリ実行エラー: {e}")
-                    print(f"Query: {query}")
-                    print(f"Params: {params}")
+                    logger.error("❌ クエリ実行エラー: %s\nQuery: %s\nParams: %s", e, query, params)
                 finally:
                     session.close()
 
-        return TempManager(db_config)
+        return TempManager(db_config, build_customer_multi_db_config(db_config.name))
 
     def _get_or_create_manager(self, customer: str) -> 'DatabaseManager':
         """
@@ -246,9 +291,11 @@ class CustomerDatabaseManager:
             DatabaseManager: 顧客用のマネージャー
         """
         if customer not in self._managers:
-            config = build_customer_db_config(customer)
-            self._managers[customer] = self._create_manager_from_config(config)
-            print(f"✅ {customer.upper()}用データベース接続を確立: {config.database}")
+            with self._managers_lock:
+                if customer not in self._managers:
+                    config = build_customer_db_config(customer)
+                    self._managers[customer] = self._create_manager_from_config(config)
+                    logger.info("✅ %s用データベース接続を確立: %s", customer.upper(), config.database)
 
         return self._managers[customer]
 
@@ -260,13 +307,13 @@ class CustomerDatabaseManager:
             customer: 顧客名 ('kubota' または 'tiera')
         """
         customer = customer.lower()
-        if customer not in ["kubota", "tiera"]:
+        if customer not in SUPPORTED_CUSTOMERS:
             raise ValueError(f"未対応の顧客名: {customer}")
 
         self._current_customer = customer
         # 必要に応じてマネージャーを作成
         self._get_or_create_manager(customer)
-        print(f"🔄 顧客を切り替えました: {customer.upper()}")
+        logger.info("🔄 顧客を切り替えました: %s", customer.upper())
 
     def get_current_customer(self) -> str:
         """現在の顧客名を取得"""
@@ -313,6 +360,100 @@ class CustomerDatabaseManager:
         manager = self._get_or_create_manager(target_customer)
         return manager.execute_non_query(query, params)
 
+    def execute_query_multi(self,
+                            query: str,
+                            params=None,
+                            customers: Optional[List[str]] = None,
+                            timeout: Union[float, Dict[str, float], None] = None) -> MultiCustomerQueryResult:
+        """
+        同じSELECTクエリを複数顧客のDBへ並列に実行し、customer列を付けて結合
+
+        各顧客は自分の接続プール（エンジン）を使うため、所要時間は最も遅い顧客分で済む。
+        タイムアウトした顧客はサーバー側でも打ち切り（MAX_EXECUTION_TIME）、結果から除外する。
+
+        Args:
+            query: SQL文字列
+            params: パラメータ（全顧客共通）
+            customers: 対象顧客（未指定の場合は全対応顧客）
+            timeout: 顧客ごとのタイムアウト秒（数値は全顧客共通、辞書で顧客別に指定）
+
+        Returns:
+            MultiCustomerQueryResult: 結合結果・顧客別所要時間・顧客別エラー
+        """
+        targets = [c.lower() for c in (customers or SUPPORTED_CUSTOMERS)]
+        default_timeout = SYSTEM_CONFIG.fanout_timeout_seconds
+        if isinstance(timeout, dict):
+            timeouts = {c: float(timeout.get(c, default_timeout)) for c in targets}
+        else:
+            timeouts = {c: float(timeout or default_timeout) for c in targets}
+
+        executor = self._get_fanout_executor()
+        started = time.perf_counter()
+        futures = {
+            customer: executor.submit(self._run_customer_query, customer, query, params, timeouts[customer])
+            for customer in targets
+        }
+
+        frames = []
+        result = MultiCustomerQueryResult(data=pd.DataFrame())
+        for customer, future in futures.items():
+            remaining = max(timeouts[customer] - (time.perf_counter() - started), 0)
+            try:
+                df, elapsed = future.result(timeout=remaining)
+                result.timings[customer] = elapsed
+                if df is not None and not df.empty:
+                    frames.append(df.assign(customer=customer))
+            except FutureTimeoutError:
+                result.timings[customer] = time.perf_counter() - started
+                result.errors[customer] = f"タイムアウト（{timeouts[customer]:g}秒）"
+            except Exception as e:
+                result.timings[customer] = time.perf_counter() - started
+                result.errors[customer] = str(e)
+
+        if frames:
+            result.data = pd.concat(frames, ignore_index=True)
+
+        for customer, error in result.errors.items():
+            logger.warning("⚠️ %sの並列クエリ失敗: %s", customer.upper(), error)
+        return result
+
+    def _run_customer_query(self, customer: str, query: str, params, timeout_seconds: float):
+        """1顧客分のクエリ実行（ワーカースレッド内）。エラーは呼び出し元へ送出する"""
+        start = time.perf_counter()
+        manager = self._get_or_create_manager(customer)
+        with read_only():
+            return self._run_session_query(manager, query, params, timeout_seconds, start)
+
+    @staticmethod
+    def _run_session_query(manager, query: str, params, timeout_seconds: float, start: float):
+        session = manager.get_session()
+        try:
+            # サーバー側でもSELECTを打ち切る（MySQLのミリ秒指定）
+            session.execute(text("SET SESSION MAX_EXECUTION_TIME = :ms"), {'ms': int(timeout_seconds * 1000)})
+            result = session.execute(text(query), params or {})
+            rows = result.fetchall()
+            df = pd.DataFrame(rows, columns=list(result.keys()))
+            return df, time.perf_counter() - start
+        finally:
+            try:
+                session.execute(text("SET SESSION MAX_EXECUTION_TIME = 0"))
+            except Exception:
+                pass
+            session.close()
+            # scoped_sessionのスレッド別セッションを解放
+            manager.SessionLocal.remove()
+
+    @classmethod
+    def _get_fanout_executor(cls) -> ThreadPoolExecutor:
+        if cls._fanout_executor is None:
+            with cls._fanout_executor_lock:
+                if cls._fanout_executor is None:
+                    cls._fanout_executor = ThreadPoolExecutor(
+                        max_workers=SYSTEM_CONFIG.fanout_max_workers,
+                        thread_name_prefix='db-fanout'
+                    )
+        return cls._fanout_executor
+
     def close(self, customer: Optional[str] = None):
         """
         データベース接続を閉じる
@@ -324,12 +465,12 @@ class CustomerDatabaseManager:
             if customer in self._managers:
                 self._managers[customer].close()
                 del self._managers[customer]
-                print(f"🔒 {customer.upper()}のデータベース接続を閉じました")
+                logger.info("🔒 %sのデータベース接続を閉じました", customer.upper())
         else:
             # 全ての接続を閉じる
             for cust, manager in self._managers.items():
                 manager.close()
-                print(f"🔒 {cust.upper()}のデータベース接続を閉じました")
+                logger.info("🔒 %sのデータベース接続を閉じました", cust.upper())
             self._managers.clear()
 
     def __enter__(self):
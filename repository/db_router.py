@@ -0,0 +1,351 @@
+# app/repository/db_router.py
+"""
+読み取りレプリカへのルーティングとフェイルオーバー
+
+- リポジトリの get_* メソッド（参照系）はセカンダリDBへ、それ以外（更新系）はプライマリDBへ送る
+- バックグラウンドで各DBの死活とレプリケーション遅延を監視し、遅延が閾値を超えたレプリカは使わない
+- 切断・接続拒否が起きたDBは即座に利用不可とし、プライマリ障害時は MultiDatabaseConfig.failover() で切り替える
+  （デッドロック・ロック待ち・タイムアウト等のクエリ単位のエラーでは切り替えない）
+- 更新を確定した直後のセッション（Streamlitのブラウザセッション単位）は、遅延許容時間内はプライマリから読む
+  （自分の更新が見えない問題を防ぐ）
+- ルーターは接続先の構成ごとにプロセスで1つだけ作成し、死活監視スレッドも1本にする（get_router）
+
+使い方:
+    @route_reads
+    class ProductRepository: ...          # get_* がレプリカ経由になる
+
+    with read_only():                     # 任意の処理をレプリカ経由にする
+        ...
+
+    with primary_reads():                 # 遅延が許されない参照（鮮度確認など）はプライマリから読む
+        ...
+"""
+
+import atexit
+import functools
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from config_all import SYSTEM_CONFIG, DatabaseConfig, MultiDatabaseConfig
+from app_logging import get_logger
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Streamlit外（バッチ・スクリプト）から使う場合
+    get_script_run_ctx = None
+
+logger = get_logger(__name__)
+
+_route_state = threading.local()
+
+# 接続できなかったことを示すMySQLのエラーコード（2003: 接続拒否・到達不可, 2005: ホスト名解決不可）
+_CONNECT_ERROR_CODES = (2003, 2005)
+
+# 接続先の構成ごとのルーター（プロセス内で共有）
+_routers: Dict[Tuple, 'DatabaseRouter'] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(multi_config: MultiDatabaseConfig) -> 'DatabaseRouter':
+    """
+    接続先の構成が同じルーターを共有して返す（初回のみ作成し、死活監視を開始）
+
+    Streamlitは再実行のたびにアプリを作り直すため、毎回ルーターを作るとエンジンと監視スレッドが残り続ける。
+    """
+    key = tuple(
+        (cfg.name, cfg.host, cfg.port, cfg.database, cfg.user, cfg.is_primary)
+        for cfg in multi_config.get_all()
+    )
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = DatabaseRouter(multi_config)
+            router.start_health_checks()
+            _routers[key] = router
+    return router
+
+
+@atexit.register
+def close_routers() -> None:
+    """共有ルーターをすべて閉じる（プロセス終了時）"""
+    with _routers_lock:
+        routers = list(_routers.values())
+        _routers.clear()
+    for router in routers:
+        router.close()
+
+
+def _session_key() -> Hashable:
+    """更新時刻を記録する単位（Streamlitのセッション、Streamlit外ではスレッド）"""
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    if ctx is not None:
+        return ctx.session_id
+    return ('thread', threading.get_ident())
+
+
+def _is_connection_error(context) -> bool:
+    """切断・接続拒否によるエラーか（DBを切り離してフェイルオーバーする対象か）"""
+    if context.is_disconnect:
+        return True
+    if not isinstance(context.sqlalchemy_exception, OperationalError):
+        return False
+    error = context.original_exception
+    code = error.args[0] if getattr(error, 'args', None) else None
+    return code in _CONNECT_ERROR_CODES or isinstance(error.__cause__ or error.__context__, ConnectionError)
+
+
+@contextmanager
+def read_only():
+    """このブロック内で作成・実行されるクエリを参照系としてレプリカへ送る"""
+    depth = getattr(_route_state, 'read_depth', 0)
+    _route_state.read_depth = depth + 1
+    try:
+        yield
+    finally:
+        _route_state.read_depth = depth
+
+
+@contextmanager
+def primary_reads():
+    """このブロック内では get_* や read_only() の中でもプライマリから読む"""
+    depth = getattr(_route_state, 'primary_depth', 0)
+    _route_state.primary_depth = depth + 1
+    try:
+        yield
+    finally:
+        _route_state.primary_depth = depth
+
+
+def is_read_only() -> bool:
+    if getattr(_route_state, 'primary_depth', 0) > 0:
+        return False
+    return getattr(_route_state, 'read_depth', 0) > 0
+
+
+def route_reads(cls):
+    """クラスデコレーター：get_* メソッドを参照系としてレプリカへ送る"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('get_') and callable(attr):
+            setattr(cls, name, _read_only_method(attr))
+    return cls
+
+
+def _read_only_method(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_only():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """実行時の参照/更新の区別で接続先エンジンを選ぶセッション"""
+
+    def __init__(self, router: 'DatabaseRouter' = None, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        # 同じトランザクション内で更新系を使った後は、未確定の更新が見えるようプライマリから読む
+        if is_read_only() and not self.info.get('uses_primary'):
+            # トランザクション中は同じレプリカを使い続ける（読み取り結果の一貫性のため）
+            if 'read_engine' not in self.info:
+                self.info['read_engine'] = self.router.read_engine()
+            return self.info['read_engine']
+        self.info['uses_primary'] = True
+        return self.router.write_engine()
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    if session.info.get('uses_primary') and session.router is not None:
+        session.router.mark_write()
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('uses_primary', None)
+        session.info.pop('read_engine', None)
+
+
+class DatabaseRouter:
+    """プライマリ/セカンダリのエンジンを保持し、死活・遅延に応じて接続先を選ぶ"""
+
+    def __init__(self, multi_config: MultiDatabaseConfig, max_lag_seconds: Optional[float] = None):
+        self.config = multi_config
+        self.max_lag_seconds = (
+            max_lag_seconds if max_lag_seconds is not None else SYSTEM_CONFIG.replica_max_lag_seconds
+        )
+        self._lock = threading.Lock()
+        self._healthy: Dict[str, bool] = {}
+        self._lag: Dict[str, float] = {}
+        self._last_write: Dict[Hashable, float] = {}
+        self._engines: Dict[str, Engine] = {}
+        for cfg in multi_config.get_all():
+            self._engines[cfg.name] = self._create_engine(cfg)
+            self._healthy[cfg.name] = True
+            self._lag[cfg.name] = 0.0
+
+        self._round_robin = itertools.count()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+        self.SessionLocal = scoped_session(
+            sessionmaker(class_=RoutingSession, router=self, autoflush=False)
+        )
+
+    # -------------------------
+    # エンジン
+    # -------------------------
+    def _create_engine(self, cfg: DatabaseConfig) -> Engine:
+        db_url = (f"mysql+pymysql://{cfg.user}:{cfg.password}@{cfg.host}:{cfg.port}/"
+                  f"{cfg.database}?charset={cfg.charset}")
+        engine = create_engine(
+            db_url, echo=False, future=True, pool_pre_ping=True,
+            connect_args={'connect_timeout': cfg.connect_timeout}
+        )
+
+        @event.listens_for(engine, 'handle_error')
+        def _on_error(context, name=cfg.name):
+            if _is_connection_error(context):
+                self._mark_unhealthy(name, context.original_exception)
+
+        return engine
+
+    @property
+    def primary_engine(self) -> Engine:
+        primary = self.config.get_primary() or self.config.get_all()[0]
+        return self._engines[primary.name]
+
+    def write_engine(self) -> Engine:
+        """更新系の接続先（フェイルオーバー中は切替先）"""
+        return self._engines[self.config.get_current().name]
+
+    def read_engine(self) -> Engine:
+        """参照系の接続先（利用可能で遅延が許容内のレプリカ、無ければ更新系と同じ）"""
+        with self._lock:
+            last_write = self._last_write.get(_session_key())
+        if last_write is not None and time.time() - last_write < self.max_lag_seconds:
+            return self.write_engine()
+
+        current = self.config.get_current().name
+        with self._lock:
+            candidates = [
+                cfg.name for cfg in self.config.get_secondary()
+                if cfg.name != current
+                and self._healthy.get(cfg.name)
+                and self._lag.get(cfg.name, 0.0) <= self.max_lag_seconds
+            ]
+        if not candidates:
+            return self.write_engine()
+        return self._engines[candidates[next(self._round_robin) % len(candidates)]]
+
+    def mark_write(self) -> None:
+        """このセッションで更新を確定した時刻を記録（遅延許容時間を過ぎた記録は破棄）"""
+        now = time.time()
+        with self._lock:
+            self._last_write[_session_key()] = now
+            expired = [key for key, at in self._last_write.items() if now - at >= self.max_lag_seconds]
+            for key in expired:
+                del self._last_write[key]
+
+    def get_session(self):
+        return self.SessionLocal()
+
+    # -------------------------
+    # 死活監視・フェイルオーバー
+    # -------------------------
+    def _mark_unhealthy(self, name: str, error) -> None:
+        with self._lock:
+            was_healthy = self._healthy.get(name, True)
+            self._healthy[name] = False
+        if was_healthy:
+            logger.warning("⚠️ DB接続エラーのため %s を切り離しました: %s", name, error)
+        if name == self.config.get_current().name:
+            self._failover_if_needed()
+
+    def _failover_if_needed(self) -> None:
+        """現在の更新先が利用不可なら、利用可能なDBまで順に切り替える"""
+        if not self.config.auto_failover:
+            return
+        while not self._healthy.get(self.config.get_current().name, False):
+            if not self.config.failover():
+                break
+
+    def check_health(self) -> Dict[str, Dict[str, float]]:
+        """
+        全DBの死活とレプリケーション遅延を確認（監視スレッドから定期実行）
+
+        Returns:
+            dict: {DB名: {'healthy': bool, 'lag': 秒}}
+        """
+        for cfg in self.config.get_all():
+            try:
+                with self._engines[cfg.name].connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0 if cfg.is_primary else self._replica_lag(conn)
+                healthy = True
+            except Exception:
+                healthy, lag = False, float('inf')
+
+            with self._lock:
+                if healthy and not self._healthy.get(cfg.name):
+                    logger.info("✅ %s が復旧しました", cfg.name)
+                self._healthy[cfg.name] = healthy
+                self._lag[cfg.name] = lag
+
+        primary = self.config.get_primary()
+        if primary and self._healthy.get(primary.name) and not self.config.is_using_primary():
+            self.config.reset_to_primary()
+        self._failover_if_needed()
+
+        with self._lock:
+            return {
+                name: {'healthy': self._healthy[name], 'lag': self._lag[name]}
+                for name in self._engines
+            }
+
+    @staticmethod
+    def _replica_lag(conn) -> float:
+        """レプリケーション遅延秒（MySQL 8.0.22以降の名称を優先、停止中は無限大）"""
+        for statement, column in (("SHOW REPLICA STATUS", 'Seconds_Behind_Source'),
+                                  ("SHOW SLAVE STATUS", 'Seconds_Behind_Master')):
+            try:
+                row = conn.execute(text(statement)).mappings().first()
+            except Exception:
+                continue
+            if row is None:
+                return 0.0  # レプリカ設定が無い（同期済みのスタンバイ等）
+            value = row.get(column)
+            return float(value) if value is not None else float('inf')
+        return 0.0
+
+    def start_health_checks(self) -> None:
+        """バックグラウンドの死活監視を開始（MultiDatabaseConfig.health_check_interval 秒ごと）"""
+        if self._health_thread and self._health_thread.is_alive():
+            return
+
+        def _loop():
+            while not self._stop.wait(self.config.health_check_interval):
+                try:
+                    self.check_health()
+                except Exception as e:
+                    logger.exception("DB死活監視エラー: %s", e)
+
+        self._health_thread = threading.Thread(target=_loop, name='db-health-check', daemon=True)
+        self._health_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.SessionLocal.remove()
+        for engine in self._engines.values():
+            engine.dispose()
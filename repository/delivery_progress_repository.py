@@ -1,34 +1,58 @@
 # app/repository/delivery_progress_repository.py
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
-from typing import List, Dict, Any, Optional
+from sqlalchemy import text, bindparam
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 from datetime import date, datetime, time
 import pandas as pd
 from .database_manager import DatabaseManager
+from .db_router import route_reads
+from .calendar_repository import working_day_sql
+from app_logging import get_logger
 
+logger = get_logger(__name__)
 
+SHIPMENT_INSERT_SQL = """
+    INSERT INTO shipment_records
+    (progress_id, truck_id, shipment_date, shipped_quantity, 
+    container_id, num_containers, actual_departure_time, actual_arrival_time, 
+    driver_name, notes)
+    VALUES 
+    (:progress_id, :truck_id, :shipment_date, :shipped_quantity,
+    :container_id, :num_containers, :actual_departure_time, :actual_arrival_time,
+    :driver_name, :notes)
+"""
+
+
+@route_reads
 class DeliveryProgressRepository:
     """納入進度データアクセス"""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
-    def get_delivery_progress(self, start_date: date = None, end_date: date = None) -> pd.DataFrame:
+    def get_delivery_progress(self, start_date: date = None, end_date: date = None,
+                              working_days_only: bool = False) -> pd.DataFrame:
         """
         納入進度データ取得
         
         Args:
             start_date: 開始日
             end_date: 終了日
+            working_days_only: 納期が営業日（会社カレンダー）の行のみ取得
         
         Returns:
             pd.DataFrame: 納入進度データ
         """
         session = self.db.get_session()
         
+        calendar_join, calendar_filter = '', ''
+        if working_days_only:
+            calendar_join, condition = working_day_sql('dp.delivery_date')
+            calendar_filter = f"AND {condition}"
+
         try:
             if start_date and end_date:
-                query = text("""
+                query = text(f"""
                     SELECT 
                         dp.id,
                         dp.order_id,
@@ -54,8 +78,10 @@ class DeliveryProgressRepository:
                         dp.priority
                     FROM delivery_progress dp
                     LEFT JOIN products p ON dp.product_id = p.id
+                    {calendar_join}
                     WHERE dp.delivery_date BETWEEN :start_date AND :end_date
                     AND dp.status != 'キャンセル'
+                    {calendar_filter}
                     ORDER BY dp.delivery_date, dp.priority
                 """)
                 result = session.execute(query, {
@@ -63,7 +89,7 @@ class DeliveryProgressRepository:
                     'end_date': end_date.strftime('%Y-%m-%d')
                 })
             else:
-                query = text("""
+                query = text(f"""
                     SELECT 
                         dp.id,
                         dp.order_id,
@@ -89,7 +115,9 @@ class DeliveryProgressRepository:
                         dp.priority
                     FROM delivery_progress dp
                     LEFT JOIN products p ON dp.product_id = p.id
+                    {calendar_join}
                     WHERE dp.status != 'キャンセル'
+                    {calendar_filter}
                     ORDER BY dp.delivery_date, dp.priority
                 """)
                 result = session.execute(query)
@@ -111,11 +139,38 @@ class DeliveryProgressRepository:
                 return pd.DataFrame()
                 
         except SQLAlchemyError as e:
-            print(f"納入進度取得エラー: {e}")
+            logger.error("納入進度取得エラー: %s", e)
             return pd.DataFrame()
         finally:
             session.close()
 
+    def get_delivery_progress_exists(self, start_date: date, end_date: date) -> bool:
+        """
+        期間内に（営業日かどうかに関係なく）キャンセル以外の納入進度があるか
+
+        営業日で絞り込んだ結果が空の場合に、生産指示へ切り替えるかの判定に使う。
+        """
+        session = self.db.get_session()
+
+        try:
+            query = text("""
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM delivery_progress
+                    WHERE delivery_date BETWEEN :start_date AND :end_date
+                    AND status != 'キャンセル'
+                )
+            """)
+            return bool(session.execute(query, {
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d')
+            }).scalar())
+        except SQLAlchemyError as e:
+            logger.error("納入進度取得エラー: %s", e)
+            return False
+        finally:
+            session.close()
+
     def get_progress_by_product_and_date(self, product_id: int, delivery_date: date) -> Optional[Dict[str, Any]]:
         """製品と納期日で納入進度を1件取得"""
         session = self.db.get_session()
@@ -125,7 +180,8 @@ class DeliveryProgressRepository:
                 SELECT *
                 FROM delivery_progress
                 WHERE product_id = :product_id
-                  AND DATE(delivery_date) = :delivery_date
+                  AND delivery_date >= :delivery_date
+                  AND delivery_date < :delivery_date + INTERVAL 1 DAY
                 ORDER BY delivery_date, id
                 LIMIT 1
             """)
@@ -140,11 +196,62 @@ class DeliveryProgressRepository:
             return None
 
         except SQLAlchemyError as e:
-            print(f"delivery_progress取得エラー: {e}")
+            logger.error("delivery_progress取得エラー: %s", e)
             return None
         finally:
             session.close()
     
+    def get_progress_by_products_and_dates(
+            self, keys: Iterable[Tuple[int, date]]) -> Dict[Tuple[int, date], Dict[str, Any]]:
+        """
+        製品と納期日の組ごとに納入進度を1件ずつ取得（get_progress_by_product_and_date の一括版、1クエリ）
+        
+        Args:
+            keys: (product_id, delivery_date) の組
+        
+        Returns:
+            dict: {(product_id, delivery_date): 納入進度}（該当なしの組は含まない）
+        """
+        keys = {(int(product_id), delivery_date) for product_id, delivery_date in keys}
+        if not keys:
+            return {}
+        
+        session = self.db.get_session()
+        
+        try:
+            query = text("""
+                SELECT *
+                FROM delivery_progress
+                WHERE product_id IN :product_ids
+                  AND delivery_date >= :start_date
+                  AND delivery_date < :end_date + INTERVAL 1 DAY
+                ORDER BY delivery_date, id
+            """).bindparams(bindparam('product_ids', expanding=True))
+            
+            rows = session.execute(query, {
+                'product_ids': sorted({product_id for product_id, _ in keys}),
+                'start_date': min(delivery_date for _, delivery_date in keys),
+                'end_date': max(delivery_date for _, delivery_date in keys)
+            }).fetchall()
+        
+        except SQLAlchemyError as e:
+            logger.error("delivery_progress一括取得エラー: %s", e)
+            return {}
+        finally:
+            session.close()
+        
+        # 組ごとに先頭（納期・ID順）の1件
+        result = {}
+        for row in rows:
+            record = dict(row._mapping)
+            delivery_date = record['delivery_date']
+            if isinstance(delivery_date, datetime):
+                delivery_date = delivery_date.date()
+            key = (record['product_id'], delivery_date)
+            if key in keys and key not in result:
+                result[key] = record
+        return result
+    
     def create_shipment_record(self, shipment_data: Dict[str, Any]) -> bool:
         """
         出荷実績を登録
@@ -158,52 +265,8 @@ class DeliveryProgressRepository:
         session = self.db.get_session()
         
         try:
-            query = text("""
-                INSERT INTO shipment_records
-                (progress_id, truck_id, shipment_date, shipped_quantity, 
-                container_id, num_containers, actual_departure_time, actual_arrival_time, 
-                driver_name, notes)
-                VALUES 
-                (:progress_id, :truck_id, :shipment_date, :shipped_quantity,
-                :container_id, :num_containers, :actual_departure_time, :actual_arrival_time,
-                :driver_name, :notes)
-            """)
-            
-            # TIME型をDATETIME型に変換
-            departure_datetime = None
-            arrival_datetime = None
-            
-            if shipment_data.get('actual_departure_time'):
-                if isinstance(shipment_data['actual_departure_time'], time):
-                    # date + timeをdatetimeに結合
-                    departure_datetime = datetime.combine(
-                        shipment_data['shipment_date'],
-                        shipment_data['actual_departure_time']
-                    )
-                else:
-                    departure_datetime = shipment_data['actual_departure_time']
-            
-            if shipment_data.get('actual_arrival_time'):
-                if isinstance(shipment_data['actual_arrival_time'], time):
-                    arrival_datetime = datetime.combine(
-                        shipment_data['shipment_date'],
-                        shipment_data['actual_arrival_time']
-                    )
-                else:
-                    arrival_datetime = shipment_data['actual_arrival_time']
-            
-            params = {
-                'progress_id': shipment_data['progress_id'],
-                'truck_id': shipment_data['truck_id'],
-                'shipment_date': shipment_data['shipment_date'],
-                'shipped_quantity': shipment_data['shipped_quantity'],
-                'container_id': shipment_data.get('container_id'),
-                'num_containers': shipment_data.get('num_containers'),
-                'actual_departure_time': departure_datetime,
-                'actual_arrival_time': arrival_datetime,
-                'driver_name': shipment_data.get('driver_name', ''),
-                'notes': shipment_data.get('notes', '')
-            }
+            query = text(SHIPMENT_INSERT_SQL)
+            params = self._shipment_params(shipment_data)
             
             session.execute(query, params)
             
@@ -229,13 +292,126 @@ class DeliveryProgressRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"出荷実績登録エラー: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("出荷実績登録エラー: %s", e)
+            return False
+        finally:
+            session.close()
+    
+    def create_shipment_records_bulk(self, shipments: List[Dict[str, Any]]) -> bool:
+        """
+        出荷実績を一括登録（1トランザクション）
+        
+        - shipment_records は executemany で登録
+        - 納入進度は行ロック（SELECT ... FOR UPDATE）してから、納入進度ごとに合計した数量を加算した
+          出荷済み数量・ステータスを executemany で更新
+        
+        Args:
+            shipments: 出荷データ（create_shipment_record と同じ形式、progress_id 必須）
+        
+        Returns:
+            bool: 成功した場合True（失敗時は全件ロールバック）
+        """
+        if not shipments:
+            return True
+        
+        totals: Dict[int, int] = {}
+        for shipment in shipments:
+            progress_id = int(shipment['progress_id'])
+            totals[progress_id] = totals.get(progress_id, 0) + int(shipment['shipped_quantity'])
+        
+        session = self.db.get_session()
+        
+        try:
+            session.execute(text(SHIPMENT_INSERT_SQL), [self._shipment_params(shipment) for shipment in shipments])
+            
+            # 対象の納入進度を行ロックしてから加算後の数量・ステータスを求める
+            # （ID順にロックし、同時に登録した場合のデッドロックを避ける）
+            select_query = text("""
+                SELECT id, shipped_quantity, order_quantity, status
+                FROM delivery_progress
+                WHERE id IN :progress_ids
+                ORDER BY id
+                FOR UPDATE
+            """).bindparams(bindparam('progress_ids', expanding=True))
+            rows = session.execute(select_query, {'progress_ids': sorted(totals)}).fetchall()
+            
+            updates = []
+            for row in rows:
+                new_shipped = (row.shipped_quantity or 0) + totals[row.id]
+                updates.append({
+                    'progress_id': row.id,
+                    'shipped_quantity': new_shipped,
+                    'status': self._shipment_status(new_shipped, row.order_quantity, row.status)
+                })
+            
+            if updates:
+                update_query = text("""
+                    UPDATE delivery_progress
+                    SET shipped_quantity = :shipped_quantity,
+                        status = :status
+                    WHERE id = :progress_id
+                """)
+                session.execute(update_query, updates)
+            
+            session.commit()
+            logger.info("出荷実績一括登録: %s件（納入進度 %s件）", len(shipments), len(totals))
+            return True
+        
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception("出荷実績一括登録エラー: %s", e)
             return False
         finally:
             session.close()
     
+    @staticmethod
+    def _shipment_status(shipped_quantity: int, order_quantity: Optional[int], status: Optional[str]) -> Optional[str]:
+        """出荷済み数量から納入進度のステータスを判定（create_shipment_record の UPDATE と同じ規則）"""
+        if order_quantity is not None and shipped_quantity >= order_quantity:
+            return '出荷完了'
+        if shipped_quantity > 0:
+            return '一部出荷'
+        return status
+    
+    @staticmethod
+    def _shipment_params(shipment_data: Dict[str, Any]) -> Dict[str, Any]:
+        """出荷データを shipment_records の登録パラメータに変換"""
+        # TIME型をDATETIME型に変換
+        departure_datetime = None
+        arrival_datetime = None
+        
+        if shipment_data.get('actual_departure_time'):
+            if isinstance(shipment_data['actual_departure_time'], time):
+                # date + timeをdatetimeに結合
+                departure_datetime = datetime.combine(
+                    shipment_data['shipment_date'],
+                    shipment_data['actual_departure_time']
+                )
+            else:
+                departure_datetime = shipment_data['actual_departure_time']
+        
+        if shipment_data.get('actual_arrival_time'):
+            if isinstance(shipment_data['actual_arrival_time'], time):
+                arrival_datetime = datetime.combine(
+                    shipment_data['shipment_date'],
+                    shipment_data['actual_arrival_time']
+                )
+            else:
+                arrival_datetime = shipment_data['actual_arrival_time']
+        
+        return {
+            'progress_id': shipment_data['progress_id'],
+            'truck_id': shipment_data['truck_id'],
+            'shipment_date': shipment_data['shipment_date'],
+            'shipped_quantity': shipment_data['shipped_quantity'],
+            'container_id': shipment_data.get('container_id'),
+            'num_containers': shipment_data.get('num_containers'),
+            'actual_departure_time': departure_datetime,
+            'actual_arrival_time': arrival_datetime,
+            'driver_name': shipment_data.get('driver_name', ''),
+            'notes': shipment_data.get('notes', '')
+        }
+    
     def get_shipment_records(self, progress_id: int = None) -> pd.DataFrame:
         """
         出荷実績を取得
@@ -292,7 +468,7 @@ class DeliveryProgressRepository:
                 return pd.DataFrame()
                 
         except SQLAlchemyError as e:
-            print(f"出荷実績取得エラー: {e}")
+            logger.error("出荷実績取得エラー: %s", e)
             return pd.DataFrame()
         finally:
             session.close()
@@ -331,7 +507,7 @@ class DeliveryProgressRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"納入進度更新エラー: {e}")
+            logger.error("納入進度更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -367,7 +543,7 @@ class DeliveryProgressRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"納入進度作成エラー: {e}")
+            logger.error("納入進度作成エラー: %s", e)
             return 0
         finally:
             session.close()
@@ -395,7 +571,7 @@ class DeliveryProgressRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"納入進度削除エラー: {e}")
+            logger.error("納入進度削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -441,7 +617,7 @@ class DeliveryProgressRepository:
             }
             
         except SQLAlchemyError as e:
-            print(f"サマリー取得エラー: {e}")
+            logger.error("サマリー取得エラー: %s", e)
             return {}
         finally:
             session.close()
@@ -2,15 +2,73 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
 from typing import Dict, Any, List, Optional
-from datetime import date
+from datetime import date, timedelta
+from collections import OrderedDict
+import copy
+import threading
+import pandas as pd
 from .database_manager import DatabaseManager
+from .db_router import route_reads
+from app_logging import get_logger
 
+logger = get_logger(__name__)
 
+# 計画スナップショットのキャッシュ（プロセス単位で共有。保存・明細更新・削除時に破棄）
+_plan_snapshots: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+
+@route_reads
 class LoadingPlanRepository:
     """積載計画保存・取得リポジトリ"""
-    
+
+    PLAN_SNAPSHOT_CACHE_SIZE = 32
+
+    HEADER_COLUMNS = ['plan_name', 'start_date', 'end_date', 'total_days', 'total_trips', 'status', 'created_at']
+
+    # 保存済み計画の読み取り用（ヘッダー + 明細/警告/積載不可を必要列のみ1クエリで取得）
+    PLAN_SNAPSHOT_SQL = text("""
+        SELECT
+            h.plan_name, h.start_date, h.end_date, h.total_days, h.total_trips, h.status, h.created_at,
+            r.rec_type, r.rec_id, r.rec_date, r.truck_id, r.truck_name, r.trip_number,
+            r.product_id, r.product_code, r.product_name, r.container_id,
+            r.num_containers, r.total_quantity, r.delivery_date, r.is_advanced,
+            r.volume_utilization, r.message, r.category
+        FROM loading_plan_header h
+        LEFT JOIN (
+            SELECT
+                'D' AS rec_type, d.id AS rec_id, d.loading_date AS rec_date,
+                d.truck_id, d.truck_name, d.trip_number,
+                d.product_id, d.product_code, d.product_name, d.container_id,
+                d.num_containers, d.total_quantity, d.delivery_date, d.is_advanced,
+                d.volume_utilization, NULL AS message, NULL AS category
+            FROM loading_plan_detail d
+            WHERE d.plan_id = :plan_id
+            UNION ALL
+            SELECT
+                'W', w.id, w.warning_date,
+                NULL, NULL, NULL,
+                NULL, NULL, NULL, NULL,
+                NULL, NULL, NULL, NULL,
+                NULL, w.warning_message, w.warning_type
+            FROM loading_plan_warnings w
+            WHERE w.plan_id = :plan_id
+            UNION ALL
+            SELECT
+                'U', u.id, NULL,
+                NULL, NULL, NULL,
+                u.product_id, u.product_code, u.product_name, u.container_id,
+                u.num_containers, u.total_quantity, u.delivery_date, NULL,
+                NULL, NULL, u.reason
+            FROM loading_plan_unloaded u
+            WHERE u.plan_id = :plan_id
+        ) r ON 1 = 1
+        WHERE h.id = :plan_id
+    """)
+
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+
     def save_loading_plan(self, plan_result: Dict[str, Any], plan_name: str = None) -> int:
         """積載計画を保存 + delivery_progressに計画数を登録"""
         session = self.db.get_session()
@@ -120,11 +178,11 @@ class LoadingPlanRepository:
                                 'truck_id': truck_plan['truck_id']
                             }
                         # デバッグ: 各アイテムの集計前の数量を出力
-                        print(f"[DEBUG] accumulate item - product_id={product_id}, delivery_date={delivery_date}, quantity={quantity}")
+                        logger.debug("accumulate item - product_id=%s, delivery_date=%s, quantity=%s", product_id, delivery_date, quantity)
                         progress_updates[key]['planned_quantity'] += quantity
 
             # デバッグ: 収集した progress_updates の内容を出力
-            print(f"[DEBUG] progress_updates collected: {progress_updates}")
+            logger.debug("progress_updates collected: %s", progress_updates)
 
             # ✅ 3. 計画期間内のplanned_quantityを一旦0にリセット（今回未計画分を0化）
             try:
@@ -136,13 +194,14 @@ class LoadingPlanRepository:
                             WHEN shipped_quantity > 0 THEN '一部出荷'
                             ELSE status
                         END
-                    WHERE DATE(delivery_date) BETWEEN :start_date AND :end_date
+                    WHERE delivery_date >= :start_date
+                      AND delivery_date < :end_date + INTERVAL 1 DAY
                 """)
                 session.execute(reset_sql, {
                     'start_date': start_date,
                     'end_date': end_date
                 })
-                print(f"[DEBUG] reset planned_quantity to 0 between {start_date} and {end_date}")
+                logger.debug("reset planned_quantity to 0 between %s and %s", start_date, end_date)
             except Exception as _:
                 pass
 
@@ -153,7 +212,8 @@ class LoadingPlanRepository:
                     SELECT id, order_quantity, planned_quantity 
                     FROM delivery_progress
                     WHERE product_id = :product_id 
-                    AND DATE(delivery_date) = :delivery_date
+                    AND delivery_date >= :delivery_date
+                    AND delivery_date < :delivery_date + INTERVAL 1 DAY
                 """)
                 
                 existing_rows = session.execute(check_sql, {
@@ -162,7 +222,7 @@ class LoadingPlanRepository:
                 }).fetchall()
 
                 # デバッグ: 検索結果を出力
-                print(f"[DEBUG] existing_rows for product_id={product_id}, delivery_date={delivery_date}: {existing_rows}")
+                logger.debug("existing_rows for product_id=%s, delivery_date=%s: %s", product_id, delivery_date, existing_rows)
                 
                 if existing_rows:
                     # 既存レコードを更新
@@ -187,7 +247,7 @@ class LoadingPlanRepository:
                         old_planned = existing_rows[0][2]
                     except Exception:
                         old_planned = None
-                    print(f"[DEBUG] update progress id={existing_rows[0][0]}: old_planned_quantity={old_planned} -> new_planned_quantity={update_data['planned_quantity']}")
+                    logger.debug("update progress id=%s: old_planned_quantity=%s -> new_planned_quantity=%s", existing_rows[0][0], old_planned, update_data['planned_quantity'])
                 else:
                     # 新規レコードを作成（オーダーIDを自動生成）
                     order_id = f"PLAN-{delivery_date.strftime('%Y%m%d')}-{product_id:04d}"
@@ -211,7 +271,7 @@ class LoadingPlanRepository:
                     })
 
                     # デバッグ: 新規作成の内容を出力
-                    print(f"[DEBUG] insert new progress: order_id={order_id}, product_id={product_id}, delivery_date={delivery_date}, order_quantity={update_data['planned_quantity']}, planned_quantity={update_data['planned_quantity']}")
+                    logger.debug("insert new progress: order_id=%s, product_id=%s, delivery_date=%s, order_quantity=%s, planned_quantity=%s", order_id, product_id, delivery_date, update_data['planned_quantity'], update_data['planned_quantity'])
             
             # 4. 警告保存
             for date_str, plan in daily_plans.items():
@@ -255,220 +315,331 @@ class LoadingPlanRepository:
                 })
             
             session.commit()
+            self.invalidate_plan_cache(plan_id)
             return plan_id
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"積載計画保存エラー: {e}")
+            logger.error("積載計画保存エラー: %s", e)
             raise
         finally:
             session.close()    
 
-    
-   
+    def get_loading_plan(self, plan_id: int, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        積載計画を取得 - daily_plans付き完全版（読み取り専用）
+
+        ヘッダー・明細・警告・積載不可を必要な列のみ1クエリで取得し、
+        日付×トラック単位の構造はgroupbyでまとめて組み立てる。
+        保存後の計画はほぼ変更されないため、plan_id単位でスナップショットをキャッシュする
+        （明細更新・削除時に破棄）。呼び出し側で変更しても良いようにコピーを返す。
+        """
+        cache_key = self._snapshot_key(plan_id)
 
-# app/repository/loading_plan_repository.py の get_loading_plan メソッドを完全修正
+        if use_cache:
+            with _snapshot_lock:
+                snapshot = _plan_snapshots.get(cache_key)
+                if snapshot is not None:
+                    _plan_snapshots.move_to_end(cache_key)
+            if snapshot is not None:
+                return copy.deepcopy(snapshot)
 
-    def get_loading_plan(self, plan_id: int) -> Dict[str, Any]:
-        """積載計画を取得 - daily_plans付き完全版"""
         session = self.db.get_session()
-        
+
         try:
-            # ヘッダー取得
-            header_sql = text("""
-                SELECT * FROM loading_plan_header WHERE id = :plan_id
-            """)
-            header_result = session.execute(header_sql, {'plan_id': plan_id}).fetchone()
-            
-            if not header_result:
-                print(f"❌ ヘッダーが見つかりません: plan_id={plan_id}")
-                return None
-            
-            header = dict(header_result._mapping)
-            print(f"✅ ヘッダー取得成功: {header}")
-            
-            # 明細取得
-            detail_sql = text("""
-                SELECT * FROM loading_plan_detail 
-                WHERE plan_id = :plan_id 
-                ORDER BY loading_date, truck_id, trip_number
-            """)
-            details = session.execute(detail_sql, {'plan_id': plan_id}).fetchall()
-            print(f"✅ 明細取得: {len(details)}件")
-            
-            # 警告取得
-            warning_sql = text("""
-                SELECT * FROM loading_plan_warnings WHERE plan_id = :plan_id
-            """)
-            warnings = session.execute(warning_sql, {'plan_id': plan_id}).fetchall()
-            
-            # 積載不可取得
-            unloaded_sql = text("""
-                SELECT * FROM loading_plan_unloaded WHERE plan_id = :plan_id
-            """)
-            unloaded = session.execute(unloaded_sql, {'plan_id': plan_id}).fetchall()
-            
-            # ✅ daily_plansを再構築
-            daily_plans = {}
-            
-            for detail in details:
-                detail_dict = dict(detail._mapping)
-                loading_date = detail_dict['loading_date']
-                
-                # 日付をstrに変換
-                if hasattr(loading_date, 'strftime'):
-                    date_str = loading_date.strftime('%Y-%m-%d')
-                else:
-                    date_str = str(loading_date)
-                
-                if date_str not in daily_plans:
-                    daily_plans[date_str] = {
-                        'trucks': [],
-                        'total_trips': 0,
-                        'warnings': []
-                    }
-                
-                # トラックを検索または新規作成
-                truck_id = detail_dict['truck_id']
-                truck = next((t for t in daily_plans[date_str]['trucks'] 
-                            if t['truck_id'] == truck_id), None)
-                
-                if not truck:
-                    truck = {
-                        'truck_id': truck_id,
-                        'truck_name': detail_dict.get('truck_name', '不明'),
-                        'loaded_items': [],
-                        'utilization': {
-                            'volume_rate': float(detail_dict.get('volume_utilization', 0)),
-                            'weight_rate': 0
-                        }
-                    }
-                    daily_plans[date_str]['trucks'].append(truck)
-                    daily_plans[date_str]['total_trips'] += 1
-                
-                # アイテム追加
-                delivery_date = detail_dict.get('delivery_date')
-                if delivery_date:
-                    if hasattr(delivery_date, 'date'):
-                        delivery_date = delivery_date.date() if hasattr(delivery_date, 'date') else delivery_date
-                
-                truck['loaded_items'].append({
-                    'product_id': detail_dict.get('product_id'),
-                    'product_code': detail_dict.get('product_code', ''),
-                    'product_name': detail_dict.get('product_name', ''),
-                    'container_id': detail_dict.get('container_id'),
-                    'num_containers': int(detail_dict.get('num_containers', 0)),
-                    'total_quantity': int(detail_dict.get('total_quantity', 0)),
-                    'delivery_date': delivery_date,
-                    'is_advanced': bool(detail_dict.get('is_advanced', False))
-                })
-            
-            # 警告を追加
-            for warning in warnings:
-                warning_dict = dict(warning._mapping)
-                warning_date = warning_dict['warning_date']
-                
-                if hasattr(warning_date, 'strftime'):
-                    date_str = warning_date.strftime('%Y-%m-%d')
-                else:
-                    date_str = str(warning_date)
-                
-                if date_str in daily_plans:
-                    daily_plans[date_str]['warnings'].append(
-                        warning_dict.get('warning_message', '')
-                    )
-            
-            # 積載不可タスク
-            unloaded_tasks = []
-            for task in unloaded:
-                task_dict = dict(task._mapping)
-                
-                delivery_date = task_dict.get('delivery_date')
-                if delivery_date:
-                    if hasattr(delivery_date, 'date'):
-                        delivery_date = delivery_date.date() if hasattr(delivery_date, 'date') else delivery_date
-                
-                unloaded_tasks.append({
-                    'product_id': task_dict.get('product_id'),
-                    'product_code': task_dict.get('product_code', ''),
-                    'product_name': task_dict.get('product_name', ''),
-                    'container_id': task_dict.get('container_id'),
-                    'num_containers': int(task_dict.get('num_containers', 0)),
-                    'total_quantity': int(task_dict.get('total_quantity', 0)),
-                    'delivery_date': delivery_date,
-                    'reason': task_dict.get('reason', '')
-                })
-            
-            # サマリー作成
-            summary = {
-                'total_days': int(header.get('total_days', 0)),
-                'total_trips': int(header.get('total_trips', 0)),
-                'status': header.get('status', '不明'),
-                'total_warnings': len(warnings),
-                'unloaded_count': len(unloaded_tasks)
-            }
-            
-            print(f"✅ daily_plans作成: {len(daily_plans)}日分")
-            print(f"✅ summary: {summary}")
-            
-            return {
-                'id': plan_id,
-                'plan_name': header.get('plan_name', ''),
-                'header': header,
-                'details': [dict(row._mapping) for row in details],
-                'warnings': [dict(row._mapping) for row in warnings],
-                'unloaded': [dict(row._mapping) for row in unloaded],
-                'daily_plans': daily_plans,  # ✅ 追加
-                'summary': summary,          # ✅ 追加
-                'unloaded_tasks': unloaded_tasks,  # ✅ 追加
-                'period': f"{header.get('start_date', '')} ~ {header.get('end_date', '')}"  # ✅ 追加
-            }
-            
+            result = session.execute(self.PLAN_SNAPSHOT_SQL, {'plan_id': plan_id})
+            frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()), dtype=object)
         except SQLAlchemyError as e:
-            print(f"❌ 積載計画取得エラー: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ 積載計画取得エラー: %s", e)
             return None
         finally:
-            session.close()    
+            session.close()
+
+        if frame.empty:
+            logger.error("❌ ヘッダーが見つかりません: plan_id=%s", plan_id)
+            return None
+
+        snapshot = self._build_plan_snapshot(plan_id, frame)
+
+        with _snapshot_lock:
+            _plan_snapshots[cache_key] = snapshot
+            _plan_snapshots.move_to_end(cache_key)
+            while len(_plan_snapshots) > self.PLAN_SNAPSHOT_CACHE_SIZE:
+                _plan_snapshots.popitem(last=False)
+
+        return copy.deepcopy(snapshot)
+
+    def invalidate_plan_cache(self, plan_id: Optional[int] = None) -> None:
+        """計画スナップショットのキャッシュを破棄（plan_id未指定時は全件）"""
+        with _snapshot_lock:
+            if plan_id is None:
+                _plan_snapshots.clear()
+            else:
+                _plan_snapshots.pop(self._snapshot_key(plan_id), None)
+
+    def _snapshot_key(self, plan_id: int) -> tuple:
+        """顧客別DBの場合は顧客ごとにキャッシュを分ける"""
+        customer = self.db.get_current_customer() if hasattr(self.db, 'get_current_customer') else None
+        return (customer, int(plan_id))
+
+    def _build_plan_snapshot(self, plan_id: int, frame: pd.DataFrame) -> Dict[str, Any]:
+        """結合クエリの結果から daily_plans 付きの計画データを組み立てる"""
+        first = frame.iloc[0]
+        header = {'id': plan_id}
+        for col in self.HEADER_COLUMNS:
+            value = first[col]
+            header[col] = None if pd.isna(value) else value
+
+        details = frame[frame['rec_type'] == 'D'].copy()
+        warnings = frame[frame['rec_type'] == 'W'].sort_values('rec_id', kind='stable')
+        unloaded = frame[frame['rec_type'] == 'U'].sort_values('rec_id', kind='stable')
+
+        # トラック未設定の明細は日付×トラック単位に組み立てられないため除外する
+        missing_truck = details['truck_id'].isna()
+        if missing_truck.any():
+            logger.warning(
+                "⚠️ トラック未設定の明細を除外: plan_id=%s, detail_ids=%s",
+                plan_id, details.loc[missing_truck, 'rec_id'].tolist()
+            )
+            details = details[~missing_truck]
+
+        # 明細: 積載日→トラック→便→明細IDの順に並べ、型変換は列単位でまとめて行う
+        details = details.sort_values(['rec_date', 'truck_id', 'trip_number', 'rec_id'], kind='stable')
+        details['loading_date'] = pd.to_datetime(details['rec_date']).dt.date
+        details['date_str'] = pd.to_datetime(details['rec_date']).dt.strftime('%Y-%m-%d')
+        details['truck_id'] = details['truck_id'].astype(int)
+        details['truck_name'] = details['truck_name'].fillna('不明')
+        for col in ('num_containers', 'total_quantity', 'trip_number'):
+            details[col] = details[col].fillna(0).astype(int)
+        details['is_advanced'] = details['is_advanced'].fillna(False).astype(bool)
+        details['volume_utilization'] = details['volume_utilization'].fillna(0).astype(float)
+        details['delivery_date'] = self._to_date_series(details['delivery_date'])
+
+        truck_groups = details.groupby(['date_str', 'truck_id'], sort=False)
+        truck_ordinal = truck_groups.ngroup()
+        details['truck_index'] = truck_ordinal - truck_ordinal.groupby(details['date_str']).transform('min')
+        details['item_index'] = truck_groups.cumcount()
+        details['truck_volume_rate'] = truck_groups['volume_utilization'].transform('first')
+
+        items = self._records(details, {
+            'product_id': 'product_id',
+            'product_code': 'product_code',
+            'product_name': 'product_name',
+            'container_id': 'container_id',
+            'num_containers': 'num_containers',
+            'total_quantity': 'total_quantity',
+            'delivery_date': 'delivery_date',
+            'is_advanced': 'is_advanced',
+        })
+        truck_rows = details[['date_str', 'truck_id', 'truck_name', 'truck_volume_rate']].to_dict('records')
+
+        daily_plans: Dict[str, Dict[str, Any]] = {}
+        truck_positions = sorted(truck_groups.indices.items(), key=lambda group: group[1][0])
+        for (date_str, truck_id), positions in truck_positions:
+            first_row = truck_rows[positions[0]]
+            day_plan = daily_plans.setdefault(date_str, {'trucks': [], 'total_trips': 0, 'warnings': []})
+            day_plan['trucks'].append({
+                'truck_id': int(truck_id),
+                'truck_name': first_row['truck_name'],
+                'loaded_items': [items[pos] for pos in positions],
+                'utilization': {
+                    'volume_rate': float(first_row['truck_volume_rate']),
+                    'weight_rate': 0
+                }
+            })
+            day_plan['total_trips'] += 1
+
+        # 警告: 計画に存在する日付のみ日別に割り当て
+        warning_dates = pd.to_datetime(warnings['rec_date']).dt.strftime('%Y-%m-%d')
+        for date_str, messages in warnings['message'].fillna('').groupby(warning_dates, sort=False):
+            if date_str in daily_plans:
+                daily_plans[date_str]['warnings'].extend(messages.tolist())
+
+        unloaded = unloaded.copy()
+        unloaded['delivery_date'] = self._to_date_series(unloaded['delivery_date'])
+        for col in ('num_containers', 'total_quantity'):
+            unloaded[col] = unloaded[col].fillna(0).astype(int)
+        unloaded['category'] = unloaded['category'].fillna('')
+        unloaded_tasks = self._records(unloaded, {
+            'product_id': 'product_id',
+            'product_code': 'product_code',
+            'product_name': 'product_name',
+            'container_id': 'container_id',
+            'num_containers': 'num_containers',
+            'total_quantity': 'total_quantity',
+            'delivery_date': 'delivery_date',
+            'category': 'reason',
+        })
+
+        warning_rows = warnings.assign(
+            warning_date=pd.to_datetime(warnings['rec_date']).dt.date
+        )
+
+        summary = {
+            'total_days': int(header.get('total_days') or 0),
+            'total_trips': int(header.get('total_trips') or 0),
+            'status': header.get('status') or '不明',
+            'total_warnings': len(warnings),
+            'unloaded_count': len(unloaded_tasks)
+        }
+
+        return {
+            'id': plan_id,
+            'plan_name': header.get('plan_name') or '',
+            'header': header,
+            'details': self._records(details, {
+                'rec_id': 'id',
+                'loading_date': 'loading_date',
+                'truck_id': 'truck_id',
+                'truck_name': 'truck_name',
+                'trip_number': 'trip_number',
+                'product_id': 'product_id',
+                'product_code': 'product_code',
+                'product_name': 'product_name',
+                'num_containers': 'num_containers',
+                'total_quantity': 'total_quantity',
+                'delivery_date': 'delivery_date',
+                'truck_volume_rate': 'volume_rate',
+                'truck_index': 'truck_index',
+                'item_index': 'item_index',
+            }),
+            'warnings': self._records(warning_rows, {
+                'rec_id': 'id',
+                'warning_date': 'warning_date',
+                'category': 'warning_type',
+                'message': 'warning_message',
+            }),
+            'unloaded': unloaded_tasks,
+            'daily_plans': daily_plans,
+            'summary': summary,
+            'unloaded_tasks': unloaded_tasks,
+            'period': f"{header.get('start_date', '')} ~ {header.get('end_date', '')}"
+        }
+
+    @staticmethod
+    def _to_date_series(series: pd.Series) -> pd.Series:
+        """日付/日時/文字列の列を date 型（欠損は None）に揃える"""
+        converted = pd.to_datetime(series, errors='coerce')
+        return pd.Series(
+            [value.date() if not pd.isna(value) else None for value in converted],
+            index=series.index,
+            dtype=object
+        )
+
+    @staticmethod
+    def _records(frame: pd.DataFrame, columns: Dict[str, str]) -> List[Dict[str, Any]]:
+        """指定列のみを辞書リスト化（NaNはNoneに置換）"""
+        if frame.empty:
+            return []
+        subset = frame[list(columns.keys())].rename(columns=columns)
+        subset = subset.astype(object).where(subset.notna(), None)
+        return subset.to_dict('records')
     
     def get_all_plans(self) -> List[Dict]:
-        """全積載計画のリスト取得"""
-        session = self.db.get_session()
-        
+        """全積載計画のリスト取得（警告数・積載不可数付き）"""
         try:
-            sql = text("""
-                SELECT 
-                    id, plan_name, start_date, end_date, 
-                    total_days, total_trips, status, created_at
-                FROM loading_plan_header
-                ORDER BY created_at DESC
-            """)
-            results = session.execute(sql).fetchall()
-            
-            plans = []
-            for row in results:
-                row_dict = dict(row._mapping)
-                
-                # ✅ summaryキーを追加
-                row_dict['summary'] = {
-                    'total_days': row_dict.get('total_days', 0),
-                    'total_trips': row_dict.get('total_trips', 0),
-                    'status': row_dict.get('status', '不明'),
-                    'total_warnings': 0,  # ヘッダーにはないのでデフォルト値
-                    'unloaded_count': 0   # ヘッダーにはないのでデフォルト値
-                }
-                
-                plans.append(row_dict)
-            
-            return plans
-            
+            return self._fetch_plan_list()
         except SQLAlchemyError as e:
-            print(f"積載計画リスト取得エラー: {e}")
+            logger.error("積載計画リスト取得エラー: %s", e)
             return []
+
+    def get_plans_page(self,
+                       limit: int = 20,
+                       before_id: Optional[int] = None,
+                       start_date: Optional[date] = None,
+                       end_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        積載計画リストをキーセット方式でページ取得（新しい順）
+
+        Args:
+            limit: 1ページの件数
+            before_id: 前ページ最後の計画ID（このIDより古い計画を取得）。None の場合は先頭ページ
+            start_date: 計画期間の絞り込み開始日（期間が重なる計画を対象）
+            end_date: 計画期間の絞り込み終了日
+
+        Returns:
+            {'plans': [...], 'next_cursor': 次ページ取得用の before_id（最終ページは None）}
+        """
+        try:
+            # 1件多く取得して次ページの有無を判定
+            plans = self._fetch_plan_list(limit + 1, before_id, start_date, end_date)
+        except SQLAlchemyError as e:
+            logger.error("積載計画リスト取得エラー: %s", e)
+            return {'plans': [], 'next_cursor': None}
+
+        has_next = len(plans) > limit
+        plans = plans[:limit]
+        return {
+            'plans': plans,
+            'next_cursor': plans[-1]['id'] if has_next and plans else None
+        }
+
+    def _fetch_plan_list(self,
+                         limit: Optional[int] = None,
+                         before_id: Optional[int] = None,
+                         start_date: Optional[date] = None,
+                         end_date: Optional[date] = None) -> List[Dict]:
+        """
+        計画ヘッダー一覧を取得
+
+        並び順は id の降順（created_at と同順で主キーを使えるため）。
+        警告数・積載不可数は LIMIT 適用後の計画分だけ plan_id のインデックスで集計する。
+        """
+        conditions = []
+        params: Dict[str, Any] = {}
+        if before_id is not None:
+            conditions.append("id < :before_id")
+            params['before_id'] = before_id
+        if start_date is not None:
+            conditions.append("end_date >= :start_date")
+            params['start_date'] = start_date
+        if end_date is not None:
+            conditions.append("start_date <= :end_date")
+            params['end_date'] = end_date
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT :limit"
+            params['limit'] = int(limit)
+
+        sql = text(f"""
+            SELECT
+                p.id, p.plan_name, p.start_date, p.end_date,
+                p.total_days, p.total_trips, p.status, p.created_at,
+                (SELECT COUNT(*) FROM loading_plan_warnings w WHERE w.plan_id = p.id) AS total_warnings,
+                (SELECT COUNT(*) FROM loading_plan_unloaded u WHERE u.plan_id = p.id) AS unloaded_count
+            FROM (
+                SELECT id, plan_name, start_date, end_date,
+                       total_days, total_trips, status, created_at
+                FROM loading_plan_header
+                {where_clause}
+                ORDER BY id DESC
+                {limit_clause}
+            ) p
+            ORDER BY p.id DESC
+        """)
+
+        session = self.db.get_session()
+        try:
+            results = session.execute(sql, params).fetchall()
         finally:
             session.close()
 
+        plans = []
+        for row in results:
+            row_dict = dict(row._mapping)
+            row_dict['summary'] = {
+                'total_days': row_dict.get('total_days', 0),
+                'total_trips': row_dict.get('total_trips', 0),
+                'status': row_dict.get('status', '不明'),
+                'total_warnings': int(row_dict.pop('total_warnings') or 0),
+                'unloaded_count': int(row_dict.pop('unloaded_count') or 0)
+            }
+            plans.append(row_dict)
+
+        return plans
+
     def get_plan_details_by_date_and_truck(self, loading_date: date, truck_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """指定日の積載計画明細をトラック単位で取得"""
         session = self.db.get_session()
@@ -489,7 +660,8 @@ class LoadingPlanRepository:
             plan_id = latest_plan[0]
             params = {
                 'plan_id': plan_id,
-                'loading_date': loading_date.strftime('%Y-%m-%d')
+                'loading_date': loading_date.strftime('%Y-%m-%d'),
+                'next_date': (loading_date + timedelta(days=1)).strftime('%Y-%m-%d')
             }
 
             detail_sql = """
@@ -510,7 +682,8 @@ class LoadingPlanRepository:
                     original_date
                 FROM loading_plan_detail
                 WHERE plan_id = :plan_id
-                  AND DATE(loading_date) = :loading_date
+                  AND loading_date >= :loading_date
+                  AND loading_date < :next_date
             """
 
             if truck_id:
@@ -523,7 +696,7 @@ class LoadingPlanRepository:
             return [dict(row._mapping) for row in results]
 
         except SQLAlchemyError as e:
-            print(f"積載計画明細取得エラー: {e}")
+            logger.error("積載計画明細取得エラー: %s", e)
             return []
         finally:
             session.close()
@@ -536,10 +709,11 @@ class LoadingPlanRepository:
             sql = text("DELETE FROM loading_plan_header WHERE id = :plan_id")
             session.execute(sql, {'plan_id': plan_id})
             session.commit()
+            self.invalidate_plan_cache(plan_id)
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"積載計画削除エラー: {e}")
+            logger.error("積載計画削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -563,11 +737,13 @@ class LoadingPlanRepository:
             
             session.execute(query, params)
             session.commit()
+            # 明細IDから計画を特定できないため、キャッシュ全体を破棄
+            self.invalidate_plan_cache()
             return True
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"計画明細更新エラー: {e}")
+            logger.error("計画明細更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -590,7 +766,7 @@ class LoadingPlanRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"編集履歴保存エラー: {e}")
+            logger.error("編集履歴保存エラー: %s", e)
             return False
         finally:
             session.close()
@@ -625,7 +801,7 @@ class LoadingPlanRepository:
             
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"バージョン作成エラー: {e}")
+            logger.error("バージョン作成エラー: %s", e)
             return 0
         finally:
             session.close()
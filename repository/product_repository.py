@@ -6,6 +6,10 @@ from sqlalchemy.orm import declarative_base
 import pandas as pd
 from typing import Optional
 from .database_manager import DatabaseManager
+from .db_router import route_reads
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 Base = declarative_base()
 
@@ -69,6 +73,7 @@ class ProductGroupORM(Base):
     updated_at = Column(TIMESTAMP)
 
 
+@route_reads
 class ProductRepository:
     """製品関連データアクセス"""
 
@@ -92,15 +97,15 @@ class ProductRepository:
 
             result = self.db.execute_query(query)
 
-            print(f"🔍 デバッグ: 製品データ取得 - {len(result)}件")
+            logger.debug("製品データ取得 - %s件", len(result))
 
             if result.empty:
-                print("⚠️ 警告: 製品データが0件")
+                logger.warning("⚠️ 警告: 製品データが0件")
 
             return result
 
         except Exception as e:
-            print(f"❌ 製品データ取得エラー: {e}")
+            logger.error("❌ 製品データ取得エラー: %s", e)
             return pd.DataFrame()
     
     def get_product_constraints(self) -> pd.DataFrame:
@@ -137,7 +142,7 @@ class ProductRepository:
                 "inspection_category": row[8] or ""
             } for row in rows])
         except SQLAlchemyError as e:
-            print(f"製品制約取得エラー: {e}")
+            logger.error("製品制約取得エラー: %s", e)
             return pd.DataFrame()
         finally:
             session.close()
@@ -160,7 +165,7 @@ class ProductRepository:
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"製品制約保存エラー: {e}")
+            logger.error("製品制約保存エラー: %s", e)
             return False
         finally:
             session.close()   
@@ -172,7 +177,7 @@ class ProductRepository:
         category = product_data.get("inspection_category")
 
         if category not in VALID_CATEGORIES:
-            print(f"⚠️ 警告: 不正な inspection_category の値 '{category}' が指定されました。登録を中止します。")
+            logger.warning("⚠️ 警告: 不正な inspection_category の値 '%s' が指定されました。登録を中止します。", category)
             return False
         
         session = self.db.get_session()
@@ -200,7 +205,7 @@ class ProductRepository:
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"製品登録エラー: {e}")
+            logger.error("製品登録エラー: %s", e)
             return False
         finally:
             session.close()
@@ -209,12 +214,12 @@ class ProductRepository:
         """製品を更新 - 修正版"""
         session = self.db.get_session()
         try:
-            print(f"🔍 update_product: ID={product_id}, data={update_data}")
+            logger.debug("🔍 update_product: ID=%s, data=%s", product_id, update_data)
             
             product = session.get(ProductORM, product_id)
             
             if product:
-                print(f"✅ 製品見つかりました: {product.product_code}")
+                logger.debug("製品見つかりました: %s", product.product_code)
                 
                 for key, value in update_data.items():
                     if hasattr(product, key):
@@ -223,30 +228,28 @@ class ProductRepository:
                             value = int(value)
                         
                         old_value = getattr(product, key, None)
-                        print(f"📝 更新: {key}: {old_value} → {value}")
+                        logger.debug("📝 更新: %s: %s → %s", key, old_value, value)
                         
                         setattr(product, key, value)
                     else:
-                        print(f"⚠️ 警告: カラム '{key}' は ProductORM に存在しません")
+                        logger.warning("⚠️ 警告: カラム '%s' は ProductORM に存在しません", key)
                 
-                print(f"💾 コミット実行中...")
+                logger.debug("💾 コミット実行中...")
                 session.commit()
-                print(f"✅ コミット成功")
+                logger.debug("コミット成功")
                 
                 # コミット後の値を確認
                 session.refresh(product)
-                print(f"🔍 コミット後の used_container_id: {product.used_container_id}")
+                logger.debug("🔍 コミット後の used_container_id: %s", product.used_container_id)
                 
                 return True
             else:
-                print(f"❌ エラー: product_id={product_id} が見つかりません")
+                logger.error("❌ エラー: product_id=%s が見つかりません", product_id)
                 return False
                 
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"❌ update_product エラー: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ update_product エラー: %s", e)
             return False
         finally:
             session.close()
@@ -263,7 +266,7 @@ class ProductRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"製品削除エラー: {e}")
+            logger.error("製品削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -274,7 +277,7 @@ class ProductRepository:
         try:
             return session.get(ProductORM, product_id)
         except SQLAlchemyError as e:
-            print(f"製品取得エラー: {e}")
+            logger.error("製品取得エラー: %s", e)
             return None
         finally:
             session.close()
@@ -316,7 +319,7 @@ class ProductRepository:
             result = self.db.execute_query(query)
             return result
         except Exception as e:
-            print(f"Failed to fetch product group data: {e}")
+            logger.error("Failed to fetch product group data: %s", e)
             return pd.DataFrame()
 
     def create_product_group(self, group_data: dict) -> Optional[int]:
@@ -347,9 +350,7 @@ class ProductRepository:
             return group.id
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Failed to create product group: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to create product group: %s", e)
             return None
         finally:
             session.close()
@@ -360,7 +361,7 @@ class ProductRepository:
         try:
             group = session.get(ProductGroupORM, group_id)
             if not group:
-                print(f"[WARN] Product group not found: ID={group_id}")
+                logger.warning("[WARN] Product group not found: ID=%s", group_id)
                 return False
 
             bool_fields = {
@@ -378,7 +379,7 @@ class ProductRepository:
 
             for key, value in update_data.items():
                 if not hasattr(group, key):
-                    print(f"[WARN] Unknown attribute '{key}' on ProductGroupORM; skipping.")
+                    logger.warning("[WARN] Unknown attribute '%s' on ProductGroupORM; skipping.", key)
                     continue
 
                 if value == "":
@@ -391,7 +392,7 @@ class ProductRepository:
                     try:
                         value = int(value)
                     except (TypeError, ValueError):
-                        print(f"[WARN] Invalid integer value for '{key}': {value}")
+                        logger.warning("[WARN] Invalid integer value for '%s': %s", key, value)
                         continue
 
                 setattr(group, key, value)
@@ -400,9 +401,7 @@ class ProductRepository:
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Failed to update product group: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to update product group: %s", e)
             return False
         finally:
             session.close()
@@ -1,16 +1,27 @@
 # app/repository/production_repository.py
 from .database_manager import DatabaseManager
+from .db_router import route_reads
+from .calendar_repository import working_day_sql
 import pandas as pd
 from datetime import date
+from app_logging import get_logger
 
+logger = get_logger(__name__)
+
+@route_reads
 class ProductionRepository:
     """生産関連データアクセス"""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
-    def get_production_instructions(self, start_date: date = None, end_date: date = None) -> pd.DataFrame:
-        """生産指示データ取得 - 完全修正版"""
+    def get_production_instructions(self, start_date: date = None, end_date: date = None,
+                                    working_days_only: bool = False) -> pd.DataFrame:
+        """生産指示データ取得 - 完全修正版（working_days_only=True で指示日が営業日の行のみ）"""
+        calendar_join, calendar_filter = '', ''
+        if working_days_only:
+            calendar_join, condition = working_day_sql('pid.instruction_date')
+            calendar_filter = f"AND {condition}"
         try:
             # パラメータを文字列に変換（SQLインジェクション注意）
             if start_date and end_date:
@@ -28,13 +39,15 @@ class ProductionRepository:
                     p.product_name
                 FROM production_instructions_detail pid
                 LEFT JOIN products p ON pid.product_id = p.id
+                {calendar_join}
                 WHERE pid.instruction_quantity IS NOT NULL 
                 AND pid.instruction_quantity > 0
                 AND pid.instruction_date BETWEEN '{start_str}' AND '{end_str}'
+                {calendar_filter}
                 ORDER BY pid.instruction_date
                 """
             else:
-                query = """
+                query = f"""
                 SELECT 
                     pid.id,
                     pid.product_id,
@@ -45,8 +58,10 @@ class ProductionRepository:
                     p.product_name
                 FROM production_instructions_detail pid
                 LEFT JOIN products p ON pid.product_id = p.id
+                {calendar_join}
                 WHERE pid.instruction_quantity IS NOT NULL 
                 AND pid.instruction_quantity > 0
+                {calendar_filter}
                 ORDER BY pid.instruction_date
                 """
             
@@ -78,5 +93,99 @@ class ProductionRepository:
             return df
                 
         except Exception as e:
-            print(f"❌ オーダーデータ取得エラー: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            logger.error("❌ オーダーデータ取得エラー: %s", e)
+            return pd.DataFrame()
+    # -------------------------
+    # ダッシュボード用集計（SQLで集計し、明細は取得しない）
+    # -------------------------
+    def get_master_counts(self) -> dict:
+        """登録製品数・制約対象製品数（product_count, constrained_count）"""
+        query = """
+        SELECT
+            (SELECT COUNT(*) FROM products) AS product_count,
+            (SELECT COUNT(*) FROM production_constraints) AS constrained_count
+        """
+        try:
+            df = self.db.execute_query(query)
+            if df is None or len(df) == 0:
+                return {'product_count': 0, 'constrained_count': 0}
+
+            row = df.iloc[0] if isinstance(df, pd.DataFrame) else df[0]
+            return {
+                'product_count': int(row['product_count'] or 0),
+                'constrained_count': int(row['constrained_count'] or 0),
+            }
+        except Exception as e:
+            logger.error("❌ ダッシュボード集計エラー: %s", e)
+            return {'product_count': 0, 'constrained_count': 0}
+
+    def get_demand_summary(self) -> dict:
+        """生産指示の総数量と期間（total_demand, min_date, max_date）"""
+        query = """
+        SELECT
+            COALESCE(SUM(pid.instruction_quantity), 0) AS total_demand,
+            MIN(pid.instruction_date) AS min_date,
+            MAX(pid.instruction_date) AS max_date
+        FROM production_instructions_detail pid
+        WHERE pid.instruction_quantity > 0
+        """
+        empty = {'total_demand': 0, 'min_date': None, 'max_date': None}
+        try:
+            df = self.db.execute_query(query)
+            if df is None or len(df) == 0:
+                return empty
+
+            row = df.iloc[0] if isinstance(df, pd.DataFrame) else df[0]
+            return {
+                'total_demand': float(row['total_demand'] or 0),
+                'min_date': pd.to_datetime(row['min_date']).date() if row['min_date'] is not None else None,
+                'max_date': pd.to_datetime(row['max_date']).date() if row['max_date'] is not None else None,
+            }
+        except Exception as e:
+            logger.error("❌ ダッシュボード集計エラー: %s", e)
+            return empty
+
+    def get_daily_demand(self) -> pd.DataFrame:
+        """日別需要量（instruction_date, instruction_quantity）を取得"""
+        query = """
+        SELECT
+            pid.instruction_date,
+            SUM(pid.instruction_quantity) AS instruction_quantity
+        FROM production_instructions_detail pid
+        WHERE pid.instruction_quantity > 0
+        GROUP BY pid.instruction_date
+        ORDER BY pid.instruction_date
+        """
+        try:
+            df = pd.DataFrame(self.db.execute_query(query))
+            if df.empty:
+                return pd.DataFrame(columns=['instruction_date', 'instruction_quantity'])
+            df['instruction_date'] = pd.to_datetime(df['instruction_date']).dt.date
+            df['instruction_quantity'] = pd.to_numeric(df['instruction_quantity'], errors='coerce').fillna(0)
+            return df
+        except Exception as e:
+            logger.error("❌ 日別需要集計エラー: %s", e)
+            return pd.DataFrame(columns=['instruction_date', 'instruction_quantity'])
+
+    def get_product_demand_totals(self) -> pd.DataFrame:
+        """製品別需要量（product_code, product_name, instruction_quantity）を多い順に取得"""
+        query = """
+        SELECT
+            p.product_code,
+            p.product_name,
+            SUM(pid.instruction_quantity) AS instruction_quantity
+        FROM production_instructions_detail pid
+        LEFT JOIN products p ON pid.product_id = p.id
+        WHERE pid.instruction_quantity > 0
+        GROUP BY p.product_code, p.product_name
+        ORDER BY instruction_quantity DESC
+        """
+        try:
+            df = pd.DataFrame(self.db.execute_query(query))
+            if df.empty:
+                return pd.DataFrame(columns=['product_code', 'product_name', 'instruction_quantity'])
+            df['instruction_quantity'] = pd.to_numeric(df['instruction_quantity'], errors='coerce').fillna(0)
+            return df
+        except Exception as e:
+            logger.error("❌ 製品別需要集計エラー: %s", e)
+            return pd.DataFrame(columns=['product_code', 'product_name', 'instruction_quantity'])
@@ -0,0 +1,502 @@
+# app/repository/snapshot_repository.py
+"""
+積載計画用ローカルスナップショット
+
+- 製品・容器・トラック・トラック×容器ルール・会社カレンダー・納入進度/生産指示（計画期間分）を
+  ローカルのSQLiteファイルへ書き出し、積載計画の入力として読み直す
+- 書き出し時にMySQL側の集計値（件数＋CRC32のXOR）を記録し、計画前に同じ集計と比較して鮮度を確認する
+- DBに接続できない場合は鮮度未確認のままスナップショットで計画を続行できる
+- 同じファイルを PlanningSnapshot.from_file() で読めば、DBなしで同じ入力を再現できる（ベンチマーク用）
+
+ファイルは SYSTEM_CONFIG.snapshot_dir/<顧客>_planning_snapshot.db に顧客ごとに作成する。
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from config_all import SYSTEM_CONFIG
+from .calendar_repository import CalendarRepository
+from .db_router import primary_reads, route_reads
+from .delivery_progress_repository import DeliveryProgressRepository
+from .product_repository import ProductRepository
+from .production_repository import ProductionRepository
+from .transport_repository import TransportRepository
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# 鮮度確認に使う列（計画結果に影響する列のみ）
+# 名前 -> (テーブル, 列, 期間で絞る日付列)
+_FINGERPRINT_SOURCES = {
+    'products': ('products', [
+        'id', 'product_code', 'used_container_id', 'used_truck_ids', 'capacity',
+        'inspection_category', 'can_advance', 'stackable', 'lead_time_days', 'fixed_point_days'
+    ], None),
+    'containers': ('container_capacity', [
+        'id', 'width', 'depth', 'height', 'max_weight', 'can_mix', 'stackable', 'max_stack'
+    ], None),
+    'trucks': ('truck_master', [
+        'id', 'width', 'depth', 'height', 'max_weight', 'departure_time', 'arrival_time',
+        'default_use', 'arrival_day_offset', 'priority_product_codes'
+    ], None),
+    'truck_container_rules': ('truck_container_rules', [
+        'id', 'truck_id', 'container_id', 'max_quantity'
+    ], None),
+    'calendar': ('company_calendar', [
+        'calendar_date', 'is_working_day'
+    ], 'calendar_date'),
+    'delivery_progress': ('delivery_progress', [
+        'id', 'product_id', 'delivery_date', 'order_quantity', 'planned_quantity', 'shipped_quantity',
+        'planned_progress_quantity', 'remaining_quantity', 'manual_planning_quantity', 'status', 'priority'
+    ], 'delivery_date'),
+    'production_instructions': ('production_instructions_detail', [
+        'id', 'product_id', 'instruction_date', 'instruction_quantity', 'inspection_category'
+    ], 'instruction_date'),
+}
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.to_datetime(value).date()
+
+
+class PlanningSnapshot:
+    """
+    スナップショットから読み込んだ積載計画の入力
+
+    各リポジトリと同じメソッド名（get_delivery_progress, get_all_products, get_containers,
+    get_trucks, get_truck_container_rules, is_working_day …）で参照できるため、
+    サービス・プランナーからはリポジトリの代わりにそのまま渡せる。
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], meta: Dict[str, Any], path: str = None):
+        self.frames = frames
+        self.meta = meta
+        self.path = path
+        calendar_df = frames.get('calendar', pd.DataFrame())
+        self._working_days = {
+            _to_date(row['calendar_date']): bool(row['is_working_day'])
+            for _, row in calendar_df.iterrows()
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> 'PlanningSnapshot':
+        """スナップショットファイルを読み込む（DB接続不要）"""
+        conn = sqlite3.connect(path)
+        try:
+            meta = {
+                key: json.loads(value)
+                for key, value in conn.execute("SELECT key, value FROM snapshot_meta")
+            }
+            kinds: Dict[str, Dict[str, str]] = {}
+            for table_name, column_name, kind in conn.execute(
+                    "SELECT table_name, column_name, kind FROM snapshot_columns"):
+                kinds.setdefault(table_name, {})[column_name] = kind
+
+            frames = {}
+            for name in meta.get('tables', []):
+                frame = pd.read_sql_query(f'SELECT * FROM "{name}"', conn)
+                frames[name] = _restore_columns(frame, kinds.get(name, {}))
+        finally:
+            conn.close()
+        return cls(frames, meta, path)
+
+    # -------------------------
+    # メタ情報
+    # -------------------------
+    @property
+    def customer(self) -> Optional[str]:
+        return self.meta.get('customer')
+
+    @property
+    def created_at(self) -> Optional[datetime]:
+        value = self.meta.get('created_at')
+        return datetime.fromisoformat(value) if value else None
+
+    @property
+    def start_date(self) -> Optional[date]:
+        return _to_date(self.meta.get('start_date'))
+
+    @property
+    def end_date(self) -> Optional[date]:
+        return _to_date(self.meta.get('end_date'))
+
+    @property
+    def fingerprint(self) -> Dict[str, str]:
+        return self.meta.get('fingerprint', {})
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        """計画期間がスナップショットの期間内か"""
+        return (self.start_date is not None and self.end_date is not None
+                and self.start_date <= start_date and end_date <= self.end_date)
+
+    def describe(self) -> Dict[str, Any]:
+        """画面・計画結果表示用の概要"""
+        return {
+            'path': self.path,
+            'customer': self.customer,
+            'created_at': self.meta.get('created_at'),
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'verified': self.meta.get('verified'),
+            'row_counts': {name: len(frame) for name, frame in self.frames.items()},
+        }
+
+    # -------------------------
+    # リポジトリ互換の参照
+    # -------------------------
+    def _frame(self, name: str) -> pd.DataFrame:
+        return self.frames.get(name, pd.DataFrame()).copy()
+
+    def _window(self, name: str, date_column: str,
+                start_date: date = None, end_date: date = None) -> pd.DataFrame:
+        frame = self._frame(name)
+        if frame.empty or not (start_date and end_date) or date_column not in frame.columns:
+            return frame
+        dates = pd.to_datetime(frame[date_column]).dt.date
+        return frame[(dates >= start_date) & (dates <= end_date)].reset_index(drop=True)
+
+    def _working_day_rows(self, frame: pd.DataFrame, date_column: str) -> pd.DataFrame:
+        """営業日の行のみ（カレンダーはメモリ上の辞書なので1行ずつ判定しても問い合わせは発生しない）"""
+        if frame.empty or date_column not in frame.columns:
+            return frame
+        mask = pd.to_datetime(frame[date_column]).dt.date.map(self.is_working_day).astype(bool)
+        return frame[mask].reset_index(drop=True)
+
+    def get_delivery_progress(self, start_date: date = None, end_date: date = None,
+                              working_days_only: bool = False) -> pd.DataFrame:
+        frame = self._window('delivery_progress', 'delivery_date', start_date, end_date)
+        return self._working_day_rows(frame, 'delivery_date') if working_days_only else frame
+
+    def get_delivery_progress_exists(self, start_date: date, end_date: date) -> bool:
+        return not self._window('delivery_progress', 'delivery_date', start_date, end_date).empty
+
+    def get_production_instructions(self, start_date: date = None, end_date: date = None,
+                                    working_days_only: bool = False) -> pd.DataFrame:
+        frame = self._window('production_instructions', 'instruction_date', start_date, end_date)
+        return self._working_day_rows(frame, 'instruction_date') if working_days_only else frame
+
+    def get_all_products(self) -> pd.DataFrame:
+        return self._frame('products')
+
+    def get_trucks(self) -> pd.DataFrame:
+        return self._frame('trucks')
+
+    def get_containers(self) -> List[SimpleNamespace]:
+        containers = []
+        for record in _records(self._frame('containers')):
+            record['stackable'] = bool(record.get('stackable')) if record.get('stackable') is not None else False
+            record['max_stack'] = int(record['max_stack']) if record.get('max_stack') is not None else 1
+            containers.append(SimpleNamespace(**record))
+        return containers
+
+    def get_truck_container_rules(self) -> List[Dict[str, Any]]:
+        return _records(self._frame('truck_container_rules'))
+
+    def is_working_day(self, target_date: date) -> bool:
+        """営業日判定（スナップショット範囲外は CalendarRepository と同じく土日以外を営業日とみなす）"""
+        target = _to_date(target_date)
+        if target in self._working_days:
+            return self._working_days[target]
+        return target.weekday() not in [5, 6]
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """NaN を None にした辞書のリスト"""
+    if frame.empty:
+        return []
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def _column_kind(series: pd.Series) -> Optional[str]:
+    """SQLite に保存できない型の列を判定（復元用の種別を返す）"""
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime64'
+    if series.dtype != object:
+        return None
+    sample = series.dropna()
+    if sample.empty:
+        return None
+    value = sample.iloc[0]
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, time):
+        return 'time'
+    if isinstance(value, timedelta):
+        return 'timedelta'
+    if isinstance(value, Decimal):
+        return 'decimal'
+    return None
+
+
+def _serialize_column(series: pd.Series, kind: str) -> pd.Series:
+    if kind in ('date', 'datetime', 'time'):
+        return series.map(lambda v: v.isoformat() if v is not None and not pd.isna(v) else None)
+    if kind == 'timedelta':
+        return series.map(lambda v: v.total_seconds() if v is not None and not pd.isna(v) else None)
+    if kind == 'decimal':
+        return series.map(lambda v: float(v) if v is not None and not pd.isna(v) else None)
+    if kind == 'bool':
+        return series.astype(int)
+    if kind == 'datetime64':
+        return series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+    return series
+
+
+def _restore_columns(frame: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    for column, kind in kinds.items():
+        if column not in frame.columns:
+            continue
+        series = frame[column]
+        if kind == 'date':
+            frame[column] = series.map(lambda v: date.fromisoformat(v) if v else None)
+        elif kind == 'datetime':
+            frame[column] = series.map(lambda v: datetime.fromisoformat(v) if v else None)
+        elif kind == 'time':
+            frame[column] = series.map(lambda v: time.fromisoformat(v) if v else None)
+        elif kind == 'timedelta':
+            frame[column] = series.map(lambda v: timedelta(seconds=v) if v is not None and not pd.isna(v) else None)
+        elif kind == 'bool':
+            frame[column] = series.astype(bool)
+        elif kind == 'datetime64':
+            frame[column] = pd.to_datetime(series)
+    return frame
+
+
+@route_reads
+class PlanningSnapshotRepository:
+    """積載計画用スナップショットの作成・読み込み・鮮度確認"""
+
+    # プランナーは前倒し・着日計算で計画期間外の営業日も参照するため、前後にこの日数分のカレンダーを含める
+    CALENDAR_MARGIN_DAYS = 31
+
+    def __init__(self, db_manager, snapshot_dir: str = None):
+        self.db = db_manager
+        self.snapshot_dir = snapshot_dir or SYSTEM_CONFIG.snapshot_dir
+
+    def _customer(self) -> str:
+        """顧客切替対応のDBでは現在の顧客、それ以外は 'default'"""
+        if hasattr(self.db, 'get_current_customer'):
+            return self.db.get_current_customer() or 'default'
+        return 'default'
+
+    def get_snapshot_path(self) -> str:
+        return os.path.join(self.snapshot_dir, f"{self._customer()}_planning_snapshot.db")
+
+    def _calendar_window(self, start_date: date, end_date: date):
+        margin = timedelta(days=self.CALENDAR_MARGIN_DAYS)
+        return start_date - margin, end_date + margin
+
+    # -------------------------
+    # 作成
+    # -------------------------
+    def export(self, start_date: date, end_date: date) -> Optional[PlanningSnapshot]:
+        """
+        マスタと計画期間の受注をスナップショットへ書き出す
+
+        Returns:
+            PlanningSnapshot: 書き出した内容（DB接続・書き込みに失敗した場合は None）
+        """
+        # 取得中に更新された場合に古いと判定されるよう、集計値はデータより先に取る
+        fingerprint = self.get_source_fingerprint(start_date, end_date)
+        if fingerprint is None:
+            logger.error("❌ スナップショット作成エラー: DBの集計値を取得できませんでした")
+            return None
+
+        cal_start, cal_end = self._calendar_window(start_date, end_date)
+        transport_repo = TransportRepository(self.db)
+        flags = CalendarRepository(self.db).get_working_day_flags(cal_start, cal_end)
+
+        frames = {
+            'products': ProductRepository(self.db).get_all_products(),
+            'containers': pd.DataFrame([vars(c) for c in transport_repo.get_containers()]),
+            'trucks': transport_repo.get_trucks(),
+            'truck_container_rules': pd.DataFrame(transport_repo.get_truck_container_rules()),
+            'calendar': pd.DataFrame({
+                'calendar_date': list(flags.keys()),
+                'is_working_day': list(flags.values())
+            }),
+            'delivery_progress': DeliveryProgressRepository(self.db).get_delivery_progress(start_date, end_date),
+            'production_instructions': ProductionRepository(self.db).get_production_instructions(start_date, end_date),
+        }
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'customer': self._customer(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'fingerprint': fingerprint,
+            'tables': [name for name, frame in frames.items() if len(frame.columns) > 0],
+        }
+
+        path = self.get_snapshot_path()
+        try:
+            self._write(path, frames, meta)
+        except (OSError, sqlite3.Error) as e:
+            logger.exception("❌ スナップショット書き込みエラー: %s", e)
+            return None
+
+        logger.info("✅ スナップショット作成: %s（%s ～ %s）", path, start_date, end_date)
+        return PlanningSnapshot(frames, meta, path)
+
+    @staticmethod
+    def _write(path: str, frames: Dict[str, pd.DataFrame], meta: Dict[str, Any]) -> None:
+        """一時ファイルに書いてから置き換える（読み込み中の他セッションに途中の状態を見せない）"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE snapshot_columns (table_name TEXT, column_name TEXT, kind TEXT)")
+            conn.executemany(
+                "INSERT INTO snapshot_meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()]
+            )
+            for name in meta['tables']:
+                frame = frames[name].copy()
+                kinds = []
+                for column in frame.columns:
+                    kind = _column_kind(frame[column])
+                    if kind:
+                        frame[column] = _serialize_column(frame[column], kind)
+                        kinds.append((name, column, kind))
+                frame.to_sql(name, conn, index=False)
+                conn.executemany(
+                    "INSERT INTO snapshot_columns (table_name, column_name, kind) VALUES (?, ?, ?)", kinds
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+
+    # -------------------------
+    # 読み込み・鮮度確認
+    # -------------------------
+    def load(self, start_date: date = None, end_date: date = None) -> Optional[PlanningSnapshot]:
+        """
+        現在の顧客のスナップショットを読み込む
+
+        Returns:
+            PlanningSnapshot: 指定期間を含むスナップショット（無い・期間外・形式が古い場合は None）
+        """
+        path = self.get_snapshot_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = PlanningSnapshot.from_file(path)
+        except (sqlite3.Error, ValueError) as e:
+            logger.exception("⚠️ スナップショット読み込みエラー: %s", e)
+            return None
+
+        if snapshot.meta.get('version') != SNAPSHOT_VERSION:
+            return None
+        if start_date and end_date and not snapshot.covers(start_date, end_date):
+            return None
+        return snapshot
+
+    def load_info(self) -> Optional[Dict[str, Any]]:
+        """
+        現在の顧客のスナップショットの概要（PlanningSnapshot.describe() と同じ形式）
+
+        画面の表示用。snapshot_meta と各表の件数だけを読み、表の内容は読み込まない。
+        """
+        path = self.get_snapshot_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            conn = sqlite3.connect(path)
+            try:
+                meta = {
+                    key: json.loads(value)
+                    for key, value in conn.execute("SELECT key, value FROM snapshot_meta")
+                }
+                row_counts = {
+                    name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+                    for name in meta.get('tables', [])
+                }
+            finally:
+                conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            logger.exception("⚠️ スナップショット読み込みエラー: %s", e)
+            return None
+
+        if meta.get('version') != SNAPSHOT_VERSION:
+            return None
+        return {
+            'path': path,
+            'customer': meta.get('customer'),
+            'created_at': meta.get('created_at'),
+            'start_date': _to_date(meta.get('start_date')),
+            'end_date': _to_date(meta.get('end_date')),
+            'verified': meta.get('verified'),
+            'row_counts': row_counts,
+        }
+
+    def get_source_fingerprint(self, start_date: date, end_date: date) -> Optional[Dict[str, str]]:
+        """
+        スナップショット対象データのMySQL側集計値（件数:CRC32のXOR）
+
+        Returns:
+            dict: {対象名: 集計値}（DBに接続できない場合は None）
+        """
+        cal_start, cal_end = self._calendar_window(start_date, end_date)
+        selects = []
+        for name, (table, columns, date_column) in _FINGERPRINT_SOURCES.items():
+            where = ""
+            if date_column:
+                bounds = ('cal_start', 'cal_end') if name == 'calendar' else ('start_date', 'end_date')
+                where = f" WHERE {date_column} BETWEEN :{bounds[0]} AND :{bounds[1]}"
+            selects.append(
+                f"(SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', {', '.join(columns)}))), 0))"
+                f" FROM {table}{where}) AS {name}"
+            )
+
+        try:
+            result = self.db.execute_query("SELECT " + ",\n".join(selects), {
+                'start_date': start_date,
+                'end_date': end_date,
+                'cal_start': cal_start,
+                'cal_end': cal_end,
+            })
+        except Exception as e:
+            logger.exception("⚠️ スナップショット鮮度確認エラー: %s", e)
+            return None
+
+        if result is None or result.empty:
+            return None
+        return {name: str(value) for name, value in result.iloc[0].items()}
+
+    def check_freshness(self, snapshot: PlanningSnapshot) -> Optional[bool]:
+        """
+        スナップショットがMySQLの現在の内容と一致するか
+
+        Returns:
+            True: 一致 / False: 古い / None: DBに接続できず確認できない
+        """
+        # 遅延しているレプリカで比べると古いスナップショットが最新に見えるため、プライマリで集計する
+        with primary_reads():
+            current = self.get_source_fingerprint(snapshot.start_date, snapshot.end_date)
+        if current is None:
+            return None
+        return current == snapshot.fingerprint
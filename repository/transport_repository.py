@@ -1,12 +1,17 @@
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List, Dict, Any
 from repository.database_manager import DatabaseManager
+from repository.db_router import route_reads
 from domain.models.transport import Container, Truck, TruckContainerRule , TransportConstraint
 import pandas as pd
 from datetime import datetime, date, timedelta
 from sqlalchemy import  text
+from app_logging import get_logger
 
+logger = get_logger(__name__)
 
+
+@route_reads
 class TransportRepository:
     """輸送関連データアクセス"""
     def __init__(self, db_manager: DatabaseManager):
@@ -51,9 +56,7 @@ class TransportRepository:
             return containers
             
         except Exception as e:
-            print(f"Container取得エラー: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Container取得エラー: %s", e)
             return []
         finally:
             session.close()
@@ -68,7 +71,7 @@ class TransportRepository:
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Container保存エラー: {e}")
+            logger.error("Container保存エラー: %s", e)
             return False
         finally:
             session.close()
@@ -95,7 +98,7 @@ class TransportRepository:
                 "priority_product_codes": t.priority_product_codes
             } for t in trucks])
         except SQLAlchemyError as e:
-            print(f"truck_masterテーブル取得エラー: {e}")
+            logger.error("truck_masterテーブル取得エラー: %s", e)
             return pd.DataFrame()
         finally:
             session.close()
@@ -141,7 +144,7 @@ class TransportRepository:
             return True
         except Exception as e:
             session.rollback()
-            print(f"Truck保存エラー: {e}")
+            logger.error("Truck保存エラー: %s", e)
             return False
         finally:
             session.close()
@@ -159,7 +162,7 @@ class TransportRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Truck削除エラー: {e}")
+            logger.error("Truck削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -179,7 +182,7 @@ class TransportRepository:
             result = self.db.execute_query(query)
             
             if result.empty:
-                print("⚠️ 警告: トラック容器ルールが0件")
+                logger.warning("⚠️ 警告: トラック容器ルールが0件")
                 return []
             
             # ✅ 単純な辞書のリストとして返す
@@ -192,11 +195,11 @@ class TransportRepository:
                     'max_quantity': row['max_quantity']
                 })
             
-            print(f"✅ デバッグ: {len(rules)}件のトラック容器ルールを取得")
+            logger.debug("トラック容器ルールを取得: %s件", len(rules))
             return rules
             
         except Exception as e:
-            print(f"❌ トラック容器ルール取得エラー: {e}")
+            logger.exception("❌ トラック容器ルール取得エラー: %s", e)
             return []  # エラー時は空リストを返す
     '''
     # repository/transport_repository.py の get_truck_container_rules()
@@ -222,7 +225,7 @@ class TransportRepository:
             result = self.db_manager.execute_query(query)
             
             if result.empty:
-                print("ℹ️ トラック容器ルールが未設定（サイズベースで計算します）")
+                logger.info("ℹ️ トラック容器ルールが未設定（サイズベースで計算します）")
                 return []
             
             rules = []
@@ -237,11 +240,11 @@ class TransportRepository:
                     'created_at': row.get('created_at')
                 })
             
-            print(f"✅ {len(rules)}件のトラック容器ルールを取得")
+            logger.info("✅ %s件のトラック容器ルールを取得", len(rules))
             return rules
             
         except Exception as e:
-            print(f"⚠️ トラック容器ルール取得エラー（サイズベース計算を使用）: {e}")
+            logger.warning("⚠️ トラック容器ルール取得エラー（サイズベース計算を使用）: %s", e)
             return []
     def save_truck_container_rule(self, rule_data: dict) -> bool:
         """トラック×容器ルールを保存（UPSERT）。TruckContainerRule は dataclass のため raw SQL を使用"""
@@ -299,7 +302,7 @@ class TransportRepository:
             return True
         except Exception as e:
             session.rollback()
-            print(f"TruckContainerRule保存エラー: {e}")
+            logger.error("TruckContainerRule保存エラー: %s", e)
             return False
         finally:
             session.close()
@@ -311,7 +314,7 @@ class TransportRepository:
                 TransportConstraint.updated_at.desc()
             ).first()
         except SQLAlchemyError as e:
-            print(f"TransportConstraint取得エラー: {e}")
+            logger.error("TransportConstraint取得エラー: %s", e)
             return None
         finally:
             session.close()
@@ -326,7 +329,7 @@ class TransportRepository:
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"TransportConstraint保存エラー: {e}")
+            logger.error("TransportConstraint保存エラー: %s", e)
             return False
         finally:
             session.close()
@@ -342,7 +345,7 @@ class TransportRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Container削除エラー: {e}")
+            logger.error("Container削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -355,7 +358,7 @@ class TransportRepository:
             return result.rowcount > 0
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"TruckContainerRule削除エラー: {e}")
+            logger.error("TruckContainerRule削除エラー: %s", e)
             return False
         finally:
             session.close()
@@ -372,7 +375,7 @@ class TransportRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Container更新エラー: {e}")
+            logger.error("Container更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -389,7 +392,7 @@ class TransportRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"Truck更新エラー: {e}")
+            logger.error("Truck更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -412,7 +415,7 @@ class TransportRepository:
             return result.rowcount > 0
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"TruckContainerRule更新エラー: {e}")
+            logger.error("TruckContainerRule更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -429,7 +432,7 @@ class TransportRepository:
             return False
         except SQLAlchemyError as e:
             session.rollback()
-            print(f"TransportConstraint更新エラー: {e}")
+            logger.error("TransportConstraint更新エラー: %s", e)
             return False
         finally:
             session.close()
@@ -439,7 +442,7 @@ class TransportRepository:
         try:
             return session.get(Container, container_id)
         except SQLAlchemyError as e:
-            print(f"Container取得エラー: {e}")
+            logger.error("Container取得エラー: %s", e)
             return None
         finally:
             session.close()
@@ -449,7 +452,7 @@ class TransportRepository:
         try:
             return session.get(Truck, truck_id)
         except SQLAlchemyError as e:
-            print(f"Truck取得エラー: {e}")
+            logger.error("Truck取得エラー: %s", e)
             return None
         finally:
             session.close()
@@ -459,7 +462,7 @@ class TransportRepository:
         try:
             return session.get(TruckContainerRule, rule_id)
         except SQLAlchemyError as e:
-            print(f"TruckContainerRule取得エラー: {e}")
+            logger.error("TruckContainerRule取得エラー: %s", e)
             return None
         finally:
             session.close()
@@ -0,0 +1,278 @@
+# app/services/background_job_service.py
+"""
+バックグラウンドジョブ実行サービス
+
+- 積載計画作成・CSV一括取込・進度再計算をワーカープールで実行する
+- ジョブはジョブIDで管理し、進捗（0.0～1.0）とステップ名を随時更新する
+- 完了した結果は一定時間キャッシュし、画面の再読み込み後でも受け取れる
+- 同じユーザーが同じ内容のジョブを実行中に再投入した場合は既存ジョブにまとめる
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from config_all import SYSTEM_CONFIG
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+JOB_KIND_LOADING_PLAN = 'loading_plan'
+JOB_KIND_CSV_IMPORT = 'csv_import'
+JOB_KIND_PROGRESS_RECOMPUTE = 'progress_recompute'
+
+ProgressCallback = Callable[[float, str], None]
+
+
+@dataclass
+class JobInfo:
+    """ジョブの状態"""
+    job_id: str
+    kind: str
+    owner: Optional[Hashable] = None
+    dedup_key: Optional[Hashable] = None
+    status: str = JOB_PENDING
+    progress: float = 0.0
+    message: str = '待機中'
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JOB_PENDING, JOB_RUNNING)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+
+class BackgroundJobRunner:
+    """
+    スレッドプールによるバックグラウンドジョブ実行
+
+    ジョブ関数は進捗コールバック progress(ratio, message) を第1引数に受け取る。
+    DB接続やStreamlitのセッションを持つサービスはプロセス間で受け渡せないため、
+    プロセスプールではなくスレッドプールを使用する。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, result_ttl_seconds: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or SYSTEM_CONFIG.job_max_workers,
+            thread_name_prefix='bg-job'
+        )
+        self._result_ttl = result_ttl_seconds or SYSTEM_CONFIG.job_result_ttl_minutes * 60
+        self._jobs: Dict[str, JobInfo] = {}
+        self._lock = threading.Lock()
+
+    def submit(self,
+               kind: str,
+               func: Callable[..., Any],
+               *args,
+               owner: Optional[Hashable] = None,
+               dedup_key: Optional[Hashable] = None,
+               **kwargs) -> str:
+        """
+        ジョブを投入
+
+        Args:
+            kind: ジョブ種別（JOB_KIND_*）
+            func: 実行する関数。func(progress, *args, **kwargs) の形で呼び出す
+            owner: 投入ユーザー（重複判定に使用）
+            dedup_key: 重複判定キー。同じ owner・kind・dedup_key のジョブが実行中なら既存IDを返す
+
+        Returns:
+            str: ジョブID
+        """
+        with self._lock:
+            self._purge_expired()
+
+            if dedup_key is not None:
+                for job in self._jobs.values():
+                    if (job.is_active and job.kind == kind
+                            and job.owner == owner and job.dedup_key == dedup_key):
+                        return job.job_id
+
+            job = JobInfo(job_id=uuid.uuid4().hex, kind=kind, owner=owner, dedup_key=dedup_key)
+            self._jobs[job.job_id] = job
+
+        self._executor.submit(self._run, job.job_id, func, args, kwargs)
+        return job.job_id
+
+    def get_job(self, job_id: str) -> Optional[JobInfo]:
+        """ジョブ状態のスナップショットを取得（存在しない・期限切れの場合は None）"""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def pop_result(self, job_id: str) -> Optional[JobInfo]:
+        """完了したジョブを取り出してキャッシュから削除（未完了の場合は None）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or not job.is_finished:
+                return None
+            return self._jobs.pop(job_id)
+
+    def find_latest_job(self, kind: str, owner: Optional[Hashable] = None) -> Optional[JobInfo]:
+        """
+        指定ユーザーの最新ジョブを取得（実行中を優先、無ければ未受取の完了ジョブ）
+
+        ブラウザ再読み込みでセッションのジョブIDが失われた場合の再接続に使用する。
+        """
+        with self._lock:
+            self._purge_expired()
+            candidates = [
+                job for job in self._jobs.values()
+                if job.kind == kind and job.owner == owner
+            ]
+        if not candidates:
+            return None
+        latest = max(candidates, key=lambda job: (job.is_active, job.submitted_at))
+        return replace(latest)
+
+    def list_jobs(self, owner: Optional[Hashable] = None) -> List[JobInfo]:
+        """ジョブ一覧を取得（owner指定時はそのユーザーのみ）"""
+        with self._lock:
+            self._purge_expired()
+            return [
+                replace(job) for job in self._jobs.values()
+                if owner is None or job.owner == owner
+            ]
+
+    def _update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                for key, value in changes.items():
+                    setattr(job, key, value)
+
+    def _run(self, job_id: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        def progress(ratio: float, message: str = '') -> None:
+            changes = {'progress': min(max(float(ratio), 0.0), 1.0)}
+            if message:
+                changes['message'] = message
+            self._update(job_id, **changes)
+
+        self._update(job_id, status=JOB_RUNNING, message='実行中')
+        try:
+            result = func(progress, *args, **kwargs)
+        except Exception as e:
+            logger.exception("バックグラウンドジョブエラー (job_id=%s): %s", job_id, e)
+            self._update(job_id, status=JOB_FAILED, error=str(e), message='エラー', finished_at=time.time())
+            return
+
+        self._update(job_id, status=JOB_DONE, progress=1.0, message='完了',
+                     result=result, finished_at=time.time())
+
+    def _purge_expired(self) -> None:
+        """受け取られないまま期限切れになった結果を破棄（ロック取得済みで呼ぶこと）"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self._result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_runner: Optional[BackgroundJobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> BackgroundJobRunner:
+    """プロセス共通のジョブランナーを取得"""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = BackgroundJobRunner()
+    return _runner
+
+
+# -------------------------
+# ジョブ投入ヘルパー
+# -------------------------
+def _customer_key(service) -> Optional[str]:
+    """顧客切替に対応したDBの場合は現在の顧客を重複判定キーに含める"""
+    db = getattr(service, 'db', None)
+    if db is not None and hasattr(db, 'get_current_customer'):
+        return db.get_current_customer()
+    return None
+
+
+def submit_loading_plan_job(transport_service,
+                            start_date: date,
+                            days: int,
+                            owner: Optional[Hashable] = None,
+                            use_delivery_progress: bool = True,
+                            use_calendar: bool = True,
+                            use_snapshot: bool = False) -> str:
+    """積載計画作成ジョブを投入"""
+    def _job(progress: ProgressCallback):
+        return transport_service.calculate_loading_plan_from_orders(
+            start_date=start_date,
+            days=days,
+            use_delivery_progress=use_delivery_progress,
+            use_calendar=use_calendar,
+            progress_callback=progress,
+            use_snapshot=use_snapshot
+        )
+
+    dedup_key = (_customer_key(transport_service), start_date, days, use_delivery_progress, use_calendar,
+                 use_snapshot)
+    return get_job_runner().submit(JOB_KIND_LOADING_PLAN, _job, owner=owner, dedup_key=dedup_key)
+
+
+def submit_csv_import_job(import_service,
+                          uploaded_file,
+                          owner: Optional[Hashable] = None,
+                          create_progress: bool = True) -> str:
+    """CSV一括取込ジョブを投入（ファイル内容はこの時点で読み込んで渡す）"""
+    import io
+
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+    content = uploaded_file.read()
+    file_name = getattr(uploaded_file, 'name', '')
+
+    def _job(progress: ProgressCallback):
+        progress(0.0, f"{file_name} を取込中")
+        return import_service.import_csv_data(io.BytesIO(content), create_progress=create_progress)
+
+    dedup_key = (_customer_key(import_service), file_name, len(content))
+    return get_job_runner().submit(JOB_KIND_CSV_IMPORT, _job, owner=owner, dedup_key=dedup_key)
+
+
+def submit_progress_recompute_job(transport_service,
+                                  start_date: date,
+                                  end_date: date,
+                                  target: str = 'planned',
+                                  owner: Optional[Hashable] = None) -> str:
+    """
+    進度再計算ジョブを投入
+
+    Args:
+        target: 'planned'（計画進度）または 'shipped'（実績進度）
+    """
+    if target == 'shipped':
+        recompute = transport_service.recompute_shipped_remaining_all
+    else:
+        recompute = transport_service.recompute_planned_progress_all
+
+    def _job(progress: ProgressCallback):
+        recompute(start_date, end_date, progress_callback=progress)
+        return True
+
+    dedup_key = (_customer_key(transport_service), target, start_date, end_date)
+    return get_job_runner().submit(JOB_KIND_PROGRESS_RECOMPUTE, _job, owner=owner, dedup_key=dedup_key)
@@ -3,6 +3,9 @@ import pandas as pd
 from datetime import datetime, date
 from typing import Tuple
 from repository.calendar_repository import CalendarRepository
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class CalendarImportService:
     """会社カレンダーExcelインポートサービス"""
@@ -84,7 +87,7 @@ class CalendarImportService:
                         skipped_count += 1
                 
                 except Exception as e:
-                    print(f"行スキップ: {e}")
+                    logger.exception("行スキップ: %s", e)
                     skipped_count += 1
                     continue
             
@@ -103,10 +106,10 @@ class CalendarImportService:
             from sqlalchemy import text
             session.execute(text("DELETE FROM company_calendar"))
             session.commit()
-            print("✅ 既存カレンダーデータをクリアしました")
+            logger.info("✅ 既存カレンダーデータをクリアしました")
         except Exception as e:
             session.rollback()
-            print(f"❌ カレンダークリアエラー: {e}")
+            logger.exception("❌ カレンダークリアエラー: %s", e)
         finally:
             session.close()
     
@@ -138,7 +141,7 @@ class CalendarImportService:
         
         except Exception as e:
             session.rollback()
-            print(f"カレンダー登録エラー: {e}")
+            logger.exception("カレンダー登録エラー: %s", e)
             return False
         finally:
             session.close()
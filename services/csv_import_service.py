@@ -2,6 +2,10 @@
 import pandas as pd
 from datetime import datetime
 from typing import Tuple, List, Dict
+from repository.daily_summary_repository import DailySummaryRepository
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class CSVImportService:
     """CSV受注インポートサービス"""
@@ -44,9 +48,15 @@ class CSVImportService:
             # 納入進度データを作成（製品コードで統合）
             if create_progress:
                 progress_count = self._create_delivery_progress_consolidated(v2_rows, v3_rows, product_ids)
-                return True, f"{count}件の指示データと{progress_count}件の進度データを登録しました"
+                message = f"{count}件の指示データと{progress_count}件の進度データを登録しました"
             else:
-                return True, f"{count}件の指示データを登録しました"
+                message = f"{count}件の指示データを登録しました"
+
+            # 取り込んだ製品の日別サマリーを更新
+            DailySummaryRepository(self.db).refresh(
+                product_ids=[info['product_id'] for info in product_ids.values()]
+            )
+            return True, message
         
         except Exception as e:
             error_msg = f"CSVインポートエラー: {str(e)}"
@@ -425,9 +435,7 @@ class CSVImportService:
         
         except Exception as e:
             session.rollback()
-            print(f"納入進度作成エラー: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("納入進度作成エラー: %s", e)
             return 0
         finally:
             session.close()
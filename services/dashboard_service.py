@@ -0,0 +1,133 @@
+# app/services/dashboard_service.py
+"""
+ダッシュボード集計サービス
+
+- 製品数・制約対象数・総需要量・計画期間・日別/製品別需要をSQL集計で取得する
+- 需要は日別サマリーテーブル（daily_progress_summary）から取得し、未作成の場合は明細から集計する
+- 集計結果は全セッション共通のTTLキャッシュに保持し、顧客（DB）ごとに分けて管理する
+- 生産指示の履歴が増えても、ダッシュボードの表示は明細件数に依存しない
+- 工場（顧客）別比較は各顧客DBへ並列にクエリし、最も遅い顧客分の時間で表示する
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from config_all import SYSTEM_CONFIG
+from repository.daily_summary_repository import DailySummaryRepository
+from repository.production_repository import ProductionRepository
+
+# 顧客をまたぐ集計のキャッシュキー
+SHARED_CACHE_KEY = '*'
+
+# (顧客, 集計名) -> (取得時刻, 値)
+_metrics_cache: Dict[Tuple[Optional[str], str], Tuple[float, Any]] = {}
+_metrics_cache_lock = threading.Lock()
+
+
+def invalidate_dashboard_cache(customer: Optional[str] = None) -> None:
+    """ダッシュボード集計キャッシュを破棄（customer指定時はその顧客のみ）"""
+    with _metrics_cache_lock:
+        if customer is None:
+            _metrics_cache.clear()
+            return
+        for key in [k for k in _metrics_cache if k[0] == customer]:
+            del _metrics_cache[key]
+
+
+class DashboardService:
+    """ダッシュボード集計"""
+
+    def __init__(self, db_manager, ttl_seconds: Optional[int] = None):
+        self.db = db_manager
+        self.production_repo = ProductionRepository(db_manager)
+        self.daily_summary_repo = DailySummaryRepository(db_manager)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else SYSTEM_CONFIG.dashboard_cache_ttl_seconds
+
+    def get_summary(self) -> Dict[str, Any]:
+        """製品数・制約対象数・総需要量・計画期間"""
+        return self._cached('summary', self._load_summary)
+
+    def get_daily_demand(self) -> pd.DataFrame:
+        """日別需要量（instruction_date, instruction_quantity）"""
+        return self._cached('daily_demand', lambda: self._from_summary_table(
+            self.daily_summary_repo.get_daily_demand, self.production_repo.get_daily_demand))
+
+    def get_product_demand(self) -> pd.DataFrame:
+        """製品別需要量（product_code, product_name, instruction_quantity）"""
+        return self._cached('product_demand', lambda: self._from_summary_table(
+            self.daily_summary_repo.get_product_demand_totals, self.production_repo.get_product_demand_totals))
+
+    def _load_summary(self) -> Dict[str, Any]:
+        summary = self.production_repo.get_master_counts()
+        summary.update(self._from_summary_table(
+            self.daily_summary_repo.get_demand_summary, self.production_repo.get_demand_summary))
+        return summary
+
+    @staticmethod
+    def _from_summary_table(summary_loader: Callable[[], Any], raw_loader: Callable[[], Any]) -> Any:
+        """日別サマリーテーブルから取得（テーブル未作成で None の場合は明細から集計）"""
+        value = summary_loader()
+        return value if value is not None else raw_loader()
+
+    def get_customer_comparison(self, days: int = 30) -> Optional[Dict[str, Any]]:
+        """
+        顧客（工場）別の今後の需要比較
+
+        Returns:
+            dict: {'data': 顧客別集計 DataFrame, 'timings': 顧客別秒数, 'errors': 顧客別エラー}
+            （顧客切替非対応のDBの場合は None）
+        """
+        if not hasattr(self.db, 'execute_query_multi'):
+            return None
+
+        def _load():
+            result = self.db.execute_query_multi("""
+                SELECT
+                    COUNT(DISTINCT pid.product_id) AS product_count,
+                    COALESCE(SUM(pid.instruction_quantity), 0) AS total_demand,
+                    MIN(pid.instruction_date) AS min_date,
+                    MAX(pid.instruction_date) AS max_date
+                FROM production_instructions_detail pid
+                WHERE pid.instruction_quantity > 0
+                  AND pid.instruction_date BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL :days DAY)
+            """, {'days': days})
+            return {'data': result.data, 'timings': result.timings, 'errors': result.errors}
+
+        # 全顧客分をまとめた結果なので顧客キーは共通
+        return self._cached(f'customer_comparison_{days}', _load, customer=SHARED_CACHE_KEY)
+
+    def refresh(self) -> None:
+        """現在の顧客のキャッシュを破棄して次回取得時に再集計"""
+        invalidate_dashboard_cache(self._customer())
+        invalidate_dashboard_cache(SHARED_CACHE_KEY)
+
+    def _customer(self) -> Optional[str]:
+        if hasattr(self.db, 'get_current_customer'):
+            return self.db.get_current_customer()
+        return None
+
+    def _cached(self, name: str, loader: Callable[[], Any], customer: Optional[str] = None) -> Any:
+        key = (customer or self._customer(), name)
+        now = time.time()
+
+        with _metrics_cache_lock:
+            entry = _metrics_cache.get(key)
+        if entry and now - entry[0] < self.ttl_seconds:
+            return self._copy(entry[1])
+
+        value = loader()
+        with _metrics_cache_lock:
+            _metrics_cache[key] = (now, value)
+        return self._copy(value)
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        """キャッシュ本体を画面側で書き換えられないよう複製して返す（集計済みのため小さい）"""
+        if isinstance(value, pd.DataFrame):
+            return value.copy()
+        if isinstance(value, dict):
+            return dict(value)
+        return value
@@ -2,213 +2,396 @@
 from datetime import datetime
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
     print("⚠️ openpyxlがインストールされていません。pip install openpyxl を実行してください")
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
 from io import BytesIO
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Optional, Iterable
+
+
+def _format_date(value) -> str:
+    """納期などの日付値を 'YYYY-MM-DD' 文字列に変換"""
+    if not value:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _week_key(date_str: str) -> str:
+    """日付文字列から週シート名（例: 2025年第42週）を作成"""
+    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+    return f"{date_obj.year}年第{date_obj.isocalendar()[1]}週"
+
 
 class ExcelExportService:
-    """Excel出力サービス"""
-    
-    def export_loading_plan(self, plan_result: Dict[str, Any]) -> BytesIO:
+    """
+    Excel出力サービス（ストリーミング版）
+
+    openpyxl の write-only モードでワークブックを作成し、計画データから
+    行を直接生成して書き出す。セルオブジェクトをメモリに保持しないため、
+    数か月分の計画でもメモリ使用量は一定に保たれる。
+
+    write-only モードではシートの並び順が作成順で確定するため、
+    必要なシートを先に全て作成してから daily_plans を1回だけ走査し、
+    各シートへ行を振り分ける。
+    """
+
+    DAILY_HEADERS = ['積載日', 'トラック名', '製品コード', '製品名', '容器数', '合計数量', '納期', '体積積載率(%)', '前倒し配送']
+    WEEKLY_HEADERS = ['週', '積載日', 'トラック名', '製品コード', '製品名', '容器数', '合計数量', '納期', '前倒し配送']
+    WARNING_HEADERS = ['日付', '警告内容']
+
+    def __init__(self):
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxlがインストールされていません")
+
+        # スタイルはセルごとに生成せず、インスタンス単位で共有する
+        self._header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        self._header_font = Font(color="FFFFFF", bold=True)
+        self._warning_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+        self._bold_font = Font(bold=True)
+        self._center = Alignment(horizontal='center')
+
+    # ------------------------------------------------------------------
+    # 公開API
+    # ------------------------------------------------------------------
+    def export_loading_plan(self, plan_result: Dict[str, Any], output=None) -> BytesIO:
         """
-        積載計画をExcelファイルとして出力
-        
+        積載計画をExcelファイルとして出力（サマリー＋日別シート形式）
+
         Args:
             plan_result: 積載計画データ
-        
+            output: 書き込み先（ファイルパスまたはファイルオブジェクト）。未指定時はBytesIO
+
         Returns:
             BytesIO: Excelファイルのバイナリストリーム
         """
-        wb = Workbook()
-        
-        # サマリーシート
+        wb = Workbook(write_only=True)
+        daily_plans = plan_result.get('daily_plans', {})
+
         self._create_summary_sheet(wb, plan_result)
-        
-        # 日別計画シート
-        self._create_daily_plan_sheets(wb, plan_result)
-        
-        # 警告シート
-        self._create_warnings_sheet(wb, plan_result)
-        
-        # 未積載アイテムシート
+
+        for date_str in sorted(daily_plans.keys()):
+            plan = daily_plans[date_str] or {}
+            self._write_daily_plan_sheet(wb, date_str, plan)
+
+        # 警告・未積載シートは日別シートの後ろに配置する
+        warnings_ws = self._create_sheet(
+            wb, "警告一覧", self.WARNING_HEADERS, widths=[15, 80],
+            title="警告・注意事項", warning=True
+        )
+        for row in self._iter_warning_rows(daily_plans):
+            warnings_ws.append(row)
+
         self._create_unloaded_sheet(wb, plan_result)
-        
-        # デフォルトシートを削除
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        # BytesIOに保存
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        return output
-    
-    def _create_summary_sheet(self, wb: Workbook, plan_result: Dict):
-        """サマリーシート作成"""
-        ws = wb.active
-        ws.title = "計画サマリー"
-        
-        summary = plan_result['summary']
-        period = plan_result['period']
-        
-        # ヘッダースタイル
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True, size=12)
-        
-        # タイトル
-        ws['A1'] = "積載計画サマリー"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:D1')
-        
-        # 計画情報
-        ws['A3'] = "計画期間"
-        ws['B3'] = period
-        ws['A4'] = "作成日時"
-        ws['B4'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # サマリー情報
-        data = [
-            ['項目', '値', '単位', '備考'],
-            ['計画日数', summary['total_days'], '日', ''],
-            ['総便数', summary['total_trips'], '便', ''],
-            ['警告数', summary['total_warnings'], '件', ''],
-            ['未積載数', summary['unloaded_count'], '件', ''],
-            ['ステータス', summary['status'], '', '']
+
+        return self._save(wb, output)
+
+    def export_plan_workbook(
+        self,
+        plan_result: Dict[str, Any],
+        export_format: str = 'daily',
+        editable_columns: Optional[List[Tuple[str, str]]] = None,
+        editable_row: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+        output=None
+    ) -> BytesIO:
+        """
+        積載計画をExcel出力（サマリー / 日別 or 週別 / 編集用 / 積載不可 / 警告一覧）
+
+        Args:
+            plan_result: 積載計画データ
+            export_format: 'daily' または 'weekly'
+            editable_columns: 編集用シートの (キー, 列見出し) のリスト
+            editable_row: (date_str, truck_plan, item) から編集用行の辞書を作る関数
+            output: 書き込み先。未指定時はBytesIO
+        """
+        wb = Workbook(write_only=True)
+        daily_plans = plan_result.get('daily_plans', {})
+        date_keys = sorted(daily_plans.keys())
+
+        summary_ws = self._create_sheet(wb, 'サマリー', ['項目', '値'])
+        for key, value in (plan_result.get('summary') or {}).items():
+            summary_ws.append([key, value])
+
+        # シートの有無を判定するため、日付ごとの積載有無だけ先に確認する
+        dates_with_items = [
+            date_str for date_str in date_keys
+            if any(truck.get('loaded_items') for truck in (daily_plans[date_str] or {}).get('trucks', []))
         ]
-        
-        for row_idx, row_data in enumerate(data, start=6):
-            for col_idx, value in enumerate(row_data, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                if row_idx == 6:  # ヘッダー行
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center')
-        
-        # 列幅調整
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 10
-        ws.column_dimensions['D'].width = 30
-    
-    def _create_daily_plan_sheets(self, wb: Workbook, plan_result: Dict):
-        """日別計画シート作成"""
-        daily_plans = plan_result['daily_plans']
-        
-        for date_str in sorted(daily_plans.keys()):
-            plan = daily_plans[date_str]
-            
-            # シート名（日付形式）
-            sheet_name = f"計画_{date_str.replace('-', '')}"
-            ws = wb.create_sheet(title=sheet_name)
-            
-            # ヘッダー
-            ws['A1'] = f"{date_str} の積載計画"
-            ws['A1'].font = Font(bold=True, size=14)
-            ws.merge_cells('A1:H1')
-            
-            ws['A2'] = f"総便数: {plan['total_trips']}便"
-            
-            # テーブルヘッダー
-            headers = ['便', 'トラック名', '製品コード', '製品名', '容器数', '合計数量', '納期', '体積率', '重量率']
-            for col_idx, header in enumerate(headers, start=1):
-                cell = ws.cell(row=4, column=col_idx, value=header)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.font = Font(color="FFFFFF", bold=True)
-                cell.alignment = Alignment(horizontal='center')
-            
-            # データ行
-            row_idx = 5
-            for truck_idx, truck_plan in enumerate(plan['trucks'], start=1):
-                truck_name = truck_plan['truck_name']
-                utilization = truck_plan['utilization']
-                
-                for item in truck_plan['loaded_items']:
-                    ws.cell(row=row_idx, column=1, value=truck_idx)
-                    ws.cell(row=row_idx, column=2, value=truck_name)
-                    ws.cell(row=row_idx, column=3, value=item.get('product_code', ''))
-                    ws.cell(row=row_idx, column=4, value=item.get('product_name', ''))
-                    ws.cell(row=row_idx, column=5, value=item.get('num_containers', 0))
-                    ws.cell(row=row_idx, column=6, value=item.get('total_quantity', 0))
-                    
-                    delivery_date = item.get('delivery_date')
-                    if delivery_date:
-                        if hasattr(delivery_date, 'strftime'):
-                            ws.cell(row=row_idx, column=7, value=delivery_date.strftime('%Y-%m-%d'))
-                        else:
-                            ws.cell(row=row_idx, column=7, value=str(delivery_date))
-                    
-                    ws.cell(row=row_idx, column=8, value=f"{utilization['volume_rate']}%")
-                    
-                    row_idx += 1
-            
-            # 列幅調整
-            for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']:
-                ws.column_dimensions[col].width = 15
-    
-    def _create_warnings_sheet(self, wb: Workbook, plan_result: Dict):
-        """警告シート作成"""
-        ws = wb.create_sheet(title="警告一覧")
-        
-        ws['A1'] = "警告・注意事項"
-        ws['A1'].font = Font(bold=True, size=14)
-        
-        headers = ['日付', '警告内容']
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col_idx, value=header)
-            cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-            cell.font = Font(bold=True)
-        
-        row_idx = 4
-        daily_plans = plan_result['daily_plans']
-        
+
+        # 出力するシートを先に作成（作成順＝シート順）
+        daily_ws = None
+        weekly_sheets: Dict[str, Any] = {}
+        if export_format == 'daily' and dates_with_items:
+            daily_ws = self._create_sheet(wb, '日別計画', self.DAILY_HEADERS)
+        elif export_format == 'weekly':
+            for date_str in dates_with_items:
+                week_key = _week_key(date_str)
+                if week_key not in weekly_sheets:
+                    weekly_sheets[week_key] = self._create_sheet(wb, week_key[:31], self.WEEKLY_HEADERS)
+
+        edit_ws = None
+        if editable_columns and editable_row and dates_with_items:
+            edit_ws = self._create_sheet(wb, '編集用', [label for _, label in editable_columns])
+
+        unloaded_tasks = plan_result.get('unloaded_tasks') or []
+        if unloaded_tasks:
+            unloaded_ws = self._create_sheet(wb, '積載不可', ['製品コード', '製品名', '容器数', '合計数量', '納期'])
+            for task in unloaded_tasks:
+                unloaded_ws.append([
+                    task.get('product_code'),
+                    task.get('product_name'),
+                    task.get('num_containers'),
+                    task.get('total_quantity'),
+                    _format_date(task.get('delivery_date'))
+                ])
+
+        warnings_ws = None
+        if any((daily_plans[d] or {}).get('warnings') for d in date_keys):
+            warnings_ws = self._create_sheet(wb, '警告一覧', self.WARNING_HEADERS)
+
+        # daily_plans を1回だけ走査して各シートへ行を書き込む
+        prev_date = None
+        for date_str in date_keys:
+            plan = daily_plans[date_str] or {}
+
+            if daily_ws is not None and prev_date is not None:
+                daily_ws.append([None] * len(self.DAILY_HEADERS))
+            prev_date = date_str
+
+            week_key = _week_key(date_str) if weekly_sheets else None
+            week_ws = weekly_sheets.get(week_key) if week_key else None
+
+            for truck in plan.get('trucks', []):
+                truck_name = truck.get('truck_name', '不明なトラック')
+                volume_rate = (truck.get('utilization') or {}).get('volume_rate', 0)
+
+                for item in truck.get('loaded_items', []):
+                    advanced_mark = '○' if item.get('is_advanced', False) else '×'
+                    delivery_str = _format_date(item.get('delivery_date'))
+
+                    if daily_ws is not None:
+                        daily_ws.append([
+                            date_str, truck_name,
+                            item.get('product_code', ''), item.get('product_name', ''),
+                            item.get('num_containers', 0), item.get('total_quantity', 0),
+                            delivery_str, volume_rate, advanced_mark
+                        ])
+                    if week_ws is not None:
+                        week_ws.append([
+                            week_key, date_str, truck_name,
+                            item.get('product_code', ''), item.get('product_name', ''),
+                            item.get('num_containers', 0), item.get('total_quantity', 0),
+                            delivery_str, advanced_mark
+                        ])
+                    if edit_ws is not None:
+                        row = editable_row(date_str, truck, item)
+                        edit_ws.append([row.get(key) for key, _ in editable_columns])
+
+            if warnings_ws is not None:
+                for warning in plan.get('warnings', []):
+                    warnings_ws.append([date_str, warning])
+
+        return self._save(wb, output)
+
+    def export_saved_plan(self, plan_data: Dict[str, Any], output=None) -> BytesIO:
+        """
+        保存済み積載計画をExcel出力（計画サマリー / 積載計画詳細 / 警告一覧 / 積載不可アイテム）
+        """
+        wb = Workbook(write_only=True)
+        summary = plan_data.get('summary', {})
+        daily_plans = plan_data.get('daily_plans', {})
+        date_keys = sorted(daily_plans.keys())
+
+        summary_ws = self._create_sheet(wb, '計画サマリー', ['項目', '値'])
+        for row in [
+            ['計画名', plan_data.get('plan_name', '無題')],
+            ['計画期間', plan_data.get('period', '')],
+            ['計画日数', f"{summary.get('total_days', 0)}日"],
+            ['総便数', f"{summary.get('total_trips', 0)}便"],
+            ['ステータス', summary.get('status', '不明')],
+            ['出力日時', datetime.now().strftime('%Y-%m-%d %H:%M')]
+        ]:
+            summary_ws.append(row)
+
+        detail_ws = None
+        if any(
+            truck.get('loaded_items')
+            for date_str in date_keys
+            for truck in (daily_plans[date_str] or {}).get('trucks', [])
+        ):
+            detail_ws = self._create_sheet(wb, '積載計画詳細', self.DAILY_HEADERS)
+
+        warnings_ws = None
+        if any((daily_plans[d] or {}).get('warnings') for d in date_keys):
+            warnings_ws = self._create_sheet(wb, '警告一覧', self.WARNING_HEADERS)
+
+        prev_date = None
+        for date_str in date_keys:
+            plan = daily_plans[date_str] or {}
+            if detail_ws is not None and prev_date is not None:
+                detail_ws.append([None] * len(self.DAILY_HEADERS))
+            prev_date = date_str
+
+            for truck in plan.get('trucks', []) if detail_ws is not None else []:
+                truck_name = truck.get('truck_name', '不明')
+                volume_rate = (truck.get('utilization') or {}).get('volume_rate', 0)
+                for item in truck.get('loaded_items', []):
+                    detail_ws.append([
+                        date_str, truck_name,
+                        item.get('product_code', ''), item.get('product_name', ''),
+                        item.get('num_containers', 0), item.get('total_quantity', 0),
+                        _format_date(item.get('delivery_date')), volume_rate,
+                        '○' if item.get('is_advanced', False) else '×'
+                    ])
+
+            if warnings_ws is not None:
+                for warning in plan.get('warnings', []):
+                    warnings_ws.append([date_str, warning])
+
+        unloaded_tasks = plan_data.get('unloaded_tasks', [])
+        if unloaded_tasks:
+            unloaded_ws = self._create_sheet(
+                wb, '積載不可アイテム', ['製品コード', '製品名', '容器数', '合計数量', '納期', '理由']
+            )
+            for task in unloaded_tasks:
+                unloaded_ws.append([
+                    task.get('product_code', ''),
+                    task.get('product_name', ''),
+                    task.get('num_containers', 0),
+                    task.get('total_quantity', 0),
+                    _format_date(task.get('delivery_date')),
+                    task.get('reason', '積載容量不足')
+                ])
+
+        return self._save(wb, output)
+
+    # ------------------------------------------------------------------
+    # シート作成
+    # ------------------------------------------------------------------
+    def _create_sheet(self, wb: "Workbook", sheet_name: str, headers: List[str],
+                      widths: Optional[List[int]] = None, title: Optional[str] = None,
+                      warning: bool = False):
+        """
+        write-onlyシートを作成し、見出し行まで書き込む
+
+        列幅は最初の行を書き込む前に設定する必要がある（write-onlyの制約）。
+        """
+        ws = wb.create_sheet(title=sheet_name)
+        if widths:
+            for col_idx, width in enumerate(widths):
+                ws.column_dimensions[chr(ord('A') + col_idx)].width = width
+
+        if title:
+            title_cell = WriteOnlyCell(ws, value=title)
+            title_cell.font = Font(bold=True, size=14)
+            ws.append([title_cell])
+            ws.append([])
+
+        ws.append(self._header_cells(ws, headers, warning=warning))
+        return ws
+
+    def _header_cells(self, ws, headers: Iterable[str], warning: bool = False) -> List[Any]:
+        """スタイル付きの見出しセルを作成"""
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            if warning:
+                cell.fill = self._warning_fill
+                cell.font = self._bold_font
+            else:
+                cell.fill = self._header_fill
+                cell.font = self._header_font
+                cell.alignment = self._center
+            cells.append(cell)
+        return cells
+
+    def _create_summary_sheet(self, wb: "Workbook", plan_result: Dict):
+        """サマリーシート作成"""
+        ws = wb.create_sheet(title="計画サマリー")
+        for col, width in zip('ABCD', (20, 20, 10, 30)):
+            ws.column_dimensions[col].width = width
+
+        summary = plan_result.get('summary', {})
+        period = plan_result.get('period', '')
+
+        title_cell = WriteOnlyCell(ws, value="積載計画サマリー")
+        title_cell.font = Font(bold=True, size=16)
+        ws.append([title_cell])
+        ws.append([])
+        ws.append(["計画期間", period])
+        ws.append(["作成日時", datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+        ws.append([])
+
+        ws.append(self._header_cells(ws, ['項目', '値', '単位', '備考']))
+        ws.append(['計画日数', summary.get('total_days'), '日', ''])
+        ws.append(['総便数', summary.get('total_trips'), '便', ''])
+        ws.append(['警告数', summary.get('total_warnings'), '件', ''])
+        ws.append(['未積載数', summary.get('unloaded_count'), '件', ''])
+        ws.append(['ステータス', summary.get('status'), '', ''])
+
+    def _write_daily_plan_sheet(self, wb: "Workbook", date_str: str, plan: Dict):
+        """日別計画シート作成（1日1シート）"""
+        ws = wb.create_sheet(title=f"計画_{date_str.replace('-', '')}")
+        for col in 'ABCDEFGH':
+            ws.column_dimensions[col].width = 15
+
+        title_cell = WriteOnlyCell(ws, value=f"{date_str} の積載計画")
+        title_cell.font = Font(bold=True, size=14)
+        ws.append([title_cell])
+        ws.append([f"総便数: {plan.get('total_trips', len(plan.get('trucks', [])))}便"])
+        ws.append([])
+        ws.append(self._header_cells(
+            ws, ['便', 'トラック名', '製品コード', '製品名', '容器数', '合計数量', '納期', '体積率', '重量率']
+        ))
+
+        for truck_idx, truck_plan in enumerate(plan.get('trucks', []), start=1):
+            truck_name = truck_plan.get('truck_name')
+            utilization = truck_plan.get('utilization') or {}
+            for item in truck_plan.get('loaded_items', []):
+                ws.append([
+                    truck_idx,
+                    truck_name,
+                    item.get('product_code', ''),
+                    item.get('product_name', ''),
+                    item.get('num_containers', 0),
+                    item.get('total_quantity', 0),
+                    _format_date(item.get('delivery_date')) or None,
+                    f"{utilization.get('volume_rate', 0)}%"
+                ])
+
+    def _iter_warning_rows(self, daily_plans: Dict[str, Any]):
+        """警告行を日付順に生成"""
         for date_str in sorted(daily_plans.keys()):
-            plan = daily_plans[date_str]
-            
-            for warning in plan.get('warnings', []):
-                ws.cell(row=row_idx, column=1, value=date_str)
-                ws.cell(row=row_idx, column=2, value=warning)
-                row_idx += 1
-        
-        ws.column_dimensions['A'].width = 15
-        ws.column_dimensions['B'].width = 80
-    
-    def _create_unloaded_sheet(self, wb: Workbook, plan_result: Dict):
+            for warning in (daily_plans[date_str] or {}).get('warnings', []):
+                yield [date_str, warning]
+
+    def _create_unloaded_sheet(self, wb: "Workbook", plan_result: Dict):
         """未積載アイテムシート作成"""
-        ws = wb.create_sheet(title="未積載アイテム")
-        
-        ws['A1'] = "積載できなかったアイテム"
-        ws['A1'].font = Font(bold=True, size=14)
-        
-        headers = ['製品コード', '製品名', '容器数', '合計数量', '納期', '理由']
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col_idx, value=header)
-            cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-            cell.font = Font(bold=True)
-        
-        row_idx = 4
-        unloaded_tasks = plan_result.get('unloaded_tasks', [])
-        
-        for task in unloaded_tasks:
-            ws.cell(row=row_idx, column=1, value=task.get('product_code', ''))
-            ws.cell(row=row_idx, column=2, value=task.get('product_name', ''))
-            ws.cell(row=row_idx, column=3, value=task.get('num_containers', 0))
-            ws.cell(row=row_idx, column=4, value=task.get('total_quantity', 0))
-            
-            delivery_date = task.get('delivery_date')
-            if delivery_date:
-                if hasattr(delivery_date, 'strftime'):
-                    ws.cell(row=row_idx, column=5, value=delivery_date.strftime('%Y-%m-%d'))
-                else:
-                    ws.cell(row=row_idx, column=5, value=str(delivery_date))
-            
-            ws.cell(row=row_idx, column=6, value="積載容量不足")
-            row_idx += 1
-        
-        for col in ['A', 'B', 'C', 'D', 'E', 'F']:
-            ws.column_dimensions[col].width = 20
\ No newline at end of file
+        ws = self._create_sheet(
+            wb, "未積載アイテム", ['製品コード', '製品名', '容器数', '合計数量', '納期', '理由'],
+            widths=[20] * 6, title="積載できなかったアイテム", warning=True
+        )
+        for task in plan_result.get('unloaded_tasks', []):
+            ws.append([
+                task.get('product_code', ''),
+                task.get('product_name', ''),
+                task.get('num_containers', 0),
+                task.get('total_quantity', 0),
+                _format_date(task.get('delivery_date')) or None,
+                "積載容量不足"
+            ])
+
+    def _save(self, wb: "Workbook", output=None):
+        """ワークブックを書き出す（write-onlyワークブックは1回のみ保存可能）"""
+        if output is not None:
+            wb.save(output)
+            return output
+
+        buffer = BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        return buffer
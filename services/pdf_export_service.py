@@ -0,0 +1,364 @@
+# app/services/pdf_export_service.py
+"""
+積載計画PDF出力サービス
+
+- 日本語フォントの登録はプロセスにつき1回だけ行う（.ttc の解析は高コストなため）
+- 段落スタイル・テーブルスタイルもモジュール単位でキャッシュして使い回す
+- 保存済み計画の一括出力はワーカープールで並列にレンダリングする
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from config_all import APP_CONFIG
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+JAPANESE_FONT = 'Japanese'
+JAPANESE_FONT_BOLD = 'Japanese-Bold'
+FALLBACK_FONT = 'Helvetica'
+FALLBACK_FONT_BOLD = 'Helvetica-Bold'
+
+# OS別の日本語フォント候補（設定値が無い場合に先頭から探索）
+FONT_CANDIDATES = [
+    'C:/Windows/Fonts/msgothic.ttc',                             # Windows
+    '/System/Library/Fonts/Arial Unicode.ttf',                   # macOS
+    '/usr/share/fonts/truetype/takao-gothic/TakaoPGothic.ttf',   # Linux
+]
+
+_font_lock = threading.Lock()
+_font_state: Dict[str, Any] = {'registered': False, 'font': None, 'bold': None, 'path': None}
+_style_cache: Dict[str, Any] = {}
+
+# プロセスプールはプロセスにつき1つを使い回す（Streamlit サーバーはマルチスレッドのため fork せず spawn で起動）
+_pool_lock = threading.Lock()
+_process_pool: Dict[str, Any] = {'executor': None, 'key': None}
+
+
+def register_japanese_font(font_path: Optional[str] = None) -> bool:
+    """
+    日本語フォントを登録（プロセスにつき1回）
+
+    Args:
+        font_path: フォントファイルのパス。未指定時は APP_CONFIG.pdf_font_path → OS標準の順に探索
+
+    Returns:
+        bool: 日本語フォントが使用可能な場合 True（False の場合は Helvetica で出力）
+    """
+    if _font_state['registered']:
+        return _font_state['font'] == JAPANESE_FONT
+
+    with _font_lock:
+        if _font_state['registered']:
+            return _font_state['font'] == JAPANESE_FONT
+
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.lib.fonts import addMapping
+
+        candidates = [p for p in [font_path, APP_CONFIG.pdf_font_path] if p] + FONT_CANDIDATES
+
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            try:
+                pdfmetrics.registerFont(TTFont(JAPANESE_FONT, path))
+                pdfmetrics.registerFont(TTFont(JAPANESE_FONT_BOLD, path))
+            except Exception:
+                continue
+
+            addMapping(JAPANESE_FONT, 0, 0, JAPANESE_FONT)
+            addMapping(JAPANESE_FONT, 1, 0, JAPANESE_FONT_BOLD)
+            _font_state.update(font=JAPANESE_FONT, bold=JAPANESE_FONT_BOLD, path=path)
+            break
+        else:
+            _font_state.update(font=FALLBACK_FONT, bold=FALLBACK_FONT_BOLD, path=None)
+
+        _font_state['registered'] = True
+        _style_cache.clear()
+
+    return _font_state['font'] == JAPANESE_FONT
+
+
+def get_font_names() -> Dict[str, str]:
+    """登録済みフォント名を取得（未登録の場合は登録してから返す）"""
+    register_japanese_font()
+    return {'normal': _font_state['font'], 'bold': _font_state['bold']}
+
+
+def get_pdf_styles() -> Dict[str, Any]:
+    """日本語対応の段落・テーブルスタイルを取得（初回のみ生成）"""
+    if _style_cache:
+        return _style_cache
+
+    fonts = get_font_names()
+    with _font_lock:
+        if _style_cache:
+            return _style_cache
+
+        styles = getSampleStyleSheet()
+
+        normal = styles['Normal'].clone('JapaneseStyle')
+        normal.fontName = fonts['normal']
+        normal.fontSize = 10
+        normal.leading = 12
+
+        title = styles['Heading1'].clone('JapaneseTitleStyle')
+        title.fontName = fonts['bold']
+        title.fontSize = 16
+        title.leading = 20
+        title.alignment = 1  # 中央揃え
+
+        heading = styles['Heading2'].clone('JapaneseHeadingStyle')
+        heading.fontName = fonts['bold']
+        heading.fontSize = 12
+        heading.leading = 16
+
+        _style_cache.update({
+            'normal': normal,
+            'title': title,
+            'heading': heading,
+            'info_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), fonts['normal']),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            'plan_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, -1), fonts['normal']),
+                ('FONTSIZE', (0, 0), (-1, 0), 8),
+                ('FONTSIZE', (0, 1), (-1, -1), 7),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('WORDWRAP', (0, 0), (-1, -1), True)
+            ]),
+            'warnings_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.orange),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), fonts['normal']),
+                ('FONTSIZE', (0, 0), (-1, -1), 7),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+        })
+
+    return _style_cache
+
+
+def _init_worker(font_path: Optional[str]):
+    """プロセスプールのワーカー初期化（フォント登録をワーカーごとに1回だけ行う）"""
+    register_japanese_font(font_path)
+
+
+def _render_plan_bytes(plan_data: Dict[str, Any]) -> bytes:
+    """ワーカー用: 計画1件をPDFのバイト列にレンダリング"""
+    return PdfExportService().render_loading_plan(plan_data).getvalue()
+
+
+def _get_process_pool(max_workers: Optional[int], font_path: Optional[str]) -> ProcessPoolExecutor:
+    """一括出力用のプロセスプール（spawn コンテキスト・プロセス内で1つを使い回す）"""
+    key = (max_workers, font_path)
+    with _pool_lock:
+        executor = _process_pool['executor']
+        if executor is not None and _process_pool['key'] != key:
+            executor.shutdown(wait=False)
+            executor = None
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(font_path,)
+            )
+            _process_pool['executor'] = executor
+            _process_pool['key'] = key
+        return executor
+
+
+def _discard_process_pool(executor: ProcessPoolExecutor):
+    """使用できなくなったプロセスプールを破棄（次回の一括出力で作り直す）"""
+    with _pool_lock:
+        if _process_pool['executor'] is executor:
+            _process_pool['executor'] = None
+            _process_pool['key'] = None
+    executor.shutdown(wait=False)
+
+
+class PdfExportService:
+    """積載計画PDF出力サービス"""
+
+    PLAN_HEADER = ['トラック', '製品コード', '製品名', '容器数', '合計数量', '納期']
+    PLAN_COL_WIDTHS = [35*mm, 30*mm, 60*mm, 18*mm, 22*mm, 28*mm]
+
+    def __init__(self, font_path: Optional[str] = None):
+        self.font_path = font_path
+        self.has_japanese_font = register_japanese_font(font_path)
+
+    def render_loading_plan(self, plan_data: Dict[str, Any]) -> io.BytesIO:
+        """
+        積載計画を日別テーブル形式のPDFとしてレンダリング
+
+        Args:
+            plan_data: 積載計画データ（get_loading_plan の戻り値 / 計算結果）
+
+        Returns:
+            BytesIO: PDFのバイナリストリーム
+        """
+        styles = get_pdf_styles()
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
+        elements = []
+
+        elements.append(Paragraph(f"積載計画: {plan_data.get('plan_name', '無題')}", styles['title']))
+        elements.append(Spacer(1, 12))
+
+        summary = plan_data.get('summary', {})
+        info_table = Table([
+            ['計画期間', plan_data.get('period', '')],
+            ['計画日数', f"{summary.get('total_days', 0)}日"],
+            ['総便数', f"{summary.get('total_trips', 0)}便"],
+            ['ステータス', summary.get('status', '不明')],
+            ['作成日', datetime.now().strftime('%Y-%m-%d %H:%M')]
+        ], colWidths=[80*mm, 80*mm])
+        info_table.setStyle(styles['info_table'])
+        elements.append(info_table)
+        elements.append(Spacer(1, 12))
+
+        daily_plans = plan_data.get('daily_plans', {})
+        warnings_data = []
+        rendered_days = 0
+
+        for date_str in sorted(daily_plans.keys()):
+            day_plan = daily_plans[date_str] or {}
+
+            for warning in day_plan.get('warnings', []):
+                warnings_data.append([date_str, warning])
+
+            rows = self._day_rows(day_plan)
+            if not rows:
+                continue
+
+            trucks = day_plan.get('trucks', [])
+            elements.append(Paragraph(f"{date_str}（{len(trucks)}便）", styles['heading']))
+            day_table = Table([self.PLAN_HEADER] + rows, colWidths=self.PLAN_COL_WIDTHS, repeatRows=1)
+            day_table.setStyle(styles['plan_table'])
+            elements.append(day_table)
+            elements.append(Spacer(1, 8))
+            rendered_days += 1
+
+        if rendered_days == 0:
+            elements.append(Paragraph("積載計画データがありません", styles['normal']))
+
+        if warnings_data:
+            elements.append(Spacer(1, 12))
+            elements.append(Paragraph("警告一覧", styles['heading']))
+            warnings_table = Table([['日付', '警告内容']] + warnings_data, colWidths=[30*mm, 150*mm])
+            warnings_table.setStyle(styles['warnings_table'])
+            elements.append(warnings_table)
+
+        doc.build(elements)
+        buffer.seek(0)
+        return buffer
+
+    def render_plans_batch(
+        self,
+        plan_ids: List[int],
+        plan_loader: Callable[[int], Optional[Dict[str, Any]]],
+        max_workers: Optional[int] = None,
+        use_processes: bool = False
+    ) -> Dict[int, bytes]:
+        """
+        複数の保存済み計画をワーカープールで一括レンダリング
+
+        計画データの取得（DBアクセス）は呼び出しスレッドで行い、
+        CPU負荷の高いPDF生成のみをワーカーに渡す。
+
+        Args:
+            plan_ids: 対象の計画ID一覧
+            plan_loader: 計画IDから計画データを取得する関数
+            max_workers: ワーカー数（未指定時は os.cpu_count()）
+            use_processes: True の場合プロセスプール（spawn で起動し、プロセス内で使い回す）、
+                           False の場合スレッドプール（既定）
+
+        Returns:
+            Dict[int, bytes]: 計画ID -> PDFバイト列（取得・生成に失敗した計画は含まない）
+        """
+        results: Dict[int, bytes] = {}
+        if not plan_ids:
+            return results
+
+        plans = []
+        for plan_id in plan_ids:
+            plan_data = plan_loader(plan_id)
+            if plan_data:
+                plans.append((plan_id, plan_data))
+
+        if use_processes:
+            executor = _get_process_pool(max_workers, self.font_path)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        try:
+            futures = {executor.submit(_render_plan_bytes, plan_data): plan_id for plan_id, plan_data in plans}
+            for future in as_completed(futures):
+                plan_id = futures[future]
+                try:
+                    results[plan_id] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.exception("PDF生成エラー (plan_id=%s): %s", plan_id, e)
+        except BrokenProcessPool as e:
+            # ワーカーが異常終了したプールは破棄し、スレッドプールでやり直す
+            logger.warning("PDF一括出力のプロセスプールが使用できません。スレッドで再実行します: %s", e)
+            _discard_process_pool(executor)
+            return self.render_plans_batch(plan_ids, plan_loader, max_workers, use_processes=False)
+        finally:
+            if not use_processes:
+                executor.shutdown(wait=True)
+
+        return results
+
+    def _day_rows(self, day_plan: Dict[str, Any]) -> List[List[str]]:
+        """1日分のテーブル行を作成"""
+        rows = []
+        for truck in day_plan.get('trucks', []):
+            truck_name = truck.get('truck_name', '不明')
+            for item in truck.get('loaded_items', []):
+                delivery_date = item.get('delivery_date')
+                if delivery_date and hasattr(delivery_date, 'strftime'):
+                    delivery_date_str = delivery_date.strftime('%Y-%m-%d')
+                else:
+                    delivery_date_str = str(delivery_date) if delivery_date else ''
+
+                rows.append([
+                    truck_name,
+                    item.get('product_code', ''),
+                    item.get('product_name', ''),
+                    str(item.get('num_containers', 0)),
+                    str(item.get('total_quantity', 0)),
+                    delivery_date_str
+                ])
+        return rows
@@ -0,0 +1,297 @@
+# app/services/plan_store.py
+"""
+積載計画の保持（サーバー側ストア）
+
+- 作成・Excel修正反映した計画はストアに保持し、画面（セッション）はハンドル（文字列）だけを持つ
+- 計画は列形式（同じ項目の値を並べる）に変換して圧縮（zlib）し、日別計画・積載不可・未計画受注ごとに分けて保存する
+- 画面は表示する部分だけを復元する（サマリーは圧縮せずに保持、日別計画は表示する日だけ展開）
+- 一定時間使われない計画は破棄（TTL）、メモリ上限を超えた場合は最後に使われた時刻が古い順に破棄（LRU）
+- ストアは全セッション共通（プロセスに1つ）
+"""
+
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+from config_all import SYSTEM_CONFIG
+
+# 圧縮して保持する項目（その他の項目はサマリーとしてそのまま保持）
+DAILY_PLANS = 'daily_plans'
+RECORD_SECTIONS = ('unloaded_tasks', 'unplanned_orders')
+
+COMPRESS_LEVEL = 6
+
+
+class _Rows:
+    """列形式テーブル内の行範囲（辞書のリストの置き換え）"""
+    __slots__ = ('start', 'stop')
+
+    def __init__(self, start: int, stop: int):
+        self.start = start
+        self.stop = stop
+
+    def __getstate__(self):
+        return (self.start, self.stop)
+
+    def __setstate__(self, state):
+        self.start, self.stop = state
+
+
+class _ColumnTable:
+    """辞書のリストを列形式で保持する（行ごとに項目の並び＝スキーマ番号を持つ）"""
+
+    def __init__(self):
+        self.schemas: List[tuple] = []
+        self.schema_ids: Dict[tuple, int] = {}
+        self.row_schema: List[int] = []
+        self.columns: Dict[str, List[Any]] = {}
+        self.size = 0
+
+    def append(self, record: Dict[str, Any]):
+        """1行追加（値は _pack 済み）"""
+        keys = tuple(record)
+        schema_id = self.schema_ids.get(keys)
+        if schema_id is None:
+            schema_id = len(self.schemas)
+            self.schemas.append(keys)
+            self.schema_ids[keys] = schema_id
+        self.row_schema.append(schema_id)
+        for key in keys:
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * self.size
+            column.append(record[key])
+        self.size += 1
+        for column in self.columns.values():
+            if len(column) < self.size:
+                column.append(None)
+
+    def rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        return [
+            {key: _unpack(self.columns[key][index], self) for key in self.schemas[self.row_schema[index]]}
+            for index in range(start, stop)
+        ]
+
+    def __getstate__(self):
+        return (self.schemas, self.row_schema, self.columns, self.size)
+
+    def __setstate__(self, state):
+        self.schemas, self.row_schema, self.columns, self.size = state
+        self.schema_ids = {keys: i for i, keys in enumerate(self.schemas)}
+
+
+def _pack(value, table: _ColumnTable):
+    """辞書のリストを列形式テーブルへ移し、行範囲に置き換える"""
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            # 子の辞書のリスト（トラック → 積載品）を先に追加し、同じリストの行が連続するようにする
+            packed = [{key: _pack(item, table) for key, item in record.items()} for record in value]
+            start = table.size
+            for record in packed:
+                table.append(record)
+            return _Rows(start, table.size)
+        return [_pack(item, table) for item in value]
+    if isinstance(value, dict):
+        return {key: _pack(item, table) for key, item in value.items()}
+    return value
+
+
+def _unpack(value, table: _ColumnTable):
+    if isinstance(value, _Rows):
+        return table.rows(value.start, value.stop)
+    if isinstance(value, list):
+        return [_unpack(item, table) for item in value]
+    if isinstance(value, dict):
+        return {key: _unpack(item, table) for key, item in value.items()}
+    return value
+
+
+def encode(value) -> bytes:
+    """計画の一部を列形式に変換して圧縮"""
+    table = _ColumnTable()
+    packed = _pack(value, table)
+    return zlib.compress(pickle.dumps((packed, table), protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+
+
+def decode(blob: bytes):
+    packed, table = pickle.loads(zlib.decompress(blob))
+    return _unpack(packed, table)
+
+
+@dataclass
+class StoredPlan:
+    """ストア内の計画（サマリー + 圧縮済みの部分）"""
+    handle: str
+    owner: Optional[Hashable]
+    meta: Dict[str, Any]
+    days: Dict[str, bytes]
+    sections: Dict[str, bytes]
+    created_at: float = field(default_factory=time.time)
+    accessed_at: float = field(default_factory=time.time)
+
+    @property
+    def size(self) -> int:
+        """圧縮後のサイズ（バイト）"""
+        return sum(len(blob) for blob in self.days.values()) + sum(len(blob) for blob in self.sections.values())
+
+
+class DailyPlanView(Mapping):
+    """日別計画の遅延展開ビュー（参照した日だけ展開する。daily_plans 辞書の代わりに使える）"""
+
+    def __init__(self, days: Dict[str, bytes]):
+        self._days = days
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, date_str: str):
+        plan = self._cache.get(date_str)
+        if plan is None:
+            plan = decode(self._days[date_str])
+            self._cache[date_str] = plan
+        return plan
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._days)
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+
+class PlanStore:
+    """積載計画のサーバー側ストア（LRU・TTL・メモリ上限付き）"""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_bytes = max_bytes or SYSTEM_CONFIG.plan_store_max_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds or SYSTEM_CONFIG.plan_store_ttl_minutes * 60
+        self._plans: "OrderedDict[str, StoredPlan]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, plan: Dict[str, Any], owner: Optional[Hashable] = None,
+            handle: Optional[str] = None) -> str:
+        """
+        計画を保存してハンドルを返す
+
+        Args:
+            plan: 積載計画（calculate_loading_plan / apply_excel_adjustments の結果）
+            owner: 所有者（ユーザーなど。stats の集計用）
+            handle: 既存のハンドル（同じハンドルの計画を置き換える）
+        """
+        meta = {key: value for key, value in plan.items()
+                if key != DAILY_PLANS and key not in RECORD_SECTIONS}
+        daily_plans = plan.get(DAILY_PLANS) or {}
+        meta['dates'] = list(daily_plans)
+        meta['unloaded_count'] = len(plan.get('unloaded_tasks') or [])
+        meta['unplanned_count'] = len(plan.get('unplanned_orders') or [])
+
+        stored = StoredPlan(
+            handle=handle or uuid.uuid4().hex,
+            owner=owner,
+            meta=meta,
+            days={date_str: encode(day_plan) for date_str, day_plan in daily_plans.items()},
+            sections={name: encode(plan[name]) for name in RECORD_SECTIONS if name in plan},
+        )
+
+        with self._lock:
+            previous = self._plans.pop(stored.handle, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._plans[stored.handle] = stored
+            self._total_bytes += stored.size
+            self._evict()
+        return stored.handle
+
+    def contains(self, handle: Optional[str]) -> bool:
+        return self._touch(handle) is not None
+
+    def get_meta(self, handle: Optional[str]) -> Optional[Dict[str, Any]]:
+        """サマリー部分（summary・period・dates など。展開不要）"""
+        stored = self._touch(handle)
+        return stored.meta if stored else None
+
+    def get_daily_plans(self, handle: Optional[str]) -> Optional[DailyPlanView]:
+        """日別計画（参照した日だけ展開するビュー）"""
+        stored = self._touch(handle)
+        return DailyPlanView(stored.days) if stored else None
+
+    def get_section(self, handle: Optional[str], name: str) -> Optional[List[Dict[str, Any]]]:
+        """積載不可（unloaded_tasks）・未計画受注（unplanned_orders）を展開"""
+        stored = self._touch(handle)
+        if stored is None:
+            return None
+        blob = stored.sections.get(name)
+        return decode(blob) if blob is not None else []
+
+    def get(self, handle: Optional[str]) -> Optional[Dict[str, Any]]:
+        """計画全体を展開（保存・出力・Excel修正反映用）"""
+        stored = self._touch(handle)
+        if stored is None:
+            return None
+        plan = {key: value for key, value in stored.meta.items()
+                if key not in ('dates', 'unloaded_count', 'unplanned_count')}
+        plan[DAILY_PLANS] = {date_str: decode(blob) for date_str, blob in stored.days.items()}
+        for name, blob in stored.sections.items():
+            plan[name] = decode(blob)
+        return plan
+
+    def discard(self, handle: Optional[str]):
+        with self._lock:
+            stored = self._plans.pop(handle, None)
+            if stored is not None:
+                self._total_bytes -= stored.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired()
+            return {
+                'plans': len(self._plans),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'owners': len({stored.owner for stored in self._plans.values()}),
+            }
+
+    def _touch(self, handle: Optional[str]) -> Optional[StoredPlan]:
+        if not handle:
+            return None
+        with self._lock:
+            self._purge_expired()
+            stored = self._plans.get(handle)
+            if stored is not None:
+                stored.accessed_at = time.time()
+                self._plans.move_to_end(handle)
+            return stored
+
+    def _evict(self):
+        """TTL切れ・メモリ上限超過分を破棄（最後に保存した計画は残す）"""
+        self._purge_expired()
+        while self._total_bytes > self.max_bytes and len(self._plans) > 1:
+            _, stored = self._plans.popitem(last=False)
+            self._total_bytes -= stored.size
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        while self._plans:
+            handle, stored = next(iter(self._plans.items()))
+            if stored.accessed_at >= cutoff:
+                break
+            del self._plans[handle]
+            self._total_bytes -= stored.size
+
+
+_store: Optional[PlanStore] = None
+_store_lock = threading.Lock()
+
+
+def get_plan_store() -> PlanStore:
+    """プロセス共通の計画ストア"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PlanStore()
+    return _store
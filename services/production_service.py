@@ -3,10 +3,14 @@ from typing import List, Optional
 import pandas as pd
 from repository.product_repository import ProductRepository
 from repository.production_repository import ProductionRepository
+from repository.calendar_repository import CalendarRepository
 from domain.calculators.production_calculator import ProductionCalculator
 from domain.models.product import Product, ProductConstraint
 from domain.models.production import ProductionInstruction, ProductionPlan
 import streamlit as st
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class ProductionService:
     """生産関連ビジネスロジック"""
@@ -14,6 +18,7 @@ class ProductionService:
     def __init__(self, db_manager):
         self.product_repo = ProductRepository(db_manager)
         self.production_repo = ProductionRepository(db_manager)
+        self.calendar_repo = CalendarRepository(db_manager)
         self.calculator = ProductionCalculator()
     
     def get_all_products(self) -> List[Product]:
@@ -26,7 +31,7 @@ class ProductionService:
                     product = Product.from_dict(row.to_dict())
                     products.append(product)
                 except Exception as e:
-                    print(f"製品データ変換エラー: {e}")
+                    logger.exception("製品データ変換エラー: %s", e)
                     continue
             return products
         except Exception as e:
@@ -43,7 +48,7 @@ class ProductionService:
                     instruction = ProductionInstruction.from_dict(row.to_dict())
                     instructions.append(instruction)
                 except Exception as e:
-                    print(f"生産指示データ変換エラー: {e}")
+                    logger.exception("生産指示データ変換エラー: %s", e)
                     continue
             return instructions
         except Exception as e:
@@ -60,7 +65,7 @@ class ProductionService:
                     constraint = ProductConstraint.from_dict(row.to_dict())
                     constraints.append(constraint)
                 except Exception as e:
-                    print(f"制約データ変換エラー: {e}")
+                    logger.exception("制約データ変換エラー: %s", e)
                     continue
             return constraints
         except Exception as e:
@@ -82,6 +87,50 @@ class ProductionService:
             st.error(f"生産計画計算エラー: {e}")
             return []
     
+    def calculate_production_plan_df(self, start_date, end_date) -> pd.DataFrame:
+        """生産計画計算（DataFrame版） - モデル変換を挟まずに画面・チャートへ渡す"""
+        try:
+            instructions_df = self.production_repo.get_production_instructions(start_date, end_date)
+            if instructions_df is None or instructions_df.empty:
+                st.warning("生産指示データがありません")
+                return pd.DataFrame(columns=ProductionCalculator.PLAN_COLUMNS)
+
+            constraints_df = self.product_repo.get_product_constraints()
+            return self.calculator.calculate_production_plan_df(instructions_df, constraints_df)
+        except Exception as e:
+            st.error(f"生産計画計算エラー: {e}")
+            return pd.DataFrame(columns=ProductionCalculator.PLAN_COLUMNS)
+
+    def calculate_leveled_production_plan(self, start_date, end_date,
+                                          line_capacity: Optional[float] = None,
+                                          mode: str = 'greedy') -> dict:
+        """
+        期間平準化した生産計画を計算
+
+        会社カレンダーの営業日だけに生産を割り当て、日産能力・ライン能力を超える需要を
+        前の営業日へ前倒しする。
+
+        Returns:
+            dict: {'plan', 'daily_summary', 'shortage'}（各 DataFrame）
+        """
+        try:
+            instructions_df = self.production_repo.get_production_instructions(start_date, end_date)
+            if instructions_df is None or instructions_df.empty:
+                st.warning("生産指示データがありません")
+                return self.calculator.calculate_leveled_plan_df(None, None, [])
+
+            constraints_df = self.product_repo.get_product_constraints()
+            flags = self.calendar_repo.get_working_day_flags(start_date, end_date)
+            working_days = [d for d, is_working in flags.items() if is_working]
+
+            return self.calculator.calculate_leveled_plan_df(
+                instructions_df, constraints_df, working_days,
+                line_capacity=line_capacity, mode=mode
+            )
+        except Exception as e:
+            st.error(f"平準化計画計算エラー: {e}")
+            return self.calculator.calculate_leveled_plan_df(None, None, [])
+    
     def save_product_constraints(self, constraints_df) -> bool:
         """製品制約保存"""
         try:
@@ -102,7 +151,7 @@ class ProductionService:
                     production = ProductionInstruction.from_dict(row.to_dict())
                     productions.append(production)
                 except Exception as e:
-                    print(f"生産計画データ変換エラー: {e}")
+                    logger.exception("生産計画データ変換エラー: %s", e)
                     continue
             return productions
         except Exception as e:
@@ -3,6 +3,10 @@ import pandas as pd
 from datetime import datetime
 from typing import Tuple, List, Dict
 from sqlalchemy import text
+from repository.daily_summary_repository import DailySummaryRepository
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class TieraKakuteiCSVImportService:
     """ティエラ様確定CSV専用インポートサービス
@@ -34,8 +38,8 @@ class TieraKakuteiCSVImportService:
             df = pd.read_csv(uploaded_file, encoding='cp932', dtype=str)
             df = df.fillna('')
 
-            print(f"📊 読み込み行数: {len(df)}")
-            print(f"📊 列数: {len(df.columns)}")
+            logger.info("📊 読み込み行数: %s", len(df))
+            logger.info("📊 列数: %s", len(df.columns))
 
             # 列名を取得（インデックスで参照するため、列名確認用）
             column_names = df.columns.tolist()
@@ -51,9 +55,9 @@ class TieraKakuteiCSVImportService:
             product_name_jp_col = column_names[self.COL_PRODUCT_NAME_JP]
             product_name_en_col = column_names[self.COL_PRODUCT_NAME_EN]
 
-            print(f"📌 図番列: {drawing_col}")
-            print(f"📌 納期列: {delivery_col}")
-            print(f"📌 数量列: {quantity_col}")
+            logger.info("📌 図番列: %s", drawing_col)
+            logger.info("📌 納期列: %s", delivery_col)
+            logger.info("📌 数量列: %s", quantity_col)
 
             # データをグループ化（図番 × 納期 ごとに集約）
             grouped_data = self._group_by_product_and_date(
@@ -80,14 +84,17 @@ class TieraKakuteiCSVImportService:
             # 納入進度データを作成
             if create_progress:
                 progress_count = self._create_delivery_progress(grouped_data, product_ids)
-                return True, f"[確定CSV] {instruction_count}件の指示データと{progress_count}件の進度データを登録しました"
+                message = f"[確定CSV] {instruction_count}件の指示データと{progress_count}件の進度データを登録しました"
             else:
-                return True, f"[確定CSV] {instruction_count}件の指示データを登録しました"
+                message = f"[確定CSV] {instruction_count}件の指示データを登録しました"
+
+            # 取り込んだ製品の日別サマリーを更新
+            DailySummaryRepository(self.db).refresh(product_ids=list(product_ids.values()))
+            return True, message
 
         except Exception as e:
             error_msg = f"確定CSVインポートエラー: {str(e)}"
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ %s", error_msg)
             return False, error_msg
 
     def _group_by_product_and_date(self, df: pd.DataFrame,
@@ -157,7 +164,7 @@ class TieraKakuteiCSVImportService:
             aggregated[key]['quantity'] += item['quantity']
 
         result = list(aggregated.values())
-        print(f"✅ グループ化後: {len(result)}件のユニークデータ（確定CSV）")
+        logger.info("✅ グループ化後: %s件のユニークデータ（確定CSV）", len(result))
         return result
 
     def _import_products(self, grouped_data: List[Dict]) -> Dict:
@@ -176,7 +183,7 @@ class TieraKakuteiCSVImportService:
                         'product_name_en': item['product_name_en']
                     }
 
-            print(f"📦 製品数（確定CSV）: {len(unique_products)}")
+            logger.info("📦 製品数（確定CSV）: %s", len(unique_products))
 
             for drawing_no, product_info in unique_products.items():
                 # 既存チェック
@@ -187,7 +194,7 @@ class TieraKakuteiCSVImportService:
 
                 if result:
                     product_id = result[0]
-                    print(f"  ✓ 既存製品: {drawing_no} (ID: {product_id})")
+                    logger.debug("✓ 既存製品: %s (ID: %s)", drawing_no, product_id)
                 else:
                     # 新規登録
                     # 製品名を決定（優先順位: 日本語名 > 英語名 > 図番）
@@ -213,7 +220,7 @@ class TieraKakuteiCSVImportService:
                         'capacity': 1
                     })
                     product_id = result.lastrowid
-                    print(f"  + 新規製品: {drawing_no} [{product_name}] (ID: {product_id})")
+                    logger.debug("+ 新規製品: %s [%s] (ID: %s)", drawing_no, product_name, product_id)
 
                 product_ids[drawing_no] = product_id
 
@@ -222,7 +229,7 @@ class TieraKakuteiCSVImportService:
 
         except Exception as e:
             session.rollback()
-            print(f"❌ 製品登録エラー: {e}")
+            logger.exception("❌ 製品登録エラー: %s", e)
             raise e
         finally:
             session.close()
@@ -267,12 +274,12 @@ class TieraKakuteiCSVImportService:
                 instruction_count += 1
 
             session.commit()
-            print(f"✅ 生産指示登録（確定CSV）: {instruction_count}件")
+            logger.info("✅ 生産指示登録（確定CSV）: %s件", instruction_count)
             return instruction_count
 
         except Exception as e:
             session.rollback()
-            print(f"❌ 生産指示登録エラー: {e}")
+            logger.exception("❌ 生産指示登録エラー: %s", e)
             return 0
         finally:
             session.close()
@@ -312,7 +319,7 @@ class TieraKakuteiCSVImportService:
                 }).rowcount
 
                 if deleted_rows > 0:
-                    print(f"  🔄 内示データを削除: {drawing_no} 納期={delivery_date} (確定データで置換)")
+                    logger.debug("🔄 内示データを削除: %s 納期=%s (確定データで置換)", drawing_no, delivery_date)
 
                 # 既存の確定データをチェック
                 existing = session.execute(text("""
@@ -357,12 +364,12 @@ class TieraKakuteiCSVImportService:
                 progress_count += 1
 
             session.commit()
-            print(f"✅ 納入進度登録（確定CSV）: {progress_count}件")
+            logger.info("✅ 納入進度登録（確定CSV）: %s件", progress_count)
             return progress_count
 
         except Exception as e:
             session.rollback()
-            print(f"❌ 納入進度登録エラー: {e}")
+            logger.exception("❌ 納入進度登録エラー: %s", e)
             return 0
         finally:
             session.close()
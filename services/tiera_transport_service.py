@@ -9,7 +9,11 @@ from typing import Dict, Any
 from datetime import date, timedelta
 from services.transport_service import TransportService
 from domain.calculators.tiera_transport_planner import TieraTransportPlanner
+from config_all import get_customer_transport_config
 import pandas as pd
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 
 class TieraTransportService(TransportService):
@@ -24,7 +28,9 @@ class TieraTransportService(TransportService):
                                           start_date: date,
                                           days: int = 7,
                                           use_delivery_progress: bool = True,
-                                          use_calendar: bool = True) -> Dict[str, Any]:
+                                          use_calendar: bool = True,
+                                          progress_callback=None,
+                                          use_snapshot: bool = False) -> Dict[str, Any]:
         """
         Tiera様の積載計画作成
 
@@ -37,12 +43,29 @@ class TieraTransportService(TransportService):
 
         end_date = start_date + timedelta(days=days - 1)
 
+        # スナップショット使用時はリポジトリの代わりにスナップショットから読む（Kubota様と同じ）
+        snapshot = self.get_planning_snapshot(start_date, end_date) if use_snapshot else None
+        progress_repo = snapshot or self.delivery_progress_repo
+        production_repo = snapshot or self.production_repo
+        product_repo = snapshot or self.product_repo
+        transport_repo = snapshot or self.transport_repo
+        calendar_repo = snapshot or self.calendar_repo
+        # 営業日の絞り込みは受注取得SQL（会社カレンダーとのJOIN）で行う
+        working_days_only = bool(use_calendar and calendar_repo)
+
         # 受注データ取得（Kubota様と同じ）
         if use_delivery_progress:
-            orders_df = self.delivery_progress_repo.get_delivery_progress(start_date, end_date)
-
-            if orders_df.empty:
-                orders_df = self.production_repo.get_production_instructions(start_date, end_date)
+            orders_df = progress_repo.get_delivery_progress(
+                start_date, end_date, working_days_only=working_days_only
+            )
+
+            # 営業日で絞り込んで空になっただけなら生産指示には切り替えない（納入進度の有無で判定）
+            if orders_df.empty and not (
+                working_days_only and progress_repo.get_delivery_progress_exists(start_date, end_date)
+            ):
+                orders_df = production_repo.get_production_instructions(
+                    start_date, end_date, working_days_only=working_days_only
+                )
 
                 if not orders_df.empty:
                     orders_df = orders_df.rename(columns={
@@ -50,7 +73,9 @@ class TieraTransportService(TransportService):
                         'instruction_quantity': 'order_quantity'
                     })
         else:
-            orders_df = self.production_repo.get_production_instructions(start_date, end_date)
+            orders_df = production_repo.get_production_instructions(
+                start_date, end_date, working_days_only=working_days_only
+            )
 
             if not orders_df.empty:
                 orders_df = orders_df.rename(columns={
@@ -63,12 +88,6 @@ class TieraTransportService(TransportService):
             if 'delivery_date' in orders_df.columns:
                 orders_df['delivery_date'] = pd.to_datetime(orders_df['delivery_date']).dt.date
 
-            # 営業日フィルタ
-            if use_calendar and self.calendar_repo:
-                orders_df = orders_df[
-                    orders_df['delivery_date'].apply(self.calendar_repo.is_working_day)
-                ].reset_index(drop=True)
-
         # 計画数量計算（Kubota様と同じロジック）
         if orders_df is not None and not orders_df.empty:
             manual_mask = pd.Series(False, index=orders_df.index)
@@ -147,10 +166,17 @@ class TieraTransportService(TransportService):
             }
 
         # マスタデータ取得
-        products_df = self.product_repo.get_all_products()
-        containers = self.get_containers()
-        trucks_df = self.get_trucks()
-        truck_container_rules = self.transport_repo.get_truck_container_rules()
+        products_df = product_repo.get_all_products()
+        containers = transport_repo.get_containers()
+        trucks_df = transport_repo.get_trucks()
+        truck_container_rules = transport_repo.get_truck_container_rules()
+
+        # 顧客別の積載エンジン（未設定時は底面積判定）
+        loading_engine = 'area'
+        try:
+            loading_engine = get_customer_transport_config('tiera').loading_engine
+        except Exception as e:
+            logger.warning("顧客設定取得エラー（デフォルト値を使用）: %s", e)
 
         # ✅ Tiera様専用プランナーで計画作成
         result = self.planner.calculate_loading_plan_from_orders(
@@ -161,7 +187,9 @@ class TieraTransportService(TransportService):
             truck_container_rules=truck_container_rules,
             start_date=start_date,
             days=days,
-            calendar_repo=self.calendar_repo if use_calendar else None
+            calendar_repo=calendar_repo if use_calendar else None,
+            progress_callback=progress_callback,
+            loading_engine=loading_engine
         )
 
         # 結果にアノテーション追加（Kubota様と同じ）
@@ -170,4 +198,7 @@ class TieraTransportService(TransportService):
         # 未計画受注を検出（Kubota様と同じ）
         result['unplanned_orders'] = self._find_unplanned_orders(orders_df, result)
 
+        if snapshot is not None:
+            result['snapshot'] = snapshot.describe()
+
         return result
@@ -1,5 +1,5 @@
 # app/services/transport_service.py（カレンダー統合版）
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import date, timedelta
 from repository.transport_repository import TransportRepository
 from repository.production_repository import ProductionRepository
@@ -7,9 +7,12 @@ from repository.product_repository import ProductRepository
 from repository.loading_plan_repository import LoadingPlanRepository
 from repository.delivery_progress_repository import DeliveryProgressRepository
 from repository.calendar_repository import CalendarRepository  # ✅ 追加
+from repository.daily_summary_repository import DailySummaryRepository
+from repository.snapshot_repository import PlanningSnapshotRepository, PlanningSnapshot
 from domain.calculators.transport_planner import TransportPlanner
 from domain.validators.loading_validator import LoadingValidator
 from domain.models.transport import LoadingItem
+from domain.models.master_data import ContainerInfo, MasterData, TruckInfo
 from config_all import get_customer_transport_config  # ✅ 顧客別設定取得
 import pandas as pd
 from datetime import datetime
@@ -17,6 +20,9 @@ from io import BytesIO
 import json
 from sqlalchemy import text
 import math
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 class TransportService:
     """運送関連ビジネスロジック（カレンダー統合版）"""
@@ -72,6 +78,8 @@ class TransportService:
         self.loading_plan_repo = LoadingPlanRepository(db_manager)
         self.delivery_progress_repo = DeliveryProgressRepository(db_manager)
         self.calendar_repo = CalendarRepository(db_manager)  # ✅ 追加
+        self.daily_summary_repo = DailySummaryRepository(db_manager)
+        self.snapshot_repo = PlanningSnapshotRepository(db_manager)
         
         self.planner = TransportPlanner()
         self.db = db_manager
@@ -148,7 +156,9 @@ class TransportService:
                                           start_date: date, 
                                           days: int = 7,
                                           use_delivery_progress: bool = True,
-                                          use_calendar: bool = True) -> Dict[str, Any]:  # ✅ use_calendar追加
+                                          use_calendar: bool = True,
+                                          progress_callback=None,
+                                          use_snapshot: bool = False) -> Dict[str, Any]:  # ✅ use_calendar追加
         """
         オーダー情報から積載計画を自動作成（カレンダー対応）
         
@@ -157,15 +167,34 @@ class TransportService:
             days: 計画日数
             use_delivery_progress: 納入進度を使用するか
             use_calendar: 会社カレンダーを使用するか（営業日のみで計画）
+            progress_callback: 進捗通知関数 progress_callback(ratio, message)（バックグラウンドジョブ用）
+            use_snapshot: ローカルスナップショットのマスタ・受注で計画するか
         """
         
         end_date = start_date + timedelta(days=days - 1)
+
+        # スナップショットはリポジトリと同じメソッドを持つので、そのまま差し替える
+        snapshot = self.get_planning_snapshot(start_date, end_date) if use_snapshot else None
+        progress_repo = snapshot or self.delivery_progress_repo
+        production_repo = snapshot or self.production_repo
+        product_repo = snapshot or self.product_repo
+        transport_repo = snapshot or self.transport_repo
+        calendar_repo = snapshot or self.calendar_repo
+        # 営業日の絞り込みは受注取得SQL（会社カレンダーとのJOIN）で行う
+        working_days_only = bool(use_calendar and calendar_repo)
         
         if use_delivery_progress:
-            orders_df = self.delivery_progress_repo.get_delivery_progress(start_date, end_date)
+            orders_df = progress_repo.get_delivery_progress(
+                start_date, end_date, working_days_only=working_days_only
+            )
             
-            if orders_df.empty:
-                orders_df = self.production_repo.get_production_instructions(start_date, end_date)
+            # 営業日で絞り込んで空になっただけなら生産指示には切り替えない（納入進度の有無で判定）
+            if orders_df.empty and not (
+                working_days_only and progress_repo.get_delivery_progress_exists(start_date, end_date)
+            ):
+                orders_df = production_repo.get_production_instructions(
+                    start_date, end_date, working_days_only=working_days_only
+                )
                 
                 if not orders_df.empty:
                     orders_df = orders_df.rename(columns={
@@ -173,7 +202,9 @@ class TransportService:
                         'instruction_quantity': 'order_quantity'
                     })
         else:
-            orders_df = self.production_repo.get_production_instructions(start_date, end_date)
+            orders_df = production_repo.get_production_instructions(
+                start_date, end_date, working_days_only=working_days_only
+            )
             
             if not orders_df.empty:
                 orders_df = orders_df.rename(columns={
@@ -185,20 +216,6 @@ class TransportService:
             if 'delivery_date' in orders_df.columns:
                 orders_df['delivery_date'] = pd.to_datetime(orders_df['delivery_date']).dt.date
 
-            if use_calendar and self.calendar_repo:
-                orders_df = orders_df[
-                    orders_df['delivery_date'].apply(self.calendar_repo.is_working_day)
-                ].reset_index(drop=True)
-        
-        if orders_df is not None and not orders_df.empty:
-            if 'delivery_date' in orders_df.columns:
-                orders_df['delivery_date'] = pd.to_datetime(orders_df['delivery_date']).dt.date
-
-            if use_calendar and self.calendar_repo:
-                orders_df = orders_df[
-                    orders_df['delivery_date'].apply(self.calendar_repo.is_working_day)
-                ].reset_index(drop=True)
-
             # 納入進捗・計画進度を加味した計画数量を算出
             manual_mask = pd.Series(False, index=orders_df.index)
             manual_remaining = pd.Series(0, index=orders_df.index, dtype='float64')
@@ -274,22 +291,24 @@ class TransportService:
                 'period': f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}"
             }
         
-        products_df = self.product_repo.get_all_products()
-        containers = self.get_containers()
-        trucks_df = self.get_trucks()
-        truck_container_rules = self.transport_repo.get_truck_container_rules()
+        products_df = product_repo.get_all_products()
+        containers = transport_repo.get_containers()
+        trucks_df = transport_repo.get_trucks()
+        truck_container_rules = transport_repo.get_truck_container_rules()
 
         # ✅ 顧客別設定を取得してトラック優先順位を決定
         truck_priority = 'morning'  # デフォルト（Kubota様）
+        loading_engine = 'area'
         try:
             # CustomerDatabaseManagerの場合、現在の顧客を取得
             if hasattr(self.db, 'get_current_customer'):
                 current_customer = self.db.get_current_customer()
                 transport_config = get_customer_transport_config(current_customer)
                 truck_priority = transport_config.truck_priority
+                loading_engine = transport_config.loading_engine
         except Exception as e:
             # エラーが発生してもデフォルト値で続行
-            print(f"顧客設定取得エラー（デフォルト値を使用）: {e}")
+            logger.warning("顧客設定取得エラー（デフォルト値を使用）: %s", e)
 
         # ✅ カレンダーリポジトリと顧客別設定を渡す
         result = self.planner.calculate_loading_plan_from_orders(
@@ -300,16 +319,53 @@ class TransportService:
             truck_container_rules=truck_container_rules,
             start_date=start_date,
             days=days,
-            calendar_repo=self.calendar_repo if use_calendar else None,  # カレンダー
-            truck_priority=truck_priority  # 顧客別トラック優先順位
+            calendar_repo=calendar_repo if use_calendar else None,  # カレンダー
+            truck_priority=truck_priority,  # 顧客別トラック優先順位
+            progress_callback=progress_callback,
+            loading_engine=loading_engine  # 顧客別積載エンジン
         )
 
         self._annotate_loading_plan_items(result)
 
         result['unplanned_orders'] = self._find_unplanned_orders(orders_df, result)
 
+        if snapshot is not None:
+            result['snapshot'] = snapshot.describe()
+
         return result
 
+    def get_planning_snapshot(self, start_date: date, end_date: date) -> Optional[PlanningSnapshot]:
+        """
+        計画期間を含み、MySQLと内容が一致するスナップショットを取得
+
+        - 無い・期間外・古い場合は作り直す（作成に失敗した場合は None = DBから直接計画）
+        - DBに接続できない場合は鮮度未確認のまま既存のスナップショットを使う
+        """
+        snapshot = self.snapshot_repo.load(start_date, end_date)
+        fresh = self.snapshot_repo.check_freshness(snapshot) if snapshot is not None else False
+
+        if fresh is None:
+            logger.warning("⚠️ DBに接続できないため、スナップショット（%s 作成）で計画します", snapshot.meta.get('created_at'))
+        elif not fresh:
+            if snapshot is not None:
+                logger.info("ℹ️ スナップショットがDBの内容と異なるため作り直します")
+            snapshot = self.snapshot_repo.export(start_date, end_date)
+            fresh = snapshot is not None
+
+        if snapshot is not None:
+            # 計画結果に表示する鮮度（ファイルには保存しない）
+            snapshot.meta['verified'] = bool(fresh)
+        return snapshot
+
+    def create_planning_snapshot(self, start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+        """スナップショットを作成して概要を返す（失敗時は None）"""
+        snapshot = self.snapshot_repo.export(start_date, end_date)
+        return snapshot.describe() if snapshot else None
+
+    def get_planning_snapshot_info(self) -> Optional[Dict[str, Any]]:
+        """現在の顧客のスナップショット概要（無い場合は None）"""
+        return self.snapshot_repo.load_info()
+
     def _annotate_loading_plan_items(self, plan_result: Dict[str, Any]) -> None:
         """積載計画データにExcel編集用の識別子と初期値を付与する。"""
         if not plan_result or 'daily_plans' not in plan_result:
@@ -395,8 +451,43 @@ class TransportService:
                         item['surplus'] = surplus_value
 
     def save_loading_plan(self, plan_result: Dict[str, Any], plan_name: str = None) -> int:
-        """積載計画をDBに保存"""
-        return self.loading_plan_repo.save_loading_plan(plan_result, plan_name)
+        """
+        積載計画をDBに保存（日別サマリーも更新）
+
+        計画数は積載品の納期で納入進度に書き込まれる。翌日着トラックの積載品は納期が計画期間（積載日）の
+        終了日より後になるため、再集計範囲は計画期間と積載品の納期の範囲を合わせた期間にする。
+        """
+        plan_id = self.loading_plan_repo.save_loading_plan(plan_result, plan_name)
+        if plan_id:
+            try:
+                start_str, end_str = plan_result['period'].split(' ~ ')
+                start_date = datetime.strptime(start_str.strip(), '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_str.strip(), '%Y-%m-%d').date()
+                delivery_dates = self._plan_delivery_dates(plan_result)
+                if delivery_dates:
+                    start_date = min(start_date, min(delivery_dates))
+                    end_date = max(end_date, max(delivery_dates))
+                # 計画期間内は全製品の計画数をリセットしてから書き込むため、製品は絞らない
+                self.daily_summary_repo.refresh(start_date=start_date, end_date=end_date)
+            except Exception as e:
+                logger.exception("日別サマリー更新エラー（積載計画保存）: %s", e)
+        return plan_id
+
+    @staticmethod
+    def _plan_delivery_dates(plan_result: Dict[str, Any]) -> List[date]:
+        """積載計画の積載品の納期（保存時に計画数を書き込む日付）"""
+        dates = []
+        for plan in (plan_result.get('daily_plans') or {}).values():
+            for truck_plan in plan.get('trucks', []):
+                for item in truck_plan.get('loaded_items', []):
+                    value = item.get('delivery_date') if isinstance(item, dict) else getattr(item, 'delivery_date', None)
+                    if isinstance(value, str) and value:
+                        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+                    elif isinstance(value, datetime):
+                        value = value.date()
+                    if isinstance(value, date):
+                        dates.append(value)
+        return dates
     
     def get_loading_plan(self, plan_id: int) -> Dict[str, Any]:
         """保存済み積載計画を取得"""
@@ -407,7 +498,20 @@ class TransportService:
     def get_all_loading_plans(self) -> List[Dict]:
         """全積載計画のリスト取得"""
         return self.loading_plan_repo.get_all_plans()
+
+    def get_loading_plans_page(self, limit: int = 20, before_id: int = None,
+                               start_date: date = None, end_date: date = None) -> Dict[str, Any]:
+        """積載計画リストをページ単位で取得（キーセット方式、新しい順）"""
+        return self.loading_plan_repo.get_plans_page(limit, before_id, start_date, end_date)
     
+    def export_saved_plans_to_pdf(self, plan_ids: List[int] = None, max_workers: int = None) -> Dict[int, bytes]:
+        """保存済み積載計画をPDFとして一括出力（未指定時は全計画）"""
+        from services.pdf_export_service import PdfExportService
+
+        if plan_ids is None:
+            plan_ids = [plan['id'] for plan in self.get_all_loading_plans()]
+        return PdfExportService().render_plans_batch(plan_ids, self.get_loading_plan, max_workers=max_workers)
+
     def get_loading_plan_details_by_date(self, loading_date: date, truck_id: int = None) -> List[Dict[str, Any]]:
         """指定日の積載計画明細を取得"""
         return self.loading_plan_repo.get_plan_details_by_date_and_truck(loading_date, truck_id)
@@ -426,171 +530,146 @@ class TransportService:
     
     def create_delivery_progress(self, progress_data: Dict[str, Any]) -> int:
         """納入進度を新規作成"""
-        return self.delivery_progress_repo.create_delivery_progress(progress_data)
+        progress_id = self.delivery_progress_repo.create_delivery_progress(progress_data)
+        if progress_id:
+            self.daily_summary_repo.refresh_for_progress_ids([progress_id])
+        return progress_id
     
     def update_delivery_progress(self, progress_id: int, update_data: Dict[str, Any]) -> bool:
         """納入進度を更新"""
-        return self.delivery_progress_repo.update_delivery_progress(progress_id, update_data)
+        return self.update_delivery_progress_batch({progress_id: update_data})[progress_id]
+    
+    def update_delivery_progress_batch(self, updates: Dict[int, Dict[str, Any]],
+                                       shipments: Optional[List[Dict[str, Any]]] = None) -> Dict[int, bool]:
+        """
+        複数の納入進度をまとめて更新（マトリックス保存用）
+        
+        日別サマリーは更新した全IDの製品・納期範囲をまとめて最後に1回だけ再集計する。
+        納期を変更する場合のみ、更新前の範囲も再集計範囲に含める。
+        
+        Args:
+            updates: {納入進度ID: 更新内容}
+            shipments: 更新後に登録する出荷実績（履歴用、create_shipment_record と同じ形式）
+        
+        Returns:
+            dict: {納入進度ID: 更新に成功したか}
+        """
+        moved_ids = [progress_id for progress_id, data in updates.items() if 'delivery_date' in data]
+        before_scope = self.daily_summary_repo.get_progress_scope(moved_ids) if moved_ids else None
+        
+        results = {
+            progress_id: self.delivery_progress_repo.update_delivery_progress(progress_id, data)
+            for progress_id, data in updates.items()
+        }
+        touched_ids = [progress_id for progress_id, success in results.items() if success]
+        for shipment in shipments or []:
+            if self.delivery_progress_repo.create_shipment_record(shipment):
+                touched_ids.append(shipment['progress_id'])
+        
+        scope = self.daily_summary_repo.merge_scopes(
+            before_scope,
+            self.daily_summary_repo.get_progress_scope(touched_ids) if touched_ids else None
+        )
+        if scope:
+            self.daily_summary_repo.refresh(**scope)
+        return results
     
     def delete_delivery_progress(self, progress_id: int) -> bool:
         """納入進度を削除"""
-        return self.delivery_progress_repo.delete_delivery_progress(progress_id)
+        before_scope = self.daily_summary_repo.get_progress_scope([progress_id])
+        success = self.delivery_progress_repo.delete_delivery_progress(progress_id)
+        if success and before_scope:
+            self.daily_summary_repo.refresh(**before_scope)
+        return success
     
     def get_progress_summary(self) -> Dict[str, Any]:
-        """納入進度サマリー取得"""
-        return self.delivery_progress_repo.get_progress_summary()
+        """納入進度サマリー取得（日別サマリーテーブルが未作成の場合は明細から集計）"""
+        summary = self.daily_summary_repo.get_progress_summary()
+        if summary is None:
+            return self.delivery_progress_repo.get_progress_summary()
+        return summary
+
+    def get_daily_progress_totals(self, start_date: date = None, end_date: date = None,
+                                  product_ids: List[int] = None) -> pd.DataFrame:
+        """製品×日付の日計・累計（日別サマリーテーブル、未作成の場合は空）"""
+        totals = self.daily_summary_repo.get_daily_totals(start_date, end_date, product_ids)
+        return totals if totals is not None else pd.DataFrame()
     
     def create_shipment_record(self, shipment_data: Dict[str, Any]) -> bool:
         """出荷実績を登録"""
-        return self.delivery_progress_repo.create_shipment_record(shipment_data)
+        success = self.delivery_progress_repo.create_shipment_record(shipment_data)
+        if success:
+            self.daily_summary_repo.refresh_for_progress_ids([shipment_data.get('progress_id')])
+        return success
     
-    def get_shipment_records(self, progress_id: int = None) -> pd.DataFrame:
-        """出荷実績を取得"""
-        return self.delivery_progress_repo.get_shipment_records(progress_id)
-   
-    def export_loading_plan_to_excel(self, plan_result: Dict[str, Any], 
-                                     export_format: str = 'daily') -> BytesIO:
-        """積載計画をExcelファイルとして出力"""
-        
-        output = BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            summary_df = pd.DataFrame([{
-                '項目': k,
-                '値': v
-            } for k, v in plan_result['summary'].items()])
-            summary_df.to_excel(writer, sheet_name='サマリー', index=False)
-            
-            if export_format == 'daily':
-                self._export_daily_plan(writer, plan_result)
-            elif export_format == 'weekly':
-                self._export_weekly_plan(writer, plan_result)
-            
-            edit_rows = self._build_editable_rows(plan_result)
-            if edit_rows:
-                edit_df = pd.DataFrame(edit_rows)
-                column_order = [col for col in self.EDITABLE_COLUMN_ORDER if col in edit_df.columns]
-                if column_order:
-                    edit_df = edit_df[column_order]
-                edit_df = edit_df.rename(columns=self.EDITABLE_COLUMN_LABELS)
-                edit_df.to_excel(writer, sheet_name='編集用', index=False)
-
-            if plan_result.get('unloaded_tasks'):
-                unloaded_df = pd.DataFrame([{
-                    '製品コード': task['product_code'],
-                    '製品名': task['product_name'],
-                    '容器数': task['num_containers'],
-                    '合計数量': task['total_quantity'],
-                    '納期': task['delivery_date'].strftime('%Y-%m-%d')
-                } for task in plan_result['unloaded_tasks']])
-                unloaded_df.to_excel(writer, sheet_name='積載不可', index=False)
-            
-            warnings_data = []
-            for date_str, plan in plan_result['daily_plans'].items():
-                for warning in plan.get('warnings', []):
-                    warnings_data.append({
-                        '日付': date_str,
-                        '警告内容': warning
-                    })
-            
-            if warnings_data:
-                warnings_df = pd.DataFrame(warnings_data)
-                warnings_df.to_excel(writer, sheet_name='警告一覧', index=False)
-        
-        output.seek(0)
-        return output
+    def get_delivery_progress_by_products_and_dates(
+            self, keys: List[Tuple[int, date]]) -> Dict[Tuple[int, date], Dict[str, Any]]:
+        """製品と納期日の組ごとに納入進度を取得（1クエリ）"""
+        return self.delivery_progress_repo.get_progress_by_products_and_dates(keys)
     
-    def _export_daily_plan(self, writer, plan_result):
-        """日別計画をExcelシートに出力"""
+    def register_shipments_bulk(self, shipments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        出荷実績を一括登録（積載計画明細からの実績登録用）
         
-        daily_data = []
-        prev_date = None
+        - progress_id が無い明細は product_id・delivery_date から1クエリでまとめて解決
+        - 出荷実績の登録と納入進度の更新は1トランザクション（create_shipment_records_bulk）
+        - 日別サマリーの再集計は対象の製品・納期範囲について最後に1回だけ行う
         
-        for date_str in sorted(plan_result['daily_plans'].keys()):
-            plan = plan_result['daily_plans'][date_str]
-            
-            # 日付が変わったら空白行を挿入
-            if prev_date is not None and prev_date != date_str:
-                daily_data.append({
-                    '積載日': '',
-                    'トラック名': '',
-                    '製品コード': '',
-                    '製品名': '',
-                    '容器数': '',
-                    '合計数量': '',
-                    '納期': '',
-                    '体積積載率': ''
-                })
-            
-            prev_date = date_str
-            
-            for truck in plan.get('trucks', []):
-                truck_name = truck.get('truck_name', '不明なトラック')
-                truck_id = truck.get('truck_id', 0)
-            
-                print(f"🔍 デバッグ: {date_str} - truck_id={truck_id}, truck_name={truck_name}")
-                for item in truck.get('loaded_items', []):
-                    # 前倒しフラグを取得
-                    is_advanced = item.get('is_advanced', False)
-                    advanced_mark = '○' if is_advanced else '×'
-                    
-                    daily_data.append({
-                        '積載日': date_str,
-                        'トラック名': truck['truck_name'],
-                        '製品コード': item.get('product_code', ''),
-                        '製品名': item.get('product_name', ''),
-                        '容器数': item.get('num_containers', 0),
-                        '合計数量': item.get('total_quantity', 0),
-                        '納期': item['delivery_date'].strftime('%Y-%m-%d') if 'delivery_date' in item else '',
-                        '体積積載率(%)': truck['utilization']['volume_rate'],
-                        '前倒し配送': advanced_mark
-                    })
-        
-        if daily_data:
-            daily_df = pd.DataFrame(daily_data)
-            daily_df.to_excel(writer, sheet_name='日別計画', index=False)
-    
-    def _export_weekly_plan(self, writer, plan_result):
-        """週別計画をExcelシートに出力"""
+        Args:
+            shipments: 出荷データ（create_shipment_record の項目 + progress_id
+                       または product_id・delivery_date）
         
-        from datetime import datetime
+        Returns:
+            dict: success（登録に成功したか）, registered（登録件数）,
+                  missing（納入進度が見つからなかった明細）
+        """
+        unresolved = [
+            (int(shipment['product_id']), shipment['delivery_date'])
+            for shipment in shipments
+            if not shipment.get('progress_id') and shipment.get('product_id') is not None
+        ]
+        progress_map = self.delivery_progress_repo.get_progress_by_products_and_dates(unresolved) if unresolved else {}
         
-        weekly_data = {}
+        resolved, missing = [], []
+        for shipment in shipments:
+            progress_id = shipment.get('progress_id')
+            if not progress_id and shipment.get('product_id') is not None:
+                progress = progress_map.get((int(shipment['product_id']), shipment['delivery_date']))
+                progress_id = progress['id'] if progress else None
+            if not progress_id:
+                missing.append(shipment)
+                continue
+            resolved.append({**shipment, 'progress_id': int(progress_id)})
         
-        for date_str in sorted(plan_result['daily_plans'].keys()):
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            week_num = date_obj.isocalendar()[1]
-            week_key = f"{date_obj.year}年第{week_num}週"
-            
-            if week_key not in weekly_data:
-                weekly_data[week_key] = []
-            
-            plan = plan_result['daily_plans'][date_str]
-            
-            for truck in plan.get('trucks', []):
-                for item in truck.get('loaded_items', []):
-                    # 前倒しフラグを取得
-                    is_advanced = item.get('is_advanced', False)
-                    advanced_mark = '○' if is_advanced else '×'
-                    
-                    weekly_data[week_key].append({
-                        '週': week_key,
-                        '積載日': date_str,
-                        'トラック名': truck['truck_name'],
-                        '製品コード': item.get('product_code', ''),
-                        '製品名': item.get('product_name', ''),
-                        '容器数': item.get('num_containers', 0),
-                        '合計数量': item.get('total_quantity', 0),
-                        '納期': item['delivery_date'].strftime('%Y-%m-%d') if 'delivery_date' in item else '',
-                        '前倒し配送': advanced_mark
-                    })
+        success = self.delivery_progress_repo.create_shipment_records_bulk(resolved)
+        if success and resolved:
+            self.daily_summary_repo.refresh_for_progress_ids([shipment['progress_id'] for shipment in resolved])
         
-        for week_key, items in weekly_data.items():
-            if items:
-                week_df = pd.DataFrame(items)
-                sheet_name = week_key[:31]
-                week_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return {
+            'success': success,
+            'registered': len(resolved) if success else 0,
+            'missing': missing
+        }
     
+    def get_shipment_records(self, progress_id: int = None) -> pd.DataFrame:
+        """出荷実績を取得"""
+        return self.delivery_progress_repo.get_shipment_records(progress_id)
+   
+    def export_loading_plan_to_excel(self, plan_result: Dict[str, Any], 
+                                     export_format: str = 'daily') -> BytesIO:
+        """積載計画をExcelファイルとして出力（write-onlyモードでストリーミング出力）"""
+        editable_columns = [
+            (key, self.EDITABLE_COLUMN_LABELS.get(key, key))
+            for key in self.EDITABLE_COLUMN_ORDER
+        ]
+        from services.excel_export_service import ExcelExportService  # openpyxl は出力時に読み込む
+        return ExcelExportService().export_plan_workbook(
+            plan_result,
+            export_format=export_format,
+            editable_columns=editable_columns,
+            editable_row=self._editable_row
+        )
+
     def _build_editable_rows(self, plan_result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Excelでの修正対象となる行データを作成する。"""
         rows: List[Dict[str, Any]] = []
@@ -601,63 +680,52 @@ class TransportService:
         for date_str in sorted(daily_plans.keys()):
             day_plan = daily_plans.get(date_str) or {}
             for truck_plan in day_plan.get('trucks', []):
-                trip_number = truck_plan.get('trip_number')
-                truck_id = truck_plan.get('truck_id')
-                truck_name = truck_plan.get('truck_name')
-
                 for item in truck_plan.get('loaded_items', []):
-                    delivery_date = item.get('delivery_date')
-                    if isinstance(delivery_date, datetime):
-                        delivery_value = delivery_date.date()
-                    else:
-                        delivery_value = delivery_date
-
-                    original_delivery = item.get('original_date')
-                    if isinstance(original_delivery, datetime):
-                        original_delivery = original_delivery.date()
-
-                    rows.append({
-                        'edit_key': str(item.get('edit_key', '')),
-                        'loading_date': date_str,
-                        'truck_id': truck_id,
-                        'truck_name': truck_name,
-                        'trip_number': trip_number,
-                        'product_id': item.get('product_id'),
-                        'product_code': item.get('product_code'),
-                        'product_name': item.get('product_name'),
-                        'container_id': item.get('container_id'),
-                        'num_containers': item.get('num_containers'),
-                        'total_quantity': item.get('total_quantity'),
-                        'original_num_containers': item.get('original_num_containers'),
-                        'original_total_quantity': item.get('original_total_quantity'),
-                        'delivery_date': delivery_value,
-                        'original_delivery_date': original_delivery,
-                        'capacity_per_container': item.get('capacity'),
-                        'surplus': item.get('surplus'),
-                        'notes': item.get('memo') or item.get('notes')
-                    })
+                    rows.append(self._editable_row(date_str, truck_plan, item))
 
         return rows
 
+    def _editable_row(self, date_str: str, truck_plan: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+        """積載明細1件分の編集用行を作成する。"""
+        delivery_date = item.get('delivery_date')
+        if isinstance(delivery_date, datetime):
+            delivery_value = delivery_date.date()
+        else:
+            delivery_value = delivery_date
+
+        original_delivery = item.get('original_date')
+        if isinstance(original_delivery, datetime):
+            original_delivery = original_delivery.date()
+
+        return {
+            'edit_key': str(item.get('edit_key', '')),
+            'loading_date': date_str,
+            'truck_id': truck_plan.get('truck_id'),
+            'truck_name': truck_plan.get('truck_name'),
+            'trip_number': truck_plan.get('trip_number'),
+            'product_id': item.get('product_id'),
+            'product_code': item.get('product_code'),
+            'product_name': item.get('product_name'),
+            'container_id': item.get('container_id'),
+            'num_containers': item.get('num_containers'),
+            'total_quantity': item.get('total_quantity'),
+            'original_num_containers': item.get('original_num_containers'),
+            'original_total_quantity': item.get('original_total_quantity'),
+            'delivery_date': delivery_value,
+            'original_delivery_date': original_delivery,
+            'capacity_per_container': item.get('capacity'),
+            'surplus': item.get('surplus'),
+            'notes': item.get('memo') or item.get('notes')
+        }
+
     def _recalculate_plan_utilizations(self, plan_result: Dict[str, Any], affected_trip_keys: List[tuple]) -> None:
         """�S�Z�b�g�ɋύX�����g���b�N�p�̓��ϗ��v�Z"""
         if not plan_result or not affected_trip_keys:
             return
 
-        containers = self.get_containers() or []
-        container_map = {c.id: c for c in containers if hasattr(c, 'id')}
-
-        trucks_df = self.get_trucks()
-        truck_info_map: Dict[int, Dict[str, Any]] = {}
-        if trucks_df is not None and not getattr(trucks_df, 'empty', False):
-            for _, row in trucks_df.iterrows():
-                truck_id = row.get('id')
-                if pd.isna(truck_id):
-                    continue
-                try:
-                    truck_info_map[int(truck_id)] = row.to_dict()
-                except (TypeError, ValueError):
-                    continue
+        master = MasterData.from_sources(trucks_df=self.get_trucks(), containers=self.get_containers())
+        truck_info_map = master.trucks
+        container_map = master.containers
 
         for date_str, truck_id, trip_number in affected_trip_keys:
             day_plan = plan_result.get('daily_plans', {}).get(date_str)
@@ -680,8 +748,8 @@ class TransportService:
     def _recalculate_truck_plan_utilization(
         self,
         truck_plan: Dict[str, Any],
-        truck_info_map: Dict[int, Dict[str, Any]],
-        container_map: Dict[int, Any]
+        truck_info_map: Dict[int, TruckInfo],
+        container_map: Dict[int, ContainerInfo]
     ) -> None:
         """�V���O�g���b�N�p�̉��ϗ��v�Z"""
         truck_id = truck_plan.get('truck_id')
@@ -710,24 +778,11 @@ class TransportService:
                 truck_info = truck_info_map[key]
                 break
 
-        if not truck_info:
+        if truck_info is None:
             return
 
-        def _to_float(val):
-            if pd.isna(val):
-                return 0.0
-            try:
-                return float(val)
-            except (TypeError, ValueError):
-                return 0.0
-
-        width = _to_float(truck_info.get('width'))
-        depth = _to_float(truck_info.get('depth'))
-        height = _to_float(truck_info.get('height'))
-        max_weight = _to_float(truck_info.get('max_weight'))
-
-        truck_floor_area = (width * depth) / 1_000_000 if width and depth else 0.0
-        truck_volume = (width * depth * height) / 1_000_000_000 if width and depth and height else 0.0
+        truck_floor_area = truck_info.floor_area
+        truck_volume = truck_info.volume
 
         container_totals: Dict[int, Dict[str, Any]] = {}
 
@@ -744,11 +799,11 @@ class TransportService:
 
             num_containers = max(num_containers, 0)
 
-            per_area = ((container.width or 0) * (container.depth or 0)) / 1_000_000
-            per_volume = ((container.width or 0) * (container.depth or 0) * (container.height or 0)) / 1_000_000_000
-            per_weight = getattr(container, 'max_weight', 0) or 0
-            stackable = bool(getattr(container, 'stackable', False))
-            max_stack = getattr(container, 'max_stack', 1) or 1
+            per_area = container.floor_area
+            per_volume = container.volume
+            per_weight = container.max_weight or 0
+            stackable = bool(container.stackable)
+            max_stack = container.max_stack or 1
 
             item['num_containers'] = num_containers
             item['floor_area_per_container'] = per_area
@@ -1180,7 +1235,7 @@ class TransportService:
             return True
             
         except Exception as e:
-            print(f"計画更新エラー: {e}")
+            logger.error("計画更新エラー: %s", e)
             return False
 
     def create_plan_version(self, plan_id: int, version_name: str, user_id: str = None) -> int:
@@ -1200,7 +1255,7 @@ class TransportService:
             return self.loading_plan_repo.create_plan_version(version_data)
             
         except Exception as e:
-            print(f"バージョン作成エラー: {e}")
+            logger.error("バージョン作成エラー: %s", e)
             return 0        
     #ストアドを呼び出して計画進度を再計算
     def recompute_planned_progress(self, product_id: int, start_date: date, end_date: date) -> None:
@@ -1215,13 +1270,15 @@ class TransportService:
         finally:
             session.close()
 
-    def recompute_planned_progress_all(self, start_date: date, end_date: date) -> None:
+    def recompute_planned_progress_all(self, start_date: date, end_date: date, progress_callback=None) -> None:
         products = self.product_repo.get_all_products()
         if products is None or products.empty or 'id' not in products.columns:
             return
         product_ids = products['id'].dropna().astype(int).tolist()
-        for pid in product_ids:
+        for index, pid in enumerate(product_ids):
             self.recompute_planned_progress(pid, start_date, end_date)
+            if progress_callback:
+                progress_callback((index + 1) / len(product_ids), f"計画進度を再計算中 ({index + 1}/{len(product_ids)})")
     # --- 実績進度（shipped_remaining_quantity）の再計算 ---
     def recompute_shipped_remaining(self, product_id: int, start_date: date, end_date: date) -> None:
         """
@@ -1238,7 +1295,7 @@ class TransportService:
         finally:
             session.close()
 
-    def recompute_shipped_remaining_all(self, start_date: date, end_date: date) -> None:
+    def recompute_shipped_remaining_all(self, start_date: date, end_date: date, progress_callback=None) -> None:
         """
         全製品分を一括再計算（期間内の全製品IDを対象）
         - 既存の planned_all と同様に product_repo を使う簡易版
@@ -1248,6 +1305,8 @@ class TransportService:
         if products is None or products.empty or 'id' not in products.columns:
             return
         product_ids = products['id'].dropna().astype(int).tolist()
-        for pid in product_ids:
+        for index, pid in enumerate(product_ids):
             self.recompute_shipped_remaining(pid, start_date, end_date)
+            if progress_callback:
+                progress_callback((index + 1) / len(product_ids), f"実績進度を再計算中 ({index + 1}/{len(product_ids)})")
 
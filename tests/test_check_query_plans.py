@@ -0,0 +1,40 @@
+# app/tests/test_check_query_plans.py
+"""
+実行計画チェック（check_query_plans.check_plan）のテスト
+"""
+
+from check_query_plans import check_plan, table_aliases
+
+PROGRESS_SQL = """
+    SELECT dp.id, p.product_code
+    FROM delivery_progress dp
+    LEFT JOIN products p ON dp.product_id = p.id
+    WHERE dp.delivery_date BETWEEN %(start_date)s AND %(end_date)s
+"""
+
+
+def _row(table, access='ALL', possible_keys=None, rows=10):
+    return {'table': table, 'type': access, 'possible_keys': possible_keys, 'key': None, 'rows': rows}
+
+
+def test_aliases_map_back_to_table_names():
+    aliases = table_aliases(PROGRESS_SQL)
+
+    assert aliases['dp'] == 'delivery_progress'
+    assert aliases['p'] == 'products'
+    assert 'WHERE' not in aliases
+
+
+def test_full_scan_of_aliased_hot_table_fails():
+    failures, notices = check_plan([_row('dp'), _row('p')], min_rows=1000, aliases=table_aliases(PROGRESS_SQL))
+
+    assert failures == ['delivery_progress(dp): type=ALL key=None rows=10']
+    assert notices == ['products(p): type=ALL key=None rows=10']
+
+
+def test_small_full_scan_with_usable_index_is_a_notice():
+    failures, notices = check_plan([_row('dp', possible_keys='idx_dp_date', rows=10)], min_rows=1000,
+                                   aliases=table_aliases(PROGRESS_SQL))
+
+    assert failures == []
+    assert len(notices) == 1
@@ -0,0 +1,96 @@
+# app/tests/test_delivery_progress_repository.py
+"""
+出荷実績の一括登録（DeliveryProgressRepository.create_shipment_records_bulk）のテスト
+
+MySQL を使わず、納入進度の行を保持する簡易セッションで実行する。
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+from repository.delivery_progress_repository import DeliveryProgressRepository
+
+
+class FakeSession:
+    """delivery_progress の行を保持し、一括登録が発行するSQLだけを解釈するセッション"""
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.shipments = []
+        self.committed = False
+
+    def execute(self, statement, params=None):
+        sql = ' '.join(str(statement).split())
+        if sql.startswith('INSERT INTO shipment_records'):
+            self.shipments.extend(params)
+        elif sql.startswith('SELECT id, shipped_quantity'):
+            assert 'FOR UPDATE' in sql
+            return SimpleNamespace(fetchall=lambda: [
+                SimpleNamespace(id=progress_id, **self.progress[progress_id])
+                for progress_id in params['progress_ids'] if progress_id in self.progress
+            ])
+        elif sql.startswith('UPDATE delivery_progress'):
+            for row in params:
+                self.progress[row['progress_id']].update(
+                    shipped_quantity=row['shipped_quantity'], status=row['status']
+                )
+        else:
+            raise AssertionError(f"想定外のSQL: {sql}")
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, session):
+        self.session = session
+
+    def get_session(self):
+        return self.session
+
+
+def _shipment(progress_id, quantity):
+    return {
+        'progress_id': progress_id,
+        'truck_id': 1,
+        'shipment_date': date(2026, 10, 19),
+        'shipped_quantity': quantity,
+    }
+
+
+def _repository(progress):
+    session = FakeSession(progress)
+    return DeliveryProgressRepository(FakeDatabase(session)), session
+
+
+def test_partial_then_completing_shipment_updates_status():
+    repo, session = _repository({
+        1: {'shipped_quantity': 0, 'order_quantity': 100, 'status': '未出荷'},
+    })
+
+    assert repo.create_shipment_records_bulk([_shipment(1, 40)])
+    assert session.progress[1] == {'shipped_quantity': 40, 'order_quantity': 100, 'status': '一部出荷'}
+
+    assert repo.create_shipment_records_bulk([_shipment(1, 60)])
+    assert session.progress[1] == {'shipped_quantity': 100, 'order_quantity': 100, 'status': '出荷完了'}
+    assert len(session.shipments) == 2
+
+
+def test_shipments_for_the_same_progress_are_summed_before_judging_status():
+    repo, session = _repository({
+        1: {'shipped_quantity': 10, 'order_quantity': 50, 'status': '一部出荷'},
+        2: {'shipped_quantity': 0, 'order_quantity': 80, 'status': '未出荷'},
+    })
+
+    assert repo.create_shipment_records_bulk([_shipment(1, 20), _shipment(2, 30), _shipment(1, 20)])
+    assert session.committed
+    assert session.progress[1]['shipped_quantity'] == 50
+    assert session.progress[1]['status'] == '出荷完了'
+    assert session.progress[2]['shipped_quantity'] == 30
+    assert session.progress[2]['status'] == '一部出荷'
@@ -0,0 +1,40 @@
+# app/tests/test_floor_packing.py
+"""
+2次元配置の積載エンジン（FloorPackingEngine）のテスト
+"""
+
+from domain.calculators.floor_packing import FloorPackingEngine
+from domain.models.master_data import TruckInfo
+
+
+def _truck(width, depth):
+    return TruckInfo(id=1, name='トラック1', width=width, depth=depth, height=2000,
+                     floor_area=width * depth / 1_000_000)
+
+
+def test_uniform_grid_of_rotatable_containers_fits():
+    # 2400×6000 の荷台に 800×1200 を 3列×5段で並べる配置
+    engine = FloorPackingEngine()
+
+    assert engine.fits(_truck(2400, 6000), {(800, 1200): 15})
+    assert not engine.fits(_truck(2400, 6000), {(800, 1200): 16})
+
+
+def test_grid_fits_whichever_way_the_footprint_is_given():
+    engine = FloorPackingEngine()
+
+    assert engine.fits(_truck(2400, 6000), {(1200, 800): 15})
+
+
+def test_mixed_containers_keep_each_type_aligned_within_a_shelf():
+    # 奥行1200の棚に 800×1200 を3個、残りの奥行1200に 1200×1200 を2個
+    engine = FloorPackingEngine()
+
+    assert engine.fits(_truck(2400, 2400), {(800, 1200): 3, (1200, 1200): 2})
+
+
+def test_fixed_orientation_rejects_layout_that_needs_rotation():
+    engine = FloorPackingEngine(allow_rotation=False)
+
+    assert engine.fits(_truck(2400, 6000), {(800, 1200): 15})
+    assert not engine.fits(_truck(2400, 6000), {(1200, 800): 15})
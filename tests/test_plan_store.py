@@ -0,0 +1,129 @@
+# app/tests/test_plan_store.py
+"""
+積載計画ストア（plan_store）のテスト
+"""
+
+import time
+from datetime import date
+
+from services import plan_store
+from services.plan_store import PlanStore, decode, encode
+
+
+def _plan(seed=0, num_days=2):
+    daily_plans = {}
+    for day in range(num_days):
+        date_str = f'2026-10-{day + 1:02d}'
+        daily_plans[date_str] = {
+            'trucks': [
+                {
+                    'truck_id': truck_id,
+                    'truck_name': f'トラック{truck_id}',
+                    'loaded_items': [
+                        {'product_code': f'P{seed}-{truck_id}-{i}', 'num_containers': i + seed,
+                         'delivery_date': date(2026, 10, day + 1)}
+                        for i in range(3)
+                    ],
+                    'utilization': {'floor_area_rate': 50.0 + seed},
+                }
+                for truck_id in (1, 2)
+            ],
+            'warnings': [],
+        }
+    return {
+        'summary': {'total_trucks': 2 * num_days, 'seed': seed},
+        'period': '2026-10-01 ~ 2026-10-02',
+        'daily_plans': daily_plans,
+        'unloaded_tasks': [{'product_code': f'U{seed}', 'reason': '容量不足'}],
+        'unplanned_orders': [],
+    }
+
+
+def test_encode_decode_round_trip():
+    value = {
+        'trucks': [
+            {'truck_id': 1, 'loaded_items': [{'a': 1, 'b': [1, 2]}, {'a': 2, 'c': None}]},
+            {'truck_id': 2, 'loaded_items': []},
+        ],
+        'warnings': ['注意'],
+        'nested': [{'x': {'y': [{'z': date(2026, 10, 19)}]}}],
+    }
+
+    assert decode(encode(value)) == value
+
+
+def test_store_returns_the_plan_and_its_parts():
+    store = PlanStore(max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+    plan = _plan()
+    handle = store.put(plan)
+
+    assert store.get(handle) == plan
+    assert store.get_meta(handle)['dates'] == list(plan['daily_plans'])
+    assert store.get_meta(handle)['unloaded_count'] == 1
+    assert store.get_daily_plans(handle)['2026-10-02'] == plan['daily_plans']['2026-10-02']
+    assert store.get_section(handle, 'unloaded_tasks') == plan['unloaded_tasks']
+    assert store.get_section(handle, 'unplanned_orders') == []
+
+
+def test_least_recently_used_plan_is_evicted_over_max_bytes():
+    sizes = []
+    probe = PlanStore(max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+    for seed in range(3):
+        probe.put(_plan(seed))
+        sizes.append(probe.stats()['total_bytes'] - sum(sizes))
+    store = PlanStore(max_bytes=sum(sizes) - 1, ttl_seconds=3600)
+
+    first = store.put(_plan(0))
+    second = store.put(_plan(1))
+    assert store.contains(first)
+    third = store.put(_plan(2))
+
+    assert store.contains(first) and store.contains(third)
+    assert not store.contains(second)
+    assert store.stats()['total_bytes'] <= store.max_bytes
+
+
+def test_latest_plan_is_kept_even_if_larger_than_max_bytes():
+    store = PlanStore(max_bytes=1, ttl_seconds=3600)
+
+    first = store.put(_plan(0))
+    second = store.put(_plan(1))
+
+    assert not store.contains(first)
+    assert store.get(second) == _plan(1)
+    assert store.stats()['plans'] == 1
+
+
+def test_replacing_a_handle_keeps_the_byte_count():
+    store = PlanStore(max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+    handle = store.put(_plan(0))
+    size = store.stats()['total_bytes']
+
+    assert store.put(_plan(0), handle=handle) == handle
+    assert store.stats() == {'plans': 1, 'total_bytes': size, 'max_bytes': store.max_bytes, 'owners': 1}
+
+    store.discard(handle)
+    assert store.stats()['total_bytes'] == 0
+
+
+def test_unused_plan_expires_after_ttl(monkeypatch):
+    store = PlanStore(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+    stale = store.put(_plan(0))
+    now = time.time()
+
+    monkeypatch.setattr(plan_store.time, 'time', lambda: now + 45)
+    fresh = store.put(_plan(1))
+    assert store.contains(fresh)
+    assert store.stats()['plans'] == 2
+
+    # 最後の参照から60秒で破棄され、参照すると期限が延びる
+    monkeypatch.setattr(plan_store.time, 'time', lambda: now + 90)
+    assert not store.contains(stale)
+    assert store.contains(fresh)
+
+    monkeypatch.setattr(plan_store.time, 'time', lambda: now + 140)
+    assert store.contains(fresh)
+
+    monkeypatch.setattr(plan_store.time, 'time', lambda: now + 210)
+    assert not store.contains(fresh)
+    assert store.stats()['total_bytes'] == 0
@@ -0,0 +1,81 @@
+# app/tests/test_production_leveler.py
+"""
+生産平準化エンジン（ProductionLeveler）のテスト
+"""
+
+import numpy as np
+import pytest
+
+from domain.calculators import production_leveler
+from domain.calculators.production_leveler import ProductionLeveler
+
+requires_scipy = pytest.mark.skipif(not production_leveler.SCIPY_AVAILABLE, reason='scipy が必要')
+
+
+def _cost(result):
+    """LPの目的関数（生産量×残り日数 + 不足量×不足の重み）"""
+    num_days = result['production'].shape[1]
+    holding = (result['production'] * np.arange(num_days, 0, -1)).sum()
+    return float(holding + result['shortage'].sum() * (2 * num_days + 1))
+
+
+def test_greedy_carries_overflow_to_earlier_days():
+    result = ProductionLeveler().level(np.array([[0, 0, 10]]), np.array([4]))
+
+    np.testing.assert_allclose(result['production'], [[2, 4, 4]])
+    np.testing.assert_allclose(result['backlog'], [[0, 2, 6]])
+    np.testing.assert_allclose(result['shortage'], [0])
+
+
+def test_greedy_reports_shortage_when_demand_exceeds_capacity():
+    result = ProductionLeveler().level(np.array([[0, 0, 20]]), np.array([4]))
+
+    np.testing.assert_allclose(result['production'], [[4, 4, 4]])
+    np.testing.assert_allclose(result['backlog'], [[8, 12, 16]])
+    np.testing.assert_allclose(result['shortage'], [8])
+
+
+def test_greedy_scales_products_down_to_the_line_capacity():
+    demand = np.array([[0, 6], [0, 6]])
+    capacity = np.array([np.inf, np.inf])
+
+    result = ProductionLeveler().level(demand, capacity, line_capacity=8)
+    np.testing.assert_allclose(result['production'], [[2, 4], [2, 4]])
+    np.testing.assert_allclose(result['shortage'], [0, 0])
+
+    result = ProductionLeveler().level(demand, capacity, line_capacity=4)
+    np.testing.assert_allclose(result['production'], [[2, 2], [2, 2]])
+    np.testing.assert_allclose(result['shortage'], [2, 2])
+
+
+def test_lp_mode_without_scipy_falls_back_to_greedy(monkeypatch):
+    monkeypatch.setattr(production_leveler, 'SCIPY_AVAILABLE', False)
+    demand = np.array([[0, 0, 10]])
+
+    lp = ProductionLeveler(ProductionLeveler.MODE_LP).level(demand, np.array([4]))
+    greedy = ProductionLeveler().level(demand, np.array([4]))
+
+    np.testing.assert_allclose(lp['production'], greedy['production'])
+
+
+@requires_scipy
+def test_lp_is_no_worse_than_greedy_within_capacity():
+    demand = np.array([[3, 0, 9, 2], [0, 5, 0, 8]])
+    capacity = np.array([4, 5])
+
+    greedy = ProductionLeveler().level(demand, capacity, line_capacity=7)
+    lp = ProductionLeveler().level(demand, capacity, line_capacity=7, mode=ProductionLeveler.MODE_LP)
+
+    assert lp['shortage'].sum() <= greedy['shortage'].sum() + 1e-6
+    np.testing.assert_allclose(lp['production'].sum(axis=1) + lp['shortage'], demand.sum(axis=1), atol=1e-6)
+    assert (lp['production'] <= capacity[:, None] + 1e-6).all()
+    assert (lp['production'].sum(axis=0) <= 7 + 1e-6).all()
+    assert _cost(lp) <= _cost(greedy) + 1e-6
+
+
+@requires_scipy
+def test_lp_reports_shortage_when_demand_exceeds_capacity():
+    result = ProductionLeveler().level(np.array([[0, 0, 20]]), np.array([4]), mode=ProductionLeveler.MODE_LP)
+
+    np.testing.assert_allclose(result['production'], [[4, 4, 4]], atol=1e-6)
+    np.testing.assert_allclose(result['shortage'], [8], atol=1e-6)
@@ -0,0 +1,72 @@
+# app/tests/test_slot_loading.py
+"""
+容器枠ベースの積載エンジン（SlotLoadingEngine / SlotLedger）のテスト
+"""
+
+from datetime import date
+
+from domain.calculators.slot_loading import SlotLedger, SlotLoadingEngine
+from domain.models.loading_records import Demand
+from domain.models.master_data import ContainerInfo, TruckInfo
+
+LOADING_DATE = date(2026, 10, 19)
+
+
+def _truck(truck_id=1, floor_area=4.0):
+    return TruckInfo(id=truck_id, name=f'トラック{truck_id}', width=2000, depth=2000, height=2000,
+                     default_use=True, floor_area=floor_area)
+
+
+def _container(container_id, floor_area=1.0):
+    return ContainerInfo(id=container_id, name=f'容器{container_id}', width=1000, depth=1000,
+                         stackable=False, max_stack=1, floor_area=floor_area)
+
+
+def _demand(container_id, num_containers):
+    return Demand(
+        product_id=container_id, product_code=f'P{container_id}', product_name=f'製品{container_id}',
+        container_id=container_id, num_containers=num_containers, total_quantity=num_containers * 10,
+        capacity=10, remainder=0, surplus=0, floor_area=float(num_containers), floor_area_per_container=1.0,
+        delivery_date=LOADING_DATE, loading_date=LOADING_DATE, truck_ids=[], max_stack=1, stackable=False,
+    )
+
+
+def _loaded(plans, container_id):
+    trucks = plans[LOADING_DATE.strftime('%Y-%m-%d')]['trucks']
+    return sum(item.num_containers for truck in trucks for item in truck['loaded_items']
+               if item.container_id == container_id)
+
+
+def test_containers_without_rules_share_the_truck_floor():
+    trucks = {1: _truck()}
+    containers = {c: _container(c) for c in (2, 3)}
+    plans = SlotLoadingEngine().allocate(
+        {LOADING_DATE.strftime('%Y-%m-%d'): [_demand(2, 4), _demand(3, 4)]},
+        [LOADING_DATE], trucks, containers, rules=[], allow_special=False,
+    )
+
+    assert _loaded(plans, 2) + _loaded(plans, 3) == 4
+    assert plans[LOADING_DATE.strftime('%Y-%m-%d')]['trucks'][0]['utilization']['slot_rate'] == 100.0
+
+
+def test_rule_container_and_no_rule_containers_do_not_overfill_the_truck():
+    trucks = {1: _truck()}
+    containers = {c: _container(c) for c in (1, 2, 3)}
+    rules = [{'truck_id': 1, 'container_id': 1, 'max_quantity': 2, 'stack_count': 1, 'priority': 0}]
+    plans = SlotLoadingEngine().allocate(
+        {LOADING_DATE.strftime('%Y-%m-%d'): [_demand(1, 4), _demand(2, 4), _demand(3, 4)]},
+        [LOADING_DATE], trucks, containers, rules=rules, allow_special=False,
+    )
+
+    loaded_area = sum(_loaded(plans, c) * containers[c].floor_area for c in containers)
+    assert _loaded(plans, 1) == 2
+    assert loaded_area <= trucks[1].floor_area
+
+
+def test_ledger_charges_no_rule_allocations_against_one_floor_budget():
+    ledger = SlotLedger([LOADING_DATE], {1: _truck()}, {c: _container(c) for c in (2, 3)}, rules=[])
+
+    assert ledger.loadable(LOADING_DATE, 1, 2, False) == 4
+    ledger.consume(LOADING_DATE, 1, 2, 3, False)
+    assert ledger.loadable(LOADING_DATE, 1, 3, False) == 1
+    assert ledger.loadable(LOADING_DATE, 1, 2, False) == 1
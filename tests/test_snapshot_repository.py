@@ -0,0 +1,77 @@
+# app/tests/test_snapshot_repository.py
+"""
+計画スナップショット（PlanningSnapshotRepository）のテスト
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from repository.db_router import is_read_only, primary_reads, read_only
+from repository.snapshot_repository import SNAPSHOT_VERSION, PlanningSnapshotRepository
+
+
+class FakeDatabase:
+    """鮮度確認で集計したときにレプリカ経由だったかを記録する"""
+
+    def __init__(self):
+        self.read_only_calls = []
+
+    def execute_query(self, query, params=None):
+        self.read_only_calls.append(is_read_only())
+        return pd.DataFrame([{'row_count': 2, 'max_updated': '2026-10-19 09:00:00'}])
+
+
+def _write_snapshot(repo):
+    frames = {
+        'products': pd.DataFrame({'id': [1, 2], 'product_code': ['P1', 'P2']}),
+        'delivery_progress': pd.DataFrame({'id': [10, 11, 12], 'order_quantity': [5, 6, 7]}),
+    }
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'customer': 'default',
+        'created_at': '2026-10-19T09:00:00',
+        'start_date': '2026-10-01',
+        'end_date': '2026-10-31',
+        'tables': list(frames),
+    }
+    PlanningSnapshotRepository._write(repo.get_snapshot_path(), frames, meta)
+
+
+def test_load_info_reads_meta_and_row_counts(tmp_path):
+    repo = PlanningSnapshotRepository(FakeDatabase(), snapshot_dir=str(tmp_path))
+    _write_snapshot(repo)
+
+    info = repo.load_info()
+
+    assert info['start_date'] == date(2026, 10, 1)
+    assert info['end_date'] == date(2026, 10, 31)
+    assert info['created_at'] == '2026-10-19T09:00:00'
+    assert info['row_counts'] == {'products': 2, 'delivery_progress': 3}
+    assert info == repo.load().describe()
+
+
+def test_load_info_without_snapshot_is_none(tmp_path):
+    repo = PlanningSnapshotRepository(FakeDatabase(), snapshot_dir=str(tmp_path))
+
+    assert repo.load_info() is None
+
+
+def test_primary_reads_overrides_read_only():
+    with read_only():
+        assert is_read_only()
+        with primary_reads():
+            assert not is_read_only()
+            with read_only():
+                assert not is_read_only()
+        assert is_read_only()
+
+
+def test_freshness_is_checked_on_the_primary(tmp_path):
+    db = FakeDatabase()
+    repo = PlanningSnapshotRepository(db, snapshot_dir=str(tmp_path))
+    _write_snapshot(repo)
+
+    repo.check_freshness(repo.load())
+
+    assert db.read_only_calls and not any(db.read_only_calls)
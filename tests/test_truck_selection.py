@@ -0,0 +1,53 @@
+# app/tests/test_truck_selection.py
+"""
+キー更新付きヒープ（truck_selection.IndexedHeap）のテスト
+"""
+
+from domain.calculators.truck_selection import IndexedHeap
+
+
+def _heap(keys):
+    heap = IndexedHeap()
+    for item, key in keys.items():
+        heap.push(item, key)
+    return heap
+
+
+def test_ordered_returns_items_by_key():
+    heap = _heap({'a': (3,), 'b': (1,), 'c': (2,), 'd': (0, 5), 'e': (0, 1)})
+
+    assert list(heap.ordered()) == ['e', 'd', 'b', 'c', 'a']
+    assert len(heap) == 5
+
+
+def test_update_moves_item_up_and_down():
+    heap = _heap({item: (index,) for index, item in enumerate('abcdefg')})
+
+    heap.update('g', (-1,))
+    assert list(heap.ordered())[0] == 'g'
+
+    heap.update('a', (10,))
+    heap.update('b', (9,))
+    assert list(heap.ordered()) == ['g', 'c', 'd', 'e', 'f', 'b', 'a']
+
+
+def test_push_of_existing_item_updates_its_key():
+    heap = _heap({'a': (1,), 'b': (2,)})
+
+    heap.push('a', (3,))
+
+    assert list(heap.ordered()) == ['b', 'a']
+    assert len(heap) == 2
+
+
+def test_ordered_can_stop_early_without_changing_the_heap():
+    heap = _heap({item: (index,) for index, item in enumerate('abcdefg')})
+
+    first_two = []
+    for item in heap.ordered():
+        first_two.append(item)
+        if len(first_two) == 2:
+            break
+
+    assert first_two == ['a', 'b']
+    assert list(heap.ordered()) == list('abcdefg')
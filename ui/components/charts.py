@@ -1,9 +1,8 @@
 # app/ui/components/charts.py
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
 
+# plotly は読み込みが重いため、チャートを作成するときに import する
+
 class ChartComponents:
     """チャートコンポーネント"""
     
@@ -13,6 +12,8 @@ class ChartComponents:
         if instructions_df.empty:
             return None
             
+        import plotly.express as px
+
         trend_data = instructions_df.groupby('instruction_date')['instruction_quantity'].sum().reset_index()
         fig = px.line(trend_data, x='instruction_date', y='instruction_quantity', 
                      title='日次需要量トレンド', labels={'instruction_quantity': '需要量', 'instruction_date': '日付'})
@@ -29,6 +30,9 @@ class ChartComponents:
             'planned_quantity': 'sum'
         }).reset_index()
         
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         fig = make_subplots(
             rows=2, cols=1,
             subplot_titles=('需要量 vs 計画生産量', '制約対象製品の生産状況'),
@@ -0,0 +1,80 @@
+# app/ui/components/fragments.py
+"""
+画面の部分再実行（fragment）と部分ごとのデータ読み込みキャッシュ
+
+- @timed_fragment("名前") を付けたメソッドは st.fragment として実行され、
+  その中のウィジェット操作ではそのメソッドだけが再実行される（他のタブのクエリは再実行しない）
+- 管理者には部分ごとの描画時間を表示する
+- PageDataCache は部分ごとのデータ読み込み結果を入力値（期間など）をキーにセッションへ保持する
+  （顧客ごとに分け、一定時間で破棄。ページで更新した場合は invalidate() で破棄する）
+"""
+
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import pandas as pd
+import streamlit as st
+
+# st.fragment が無いバージョンでは通常の関数として実行
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+
+def _is_admin() -> bool:
+    user = st.session_state.get('user') or {}
+    return bool(user.get('is_admin'))
+
+
+def timed_fragment(label: str):
+    """メソッドを部分再実行（fragment）にし、管理者には描画時間を表示する"""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                st.session_state.setdefault('render_timings', {})[label] = elapsed_ms
+                if _is_admin():
+                    st.caption(f"⏱ {label}: {elapsed_ms:,.0f} ms")
+        return _fragment(timed)
+    return decorator
+
+
+class PageDataCache:
+    """ページ部分ごとのデータ読み込みキャッシュ（セッション単位）"""
+
+    def __init__(self, namespace: str, ttl_seconds: int = 60, max_entries: int = 32):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _entries(self) -> "OrderedDict[Hashable, tuple]":
+        caches = st.session_state.setdefault('page_data_cache', {})
+        return caches.setdefault(self.namespace, OrderedDict())
+
+    def load(self, name: str, loader: Callable[..., Any], *args) -> Any:
+        """
+        loader(*args) の結果を取得（同じ顧客・名前・引数で有効期限内なら再利用）
+
+        DataFrame は呼び出し側で列を追加・変更するためコピーを返す
+        """
+        entries = self._entries()
+        key = (st.session_state.get('current_customer'), name, args)
+        entry = entries.get(key)
+        now = time.time()
+        if entry is None or now - entry[0] > self.ttl_seconds:
+            entry = (now, loader(*args))
+            entries[key] = entry
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        entries.move_to_end(key)
+
+        value = entry[1]
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+
+    def invalidate(self):
+        """データを更新した後に呼び出す（このページのキャッシュを全て破棄）"""
+        st.session_state.get('page_data_cache', {}).pop(self.namespace, None)
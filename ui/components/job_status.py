@@ -0,0 +1,66 @@
+# app/ui/components/job_status.py
+"""
+バックグラウンドジョブの進捗表示（積載計画作成・CSV取込・進度再計算で共通）
+
+- 投入したジョブIDはセッションに保持し、実行中は進捗バーと「進捗を更新」ボタンを表示する
+- 完了したジョブは結果を取り出して呼び出し側に返す（結果の表示は呼び出し側で行う）
+- ブラウザ再読み込みでジョブIDが失われた場合は、同じユーザーの実行中・未受取のジョブに再接続する
+"""
+
+import uuid
+from typing import Hashable, Optional
+
+import streamlit as st
+
+from services.background_job_service import JobInfo, get_job_runner
+
+
+def job_owner() -> Hashable:
+    """バックグラウンドジョブの所有者（ログインユーザー、未ログイン時はセッション）"""
+    user = st.session_state.get('user')
+    if user and user.get('id') is not None:
+        return user['id']
+    if 'job_owner_token' not in st.session_state:
+        st.session_state['job_owner_token'] = uuid.uuid4().hex
+    return st.session_state['job_owner_token']
+
+
+def poll_job(session_key: str, kind: str, label: str, reconnect: bool = True) -> Optional[JobInfo]:
+    """
+    ジョブの進捗を表示し、完了していれば取り出して返す
+
+    Args:
+        session_key: ジョブIDを保持するセッションのキー
+        kind: ジョブ種別（JOB_KIND_*、再接続に使用）
+        label: 進捗バーに表示する処理名（例: "積載計画を計算中"）
+        reconnect: ジョブIDが無い場合に同じユーザーの最新ジョブへ再接続する
+                   （同じ種別のジョブを複数の場所で投入する画面では False）
+
+    Returns:
+        JobInfo: 完了（成功・失敗）したジョブ。実行中・ジョブ無しの場合は None
+    """
+    runner = get_job_runner()
+    job_id = st.session_state.get(session_key)
+    if not job_id and reconnect:
+        latest_job = runner.find_latest_job(kind, job_owner())
+        if latest_job:
+            job_id = latest_job.job_id
+            st.session_state[session_key] = job_id
+
+    if not job_id:
+        return None
+
+    job = runner.get_job(job_id)
+    if job is None:
+        st.session_state.pop(session_key, None)
+        return None
+
+    if job.is_active:
+        st.progress(job.progress, text=f"{label}... {job.message}")
+        st.caption("処理はバックグラウンドで実行中です。他のタブ・画面に移動しても結果は保持されます。")
+        st.button("🔄 進捗を更新", key=f"refresh_{session_key}")
+        return None
+
+    runner.pop_result(job_id)
+    st.session_state.pop(session_key, None)
+    return job
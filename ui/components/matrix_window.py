@@ -0,0 +1,136 @@
+# app/ui/components/matrix_window.py
+"""
+日付×製品マトリックスのウィンドウ表示
+
+- 画面には選択した週（日付列）・製品群・製品ページの範囲だけを送る（列数・行数を一定に抑える）
+- 累計などの計算は呼び出し側で全期間・全製品について行い、表示する範囲だけを切り出す
+- 範囲をまたいだ編集は (製品コード, 日付列, 行種別) をキーにセッションへ保持し、保存時にまとめて反映する
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import streamlit as st
+
+ALL = 'すべて'
+UNGROUPED = '未設定'
+PAGE_SIZES = (20, 50, 100)
+
+
+class MatrixWindow:
+    """マトリックスの表示範囲（週・製品群・製品ページ）と範囲をまたいだ編集内容"""
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: ウィジェット・セッションのキーの接頭辞（画面内で一意）
+        """
+        self.key = key
+        self.window_id = ''
+
+    def select(self, dates: Sequence[date], product_codes: Sequence[str],
+               product_groups: Optional[Dict[str, str]] = None) -> Tuple[List[date], List[str]]:
+        """
+        表示範囲の選択欄を表示し、表示する日付・製品コードを返す
+
+        Args:
+            dates: 全日付（昇順）
+            product_codes: 全製品コード（表示順）
+            product_groups: 製品コード → 製品群名（製品群で絞り込む場合）
+        """
+        product_groups = product_groups or {}
+        weeks = sorted({d - timedelta(days=d.weekday()) for d in dates})
+        this_week = date.today() - timedelta(days=date.today().weekday())
+        group_names = sorted({product_groups.get(code, UNGROUPED) for code in product_codes})
+
+        col_week, col_group, col_size, col_page = st.columns([2, 2, 1, 1])
+        with col_week:
+            week = st.selectbox(
+                "表示週",
+                options=[None] + weeks,
+                index=1 + weeks.index(this_week) if this_week in weeks else (1 if weeks else 0),
+                format_func=lambda w: ALL if w is None else f"{w.strftime('%Y/%m/%d')}～{(w + timedelta(days=6)).strftime('%m/%d')}",
+                key=f"{self.key}_week"
+            )
+        with col_group:
+            group = st.selectbox(
+                "製品群",
+                options=[ALL] + group_names,
+                key=f"{self.key}_group",
+                disabled=len(group_names) <= 1
+            )
+        with col_size:
+            page_size = st.selectbox("製品数/ページ", options=PAGE_SIZES, key=f"{self.key}_page_size")
+
+        if group != ALL:
+            product_codes = [code for code in product_codes if product_groups.get(code, UNGROUPED) == group]
+        total_pages = max(1, -(-len(product_codes) // page_size))
+        with col_page:
+            # 絞り込みを変えたら1ページ目に戻す
+            page = st.selectbox(
+                "ページ",
+                options=list(range(1, total_pages + 1)),
+                format_func=lambda p: f"{p} / {total_pages}",
+                key=f"{self.key}_page_{group}_{page_size}"
+            )
+
+        visible_dates = [d for d in dates if week is None or week <= d < week + timedelta(days=7)]
+        start = (page - 1) * page_size
+        visible_codes = list(product_codes[start:start + page_size])
+
+        self.window_id = f"{week}_{group}_{page_size}_{page}"
+        st.caption(
+            f"表示中: 製品 {start + 1 if visible_codes else 0}～{start + len(visible_codes)} / {len(product_codes)}件、"
+            f"日付 {len(visible_dates)} / {len(dates)}日"
+        )
+        return visible_dates, visible_codes
+
+    @property
+    def pending(self) -> Dict[Tuple[str, str, str], Any]:
+        """未保存の編集 {(製品コード, 日付列, 行種別): 値}"""
+        return st.session_state.setdefault(f"{self.key}_pending", {})
+
+    def apply_pending(self, frame: pd.DataFrame, value_columns: Iterable[str],
+                      product_column: str = 'product', type_column: str = 'row_type') -> pd.DataFrame:
+        """表示範囲の表に未保存の編集を反映したコピーを返す（他の範囲を表示していた間の編集を復元）"""
+        frame = frame.copy()
+        if not self.pending:
+            return frame
+        positions = {key: index for index, key in enumerate(zip(frame[product_column], frame[type_column]))}
+        value_columns = set(value_columns)
+        for (product_code, column, row_type), value in self.pending.items():
+            index = positions.get((product_code, row_type))
+            if index is not None and column in value_columns:
+                frame.iat[index, frame.columns.get_loc(column)] = value
+        return frame
+
+    def record(self, base: pd.DataFrame, edited: pd.DataFrame, value_columns: Iterable[str],
+               editable_types: Iterable[str], product_column: str = 'product', type_column: str = 'row_type'):
+        """
+        表示範囲の編集を未保存の編集へ反映（元の値に戻したセルは取り除く）
+
+        Args:
+            base: 編集前の値（未保存の編集を反映していない表）
+            edited: data_editor の結果（base と同じ行・列の並び）
+        """
+        pending = self.pending
+        editable_types = set(editable_types)
+        for index, (product_code, row_type) in enumerate(zip(base[product_column], base[type_column])):
+            if row_type not in editable_types:
+                continue
+            for column in value_columns:
+                original = _to_int(base.iat[index, base.columns.get_loc(column)])
+                value = _to_int(edited.iat[index, edited.columns.get_loc(column)])
+                if value == original:
+                    pending.pop((product_code, column, row_type), None)
+                else:
+                    pending[(product_code, column, row_type)] = value
+
+    def clear(self):
+        """未保存の編集を破棄（保存後・取り消し時）"""
+        st.session_state.pop(f"{self.key}_pending", None)
+
+
+def _to_int(value) -> int:
+    return int(value) if pd.notna(value) else 0
@@ -0,0 +1,88 @@
+# app/ui/page_registry.py
+"""
+ページ登録（サイドバーのページ名 → ページクラスの遅延読み込み）
+
+- ページモジュールは表示するときに初めて import する（起動時に全ページ・帳票ライブラリを読み込まない）
+- ページは表示するページだけ作成する（rerun のたびに全ページを作らない）
+- ページが必要とするサービスは名前で指定し、アプリ側の resolver で必要になった時点で作成する
+"""
+
+import importlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    """ページの定義（モジュール・クラス名・コンストラクタに渡すサービス名）"""
+    module: str
+    class_name: str
+    dependencies: Tuple[str, ...] = ()
+
+
+# サイドバーのページ名 → ページ定義
+PAGE_SPECS: Dict[str, PageSpec] = {
+    "ダッシュボード": PageSpec("ui.pages.dashboard_page", "DashboardPage",
+                          ("production_service", "dashboard_service")),
+    "CSV受注取込": PageSpec("ui.pages.csv_import_page", "CSVImportPage", ("db", "auth_service")),
+    "製品管理": PageSpec("ui.pages.product_page", "ProductPage",
+                     ("production_service", "transport_service", "auth_service")),
+    "製品群管理": PageSpec("ui.pages.product_group_page", "ProductGroupPage",
+                      ("production_service", "auth_service")),
+    "制限設定": PageSpec("ui.pages.constraints_page", "ConstraintsPage",
+                     ("production_service", "auth_service")),
+    "生産計画": PageSpec("ui.pages.production_page", "ProductionPage",
+                     ("production_service", "transport_service", "auth_service")),
+    "配送便計画": PageSpec("ui.pages.transport_page", "TransportPage",
+                      ("transport_service", "auth_service")),
+    "納入進度": PageSpec("ui.pages.delivery_progress_page", "DeliveryProgressPage",
+                     ("transport_service", "auth_service")),
+    "📅 会社カレンダー": PageSpec("ui.pages.calendar_page", "CalendarPage", ("db", "auth_service")),
+    "ユーザー管理": PageSpec("ui.pages.user_management_page", "UserManagementPage", ("auth_service",)),
+}
+
+# 顧客専用のページ（(ページ名, 顧客) → ページ定義）
+CUSTOMER_PAGE_SPECS: Dict[Tuple[str, str], PageSpec] = {
+    ("配送便計画", "tiera"): PageSpec("ui.pages.tiera_transport_page", "TieraTransportPage",
+                                   ("transport_service", "auth_service")),
+}
+
+
+@lru_cache(maxsize=None)
+def load_page_class(module: str, class_name: str):
+    """ページクラスを import（モジュールは初回のみ読み込み）"""
+    return getattr(importlib.import_module(module), class_name)
+
+
+def get_page_spec(name: str, customer: Optional[str] = None) -> Optional[PageSpec]:
+    """ページ名（と顧客）に対応するページ定義"""
+    return CUSTOMER_PAGE_SPECS.get((name, customer)) or PAGE_SPECS.get(name)
+
+
+class PageRegistry:
+    """表示するページだけを作成・保持する"""
+
+    def __init__(self, resolve: Callable[[str], Any]):
+        """
+        Args:
+            resolve: サービス名（PageSpec.dependencies の要素）→ サービスを返す関数
+        """
+        self.resolve = resolve
+        self._pages: Dict[Tuple[str, Optional[str]], Any] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in PAGE_SPECS
+
+    def get(self, name: str, customer: Optional[str] = None):
+        """ページを取得（初回のみ import・作成）。未登録のページは None"""
+        spec = get_page_spec(name, customer)
+        if spec is None:
+            return None
+        key = (name, customer)
+        page = self._pages.get(key)
+        if page is None:
+            page_class = load_page_class(spec.module, spec.class_name)
+            page = page_class(*(self.resolve(dependency) for dependency in spec.dependencies))
+            self._pages[key] = page
+        return page
@@ -6,6 +6,35 @@ from services.csv_import_service import CSVImportService
 from services.tiera_csv_import_service import TieraCSVImportService
 from services.tiera_kakutei_csv_import_service import TieraKakuteiCSVImportService
 from services.transport_service import TransportService
+from services.background_job_service import (
+    submit_csv_import_job, submit_progress_recompute_job, JOB_KIND_CSV_IMPORT, JOB_KIND_PROGRESS_RECOMPUTE
+)
+from ui.components.job_status import job_owner, poll_job
+
+# 検査対象の絞り込み条件。生成列 is_inspection_target（migrations/add_hot_table_indexes.py）が
+# 無いDBでは従来の LIKE で判定する
+INSPECTION_FLAG_FILTER = "pid.is_inspection_target = 1"
+INSPECTION_LIKE_FILTER = "(pid.inspection_category LIKE '%F%' OR pid.inspection_category LIKE '%$%')"
+
+# 顧客DBごとの is_inspection_target 列の有無（プロセス内で1回だけ確認）
+_inspection_flag_available = {}
+
+
+def _inspection_filter(session, customer: str) -> str:
+    """検査対象の絞り込み条件（列の有無は information_schema を顧客ごとに1回だけ確認）"""
+    from sqlalchemy import text
+
+    if customer not in _inspection_flag_available:
+        row = session.execute(text("""
+            SELECT COUNT(*)
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+              AND table_name = 'production_instructions_detail'
+              AND column_name = 'is_inspection_target'
+        """)).fetchone()
+        _inspection_flag_available[customer] = bool(row and row[0])
+    return INSPECTION_FLAG_FILTER if _inspection_flag_available[customer] else INSPECTION_LIKE_FILTER
+
 
 class CSVImportPage:
     """CSV受注インポートページ"""
@@ -124,9 +153,7 @@ class CSVImportPage:
                     st.success("再計算が完了しました")
 
             with col_recalc_all:
-                if st.button("全製品を再計算", key=f"{tab_prefix}recalc_all_upload", disabled=not can_edit):
-                    self.service.recompute_planned_progress_all(recal_start_date, recal_end_date)
-                    st.success("全ての製品に対する再計算が完了しました")
+                self._recompute_all_button(f"{tab_prefix}recalc_all_upload", recal_start_date, recal_end_date, can_edit)
         # ファイルアップロード
         uploaded_file = st.file_uploader(
             "CSVファイルを選択",
@@ -215,32 +242,17 @@ class CSVImportPage:
 
                 with col_btn1:
                     if st.button("🔄 インポート実行", type="primary", use_container_width=True, disabled=not can_edit, key=f"{tab_prefix}import_btn"):
-                        with st.spinner("データをインポート中..."):
-                            try:
-                                uploaded_file.seek(0)
-
-                                success, message = self.import_service.import_csv_data(
-                                    uploaded_file,
-                                    create_progress=create_progress
-                                )
-
-                                if success:
-                                    st.success(f"✅ {message}")
-                                    st.balloons()
-
-                                    self._log_import_history(uploaded_file.name, message)
-
-                                    # 検査対象製品を表示
-                                    self._show_inspection_products_after_import(tab_prefix=tab_prefix)
-
-                                    st.info("💡 「配送便計画」ページでデータを確認してください")
-                                else:
-                                    st.error(f"❌ {message}")
-
-                            except Exception as e:
-                                st.error(f"予期しないエラー: {e}")
-                                import traceback
-                                st.code(traceback.format_exc())
+                        try:
+                            # 取込はバックグラウンドで実行（ファイル内容は投入時に読み込んで渡す）
+                            st.session_state[f"{tab_prefix}csv_import_job_id"] = submit_csv_import_job(
+                                self.import_service,
+                                uploaded_file,
+                                owner=job_owner(),
+                                create_progress=create_progress
+                            )
+                            st.session_state[f"{tab_prefix}csv_import_file_name"] = uploaded_file.name
+                        except Exception as e:
+                            st.error(f"予期しないエラー: {e}")
 
                 with col_btn2:
                     if st.button("🗑️ キャンセル", use_container_width=True, key=f"{tab_prefix}cancel_btn"):
@@ -251,6 +263,58 @@ class CSVImportPage:
                 encoding_name = "Shift-JIS" if customer == 'kubota' else "CP932"
                 st.error(f"ファイル読み込みエラー: {e}")
                 st.info(f"ファイルが{encoding_name}形式であることを確認してください")
+
+        self._show_import_job_result(tab_prefix)
+
+    def _show_import_job_result(self, tab_prefix=""):
+        """CSV取込ジョブの進捗と結果を表示"""
+        # ティエラ様は内示・確定の2つのタブで取込むため、タブごとのジョブIDだけを表示（再接続しない）
+        job = poll_job(
+            f"{tab_prefix}csv_import_job_id",
+            JOB_KIND_CSV_IMPORT,
+            "データをインポート中",
+            reconnect=not tab_prefix
+        )
+        if job is None:
+            return
+
+        file_name = st.session_state.pop(f"{tab_prefix}csv_import_file_name", '')
+        if job.error:
+            st.error(f"予期しないエラー: {job.error}")
+            return
+
+        success, message = job.result
+        if success:
+            st.success(f"✅ {message}")
+            st.balloons()
+
+            self._log_import_history(file_name, message)
+
+            # 検査対象製品を表示
+            self._show_inspection_products_after_import(tab_prefix=tab_prefix)
+
+            st.info("💡 「配送便計画」ページでデータを確認してください")
+        else:
+            st.error(f"❌ {message}")
+
+    def _recompute_all_button(self, key: str, recal_start_date: date, recal_end_date: date, can_edit: bool = True):
+        """全製品の計画進度再計算（バックグラウンドで実行し、進捗を表示）"""
+        session_key = f"{key}_job_id"
+        if st.button("全製品を再計算", key=key, disabled=not can_edit):
+            st.session_state[session_key] = submit_progress_recompute_job(
+                self.service,
+                recal_start_date,
+                recal_end_date,
+                target='planned',
+                owner=job_owner()
+            )
+
+        job = poll_job(session_key, JOB_KIND_PROGRESS_RECOMPUTE, "計画進度を再計算中", reconnect=False)
+        if job is not None:
+            if job.error:
+                st.error(f"再計算エラー: {job.error}")
+            else:
+                st.success("全ての製品に対する再計算が完了しました")
                 
             
     def _show_inspection_products_after_import(self, tab_prefix=""):
@@ -271,9 +335,7 @@ class CSVImportPage:
                     st.success("再計算が完了しました")
 
             with col_recalc_all:
-                if st.button("全製品を再計算", key=f"{tab_prefix}recalc_all_inspection"):
-                    self.service.recompute_planned_progress_all(recal_start_date, recal_end_date)
-                    st.success("全ての製品に対する再計算が完了しました")
+                self._recompute_all_button(f"{tab_prefix}recalc_all_inspection", recal_start_date, recal_end_date)
         
         try:
             # 日付範囲を調整（当日～1ヶ月後）
@@ -281,7 +343,9 @@ class CSVImportPage:
             end_date = today + timedelta(days=30)
             
             # production_instructions_detailテーブルから直接検査区分を取得
-            query = text("""
+            customer = st.session_state.get('current_customer', 'kubota')
+            inspection_filter = _inspection_filter(session, customer)
+            query = text(f"""
                 SELECT 
                     pid.instruction_date as 日付,
                     pid.id as 指示ID,
@@ -292,7 +356,7 @@ class CSVImportPage:
                 FROM production_instructions_detail pid
                 LEFT JOIN products p ON pid.product_id = p.id
                 WHERE pid.instruction_date BETWEEN :start_date AND :end_date
-                    AND (pid.inspection_category LIKE '%F%' OR pid.inspection_category LIKE '%$%')
+                    AND {inspection_filter}  -- 検査区分に F / $ を含む
                 ORDER BY pid.instruction_date, pid.inspection_category
             """)
             
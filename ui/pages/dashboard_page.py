@@ -2,46 +2,51 @@
 import streamlit as st
 import pandas as pd
 from ui.components.charts import ChartComponents
+from services.dashboard_service import DashboardService
 
 class DashboardPage:
     """ダッシュボードページ - メインの分析画面"""
     
-    def __init__(self, production_service):
+    def __init__(self, production_service, dashboard_service=None):
         self.service = production_service
+        self.dashboard_service = dashboard_service or DashboardService(production_service.production_repo.db)
         self.charts = ChartComponents()
     
     def show(self):
         """ページ表示"""
         st.title("🏭 生産計画管理ダッシュボード")
+
+        if st.button("🔄 最新の集計に更新"):
+            self.dashboard_service.refresh()
         
         # 基本情報表示
         self._show_basic_metrics()
         
         # 需要トレンドグラフ
         self._show_demand_trend()
+
+        # 工場（顧客）別比較
+        self._show_customer_comparison()
     
     def _show_basic_metrics(self):
         """基本メトリクス表示"""
         try:
-            products = self.service.get_all_products()
-            instructions = self.service.get_production_instructions()
-            constraints = self.service.get_product_constraints()
+            summary = self.dashboard_service.get_summary()
             
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("登録製品数", len(products))
+                st.metric("登録製品数", summary['product_count'])
             
             with col2:
-                st.metric("制約対象製品", len(constraints))
+                st.metric("制約対象製品", summary['constrained_count'])
             
             with col3:
-                total_demand = sum(inst.instruction_quantity for inst in instructions) if instructions else 0
-                st.metric("総需要量", f"{total_demand:,.0f}")
+                st.metric("総需要量", f"{summary['total_demand']:,.0f}")
             
             with col4:
-                if instructions:
-                    date_range = f"{min(inst.instruction_date for inst in instructions).strftime('%m/%d')} - {max(inst.instruction_date for inst in instructions).strftime('%m/%d')}"
+                if summary['min_date'] and summary['max_date']:
+                    date_range = f"{summary['min_date'].strftime('%m/%d')} - {summary['max_date'].strftime('%m/%d')}"
                     st.metric("計画期間", date_range)
                 else:
                     st.metric("計画期間", "データなし")
@@ -54,25 +59,16 @@ class DashboardPage:
         st.subheader("📈 需要トレンド分析")
         
         try:
-            instructions = self.service.get_production_instructions()
-            if instructions:
-                # DataFrameに変換
-                instructions_df = pd.DataFrame([{
-                    'instruction_date': inst.instruction_date,
-                    'instruction_quantity': inst.instruction_quantity,
-                    'product_code': inst.product_code,
-                    'product_name': inst.product_name
-                } for inst in instructions])
-                
-                # トレンドグラフ表示
-                fig = self.charts.create_demand_trend_chart(instructions_df)
+            daily_demand = self.dashboard_service.get_daily_demand()
+            if not daily_demand.empty:
+                # トレンドグラフ表示（日別集計済み）
+                fig = self.charts.create_demand_trend_chart(daily_demand)
                 if fig:
                     st.plotly_chart(fig, use_container_width=True)
                 
                 # 製品別需要
                 st.subheader("製品別需要分析")
-                product_demand = instructions_df.groupby(['product_code', 'product_name'])['instruction_quantity'].sum().reset_index()
-                product_demand = product_demand.sort_values('instruction_quantity', ascending=False)
+                product_demand = self.dashboard_service.get_product_demand()
                 
                 col1, col2 = st.columns([2, 1])
                 
@@ -100,4 +96,38 @@ class DashboardPage:
                 st.warning("生産指示データがありません")
                 
         except Exception as e:
-            st.error(f"グラフ表示エラー: {e}")
\ No newline at end of file
+            st.error(f"グラフ表示エラー: {e}")
+
+    def _show_customer_comparison(self):
+        """工場（顧客）別の今後30日の需要比較"""
+        with st.expander("🏭 工場別比較（今後30日）"):
+            try:
+                comparison = self.dashboard_service.get_customer_comparison(days=30)
+                if comparison is None:
+                    st.info("顧客切替に対応していないため表示できません")
+                    return
+
+                data = comparison['data']
+                if not data.empty:
+                    st.dataframe(
+                        data[['customer', 'product_count', 'total_demand', 'min_date', 'max_date']],
+                        column_config={
+                            "customer": "顧客",
+                            "product_count": st.column_config.NumberColumn("製品数", format="%d"),
+                            "total_demand": st.column_config.NumberColumn("需要数量", format="%d"),
+                            "min_date": "開始日",
+                            "max_date": "終了日",
+                        },
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                else:
+                    st.info("比較対象のデータがありません")
+
+                timings = ", ".join(f"{c}: {t:.2f}秒" for c, t in comparison['timings'].items())
+                st.caption(f"取得時間 - {timings}")
+                for customer, error in comparison['errors'].items():
+                    st.warning(f"⚠️ {customer}: {error}")
+
+            except Exception as e:
+                st.error(f"工場別比較エラー: {e}")
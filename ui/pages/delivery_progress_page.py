@@ -4,8 +4,22 @@ import pandas as pd
 from datetime import date, timedelta, datetime
 from typing import Dict, Optional, Any
 from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from ui.components.fragments import PageDataCache, timed_fragment
+from ui.components.matrix_window import MatrixWindow, UNGROUPED
+from ui.components.job_status import job_owner, poll_job
+from services.background_job_service import submit_progress_recompute_job, JOB_KIND_PROGRESS_RECOMPUTE
+
+# マトリックスの行（状態名, 行種別）。製品ごとにこの順で並べる
+MATRIX_ROWS = (
+    ('受注数', 'order'),
+    ('納入計画数', 'planned'),
+    ('計画進度', 'planned_progress'),
+    ('納入実績', 'shipped'),
+    ('進度', 'progress'),
+    ('___', 'ーーー'),
+)
+MATRIX_EDITABLE_ROWS = ('planned', 'shipped')
+
 
 class DeliveryProgressPage:
     """納入進度管理ページ"""
@@ -13,6 +27,8 @@ class DeliveryProgressPage:
     def __init__(self, transport_service, auth_service=None):
         self.service = transport_service
         self.auth_service = auth_service
+        # タブごとの検索結果（期間などの入力値ごと）。更新したら invalidate する
+        self.data = PageDataCache('delivery_progress')
 
     def _can_edit_page(self) -> bool:
         """ページ編集権限チェック"""
@@ -52,13 +68,14 @@ class DeliveryProgressPage:
         with tab5:
             self._show_internal_orders()
     
+    @timed_fragment("進度一覧")
     def _show_progress_list(self, can_edit):
         """進度一覧表示"""
         st.header("📊 納入進度一覧")
         
         # サマリー表示
         try:
-            summary = self.service.get_progress_summary()
+            summary = self.data.load('summary', self.service.get_progress_summary)
             
             col1, col2, col3, col4, col5 = st.columns(5)
             
@@ -109,12 +126,12 @@ class DeliveryProgressPage:
             ).strip()
         # 進度データ取得
         try:
-            progress_df = self.service.get_delivery_progress(start_date, end_date)
+            progress_df = self.data.load('progress', self.service.get_delivery_progress, start_date, end_date)
 
             with st.expander("計画進度の再計算"):
                 # 製品リストを取得
                 try:
-                    products = self.service.product_repo.get_all_products()
+                    products = self.data.load('products', self.service.product_repo.get_all_products)
                     if not products.empty:
                         product_options = {
                             f"{row['product_code']} - {row['product_name']}": row['id']
@@ -141,21 +158,24 @@ class DeliveryProgressPage:
                 with col_recalc_single:
                     if st.button("選択製品のみ再計算", disabled=not can_edit):
                         if product_id:
+                            self.data.invalidate()
                             self.service.recompute_planned_progress(product_id, recal_start_date, recal_end_date)
                             st.success("再計算が完了しました")
                         else:
                             st.error("製品を選択してください")
 
                 with col_recalc_all:
-                    if st.button("全製品を再計算", disabled=not can_edit):
-                        self.service.recompute_planned_progress_all(recal_start_date, recal_end_date)
-                        st.success("全ての製品に対する再計算が完了しました")
+                    self._recompute_all_job(
+                        'planned', "全製品を再計算", "recalc_all_planned",
+                        recal_start_date, recal_end_date, can_edit,
+                        done_message="全ての製品に対する再計算が完了しました"
+                    )
 
             # ▼ ここから追加：実績進度（shipped_remaining_quantity）の再計算
             with st.expander("実績進度の再計算（shipped_remaining_quantity）"):
                 # 製品リストを取得
                 try:
-                    products = self.service.product_repo.get_all_products()
+                    products = self.data.load('products', self.service.product_repo.get_all_products)
                     if not products.empty:
                         sr_product_options = {
                             f"{row['product_code']} - {row['product_name']}": row['id']
@@ -182,15 +202,18 @@ class DeliveryProgressPage:
                 with col_sr_one:
                     if st.button("選択製品の実績進度を再計算", key="btn_sr_one", disabled=not can_edit):
                         if sr_product_id:
+                            self.data.invalidate()
                             self.service.recompute_shipped_remaining(sr_product_id, sr_start_date, sr_end_date)
                             st.success("実績進度の再計算が完了しました")
                         else:
                             st.error("製品を選択してください")
 
                 with col_sr_all:
-                    if st.button("全製品の実績進度を再計算", key="btn_sr_all", disabled=not can_edit):
-                        self.service.recompute_shipped_remaining_all(sr_start_date, sr_end_date)
-                        st.success("全製品の実績進度の再計算が完了しました")
+                    self._recompute_all_job(
+                        'shipped', "全製品の実績進度を再計算", "btn_sr_all",
+                        sr_start_date, sr_end_date, can_edit,
+                        done_message="全製品の実績進度の再計算が完了しました"
+                    )
                               
             if not progress_df.empty:
                 # ステータスフィルター適用
@@ -309,6 +332,7 @@ class DeliveryProgressPage:
                             if orig_compare == new_db_val:
                                 continue
 
+                            self.data.invalidate()
                             success = self.service.update_delivery_progress(
                                 int(row['id']),
                                 {'manual_planning_quantity': new_db_val}
@@ -410,6 +434,7 @@ class DeliveryProgressPage:
                                             'manual_planning_quantity': int(manual_quantity) if use_manual else None
                                         }
                                         
+                                        self.data.invalidate()
                                         success = self.service.update_delivery_progress(progress_id, update_data)
                                         if success:
                                             st.success("進度を更新しました")
@@ -445,7 +470,7 @@ class DeliveryProgressPage:
                                         
                                         # トラック選択
                                         try:
-                                            trucks_df = self.service.get_trucks()
+                                            trucks_df = self.data.load('trucks', self.service.get_trucks)
                                             
                                             if not trucks_df.empty:
                                                 truck_options = dict(zip(trucks_df['name'], trucks_df['id']))
@@ -537,6 +562,7 @@ class DeliveryProgressPage:
                                                 'notes': shipment_notes
                                             }
                                             
+                                            self.data.invalidate()
                                             success = self.service.create_shipment_record(shipment_data)
                                             if success:
                                                 st.success(f"✅ 出荷実績を登録しました（{shipped_quantity}個）")
@@ -550,6 +576,7 @@ class DeliveryProgressPage:
                             col_del1, col_del2 = st.columns([1, 5])
                             with col_del1:
                                 if st.button(f"🗑️ 削除", key=f"delete_progress_{progress_id}", type="secondary", disabled=not can_edit):
+                                    self.data.invalidate()
                                     success = self.service.delete_delivery_progress(progress_id)
                                     if success:
                                         st.success("進度を削除しました")
@@ -563,103 +590,74 @@ class DeliveryProgressPage:
         except Exception as e:
             st.error(f"進度一覧エラー: {e}")
     
+    def _recompute_all_job(self, target: str, button_label: str, key: str,
+                           start_date: date, end_date: date, can_edit, done_message: str):
+        """全製品の進度再計算（target: planned / shipped）をバックグラウンドで実行し、進捗を表示"""
+        session_key = f"{key}_job_id"
+        if st.button(button_label, key=key, disabled=not can_edit):
+            st.session_state[session_key] = submit_progress_recompute_job(
+                self.service, start_date, end_date, target=target, owner=job_owner()
+            )
+
+        job = poll_job(session_key, JOB_KIND_PROGRESS_RECOMPUTE, f"{button_label}中", reconnect=False)
+        if job is not None:
+            self.data.invalidate()
+            if job.error:
+                st.error(f"再計算エラー: {job.error}")
+            else:
+                st.success(done_message)
+
     def _show_matrix_view(self, progress_df: pd.DataFrame, can_edit):
-        """マトリックス表示（横軸=日付、縦軸=製品コード×状態）- 編集可能"""
-        
-        # 製品名マッピング作成
-        product_names = progress_df.groupby('product_code')['product_name'].first().to_dict()
+        """マトリックス表示（横軸=日付、縦軸=製品コード×状態）- 編集可能（週・製品群・製品ページ単位で表示）"""
         
         # 製品コード一覧を取得
         product_codes = sorted(progress_df['product_code'].unique())
         
-        # 日付一覧を取得（文字列形式）
+        # 日付一覧を取得
         dates = sorted(progress_df['delivery_date'].unique())
-        date_columns = [d.strftime('%m月%d日') for d in dates]
         
         st.write(f"**製品数**: {len(product_codes)}")
         st.write(f"**日付数**: {len(dates)}")
         
         # オーダーIDマッピング（更新用）
         order_mapping = {}  # {(product_code, date_str): order_id}
-        for _, row in progress_df.iterrows():
-            key = (row['product_code'], row['delivery_date'].strftime('%m月%d日'))
-            order_mapping[key] = row['id']
+        for product_code, delivery_date, order_id in zip(progress_df['product_code'], progress_df['delivery_date'], progress_df['id']):
+            order_mapping[(product_code, delivery_date.strftime('%m月%d日'))] = order_id
         
-        # 結果を格納するリスト
-        result_rows = []
+        # 累計（計画進度・進度）は全期間で計算し、表示範囲だけを切り出す
+        values = self._matrix_values(progress_df, product_codes, dates)
         
-        for product_code in product_codes:
-            product_data = progress_df[progress_df['product_code'] == product_code]
-            
-            # 各指標の行を作成
-            order_row = {'製品コード': product_code, '状態': '受注数', 'row_type': 'order'}
-            planned_row = {'製品コード': '', '状態': '納入計画数', 'row_type': 'planned'}
-            planned_progress_row = {'製品コード': '', '状態': '計画進度', 'row_type': 'planned_progress'}
-            shipped_row = {'製品コード': '', '状態': '納入実績', 'row_type': 'shipped'}
-            progress_row = {'製品コード': '', '状態': '進度', 'row_type': 'progress'}
-            keisen_row = {'製品コード': '', '状態': '___', 'row_type': 'ーーー'}
-            
-            cumulative_order = 0
-            cumulative_planned = 0
-            cumulative_shipped = 0
-            
-            for idx, (date_obj, date_str) in enumerate(zip(dates, date_columns)):
-                # その日のデータを取得
-                day_data = product_data[product_data['delivery_date'] == date_obj]
-                
-                if not day_data.empty:
-                    row = day_data.iloc[0]
-                    
-                    order_qty = int(row['order_quantity']) if pd.notna(row['order_quantity']) else 0
-                    
-                    # planned_quantity の安全な取得
-                    if 'planned_quantity' in day_data.columns and pd.notna(row['planned_quantity']):
-                        planned_qty = int(row['planned_quantity'])
-                    else:
-                        planned_qty = 0
-                    
-                    # shipped_quantity の安全な取得
-                    if 'shipped_quantity' in day_data.columns and pd.notna(row['shipped_quantity']):
-                        shipped_qty = int(row['shipped_quantity'])
-                    else:
-                        shipped_qty = 0
-                    
-                    cumulative_order += order_qty
-                    cumulative_planned += planned_qty
-                    cumulative_shipped += shipped_qty
-                    
-                    order_row[date_str] = order_qty
-                    planned_row[date_str] = planned_qty
-                    planned_progress_row[date_str] = cumulative_planned - cumulative_order
-                    shipped_row[date_str] = shipped_qty
-                else:
-                    order_row[date_str] = 0
-                    planned_row[date_str] = 0
-                    planned_progress_row[date_str] = cumulative_planned - cumulative_order
-                    shipped_row[date_str] = 0
-                
-                # 進度 = 累計出荷 - 累計受注
-                progress = cumulative_shipped - cumulative_order
-                progress_row[date_str] = int(progress)
-            
-            result_rows.extend([order_row, planned_row, planned_progress_row, shipped_row, progress_row, keisen_row])
+        st.write("---")
+        st.write("**日付×製品マトリックス（受注・計画・実績・進度）**")
         
-        # DataFrameに変換
-        result_df = pd.DataFrame(result_rows)
+        window = MatrixWindow('matrix')
+        visible_dates, visible_codes = window.select(dates, product_codes, self._product_groups())
+        date_columns = [d.strftime('%m月%d日') for d in visible_dates]
         
-        # カラムの順序を整理
-        columns = ['製品コード', '状態', 'row_type'] + date_columns
-        result_df = result_df[columns]
+        result_rows = []
+        for product_code in visible_codes:
+            for label, row_type in MATRIX_ROWS:
+                row = {
+                    '製品コード': product_code if row_type == 'order' else '',
+                    '状態': label,
+                    'row_type': row_type,
+                    'product': product_code
+                }
+                if row_type in values:
+                    row.update(zip(date_columns, values[row_type].loc[product_code, visible_dates].tolist()))
+                result_rows.append(row)
         
-        st.write("---")
-        st.write("**日付×製品マトリックス（受注・計画・実績・進度）**")
+        # カラムの順序を整理
+        result_df = pd.DataFrame(result_rows, columns=['製品コード', '状態', 'row_type', 'product'] + date_columns)
         
         # 修正: 列を固定表示（製品コードと状態列を固定）
+        # 表示範囲ごとに別の編集欄にし、他の範囲で編集した値は window.pending から復元する
         edited_df = st.data_editor(
-            result_df,
+            window.apply_pending(result_df, date_columns),
             use_container_width=True,
             hide_index=True,
-            disabled=['製品コード', '状態', 'row_type'],  # 編集不可カラム
+            num_rows="fixed",
+            disabled=['製品コード', '状態', 'row_type', 'product'],  # 編集不可カラム
             column_config={
                 "製品コード": st.column_config.TextColumn(
                     "製品コード", 
@@ -672,26 +670,26 @@ class DeliveryProgressPage:
                     pinned=True
                 ),
                 "row_type": None,  # 非表示
+                "product": None,  # 非表示（編集の保持用）
                 **{col: st.column_config.NumberColumn(col, step=1) for col in date_columns}
             },
-            key="matrix_editor"
+            key=f"matrix_editor_{window.window_id}"
         )
+        window.record(result_df, edited_df, date_columns, MATRIX_EDITABLE_ROWS)
         
         # 保存ボタン
         col_save1, col_save2 = st.columns([1, 5])
         
         with col_save1:
             if st.button("💾 変更を保存", type="primary", use_container_width=True, disabled=not can_edit):
-                # 変更を検出して保存
+                # 全範囲の編集をまとめて保存
                 changes_saved = self._save_matrix_changes(
-                    original_df=result_df,
-                    edited_df=edited_df,
+                    changes=dict(window.pending),
                     order_mapping=order_mapping,
-                    product_codes=product_codes,
                     dates=dates,
-                    date_columns=date_columns,
                     progress_df=progress_df
                 )
+                window.clear()
                 
                 if changes_saved:
                     st.success("✅ 変更を保存しました")
@@ -700,6 +698,8 @@ class DeliveryProgressPage:
                     st.info("変更はありませんでした")
         
         with col_save2:
+            if window.pending:
+                st.caption(f"未保存の変更: {len(window.pending)}セル（他の週・ページの変更も含めて保存されます）")
             st.caption("※ 「計画進度」「進度」行は自動計算されます（計画進度=累計計画 - 累計受注、進度=累計出荷 - 累計受注）")
         
         # 説明
@@ -713,104 +713,128 @@ class DeliveryProgressPage:
             - **進度**: 累計出荷 - 累計受注（自動計算、マイナスは未納分）
             
             **編集方法:**
-            1. 「納入計画数」または「納入実績」のセルをダブルクリック
-            2. 数値を入力
-            3. 「💾 変更を保存」ボタンをクリック
+            1. 「表示週」「製品群」「ページ」で表示する範囲を選択
+            2. 「納入計画数」または「納入実績」のセルをダブルクリックして数値を入力
+            3. 「💾 変更を保存」ボタンをクリック（範囲を切り替えても変更は保持されます）
             """)
 
-    def _save_matrix_changes(self, original_df, edited_df, order_mapping, 
-                            product_codes, dates, date_columns, progress_df):
-        """マトリックスの変更をデータベースに保存"""
+    def _matrix_values(self, progress_df: pd.DataFrame, product_codes, dates) -> Dict[str, pd.DataFrame]:
+        """製品×日付の受注数・計画数・実績と累計から求める進度（行種別 → 製品×日付の表）"""
+        # 同じ製品・日付が複数ある場合は先頭の行を使う
+        first_rows = progress_df.drop_duplicates(['product_code', 'delivery_date'])
+        values = {}
+        for row_type, column in (('order', 'order_quantity'), ('planned', 'planned_quantity'), ('shipped', 'shipped_quantity')):
+            if column in first_rows.columns:
+                quantity = pd.to_numeric(first_rows[column], errors='coerce').fillna(0)
+            else:
+                quantity = pd.Series(0, index=first_rows.index)
+            values[row_type] = (
+                first_rows.assign(quantity=quantity)
+                .pivot(index='product_code', columns='delivery_date', values='quantity')
+                .reindex(index=product_codes, columns=dates)
+                .fillna(0)
+                .astype(int)
+            )
         
-        changes_made = False
+        cumulative_order = values['order'].cumsum(axis=1)
+        values['planned_progress'] = values['planned'].cumsum(axis=1) - cumulative_order
+        values['progress'] = values['shipped'].cumsum(axis=1) - cumulative_order
+        return values
+
+    def _product_groups(self) -> Dict[str, str]:
+        """製品コード → 製品群名（マトリックスの製品群フィルター用）"""
+        if not hasattr(self.service, "product_repo"):
+            return {}
+        try:
+            products = self.data.load('products', self.service.product_repo.get_all_products)
+            groups = self.data.load('product_groups', self.service.product_repo.get_all_product_groups)
+        except Exception:
+            return {}
+        if products is None or products.empty or 'product_group_id' not in products.columns:
+            return {}
         
-        for product_code in product_codes:
-            for date_obj, date_str in zip(dates, date_columns):
-                # オーダーIDを取得
-                order_key = (product_code, date_str)
-                if order_key not in order_mapping:
-                    continue
-                
-                order_id = order_mapping[order_key]
-                
-                # 元データを取得
-                original_data = progress_df[
-                    (progress_df['product_code'] == product_code) & 
-                    (progress_df['delivery_date'] == date_obj)
-                ]
-                
-                if original_data.empty:
-                    continue
-                
-                # NaN対応
-                original_planned = int(original_data['planned_quantity'].iloc[0]) if pd.notna(original_data['planned_quantity'].iloc[0]) else 0
-                original_shipped = int(original_data['shipped_quantity'].iloc[0]) if pd.notna(original_data['shipped_quantity'].iloc[0]) else 0
-                
-                # 編集後のデータを取得
-                planned_rows = edited_df[
-                    (edited_df['row_type'] == 'planned') &
-                    ((edited_df['製品コード'] == product_code) | (edited_df['製品コード'] == ''))
-                ]
-                
-                shipped_rows = edited_df[
-                    (edited_df['row_type'] == 'shipped') &
-                    ((edited_df['製品コード'] == product_code) | (edited_df['製品コード'] == ''))
-                ]
+        group_names = {}
+        if groups is not None and not groups.empty:
+            group_names = dict(zip(groups['id'], groups['group_name']))
+        return {
+            code: group_names.get(group_id, UNGROUPED) if pd.notna(group_id) else UNGROUPED
+            for code, group_id in zip(products['product_code'], products['product_group_id'])
+        }
+
+    def _save_matrix_changes(self, changes, order_mapping, dates, progress_df):
+        """
+        マトリックスの変更をデータベースに保存
+        
+        Args:
+            changes: {(product_code, date_str, row_type): 変更後の値}（row_type は planned / shipped）
+        """
+        
+        date_lookup = {d.strftime('%m月%d日'): d for d in dates}
+        first_rows = progress_df.drop_duplicates(['product_code', 'delivery_date']).set_index(['product_code', 'delivery_date'])
+        row_order = {row_type: i for i, (_, row_type) in enumerate(MATRIX_ROWS)}
+        updates = {}
+        shipments = []
+        
+        # 製品・日付・行（計画 → 実績）の順に変更内容を集め、最後にまとめて保存
+        for (product_code, date_str, row_type), new_value in sorted(
+            changes.items(),
+            key=lambda item: (item[0][0], date_lookup.get(item[0][1], date.min), row_order.get(item[0][2], 0))
+        ):
+            # オーダーIDを取得
+            order_id = order_mapping.get((product_code, date_str))
+            date_obj = date_lookup.get(date_str)
+            if order_id is None or date_obj is None or (product_code, date_obj) not in first_rows.index:
+                continue
+            
+            # 元データを取得（NaN対応）
+            original_data = first_rows.loc[(product_code, date_obj)]
+            
+            # 納入計画数の変更チェック
+            if row_type == 'planned':
+                original_planned = int(original_data['planned_quantity']) if pd.notna(original_data['planned_quantity']) else 0
+                new_planned = int(new_value)
                 
-                # 納入計画数の変更チェック
-                if not planned_rows.empty and date_str in planned_rows.columns:
-                    product_planned_rows = planned_rows[
-                        (planned_rows.index > edited_df[edited_df['製品コード'] == product_code].index.min()) &
-                        (planned_rows.index < edited_df[edited_df['製品コード'] == product_code].index.min() + 4)
-                    ]
-                    
-                    if not product_planned_rows.empty:
-                        new_planned = int(product_planned_rows.iloc[0][date_str]) if pd.notna(product_planned_rows.iloc[0][date_str]) else 0
-                        
-                        if new_planned != original_planned:
-                            update_data = {'planned_quantity': new_planned}
-                            success = self.service.update_delivery_progress(order_id, update_data)
-                            if success:
-                                changes_made = True
-                                print(f"✅ 計画数更新: order_id={order_id}, {original_planned} → {new_planned}")
+                if new_planned != original_planned:
+                    updates.setdefault(order_id, {})['planned_quantity'] = new_planned
+                    print(f"✅ 計画数更新: order_id={order_id}, {original_planned} → {new_planned}")
+            
+            # 納入実績の変更チェック
+            elif row_type == 'shipped':
+                original_shipped = int(original_data['shipped_quantity']) if pd.notna(original_data['shipped_quantity']) else 0
+                new_shipped = int(new_value)
                 
-                # 納入実績の変更チェック
-                if not shipped_rows.empty and date_str in shipped_rows.columns:
-                    product_shipped_rows = shipped_rows[
-                        (shipped_rows.index > edited_df[edited_df['製品コード'] == product_code].index.min()) &
-                        (shipped_rows.index < edited_df[edited_df['製品コード'] == product_code].index.min() + 4)
-                    ]
+                # ✅ 修正: 直接 delivery_progress を更新
+                if new_shipped != original_shipped:
+                    # 1. delivery_progress.shipped_quantity を直接更新
+                    updates.setdefault(order_id, {})['shipped_quantity'] = new_shipped
+                    print(f"✅ 実績更新: order_id={order_id}, {original_shipped} → {new_shipped}")
                     
-                    if not product_shipped_rows.empty:
-                        new_shipped = int(product_shipped_rows.iloc[0][date_str]) if pd.notna(product_shipped_rows.iloc[0][date_str]) else 0
-                        
-                        # ✅ 修正: 直接 delivery_progress を更新
-                        if new_shipped != original_shipped:
-                            # 1. delivery_progress.shipped_quantity を直接更新
-                            update_data = {'shipped_quantity': new_shipped}
-                            success = self.service.update_delivery_progress(order_id, update_data)
-                            
-                            if success:
-                                changes_made = True
-                                print(f"✅ 実績更新: order_id={order_id}, {original_shipped} → {new_shipped}")
-                                
-                                # 2. 差分があれば出荷実績レコードも作成（履歴として）
-                                diff = new_shipped - original_shipped
-                                if diff > 0:
-                                    shipment_data = {
-                                        'progress_id': order_id,
-                                        'truck_id': 1,
-                                        'shipment_date': date_obj,
-                                        'shipped_quantity': diff,
-                                        'driver_name': 'マトリックス入力',
-                                        'actual_departure_time': None,
-                                        'actual_arrival_time': None,
-                                        'notes': f'マトリックスから直接入力（累計: {new_shipped}）'
-                                    }
-                                    self.service.create_shipment_record(shipment_data)
+                    # 2. 差分があれば出荷実績レコードも作成（履歴として）
+                    diff = new_shipped - original_shipped
+                    if diff > 0:
+                        shipments.append({
+                            'progress_id': order_id,
+                            'truck_id': 1,
+                            'shipment_date': date_obj,
+                            'shipped_quantity': diff,
+                            'driver_name': 'マトリックス入力',
+                            'actual_departure_time': None,
+                            'actual_arrival_time': None,
+                            'notes': f'マトリックスから直接入力（累計: {new_shipped}）'
+                        })
+        
+        if not updates:
+            return False
         
-        return changes_made
+        # 日別サマリーの再集計は保存1回につき1回
+        self.data.invalidate()
+        results = self.service.update_delivery_progress_batch(
+            updates,
+            shipments=[shipment for shipment in shipments if shipment['progress_id'] in updates]
+        )
+        return any(results.values())
 
+    @timed_fragment("新規登録")
     def _show_progress_registration(self, can_edit):
         """新規登録"""
         st.header("➕ 新規納入進度登録")
@@ -828,7 +852,7 @@ class DeliveryProgressPage:
                 
                 # 製品選択
                 try:
-                    products = self.service.product_repo.get_all_products()
+                    products = self.data.load('products', self.service.product_repo.get_all_products)
                     if not products.empty:
                         product_options = {
                             f"{row['product_code']} - {row['product_name']}": row['id']
@@ -874,6 +898,7 @@ class DeliveryProgressPage:
                         'notes': notes
                     }
                     
+                    self.data.invalidate()
                     progress_id = self.service.create_delivery_progress(progress_data)
                     if progress_id > 0:
                         st.success(f"納入進度を登録しました（ID: {progress_id}）")
@@ -882,6 +907,7 @@ class DeliveryProgressPage:
                     else:
                         st.error("納入進度登録に失敗しました")
     
+    @timed_fragment("実績登録")
     def _show_actual_registration(self, can_edit):
         """実績登録"""
         st.header("✅ 積込実績登録")
@@ -891,7 +917,7 @@ class DeliveryProgressPage:
             return
         
         try:
-            trucks_df = self.service.get_trucks()
+            trucks_df = self.data.load('trucks', self.service.get_trucks)
         except Exception as e:
             st.error(f"トラック情報の取得に失敗しました: {e}")
             return
@@ -967,6 +993,8 @@ class DeliveryProgressPage:
         plan_df['current_shipped'] = None
         plan_df['current_status'] = None
         
+        # 明細ごとの製品ID・納入日を整えてから、納入進度を1クエリでまとめて取得
+        progress_keys: Dict[int, tuple] = {}
         for detail_id, row in plan_df.iterrows():
             product_id = row.get('product_id')
             try:
@@ -988,13 +1016,16 @@ class DeliveryProgressPage:
                     delivery_value = loading_date
             
             plan_df.at[detail_id, 'delivery_date'] = delivery_value
-            
-            try:
-                progress = self.service.get_delivery_progress_by_product_and_date(product_id_int, delivery_value)
-            except Exception as e:
-                st.warning(f"納入進度の取得に失敗しました（製品ID:{product_id_int}）: {e}")
-                progress = None
-            
+            progress_keys[detail_id] = (product_id_int, delivery_value)
+        
+        try:
+            progress_map = self.service.get_delivery_progress_by_products_and_dates(list(progress_keys.values()))
+        except Exception as e:
+            st.warning(f"納入進度の取得に失敗しました: {e}")
+            progress_map = {}
+        
+        for detail_id, progress_key in progress_keys.items():
+            progress = progress_map.get(progress_key)
             progress_cache[detail_id] = progress
             
             if progress:
@@ -1004,7 +1035,7 @@ class DeliveryProgressPage:
             else:
                 plan_df.at[detail_id, 'current_shipped'] = None
                 plan_df.at[detail_id, 'current_status'] = None
-                missing_progress.append(f"{row.get('product_code', '') or '不明'}（{delivery_value}）")
+                missing_progress.append(f"{plan_df.loc[detail_id].get('product_code', '') or '不明'}（{progress_key[1]}）")
         
         product_codes = plan_df.get('product_code', pd.Series('', index=plan_df.index))
         product_names = plan_df.get('product_name', pd.Series('', index=plan_df.index))
@@ -1059,8 +1090,7 @@ class DeliveryProgressPage:
                     st.info("登録対象の明細がありません。")
                     return
                 
-                registered = 0
-                failed_entries: list[str] = []
+                shipments = []
                 missing_entries: list[str] = []
                 
                 for detail_id, row in edited_df.iterrows():
@@ -1076,26 +1106,38 @@ class DeliveryProgressPage:
                     progress = progress_cache.get(detail_id_int)
                     plan_row = plan_df.loc[detail_id_int]
                     
-                    if not progress:
+                    if detail_id_int not in progress_keys:
                         missing_entries.append(f"{plan_row.get('product_code', '') or '不明'}（{plan_row.get('delivery_date')}）")
                         continue
                     
-                    shipment_data = {
-                        'progress_id': progress['id'],
+                    # 納入進度は登録時に製品ID・納入日からまとめて解決する（表示後に作成された進度も対象）
+                    product_id_int, delivery_value = progress_keys[detail_id_int]
+                    shipments.append({
+                        'progress_id': progress['id'] if progress else None,
+                        'product_id': product_id_int,
+                        'delivery_date': delivery_value,
                         'truck_id': selected_truck_id,
                         'shipment_date': loading_date,
                         'shipped_quantity': int(quantity_value),
                         'container_id': plan_row.get('container_id'),
                         'num_containers': plan_row.get('num_containers'),
                         'driver_name': driver_name,
-                        'notes': notes
-                    }
-                    
-                    success = self.service.create_shipment_record(shipment_data)
-                    if success:
-                        registered += 1
-                    else:
-                        failed_entries.append(f"{plan_row.get('product_code', '') or '不明'}（{plan_row.get('delivery_date')}）")
+                        'notes': notes,
+                        'label': f"{plan_row.get('product_code', '') or '不明'}（{plan_row.get('delivery_date')}）"
+                    })
+                
+                registered = 0
+                failed_entries: list[str] = []
+                if shipments:
+                    self.data.invalidate()
+                    result = self.service.register_shipments_bulk(shipments)
+                    registered = result['registered']
+                    missing_entries.extend(shipment['label'] for shipment in result['missing'])
+                    if not result['success']:
+                        failed_entries = [
+                            shipment['label'] for shipment in shipments
+                            if shipment not in result['missing']
+                        ]
                 
                 if registered:
                     st.success(f"{registered} 件の実績を登録しました。")
@@ -1109,6 +1151,7 @@ class DeliveryProgressPage:
                     st.info("他のタブで最新の実績を確認できます。")
                     st.rerun()
     
+    @timed_fragment("出荷実績")
     def _show_shipment_records(self):
         """出荷実績表示"""
         st.header("📦 出荷実績一覧")
@@ -1131,7 +1174,7 @@ class DeliveryProgressPage:
             )
         
         try:
-            shipment_df = self.service.get_shipment_records()
+            shipment_df = self.data.load('shipments', self.service.get_shipment_records)
             
             if not shipment_df.empty:
                 # 日付フィルター適用
@@ -1200,6 +1243,7 @@ class DeliveryProgressPage:
         except Exception as e:
             st.error(f"出荷実績取得エラー: {e}")
 
+    @timed_fragment("社内注文")
     def _show_internal_orders(self):
         """社内注文（製造工程）タブ"""
         st.header("🏭 社内注文")
@@ -1228,7 +1272,12 @@ class DeliveryProgressPage:
             return
 
         try:
-            progress_df = self.service.get_delivery_progress(start_date, end_date)
+            # 日別サマリー（製品×日付の集計済み）を優先し、未作成の場合は明細から集計
+            progress_df = self.data.load('daily_totals', self.service.get_daily_progress_totals, start_date, end_date)
+            if progress_df is not None and not progress_df.empty:
+                progress_df = progress_df.rename(columns={'summary_date': 'delivery_date'})
+            else:
+                progress_df = self.data.load('progress', self.service.get_delivery_progress, start_date, end_date)
         except Exception as e:
             st.error(f"データ取得エラー: {e}")
             return
@@ -1255,8 +1304,12 @@ class DeliveryProgressPage:
         if matrix_df.empty:
             st.info("表示対象データがありません。")
             return
+        # 画面には選択した週・製品群・ページの範囲だけを表示（Excel出力は全期間・全製品）
+        window = MatrixWindow('internal_order_matrix')
+        date_values = [datetime.strptime(col, '%Y/%m/%d').date() for col in matrix_df.columns if col != '製品名']
+        visible_dates, visible_codes = window.select(date_values, matrix_df.index.tolist(), self._product_groups())
         st.dataframe(
-            matrix_df,
+            matrix_df.loc[visible_codes, ['製品名'] + [d.strftime('%Y/%m/%d') for d in visible_dates]],
             use_container_width=True,
             hide_index=False,
             height=600
@@ -1280,7 +1333,7 @@ class DeliveryProgressPage:
         name_map = {}
         if hasattr(self.service, "product_repo"):
             try:
-                master_df = self.service.product_repo.get_all_products()
+                master_df = self.data.load('products', self.service.product_repo.get_all_products)
             except Exception:
                 master_df = pd.DataFrame()
             else:
@@ -1317,38 +1370,36 @@ class DeliveryProgressPage:
         date_columns = [d.strftime('%Y/%m/%d') for d in date_range]
         date_values = [d.date() for d in date_range]
 
-        matrix_data = []
-        for product_code in product_codes:
-            product_data = progress_df[progress_df['product_code'] == product_code]
-            if product_data.empty:
-                continue
+        if not product_codes:
+            return pd.DataFrame()
 
-            product_name = name_map.get(product_code)
-            if not product_name:
-                product_name = product_data['product_name'].iloc[0] if 'product_name' in product_data.columns else ''
-            row = {
-                '製品コード': product_code,
-                '製品名': product_name
-            }
-
-            for date_obj, date_str in zip(date_values, date_columns):
-                day_data = product_data[product_data['delivery_date'] == date_obj]
-                if not day_data.empty:
-                    planned_qty = pd.to_numeric(day_data['planned_quantity'], errors='coerce').fillna(0).sum()
-                    row[date_str] = int(planned_qty) if planned_qty > 0 else 0
-                else:
-                    row[date_str] = 0
+        # 製品×日付の計画数合計（マイナスは0）
+        planned = progress_df.assign(
+            planned_total=pd.to_numeric(progress_df['planned_quantity'], errors='coerce').fillna(0)
+        )
+        totals = (
+            planned.groupby(['product_code', 'delivery_date'])['planned_total'].sum()
+            .unstack(fill_value=0)
+            .reindex(index=product_codes, columns=date_values, fill_value=0)
+            .clip(lower=0)
+            .astype(int)
+        )
+        totals.columns = date_columns
 
-            matrix_data.append(row)
+        first_names = progress_df.groupby('product_code')['product_name'].first() if 'product_name' in progress_df.columns else {}
+        product_names = [name_map.get(code) or first_names.get(code, '') for code in product_codes]
 
-        matrix_df = pd.DataFrame(matrix_data)
-        if not matrix_df.empty:
-            matrix_df = matrix_df.set_index('製品コード')
+        matrix_df = totals
+        matrix_df.insert(0, '製品名', product_names)
+        matrix_df.index.name = '製品コード'
 
         return matrix_df
 
     def _export_internal_orders_to_excel(self, matrix_df: pd.DataFrame, start_date: date, end_date: date):
         """マトリクスデータをExcelに出力"""
+        import openpyxl  # Excel出力時に読み込む
+        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+
         output = BytesIO()
 
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
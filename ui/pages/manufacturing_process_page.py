@@ -4,8 +4,6 @@ import pandas as pd
 from datetime import date, timedelta
 from typing import Dict, Any
 from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 class ManufacturingProcessPage:
     """製造工程画面 - 積載計画数を基に加工対象を表示"""
@@ -145,6 +143,8 @@ class ManufacturingProcessPage:
 
     def _export_to_excel(self, matrix_df: pd.DataFrame, start_date: date, end_date: date) -> BytesIO:
         """マトリックスデータをExcelに出力"""
+        import openpyxl  # Excel出力時に読み込む
+        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
         output = BytesIO()
 
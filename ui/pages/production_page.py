@@ -7,6 +7,13 @@ from ui.components.charts import ChartComponents
 class ProductionPage:
     """生産計画ページ（シミュレーション + CRUD管理）"""
 
+    # 計算方式の表示名 → 平準化モード（None は従来の日別計算）
+    LEVELING_OPTIONS = {
+        "日別上限（従来）": None,
+        "期間平準化（貪欲法）": "greedy",
+        "期間平準化（最適化）": "lp",
+    }
+
     def __init__(self, production_service, transport_service=None, auth_service=None):
         self.service = production_service
         self.transport_service = transport_service
@@ -63,33 +70,87 @@ class ProductionPage:
             st.write(""); st.write("")
             calculate_clicked = st.button("🔧 計画計算", type="primary", use_container_width=True, disabled=not can_edit)
 
+        col4, col5 = st.columns([2, 2])
+        with col4:
+            leveling_label = st.radio(
+                "計算方式",
+                options=list(self.LEVELING_OPTIONS.keys()),
+                horizontal=True,
+                help="期間平準化：日産能力・ライン能力を超える需要を前の営業日へ前倒しします"
+            )
+        with col5:
+            line_capacity = st.number_input(
+                "ライン日産能力（0=制限なし）",
+                min_value=0, value=0, step=100,
+                disabled=self.LEVELING_OPTIONS[leveling_label] is None,
+                help="全製品合計で1日に生産できる上限数量"
+            )
+
         if calculate_clicked:
-            self._calculate_and_show_plan(start_date, end_date)
+            self._calculate_and_show_plan(
+                start_date, end_date,
+                leveling=self.LEVELING_OPTIONS[leveling_label],
+                line_capacity=line_capacity or None
+            )
 
-    def _calculate_and_show_plan(self, start_date, end_date):
+    def _calculate_and_show_plan(self, start_date, end_date, leveling=None, line_capacity=None):
         with st.spinner("生産計画を計算中..."):
             try:
-                plans = self.service.calculate_production_plan(start_date, end_date)
-                if plans:
-                    # DataFrame 化
-                    plan_df = pd.DataFrame([{
-                        'date': plan.date,
-                        'product_id': plan.product_id,
-                        'product_code': plan.product_code,
-                        'product_name': plan.product_name,
-                        'demand_quantity': plan.demand_quantity,
-                        'planned_quantity': plan.planned_quantity,
-                        'inspection_category': plan.inspection_category,
-                        'is_constrained': plan.is_constrained
-                    } for plan in plans])
+                if leveling:
+                    result = self.service.calculate_leveled_production_plan(
+                        start_date, end_date, line_capacity=line_capacity, mode=leveling
+                    )
+                    plan_df = result['plan']
+                else:
+                    result = None
+                    plan_df = self.service.calculate_production_plan_df(start_date, end_date)
 
+                if not plan_df.empty:
                     self._display_production_plan(plan_df)
+                    if result is not None:
+                        self._display_leveling_backlog(result)
                 else:
                     st.warning("指定期間内に生産計画データがありません")
 
             except Exception as e:
                 st.error(f"計画計算エラー: {e}")
 
+    def _display_leveling_backlog(self, result: dict):
+        """平準化による前倒し（繰越残）と期間内不足の表示"""
+        st.subheader("📦 前倒し・繰越残")
+        daily_summary = result['daily_summary']
+        shortage_df = result['shortage']
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("最大繰越残", f"{daily_summary['carried_backlog'].max():,.0f}")
+        with col2:
+            st.metric("期間内に吸収できない数量", f"{shortage_df['shortage_quantity'].sum():,.0f}")
+
+        st.dataframe(
+            daily_summary,
+            column_config={
+                "date": "日付",
+                "demand_quantity": st.column_config.NumberColumn("需要量", format="%d"),
+                "planned_quantity": st.column_config.NumberColumn("計画生産量", format="%d"),
+                "carried_backlog": st.column_config.NumberColumn("繰越残", format="%d"),
+                "line_utilization": st.column_config.NumberColumn("ライン稼働率", format="%.1f%%"),
+            },
+            use_container_width=True,
+        )
+
+        if not shortage_df.empty:
+            st.warning(f"⚠️ {len(shortage_df)}製品で期間初日より前の生産が必要です")
+            st.dataframe(
+                shortage_df,
+                column_config={
+                    "product_code": "製品コード",
+                    "product_name": "製品名",
+                    "shortage_quantity": st.column_config.NumberColumn("不足数量", format="%d"),
+                },
+                use_container_width=True,
+            )
+
     def _display_production_plan(self, plan_df: pd.DataFrame):
         # サマリー
         st.subheader("📈 計画サマリー")
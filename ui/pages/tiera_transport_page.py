@@ -14,11 +14,6 @@ from ui.pages.transport_page import TransportPage
 from typing import Dict
 import io
 from datetime import datetime
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import mm
 from collections import defaultdict
 
 
@@ -113,6 +108,13 @@ class TieraTransportPage(TransportPage):
         縦軸：製品コード（朝便/夕便で分類）
         """
         try:
+            # reportlab は PDF 出力時に読み込む
+            from reportlab.lib.pagesizes import A4, landscape
+            from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+            from reportlab.lib.styles import getSampleStyleSheet
+            from reportlab.lib.units import mm
+            from services.pdf_export_service import register_japanese_font
+
             # PDFバッファを作成
             buffer = io.BytesIO()
 
@@ -123,25 +125,9 @@ class TieraTransportPage(TransportPage):
             elements = []
             styles = getSampleStyleSheet()
 
-            # ✅ 日本語フォントの設定
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            from reportlab.lib.fonts import addMapping
-
-            # 日本語フォントの登録
-            try:
-                pdfmetrics.registerFont(TTFont('Japanese', 'C:/Windows/Fonts/msgothic.ttc'))
-                pdfmetrics.registerFont(TTFont('Japanese-Bold', 'C:/Windows/Fonts/msgothic.ttc'))
-            except:
-                try:
-                    pdfmetrics.registerFont(TTFont('Japanese', '/System/Library/Fonts/Arial Unicode.ttf'))
-                    pdfmetrics.registerFont(TTFont('Japanese-Bold', '/System/Library/Fonts/Arial Unicode.ttf'))
-                except:
-                    st.warning("日本語フォントが見つかりません")
-
-            # フォントマッピング
-            addMapping('Japanese', 0, 0, 'Japanese')
-            addMapping('Japanese', 1, 0, 'Japanese-Bold')
+            # ✅ 日本語フォントの設定（登録はプロセスにつき1回のみ）
+            if not register_japanese_font():
+                st.warning("日本語フォントが見つかりません")
 
             # タイトルスタイル
             japanese_title_style = styles['Heading1'].clone('JapaneseTitleStyle')
@@ -253,7 +239,7 @@ class TieraTransportPage(TransportPage):
     def _get_trucks_info(self):
         """トラック情報を取得"""
         try:
-            trucks_df = self.service.get_trucks()
+            trucks_df = self.data.load('trucks', self.service.get_trucks)
             trucks_info = {}
             for _, row in trucks_df.iterrows():
                 truck_id = row['id']
@@ -367,6 +353,9 @@ class TieraTransportPage(TransportPage):
 
     def _create_production_table_style(self, num_dates, num_rows, row_info):
         """生産課形式のテーブルスタイルを作成"""
+        from reportlab.lib import colors
+        from reportlab.platypus import TableStyle
+
         style = TableStyle([
             # 基本設定
             ('FONTNAME', (0, 0), (-1, -1), 'Japanese'),
@@ -418,6 +407,9 @@ class TieraTransportPage(TransportPage):
 
     def _create_production_table_style_with_weekends(self, dates, num_rows, row_info):
         """生産課形式のテーブルスタイルを作成（土日祝日の色分け含む）"""
+        from reportlab.lib import colors
+        from reportlab.platypus import TableStyle
+
         style = TableStyle([
             # 基本設定
             ('FONTNAME', (0, 0), (-1, -1), 'Japanese'),
@@ -2,18 +2,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
 from ui.components.forms import FormComponents
 from ui.components.tables import TableComponents
 from services.transport_service import TransportService
+from services.background_job_service import submit_loading_plan_job, JOB_KIND_LOADING_PLAN
+from services.plan_store import get_plan_store
+from ui.components.fragments import PageDataCache, timed_fragment
+from ui.components.job_status import job_owner, poll_job
 import io
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
-import os
+import zipfile
 
 class TransportPage:
     """配送便計画ページ - トラック積載計画の作成画面"""
@@ -22,6 +20,8 @@ class TransportPage:
         self.service = transport_service
         self.auth_service = auth_service
         self.tables = TableComponents()
+        # タブごとの検索結果（期間などの入力値ごと）。更新したら invalidate する
+        self.data = PageDataCache('transport')
 
     def _can_edit_page(self) -> bool:
         """ページ編集権限チェック"""
@@ -32,6 +32,34 @@ class TransportPage:
             return False
         return self.auth_service.can_edit_page(user['id'], "配送便計画")
 
+    def _plan_handle(self):
+        """作成済み計画のハンドル（ストアから破棄済みの場合は None）"""
+        handle = st.session_state.get('loading_plan_handle')
+        if handle and not get_plan_store().contains(handle):
+            self._forget_plan()
+            return None
+        return handle
+
+    def _forget_plan(self):
+        """ストアから破棄された計画のハンドルをセッションから外し、再作成を案内"""
+        st.session_state.pop('loading_plan_handle', None)
+        st.info("作成した計画は一定時間使われなかったため破棄されました。再度作成してください")
+
+    def _load_plan(self, handle):
+        """ストアから計画全体を取得（他の計画に押し出されて破棄済みの場合は None）"""
+        plan = get_plan_store().get(handle)
+        if plan is None:
+            self._forget_plan()
+        return plan
+
+    def _store_plan(self, plan: Dict):
+        """作成・修正した計画をストアに保存し、セッションにはハンドルだけを持つ"""
+        st.session_state['loading_plan_handle'] = get_plan_store().put(
+            plan,
+            owner=job_owner(),
+            handle=st.session_state.get('loading_plan_handle')
+        )
+
     def _can_edit_tab(self, tab_name: str) -> bool:
         """タブ編集権限チェック"""
         if not self.auth_service:
@@ -69,6 +97,7 @@ class TransportPage:
         with tab6:
             self._show_truck_container_rules()
     
+    @timed_fragment("トラック×容器ルール")
     def _show_truck_container_rules(self):
         """トラック×容器ルール管理（このページ内のタブ）"""
         st.header("🧱 トラック×容器ルール")
@@ -79,11 +108,11 @@ class TransportPage:
             st.warning("⚠️ この画面の編集権限がありません。閲覧のみ可能です。")
 
         try:
-            trucks_df = self.service.get_trucks()
+            trucks_df = self.data.load('trucks', self.service.get_trucks)
             if trucks_df is None or getattr(trucks_df, 'empty', False):
                 trucks_df = pd.DataFrame()
-            containers = self.service.get_containers() or []
-            rules = self.service.get_truck_container_rules() or []
+            containers = self.data.load('containers', self.service.get_containers) or []
+            rules = self.data.load('truck_container_rules', self.service.get_truck_container_rules) or []
 
             truck_id_to_name = {}
             truck_name_to_id = {}
@@ -128,6 +157,7 @@ class TransportPage:
                                 'max_quantity': int(max_quantity),
                                 'priority': int(priority)
                             }
+                            self.data.invalidate()
                             self.service.save_truck_container_rule(data)
                             st.success("ルールを保存しました")
                             st.rerun()
@@ -184,6 +214,7 @@ class TransportPage:
                                 if before['優先度'] != after['優先度']:
                                     update_data['priority'] = int(after['優先度'] or 0)
                                 if update_data:
+                                    self.data.invalidate()
                                     ok = self.service.update_truck_container_rule(rid, update_data)
                                     if ok:
                                         changes += 1
@@ -205,6 +236,7 @@ class TransportPage:
                 if st.button("削除", type="secondary", disabled=(not can_edit or target_id == "選択"), key="tcr_delete_btn"):
                     try:
                         rid = int(target_id)
+                        self.data.invalidate()
                         ok = self.service.delete_truck_container_rule(rid)
                         if ok:
                             st.success("削除しました")
@@ -215,6 +247,7 @@ class TransportPage:
                         st.error(f"削除エラー: {e}")
         except Exception as e:
             st.error(f"ルール管理画面エラー: {e}")
+    @timed_fragment("検査対象製品")
     def _show_inspection_products(self):
         """検査対象製品（F/$）の注文詳細表示"""
         st.header("🔬 検査対象製品一覧")
@@ -237,42 +270,10 @@ class TransportPage:
                 key="inspection_end_date"
             )
         
-        # データ取得
-        from sqlalchemy import text
-        
-        session = self.service.db.get_session()
-        
         try:
-            query = text("""
-                SELECT 
-                    dp.delivery_date as 日付,
-                    dp.order_id as オーダーID,
-                    p.product_code as 製品コード,
-                    p.product_name as 製品名,
-                    dp.order_quantity as 受注数,
-                    dp.planned_quantity as 計画数,
-                    dp.shipped_quantity as 出荷済,
-                    p.inspection_category as 検査区分,
-                    dp.customer_name as 得意先,
-                    dp.status as ステータス
-                FROM delivery_progress dp
-                LEFT JOIN products p ON dp.product_id = p.id
-                WHERE dp.delivery_date BETWEEN :start_date AND :end_date
-                    AND (p.inspection_category LIKE 'F%' OR p.inspection_category LIKE '%$%')
-                    AND dp.status != 'キャンセル'
-                ORDER BY dp.delivery_date, p.product_code
-            """)
+            df = self.data.load('inspection_orders', self._load_inspection_orders, start_date, end_date)
             
-            result = session.execute(query, {
-                'start_date': start_date.strftime('%Y-%m-%d'),
-                'end_date': end_date.strftime('%Y-%m-%d')
-            })
-            
-            rows = result.fetchall()
-            
-            if rows:
-                df = pd.DataFrame(rows, columns=result.keys())
-                df['日付'] = pd.to_datetime(df['日付']).dt.date
+            if not df.empty:
                 
                 # サマリー
                 st.subheader("📊 サマリー")
@@ -337,9 +338,45 @@ class TransportPage:
         
         except Exception as e:
             st.error(f"データ取得エラー: {e}")
+
+    def _load_inspection_orders(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """検査対象製品（F/$）の注文詳細を取得"""
+        from sqlalchemy import text
+
+        session = self.service.db.get_session()
+        try:
+            query = text("""
+                SELECT 
+                    dp.delivery_date as 日付,
+                    dp.order_id as オーダーID,
+                    p.product_code as 製品コード,
+                    p.product_name as 製品名,
+                    dp.order_quantity as 受注数,
+                    dp.planned_quantity as 計画数,
+                    dp.shipped_quantity as 出荷済,
+                    p.inspection_category as 検査区分,
+                    dp.customer_name as 得意先,
+                    dp.status as ステータス
+                FROM delivery_progress dp
+                LEFT JOIN products p ON dp.product_id = p.id
+                WHERE dp.delivery_date BETWEEN :start_date AND :end_date
+                    AND (p.inspection_category LIKE 'F%' OR p.inspection_category LIKE '%$%')
+                    AND dp.status != 'キャンセル'
+                ORDER BY dp.delivery_date, p.product_code
+            """)
+
+            result = session.execute(query, {
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d')
+            })
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+            if not df.empty:
+                df['日付'] = pd.to_datetime(df['日付']).dt.date
+            return df
         finally:
             session.close()
 
+    @timed_fragment("積載計画作成")
     def _show_loading_planning(self):
         """積載計画作成"""
         st.header("📦 積載計画自動作成")
@@ -358,7 +395,7 @@ class TransportPage:
         
         # 納期データから推奨期間を取得
         try:
-            orders_df = self.service.get_delivery_progress()
+            orders_df = self.data.load('progress_all', self.service.get_delivery_progress)
             if not orders_df.empty and 'delivery_date' in orders_df.columns:
                 min_delivery = pd.to_datetime(orders_df['delivery_date']).min().date()
                 max_delivery = pd.to_datetime(orders_df['delivery_date']).max().date()
@@ -390,91 +427,47 @@ class TransportPage:
         
         # 計画日数の表示
         st.info(f"📅 計画期間: **{days}日間** ({start_date.strftime('%Y年%m月%d日')} ～ {end_date.strftime('%Y年%m月%d日')})")
+
+        use_snapshot = self._show_snapshot_options(start_date, end_date, can_edit)
    
         st.markdown("---")
 
         if st.button("🔄 積載計画を作成", type="primary", use_container_width=True, disabled=not can_edit):
-            with st.spinner("積載計画を計算中..."):
-                try:
-                    result = self.service.calculate_loading_plan_from_orders(
-                        start_date=start_date,
-                        days=days
-                    )
-                    
-                    st.session_state['loading_plan'] = result
-                    
-                    summary = result['summary']
-                    
-                    st.success("✅ 積載計画を作成しました")
-                    
-                    col_a, col_b, col_c, col_d = st.columns(4)
-                    with col_a:
-                        st.metric("計画日数", f"{summary['total_days']}日")
-                    with col_b:
-                        st.metric("総便数", f"{summary['total_trips']}便")
-                    with col_c:
-                        st.metric("警告数", summary['total_warnings'])
-                    with col_d:
-                        status_color = "🟢" if summary['status'] == '正常' else "🟡"
-                        st.metric("ステータス", f"{status_color} {summary['status']}")
-                    
-                    unplanned_orders = result.get('unplanned_orders') or []
-                    if unplanned_orders:
-                        st.warning(f"⚠️ 受注されたが積載されていない製品が {len(unplanned_orders)} 件あります")
-                        unplanned_df = pd.DataFrame(unplanned_orders)
-
-                        # 不要な列を削除し、日本語列名に変更
-                        columns_to_drop = ['order_id', 'customer_name', 'product_id']
-                        unplanned_df = unplanned_df.drop(columns=[col for col in columns_to_drop if col in unplanned_df.columns], errors='ignore')
-
-                        # 列名を日本語に変更
-                        column_mapping = {
-                            'product_code': '製品コード',
-                            'product_name': '製品名',
-                            'order_quantity': '受注数量',
-                            'delivery_date': '納期',
-                            'planned_quantity': '計画数量',
-                            'shipped_quantity': '出荷済数量',
-                            'status': 'ステータス'
-                        }
-                        unplanned_df = unplanned_df.rename(columns=column_mapping)
+            try:
+                st.session_state['loading_plan_job_id'] = submit_loading_plan_job(
+                    self.service,
+                    start_date=start_date,
+                    days=days,
+                    owner=job_owner(),
+                    use_snapshot=use_snapshot
+                )
+            except Exception as e:
+                st.error(f"積載計画作成エラー: {e}")
 
-                        st.dataframe(
-                            unplanned_df,
-                            use_container_width=True,
-                            hide_index=True
-                        )
-                    
-                    if result['unloaded_tasks']:
-                        st.error(f"⚠️ 積載できなかった製品: {len(result['unloaded_tasks'])}件")
-                        
-                        unloaded_df = pd.DataFrame([{
-                            '製品コード': task['product_code'],
-                            '製品名': task['product_name'],
-                            '容器数': task['num_containers'],
-                            '納期': task['delivery_date'].strftime('%Y-%m-%d')
-                        } for task in result['unloaded_tasks']])
-                        
-                        st.dataframe(unloaded_df, use_container_width=True, hide_index=True)
-                        
-                        st.warning("""
-                        **対処方法:**
-                        - トラックの追加を検討してください
-                        - 製品の前倒し可能フラグを確認してください
-                        - 容器・トラックの容量を確認してください
-                        """)
-                    
-                    st.info("詳細は「📊 計画確認」タブでご確認ください")
-                    
-                except Exception as e:
-                    st.error(f"積載計画作成エラー: {e}")
-                    
-        if 'loading_plan' in st.session_state:
-            result = st.session_state['loading_plan']
-            summary = result.get('summary', {})
+        job = poll_job('loading_plan_job_id', JOB_KIND_LOADING_PLAN, "積載計画を計算中")
+        if job is not None:
+            if job.error:
+                st.error(f"積載計画作成エラー: {job.error}")
+            else:
+                # 計画確認タブ（別の部分）にも反映するため画面全体を再実行し、結果は再実行後に表示
+                self._store_plan(job.result)
+                st.session_state['loading_plan_created'] = True
+                st.rerun()
+
+        handle = self._plan_handle()
+        # 確認してから読むまでの間に他の計画に押し出される場合があるため、メタ情報は1回だけ読んで判定する
+        meta = get_plan_store().get_meta(handle) if handle else None
+        if handle and meta is None:
+            self._forget_plan()
+        if meta is not None:
+            if st.session_state.pop('loading_plan_created', False):
+                plan = self._load_plan(handle)
+                if plan is not None:
+                    self._show_plan_creation_result(plan)
+            summary = meta.get('summary', {})
 
             # 期間から開始日と終了日を取得
-            period = result.get('period', '')
+            period = meta.get('period', '')
             period_suffix = ""
             if period and ' ~ ' in period:
                 try:
@@ -500,9 +493,13 @@ class TransportPage:
                 
                 if st.button("💾 DBに保存", type="primary", disabled=not can_edit):
                     try:
-                        plan_id = self.service.save_loading_plan(result, plan_name)
-                        st.success(f"✅ 計画を保存しました (ID: {plan_id})")
-                        st.session_state['saved_plan_id'] = plan_id
+                        plan = self._load_plan(handle)
+                        if plan is not None:
+                            self.data.invalidate()
+                            plan_id = self.service.save_loading_plan(plan, plan_name)
+                            st.success(f"✅ 計画を保存しました (ID: {plan_id})")
+                            st.session_state['saved_plan_id'] = plan_id
+                            st.session_state.pop('saved_plans_pages', None)
                     except Exception as e:
                         st.error(f"保存エラー: {e}")
             
@@ -518,17 +515,19 @@ class TransportPage:
                 if st.button("📥 Excelダウンロード", type="secondary"):
 
                     try:
-                        format_key = 'daily' if export_format == '日別' else 'weekly'
-                        excel_data = self.service.export_loading_plan_to_excel(result, format_key)
+                        plan = self._load_plan(handle)
+                        if plan is not None:
+                            format_key = 'daily' if export_format == '日別' else 'weekly'
+                            excel_data = self.service.export_loading_plan_to_excel(plan, format_key)
 
-                        filename = f"積載計画確認用_{export_format}_{period_suffix}{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-                        
-                        st.download_button(
-                            label="⬇️ ダウンロード",
-                            data=excel_data,
-                            file_name=filename,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
+                            filename = f"積載計画確認用_{export_format}_{period_suffix}{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+                            
+                            st.download_button(
+                                label="⬇️ ダウンロード",
+                                data=excel_data,
+                                file_name=filename,
+                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                            )
                     except Exception as e:
                         st.error(f"Excel出力エラー: {e}")
                 st.write("**確認用、保存は左のボタン**")
@@ -538,16 +537,18 @@ class TransportPage:
                 
                 if st.button("📄 CSVダウンロード", type="secondary"):
                     try:
-                        csv_data = self.service.export_loading_plan_to_csv(result)
+                        plan = self._load_plan(handle)
+                        if plan is not None:
+                            csv_data = self.service.export_loading_plan_to_csv(plan)
 
-                        filename = f"積載計画確認用_{period_suffix}{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-                        
-                        st.download_button(
-                            label="⬇️ ダウンロード",
-                            data=csv_data,
-                            file_name=filename,
-                            mime="text/csv"
-                        )
+                            filename = f"積載計画確認用_{period_suffix}{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+                            
+                            st.download_button(
+                                label="⬇️ ダウンロード",
+                                data=csv_data,
+                                file_name=filename,
+                                mime="text/csv"
+                            )
 
                     except Exception as e:
                         st.error(f"CSV出力エラー: {e}")
@@ -564,16 +565,19 @@ class TransportPage:
             )
 
             if uploaded_excel is not None:
+                plan = None
                 if st.button("Excelの修正を適用", type="primary", key="apply_excel_updates"):
+                    plan = self._load_plan(handle)
+                if plan is not None:
                     with st.spinner("Excelの変更を反映中..."):
-                        apply_result = self.service.apply_excel_adjustments(result, uploaded_excel)
+                        self.data.invalidate()
+                        apply_result = self.service.apply_excel_adjustments(plan, uploaded_excel)
                     errors = apply_result.get('errors') or []
                     for err in errors:
                         st.error(err)
                     changes = apply_result.get('changes') or []
                     if changes:
-                        st.session_state['loading_plan'] = apply_result.get('plan', result)
-                        st.success(f"Excelから{len(changes)}件の変更を反映しました。")
+                        self._store_plan(apply_result.get('plan', plan))
                         change_rows = []
                         for change in changes:
                             for field, diff in change['changes'].items():
@@ -587,15 +591,117 @@ class TransportPage:
                                     '変更前': diff.get('before'),
                                     '変更後': diff.get('after')
                                 })
-                        if change_rows:
-                            st.dataframe(pd.DataFrame(change_rows), use_container_width=True, hide_index=True)
-                        result = st.session_state['loading_plan']
-                        summary = result.get('summary', {})
-                        if summary.get('manual_adjusted'):
-                            st.info(f"Excelで手動調整 {summary.get('manual_adjustment_count', 0)} 件を反映済みです。")
+                        # 計画確認タブにも反映するため画面全体を再実行し、変更内容は再実行後に表示
+                        st.session_state['loading_plan_excel_changes'] = (len(changes), change_rows)
+                        st.rerun()
                     elif not errors:
                         st.warning("Excelから変更が見つかりませんでした。")
 
+            applied = st.session_state.pop('loading_plan_excel_changes', None)
+            if applied:
+                change_count, change_rows = applied
+                st.success(f"Excelから{change_count}件の変更を反映しました。")
+                if change_rows:
+                    st.dataframe(pd.DataFrame(change_rows), use_container_width=True, hide_index=True)
+
+    def _show_snapshot_options(self, start_date: date, end_date: date, can_edit: bool) -> bool:
+        """ローカルスナップショットの利用設定・作成（スナップショットで計画する場合 True）"""
+        with st.expander("💾 ローカルスナップショット"):
+            st.caption("マスタと計画期間の受注をローカルに保存し、DBが遅い・停止中でも計画を作成できます。"
+                       "計画前にDBと内容を照合し、変更があれば自動で作り直します。")
+
+            info = self.service.get_planning_snapshot_info()
+            if info:
+                st.info(f"📁 {info['start_date']} ～ {info['end_date']}（{info['created_at']} 作成）"
+                        f" 受注 {info['row_counts'].get('delivery_progress', 0)}件")
+            else:
+                st.info("スナップショットはまだ作成されていません")
+
+            use_snapshot = st.checkbox("スナップショットで計画する", key="loading_plan_use_snapshot")
+
+            if st.button("📸 計画期間のスナップショットを作成", disabled=not can_edit):
+                with st.spinner("スナップショットを作成中..."):
+                    created = self.service.create_planning_snapshot(start_date, end_date)
+                if created:
+                    st.success(f"✅ スナップショットを作成しました（{created['start_date']} ～ {created['end_date']}）")
+                else:
+                    st.error("スナップショットの作成に失敗しました")
+
+        return use_snapshot
+
+    def _show_plan_creation_result(self, result: Dict):
+        """積載計画作成結果のサマリーを表示"""
+        summary = result['summary']
+        
+        st.success("✅ 積載計画を作成しました")
+
+        snapshot = result.get('snapshot')
+        if snapshot:
+            if snapshot.get('verified'):
+                st.caption(f"💾 スナップショット（{snapshot['created_at']} 作成）で計画しました")
+            else:
+                st.warning(f"⚠️ DBに接続できないため、DBと照合していないスナップショット"
+                           f"（{snapshot['created_at']} 作成）で計画しました")
+        
+        col_a, col_b, col_c, col_d = st.columns(4)
+        with col_a:
+            st.metric("計画日数", f"{summary['total_days']}日")
+        with col_b:
+            st.metric("総便数", f"{summary['total_trips']}便")
+        with col_c:
+            st.metric("警告数", summary['total_warnings'])
+        with col_d:
+            status_color = "🟢" if summary['status'] == '正常' else "🟡"
+            st.metric("ステータス", f"{status_color} {summary['status']}")
+        
+        unplanned_orders = result.get('unplanned_orders') or []
+        if unplanned_orders:
+            st.warning(f"⚠️ 受注されたが積載されていない製品が {len(unplanned_orders)} 件あります")
+            unplanned_df = pd.DataFrame(unplanned_orders)
+
+            # 不要な列を削除し、日本語列名に変更
+            columns_to_drop = ['order_id', 'customer_name', 'product_id']
+            unplanned_df = unplanned_df.drop(columns=[col for col in columns_to_drop if col in unplanned_df.columns], errors='ignore')
+
+            # 列名を日本語に変更
+            column_mapping = {
+                'product_code': '製品コード',
+                'product_name': '製品名',
+                'order_quantity': '受注数量',
+                'delivery_date': '納期',
+                'planned_quantity': '計画数量',
+                'shipped_quantity': '出荷済数量',
+                'status': 'ステータス'
+            }
+            unplanned_df = unplanned_df.rename(columns=column_mapping)
+
+            st.dataframe(
+                unplanned_df,
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        if result['unloaded_tasks']:
+            st.error(f"⚠️ 積載できなかった製品: {len(result['unloaded_tasks'])}件")
+            
+            unloaded_df = pd.DataFrame([{
+                '製品コード': task['product_code'],
+                '製品名': task['product_name'],
+                '容器数': task['num_containers'],
+                '納期': task['delivery_date'].strftime('%Y-%m-%d')
+            } for task in result['unloaded_tasks']])
+            
+            st.dataframe(unloaded_df, use_container_width=True, hide_index=True)
+            
+            st.warning("""
+            **対処方法:**
+            - トラックの追加を検討してください
+            - 製品の前倒し可能フラグを確認してください
+            - 容器・トラックの容量を確認してください
+            """)
+        
+        st.info("詳細は「📊 計画確認」タブでご確認ください")
+
     def _show_plan_view(self):
         """計画確認"""
         st.header("📊 積載計画確認")
@@ -608,17 +714,26 @@ class TransportPage:
         with view_tab2:
             self._show_saved_plans()
     
+    @timed_fragment("現在の計画")
     def _show_current_plan(self):
         """現在の計画表示"""
         
-        if 'loading_plan' not in st.session_state:
+        handle = self._plan_handle()
+        if not handle:
             st.info("まず「積載計画作成」タブで計画を作成してください")
             return
         
-        result = st.session_state['loading_plan']
-        daily_plans = result['daily_plans']
+        # 表示する部分だけ展開（日別計画は参照した日だけ展開される）
+        store = get_plan_store()
+        meta = store.get_meta(handle)
+        daily_plans = store.get_daily_plans(handle)
+        if meta is None or daily_plans is None:
+            self._forget_plan()
+            return
         
-        unplanned_orders = result.get('unplanned_orders') or []
+        unplanned_orders = []
+        if meta.get('unplanned_count'):
+            unplanned_orders = store.get_section(handle, 'unplanned_orders') or []
         if unplanned_orders:
             st.warning(f"⚠️ 受注されたが積載されていない製品が {len(unplanned_orders)} 件あります")
             unplanned_df = pd.DataFrame(unplanned_orders)
@@ -659,15 +774,44 @@ class TransportPage:
         else:
             self._show_list_view(daily_plans)
      
+    @timed_fragment("保存済み計画")
     def _show_saved_plans(self):
         """保存済み計画表示"""
         
         try:
-            saved_plans = self.service.get_all_loading_plans()
+            col_from, col_to, col_size = st.columns([2, 2, 1])
+            with col_from:
+                filter_start = st.date_input(
+                    "計画期間（開始）",
+                    value=None,
+                    help="未指定の場合は期間で絞り込みません",
+                    key="saved_plans_filter_start"
+                )
+            with col_to:
+                filter_end = st.date_input(
+                    "計画期間（終了）",
+                    value=None,
+                    help="未指定の場合は期間で絞り込みません",
+                    key="saved_plans_filter_end"
+                )
+            with col_size:
+                page_size = st.selectbox("表示件数", options=[20, 50, 100], key="saved_plans_page_size")
+
+            saved_plans, next_cursor = self._load_saved_plan_pages(filter_start, filter_end, page_size)
             
             if not saved_plans:
-                st.info("保存済みの計画がありません")
+                if filter_start or filter_end:
+                    st.info("指定した期間の保存済み計画がありません")
+                else:
+                    st.info("保存済みの計画がありません")
                 return
+
+            if next_cursor is not None:
+                if st.button(f"⬇️ さらに{page_size}件読み込む（{len(saved_plans)}件表示中）", key="saved_plans_load_more"):
+                    st.session_state['saved_plans_pages']['pending_cursor'] = next_cursor
+                    st.rerun()
+            else:
+                st.caption(f"全{len(saved_plans)}件を表示中")
             
             # 計画選択UI
             plan_options = {
@@ -679,6 +823,33 @@ class TransportPage:
                 "表示する計画を選択",
                 options=list(plan_options.keys())
             )
+
+            with st.expander("📦 保存済み計画のPDF一括出力"):
+                batch_keys = st.multiselect(
+                    "出力する計画",
+                    options=list(plan_options.keys()),
+                    default=[],
+                    key="pdf_batch_plans"
+                )
+                if st.button("📄 PDF一括作成", key="pdf_batch_export", disabled=not batch_keys):
+                    with st.spinner(f"{len(batch_keys)}件の計画をPDF出力中..."):
+                        pdf_map = self.service.export_saved_plans_to_pdf(
+                            [plan_options[key] for key in batch_keys]
+                        )
+                    plan_names = {plan['id']: plan['plan_name'] for plan in saved_plans}
+                    zip_buffer = io.BytesIO()
+                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                        for plan_id, pdf_bytes in pdf_map.items():
+                            zf.writestr(f"{plan_id}_{plan_names.get(plan_id, '無題')}.pdf", pdf_bytes)
+                    zip_buffer.seek(0)
+                    st.success(f"✅ {len(pdf_map)}件のPDFを作成しました")
+                    st.download_button(
+                        label="⬇️ ZIPダウンロード",
+                        data=zip_buffer,
+                        file_name=f"積載計画PDF_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                        mime="application/zip",
+                        key="pdf_batch_download"
+                    )
             
             if selected_plan_key:
                 selected_plan_id = plan_options[selected_plan_key]
@@ -697,6 +868,37 @@ class TransportPage:
             import traceback
             st.code(traceback.format_exc())
           
+    def _load_saved_plan_pages(self, start_date: Optional[date], end_date: Optional[date], page_size: int):
+        """
+        保存済み計画リストをページ単位で遅延読み込み
+
+        読み込み済みのページはセッションに保持し、「さらに読み込む」で次ページのみ取得する。
+        絞り込み条件が変わった場合は先頭ページから読み直す。
+
+        Returns:
+            (plans, next_cursor): 読み込み済みの計画リストと次ページのカーソル（最終ページは None）
+        """
+        filter_key = (start_date, end_date, page_size)
+        state = st.session_state.get('saved_plans_pages')
+        if not state or state.get('filter_key') != filter_key:
+            state = {'filter_key': filter_key, 'plans': [], 'next_cursor': None,
+                     'pending_cursor': None, 'loaded': False}
+            st.session_state['saved_plans_pages'] = state
+
+        if not state['loaded'] or state['pending_cursor'] is not None:
+            page = self.service.get_loading_plans_page(
+                limit=page_size,
+                before_id=state['pending_cursor'],
+                start_date=start_date,
+                end_date=end_date
+            )
+            state['plans'].extend(page['plans'])
+            state['next_cursor'] = page['next_cursor']
+            state['pending_cursor'] = None
+            state['loaded'] = True
+
+        return state['plans'], state['next_cursor']
+
     def _display_saved_plan(self, plan_data: Dict):
         """保存済み計画を表形式で表示・編集"""
         try:
@@ -791,6 +993,7 @@ class TransportPage:
             with col_delete2:
                 if st.button("🗑️ 削除", type="secondary", use_container_width=True, disabled=not can_edit, key=f"delete_{plan_data.get('id')}"):
                     if self._confirm_and_delete_plan(plan_data.get('id'), plan_data.get('plan_name', '無題')):
+                        st.session_state.pop('saved_plans_pages', None)
                         st.success("✅ 計画を削除しました")
                         st.rerun()
             
@@ -838,48 +1041,11 @@ class TransportPage:
                 )
             
             # 全データを1つのDataFrameに変換
-            all_plan_data = []
-            # ✅ row_id_mapを定義
-            row_id_map = {}  # {row_index: (date_str, truck_idx, item_idx)}
-            
-            for date_str in sorted(daily_plans.keys()):
-                day_plan = daily_plans[date_str]
-                st.write(f"📅 日付: {date_str}, トラック数: {len(day_plan.get('trucks', []))}")
-                
-                for truck_idx, truck in enumerate(day_plan.get('trucks', [])):
-                    truck_name = truck.get('truck_name', '不明')
-                    utilization = truck.get('utilization', {})
-                    
-                    for item_idx, item in enumerate(truck.get('loaded_items', [])):
-                        # 納期のフォーマット処理
-                        delivery_date = item.get('delivery_date')
-                        delivery_date_str = ''
-                        if delivery_date:
-                            if hasattr(delivery_date, 'strftime'):
-                                delivery_date_str = delivery_date.strftime('%Y-%m-%d')
-                            elif hasattr(delivery_date, 'date'):
-                                delivery_date_str = delivery_date.date().strftime('%Y-%m-%d')
-                            else:
-                                delivery_date_str = str(delivery_date)
-                        
-                        # ✅ row_id_mapにインデックスを追加
-                        row_index = len(all_plan_data)
-                        row_id_map[row_index] = (date_str, truck_idx, item_idx)
-                        
-                        all_plan_data.append({
-                            '積載日': date_str,
-                            'トラック': truck_name,
-                            '製品コード': item.get('product_code', ''),
-                            '製品名': item.get('product_name', ''),
-                            '容器数': item.get('num_containers', 0),
-                            '合計数量': item.get('total_quantity', 0),
-                            '納期': delivery_date_str,
-                            '体積率(%)': utilization.get('volume_rate', 0)
-                        })
+            # ✅ row_id_map: {row_index: (date_str, truck_idx, item_idx)}
+            plan_df, row_id_map = self._build_saved_plan_frame(plan_data)
+            all_plan_data = not plan_df.empty
             
             if all_plan_data:
-                plan_df = pd.DataFrame(all_plan_data)
-                
                 st.success(f"✅ 計画データを読み込みました: {len(plan_df)} 行")
                 
                 # 編集可能なデータエディタ
@@ -908,11 +1074,11 @@ class TransportPage:
             if not edited_df.equals(plan_df):
                 # 必要な情報を取得
                 try:
-                    products_df = self.service.product_repo.get_all_products()
+                    products_df = self.data.load('products', self.service.product_repo.get_all_products)
                     capacity_map = dict(zip(products_df['product_code'], products_df['capacity']))
-                    containers = self.service.get_containers()
+                    containers = self.data.load('containers', self.service.get_containers)
                     container_map = {container.id: container for container in containers}
-                    trucks_df = self.service.get_trucks()
+                    trucks_df = self.data.load('trucks', self.service.get_trucks)
                     truck_map = {truck['id']: truck for _, truck in trucks_df.iterrows()}
                 except Exception as e:
                     st.warning(f"情報取得エラー: {e}")
@@ -1011,6 +1177,7 @@ class TransportPage:
                     if save_mode == "🔀 バージョン保存":
                         # バージョン作成（実装済みの場合）
                         try:
+                            self.data.invalidate()
                             version_id = self.service.create_plan_version(
                                 plan_data['id'], 
                                 version_name,
@@ -1060,311 +1227,75 @@ class TransportPage:
             import traceback
             st.code(traceback.format_exc())
 
+    def _build_saved_plan_frame(self, plan_data: Dict):
+        """
+        保存済み計画の編集用テーブルを作成
+
+        Returns:
+            (plan_df, row_id_map): 表示用DataFrame と 行番号 -> (日付, トラック番号, 明細番号)
+        """
+        details = plan_data.get('details') or []
+        if details and 'truck_index' in details[0]:
+            # 明細は daily_plans と同じ順序（積載日→トラック→明細）で並んでいるため列単位で変換
+            detail_df = pd.DataFrame(details)
+            date_strs = pd.to_datetime(detail_df['loading_date']).dt.strftime('%Y-%m-%d')
+            delivery = pd.to_datetime(detail_df['delivery_date'], errors='coerce')
+            plan_df = pd.DataFrame({
+                '積載日': date_strs,
+                'トラック': detail_df['truck_name'].fillna('不明'),
+                '製品コード': detail_df['product_code'].fillna(''),
+                '製品名': detail_df['product_name'].fillna(''),
+                '容器数': detail_df['num_containers'],
+                '合計数量': detail_df['total_quantity'],
+                '納期': delivery.dt.strftime('%Y-%m-%d').fillna(''),
+                '体積率(%)': detail_df['volume_rate']
+            })
+            row_id_map = dict(enumerate(zip(date_strs, detail_df['truck_index'], detail_df['item_index'])))
+            return plan_df, row_id_map
+
+        # 明細情報が無い計画（計算直後の計画など）は daily_plans から作成
+        rows = []
+        row_id_map = {}
+        daily_plans = plan_data.get('daily_plans', {})
+        for date_str in sorted(daily_plans.keys()):
+            for truck_idx, truck in enumerate(daily_plans[date_str].get('trucks', [])):
+                utilization = truck.get('utilization', {})
+                for item_idx, item in enumerate(truck.get('loaded_items', [])):
+                    delivery_date = item.get('delivery_date')
+                    row_id_map[len(rows)] = (date_str, truck_idx, item_idx)
+                    rows.append({
+                        '積載日': date_str,
+                        'トラック': truck.get('truck_name', '不明'),
+                        '製品コード': item.get('product_code', ''),
+                        '製品名': item.get('product_name', ''),
+                        '容器数': item.get('num_containers', 0),
+                        '合計数量': item.get('total_quantity', 0),
+                        '納期': delivery_date.strftime('%Y-%m-%d') if hasattr(delivery_date, 'strftime') else str(delivery_date or ''),
+                        '体積率(%)': utilization.get('volume_rate', 0)
+                    })
+        return pd.DataFrame(rows), row_id_map
+
     def _export_plan_to_pdf(self, plan_data: Dict):
         """積載計画をPDFとしてエクスポート（日本語対応）"""
         try:
-            # PDFバッファを作成
-            buffer = io.BytesIO()
-            
-            # 横向きA4でドキュメント作成
-            doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # ✅ 日本語フォントの設定
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            from reportlab.lib.fonts import addMapping
-            
-            # 日本語フォントの登録（システムにインストールされているフォントを使用）
-            try:
-                # Windowsの日本語フォント
-                pdfmetrics.registerFont(TTFont('Japanese', 'C:/Windows/Fonts/msgothic.ttc'))
-                pdfmetrics.registerFont(TTFont('Japanese-Bold', 'C:/Windows/Fonts/msgothic.ttc'))
-            except:
-                try:
-                    # macOSの日本語フォント
-                    pdfmetrics.registerFont(TTFont('Japanese', '/System/Library/Fonts/Arial Unicode.ttf'))
-                    pdfmetrics.registerFont(TTFont('Japanese-Bold', '/System/Library/Fonts/Arial Unicode.ttf'))
-                except:
-                    try:
-                        # Linuxの日本語フォント
-                        pdfmetrics.registerFont(TTFont('Japanese', '/usr/share/fonts/truetype/takao-gothic/TakaoPGothic.ttf'))
-                        pdfmetrics.registerFont(TTFont('Japanese-Bold', '/usr/share/fonts/truetype/takao-gothic/TakaoPGothic.ttf'))
-                    except:
-                        st.warning("日本語フォントが見つかりません。デフォルトフォントを使用します。")
-            
-            # フォントマッピングの設定
-            addMapping('Japanese', 0, 0, 'Japanese')
-            addMapping('Japanese', 1, 0, 'Japanese-Bold')
-            
-            # ✅ 日本語対応スタイルの作成
-            japanese_style = styles['Normal'].clone('JapaneseStyle')
-            japanese_style.fontName = 'Japanese'
-            japanese_style.fontSize = 10
-            japanese_style.leading = 12
-            
-            japanese_title_style = styles['Heading1'].clone('JapaneseTitleStyle')
-            japanese_title_style.fontName = 'Japanese-Bold'
-            japanese_title_style.fontSize = 16
-            japanese_title_style.leading = 20
-            japanese_title_style.alignment = 1  # 中央揃え
-            
-            japanese_heading_style = styles['Heading2'].clone('JapaneseHeadingStyle')
-            japanese_heading_style.fontName = 'Japanese-Bold'
-            japanese_heading_style.fontSize = 12
-            japanese_heading_style.leading = 16
-            
-            # タイトル
-            title = Paragraph(f"積載計画: {plan_data.get('plan_name', '無題')}", japanese_title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 12))
-            
-            # 計画情報
-            summary = plan_data.get('summary', {})
-            info_data = [
-                ['計画期間', plan_data.get('period', '')],
-                ['計画日数', f"{summary.get('total_days', 0)}日"],
-                ['総便数', f"{summary.get('total_trips', 0)}便"],
-                ['ステータス', summary.get('status', '不明')],
-                ['作成日', datetime.now().strftime('%Y-%m-%d %H:%M')]
-            ]
-            
-            # ✅ 日本語フォントを使用したテーブルスタイル
-            info_table = Table(info_data, colWidths=[80*mm, 80*mm])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Japanese'),  # ✅ 日本語フォント指定
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(info_table)
-            elements.append(Spacer(1, 12))
-            
-            # 積載計画データ
-            daily_plans = plan_data.get('daily_plans', {})
-            
-            if daily_plans:
-                # 全データを収集
-                all_plan_data = []
-                header = ['積載日', 'トラック', '製品コード', '製品名', '容器数', '合計数量', '納期']
-                all_plan_data.append(header)
-                
-                for date_str in sorted(daily_plans.keys()):
-                    day_plan = daily_plans[date_str]
-                    
-                    for truck in day_plan.get('trucks', []):
-                        truck_name = truck.get('truck_name', '不明')
-                        
-                        for item in truck.get('loaded_items', []):
-                            # 納期のフォーマット処理
-                            delivery_date = item.get('delivery_date')
-                            delivery_date_str = ''
-                            if delivery_date:
-                                if hasattr(delivery_date, 'strftime'):
-                                    delivery_date_str = delivery_date.strftime('%Y-%m-%d')
-                                elif hasattr(delivery_date, 'date'):
-                                    delivery_date_str = delivery_date.date().strftime('%Y-%m-%d')
-                                else:
-                                    delivery_date_str = str(delivery_date)
-                            
-                            row = [
-                                date_str,
-                                truck_name,
-                                item.get('product_code', ''),
-                                item.get('product_name', ''),
-                                str(item.get('num_containers', 0)),
-                                str(item.get('total_quantity', 0)),
-                                delivery_date_str
-                            ]
-                            all_plan_data.append(row)
-                
-                # テーブル作成
-                if len(all_plan_data) > 1:  # ヘッダー以外にデータがある場合
-                    # テーブル幅の計算（横向きA4に合わせて調整）
-                    col_widths = [25*mm, 25*mm, 25*mm, 40*mm, 15*mm, 20*mm, 25*mm]
-                    
-                    plan_table = Table(all_plan_data, colWidths=col_widths, repeatRows=1)
-                    plan_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, -1), 'Japanese'),  # ✅ 日本語フォント指定
-                        ('FONTSIZE', (0, 0), (-1, 0), 8),
-                        ('FONTSIZE', (0, 1), (-1, -1), 7),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('WORDWRAP', (0, 0), (-1, -1), True)  # 文字列の折り返し
-                    ]))
-                    elements.append(plan_table)
-                else:
-                    elements.append(Paragraph("積載計画データがありません", japanese_style))
-            else:
-                elements.append(Paragraph("積載計画データがありません", japanese_style))
-            
-            # 警告情報
-            warnings_data = []
-            for date_str, day_plan in daily_plans.items():
-                for warning in day_plan.get('warnings', []):
-                    warnings_data.append([date_str, warning])
-            
-            if warnings_data:
-                elements.append(Spacer(1, 12))
-                elements.append(Paragraph("警告一覧", japanese_heading_style))
-                warnings_header = ['日付', '警告内容']
-                warnings_table_data = [warnings_header] + warnings_data
-                
-                warnings_table = Table(warnings_table_data, colWidths=[30*mm, 150*mm])
-                warnings_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.orange),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Japanese'),  # ✅ 日本語フォント指定
-                    ('FONTSIZE', (0, 0), (-1, -1), 7),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                elements.append(warnings_table)
-            
-            # PDF生成
-            doc.build(elements)
-            buffer.seek(0)
-            
-            return buffer
-            
+            from services.pdf_export_service import PdfExportService  # reportlab は出力時に読み込む
+            pdf_service = PdfExportService()
+            if not pdf_service.has_japanese_font:
+                st.warning("日本語フォントが見つかりません。デフォルトフォントを使用します。")
+            return pdf_service.render_loading_plan(plan_data)
+
         except Exception as e:
             st.error(f"PDF生成エラー: {str(e)}")
             import traceback
             st.code(traceback.format_exc())
             return None
+
     def _export_plan_to_excel(self, plan_data: Dict):
         """積載計画をExcelとしてエクスポート"""
         try:
-            from io import BytesIO
-            import pandas as pd
-            
-            # メモリバッファを作成
-            output = BytesIO()
-            
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                # サマリーシート
-                summary = plan_data.get('summary', {})
-                summary_data = [
-                    ['計画名', plan_data.get('plan_name', '無題')],
-                    ['計画期間', plan_data.get('period', '')],
-                    ['計画日数', f"{summary.get('total_days', 0)}日"],
-                    ['総便数', f"{summary.get('total_trips', 0)}便"],
-                    ['ステータス', summary.get('status', '不明')],
-                    ['出力日時', datetime.now().strftime('%Y-%m-%d %H:%M')]
-                ]
-                summary_df = pd.DataFrame(summary_data, columns=['項目', '値'])
-                summary_df.to_excel(writer, sheet_name='計画サマリー', index=False)
-                
-                # 積載計画詳細シート
-                daily_plans = plan_data.get('daily_plans', {})
-                if daily_plans:
-                    plan_data_list = []
-                    prev_date = None
-                    
-                    for date_str in sorted(daily_plans.keys()):
-                        day_plan = daily_plans[date_str]
-                        
-                        # 日付が変わったら空白行を挿入
-                        if prev_date is not None and prev_date != date_str:
-                            plan_data_list.append({
-                                '積載日': '',
-                                'トラック名': '',
-                                '製品コード': '',
-                                '製品名': '',
-                                '容器数': '',
-                                '合計数量': '',
-                                '納期': '',
-                                '体積積載率(%)': '',
-                                '前倒し配送': ''
-                            })
-                        
-                        prev_date = date_str
-                        
-                        for truck in day_plan.get('trucks', []):
-                            truck_name = truck.get('truck_name', '不明')
-                            utilization = truck.get('utilization', {})
-                            
-                            for item in truck.get('loaded_items', []):
-                                # 納期のフォーマット処理
-                                delivery_date = item.get('delivery_date')
-                                delivery_date_str = ''
-                                if delivery_date:
-                                    if hasattr(delivery_date, 'strftime'):
-                                        delivery_date_str = delivery_date.strftime('%Y-%m-%d')
-                                    elif hasattr(delivery_date, 'date'):
-                                        delivery_date_str = delivery_date.date().strftime('%Y-%m-%d')
-                                    else:
-                                        delivery_date_str = str(delivery_date)
-                                
-                                plan_data_list.append({
-                                    '積載日': date_str,
-                                    'トラック名': truck_name,
-                                    '製品コード': item.get('product_code', ''),
-                                    '製品名': item.get('product_name', ''),
-                                    '容器数': item.get('num_containers', 0),
-                                    '合計数量': item.get('total_quantity', 0),
-                                    '納期': delivery_date_str,
-                                    '体積積載率(%)': utilization.get('volume_rate', 0),
-                                    '前倒し配送': '○' if item.get('is_advanced', False) else '×'
-                                })
-                    
-                    if plan_data_list:
-                        plan_df = pd.DataFrame(plan_data_list)
-                        plan_df.to_excel(writer, sheet_name='積載計画詳細', index=False)
-                
-                # 警告シート
-                warnings_data = []
-                for date_str, day_plan in daily_plans.items():
-                    for warning in day_plan.get('warnings', []):
-                        warnings_data.append({
-                            '日付': date_str,
-                            '警告内容': warning
-                        })
-                
-                if warnings_data:
-                    warnings_df = pd.DataFrame(warnings_data)
-                    warnings_df.to_excel(writer, sheet_name='警告一覧', index=False)
-                
-                # 積載不可アイテムシート
-                unloaded_tasks = plan_data.get('unloaded_tasks', [])
-                if unloaded_tasks:
-                    unloaded_data = []
-                    for task in unloaded_tasks:
-                        delivery_date = task.get('delivery_date')
-                        delivery_date_str = ''
-                        if delivery_date:
-                            if hasattr(delivery_date, 'strftime'):
-                                delivery_date_str = delivery_date.strftime('%Y-%m-%d')
-                            elif hasattr(delivery_date, 'date'):
-                                delivery_date_str = delivery_date.date().strftime('%Y-%m-%d')
-                            else:
-                                delivery_date_str = str(delivery_date)
-                        
-                        unloaded_data.append({
-                            '製品コード': task.get('product_code', ''),
-                            '製品名': task.get('product_name', ''),
-                            '容器数': task.get('num_containers', 0),
-                            '合計数量': task.get('total_quantity', 0),
-                            '納期': delivery_date_str,
-                            '理由': task.get('reason', '積載容量不足')
-                        })
-                    
-                    unloaded_df = pd.DataFrame(unloaded_data)
-                    unloaded_df.to_excel(writer, sheet_name='積載不可アイテム', index=False)
-            
-            output.seek(0)
-            return output
-            
+            from services.excel_export_service import ExcelExportService  # openpyxl は出力時に読み込む
+            return ExcelExportService().export_saved_plan(plan_data)
+
         except Exception as e:
             st.error(f"Excelエクスポートエラー: {str(e)}")
             import traceback
@@ -1466,6 +1397,7 @@ class TransportPage:
             st.dataframe(df, width='stretch')
             st.info("表示するデータがありません")
 
+    @timed_fragment("容器管理")
     def _show_container_management(self):
         """容器管理表示"""
         st.header("🧰 容器管理")
@@ -1482,6 +1414,7 @@ class TransportPage:
                 container_data = FormComponents.container_form()
 
             if can_edit and container_data:
+                self.data.invalidate()
                 success = self.service.create_container(container_data)
                 if success:
                     st.success(f"容器 '{container_data['name']}' を登録しました")
@@ -1490,7 +1423,7 @@ class TransportPage:
                     st.error("容器登録に失敗しました")
 
             st.subheader("登録済み容器一覧")
-            containers = self.service.get_containers()
+            containers = self.data.load('containers', self.service.get_containers)
 
             if containers:
                 for container in containers:
@@ -1539,6 +1472,7 @@ class TransportPage:
                                     "stackable": int(new_stackable),
                                     "max_stack": new_max_stack
                                 }
+                                self.data.invalidate()
                                 success = self.service.update_container(container.id, update_data)
                                 if success:
                                     st.success(f"✅ 容器 '{container.name}' を更新しました")
@@ -1547,6 +1481,7 @@ class TransportPage:
                                     st.error("❌ 容器更新に失敗しました")
 
                         if st.button("🗑️ 削除", key=f"delete_container_{container.id}", disabled=not can_edit):
+                            self.data.invalidate()
                             success = self.service.delete_container(container.id)
                             if success:
                                 st.success(f"容器 '{container.name}' を削除しました")
@@ -1571,6 +1506,7 @@ class TransportPage:
         except Exception as e:
             st.error(f"容器管理エラー: {e}")
 
+    @timed_fragment("トラック管理")
     def _show_truck_management(self):
         """トラック管理表示"""
         st.header("🚛 トラック管理")
@@ -1587,6 +1523,7 @@ class TransportPage:
                 truck_data = FormComponents.truck_form()
 
             if can_edit and truck_data:
+                self.data.invalidate()
                 success = self.service.create_truck(truck_data)
                 if success:
                     st.success(f"トラック '{truck_data['name']}' を登録しました")
@@ -1595,7 +1532,7 @@ class TransportPage:
                     st.error("トラック登録に失敗しました")
 
             st.subheader("登録済みトラック一覧")
-            trucks_df = self.service.get_trucks()
+            trucks_df = self.data.load('trucks', self.service.get_trucks)
 
             if not trucks_df.empty:
                 for _, truck in trucks_df.iterrows():
@@ -1657,6 +1594,7 @@ class TransportPage:
                                     "priority_product_codes": new_priority.strip() if new_priority else None
 
                                 }
+                                self.data.invalidate()
                                 success = self.service.update_truck(truck['id'], update_data)
                                 if success:
                                     st.success(f"✅ トラック '{truck['name']}' を更新しました")
@@ -1665,6 +1603,7 @@ class TransportPage:
                                     st.error("❌ トラック更新に失敗しました")
 
                         if st.button("🗑️ 削除", key=f"delete_truck_{truck['id']}", disabled=not can_edit):
+                            self.data.invalidate()
                             success = self.service.delete_truck(truck['id'])
                             if success:
                                 st.success(f"トラック '{truck['name']}' を削除しました")
@@ -1686,7 +1625,7 @@ class TransportPage:
             
             # 必要な情報を取得
             try:
-                products_df = self.service.product_repo.get_all_products()
+                products_df = self.data.load('products', self.service.product_repo.get_all_products)
                 capacity_map = dict(zip(products_df['product_code'], products_df['capacity']))
             except:
                 capacity_map = {}
@@ -1730,6 +1669,7 @@ class TransportPage:
             
             if changes_detected and updates:
                 # サービスを通じて更新
+                self.data.invalidate()
                 success = self.service.update_loading_plan(plan_data['id'], updates)
                 
                 if success:
@@ -1752,6 +1692,12 @@ class TransportPage:
         """明細IDを検索"""
         try:
             details = plan_data.get('details', [])
+
+            # 読み込み時に付与したトラック番号・明細番号で直接照合
+            for detail in details:
+                if (detail.get('truck_index') == truck_idx and detail.get('item_index') == item_idx and
+                        str(detail.get('loading_date')) == date_str):
+                    return detail['id']
             
             for detail in details:
                 if (str(detail.get('loading_date')) == date_str and 
@@ -1786,6 +1732,7 @@ class TransportPage:
         """計画削除の確認と実行"""
         try:
             # 削除実行
+            self.data.invalidate()
             success = self.service.delete_loading_plan(plan_id)
             
             if success: